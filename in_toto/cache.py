@@ -0,0 +1,592 @@
+"""
+<Program Name>
+  cache.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Provides a size-bounded, persistent key-value store, used to cache results
+  of expensive operations across in-toto invocations, and helpers to create
+  the cache keys for successful signature verifications. Cache keys for
+  verified steps are created in `in_toto.verifylib`.
+
+  Product files of cached inspections are kept in a size-bounded,
+  content-addressed store (see `ContentStore`), so that they can be restored
+  without running the inspection again.
+
+  Additionally provides a size-bounded in-memory store, used by long-running
+  processes, e.g. `in_toto.verify_server`, to reuse parsed metadata across
+  verifications. Parsed metadata is only ever kept in memory, and never
+  deserialized from the cache directory.
+
+  Cache entries are stored as individual JSON files in a cache directory,
+  named after the digest of their key. The directory must be trusted, i.e.
+  writable only by the user who runs in-toto, because anyone who can write a
+  cache entry can make in-toto skip the cached operation. Existing cache
+  directories that are owned or writable by other users are rejected.
+
+"""
+import os
+import json
+import errno
+import shutil
+import hashlib
+import tempfile
+import logging
+import threading
+import collections
+
+import securesystemslib.formats
+
+import in_toto.settings
+
+# Inherits from in_toto base logger (c.f. in_toto.log)
+log = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_ENTRIES = 10000
+
+# Cache directories are created with these permissions, see module docstring
+CACHE_DIR_MODE = 0o700
+
+# Size of the chunks in which files are copied to and from the content store
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def _create_cache_dir(path):
+  """Private function to create the cache directory at `path`, if it does not
+  exist, and to make sure that it is owned and only writable by the current
+  user, which is only checked on POSIX systems. """
+  try:
+    os.makedirs(path, CACHE_DIR_MODE)
+
+  except OSError as e:
+    if e.errno != errno.EEXIST or not os.path.isdir(path):
+      raise
+
+  if hasattr(os, "getuid"):
+    status = os.stat(path)
+    if status.st_uid != os.getuid() or status.st_mode & 0o022:
+      raise OSError(errno.EACCES, "Cache directory must be owned and only"
+          " writable by the current user", path)
+
+
+class FileCache(object):
+  """
+  A persistent key-value store, that keeps at most `max_entries` entries in
+  the directory at `path`. If the store grows beyond `max_entries`, the least
+  recently used entries are removed.
+
+  Keys are strings, values must be JSON serializable.
+
+  """
+  def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+    """
+    <Purpose>
+      Instantiate a new file cache and create the cache directory if it does
+      not exist.
+
+    <Arguments>
+      path:
+              A path to the cache directory.
+
+      max_entries: (optional)
+              The maximum number of entries kept in the cache directory.
+
+    <Exceptions>
+      securesystemslib.exceptions.FormatError
+              If the passed path is not a path or max_entries is not an int.
+
+      OSError
+              If the cache directory cannot be created, or is owned or
+              writable by another user.
+
+    """
+    securesystemslib.formats.PATH_SCHEMA.check_match(path)
+    securesystemslib.formats.LENGTH_SCHEMA.check_match(max_entries)
+
+    self.path = path
+    self.max_entries = max_entries
+    _create_cache_dir(self.path)
+
+
+  def _get_entry_path(self, key):
+    """Private method to return the path of the entry file for a key. """
+    return os.path.join(self.path,
+        hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+
+  def get(self, key):
+    """
+    <Purpose>
+      Return the value stored for the passed key, or None if there is no such
+      entry or the entry cannot be read.
+
+    <Side Effects>
+      Updates the modification time of a found entry, to mark it as recently
+      used.
+
+    """
+    entry_path = self._get_entry_path(key)
+    try:
+      with open(entry_path, "r") as fp:
+        entry = json.load(fp)
+
+    except (IOError, OSError, ValueError):
+      return None
+
+    # The file name is only a digest, so we double-check the full key
+    if not isinstance(entry, dict) or entry.get("key") != key:
+      return None
+
+    try:
+      os.utime(entry_path, None)
+
+    except OSError: # pragma: no cover
+      pass
+
+    return entry.get("value")
+
+
+  def set(self, key, value):
+    """
+    <Purpose>
+      Store the passed value for the passed key, replacing an existing entry.
+      The entry is written to a temporary file and then moved into place, so
+      that concurrent readers never see a partially written entry.
+
+    <Side Effects>
+      Writes to the cache directory and removes least recently used entries
+      if the cache exceeds its maximum size.
+
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix=".tmp-")
+    try:
+      with os.fdopen(fd, "w") as fp:
+        json.dump({"key": key, "value": value}, fp)
+      os.rename(tmp_path, self._get_entry_path(key))
+
+    except (IOError, OSError) as e:
+      log.warning("Could not write cache entry to '{}': {}".format(
+          self.path, e))
+      if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+      return
+
+    _evict(self.path, self.max_entries)
+
+
+def _evict(path, max_entries):
+  """Private function to remove the least recently used entries, until there
+  are at most `max_entries` entries in the cache directory at `path`. """
+  entries = []
+  for name in os.listdir(path):
+    if name.startswith("."):
+      continue
+
+    entry_path = os.path.join(path, name)
+    try:
+      entries.append((os.path.getmtime(entry_path), entry_path))
+
+    except OSError: # pragma: no cover
+      # Another process may have evicted the entry in the meantime
+      continue
+
+  if len(entries) <= max_entries:
+    return
+
+  entries.sort()
+  for junk, entry_path in entries[:len(entries) - max_entries]:
+    try:
+      os.remove(entry_path)
+
+    except OSError: # pragma: no cover
+      pass
+
+
+class ContentStore(object):
+  """
+  A persistent, content-addressed file store, that keeps at most
+  `max_entries` files in the directory at `path`, named after the sha256
+  digest of their contents. If the store grows beyond `max_entries`, the
+  least recently used files are removed.
+
+  """
+  def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+    """
+    <Purpose>
+      Instantiate a new content store and create the store directory if it
+      does not exist.
+
+    <Exceptions>
+      securesystemslib.exceptions.FormatError
+              If the passed path is not a path or max_entries is not an int.
+
+      OSError
+              If the store directory cannot be created, or is owned or
+              writable by another user.
+
+    """
+    securesystemslib.formats.PATH_SCHEMA.check_match(path)
+    securesystemslib.formats.LENGTH_SCHEMA.check_match(max_entries)
+
+    self.path = path
+    self.max_entries = max_entries
+    _create_cache_dir(self.path)
+
+
+  def _get_entry_path(self, key):
+    """Private method to return the path of the file with the passed sha256
+    digest. """
+    securesystemslib.formats.HEX_SCHEMA.check_match(key)
+    return os.path.join(self.path, key)
+
+
+  def has(self, digest):
+    """Return True if the file with the passed sha256 digest is stored. """
+    return os.path.isfile(self._get_entry_path(digest))
+
+
+  def add(self, digest, source_path):
+    """
+    <Purpose>
+      Store a copy of the file at the passed path under the passed sha256
+      digest of its contents, unless the file is already stored. The file is
+      not stored if its contents don't match the digest, e.g. because it
+      changed after it was hashed.
+
+    <Returns>
+      True if the file is stored, False otherwise.
+
+    <Side Effects>
+      Writes to the store directory and removes least recently used files if
+      the store exceeds its maximum size.
+
+    """
+    if self.has(digest):
+      return True
+
+    fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix=".tmp-")
+    try:
+      sha256 = hashlib.sha256()
+      with os.fdopen(fd, "wb") as fp, open(source_path, "rb") as source_fp:
+        for chunk in iter(lambda: source_fp.read(COPY_CHUNK_SIZE), b""):
+          sha256.update(chunk)
+          fp.write(chunk)
+
+      if sha256.hexdigest() != digest:
+        log.warning("Not storing '{}' in content store, its contents changed"
+            .format(source_path))
+        os.remove(tmp_path)
+        return False
+
+      os.rename(tmp_path, self._get_entry_path(digest))
+
+    except (IOError, OSError) as e:
+      log.warning("Could not write file to content store '{}': {}".format(
+          self.path, e))
+      if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+      return False
+
+    _evict(self.path, self.max_entries)
+    return True
+
+
+  def restore(self, digest, target_path, mode=None):
+    """
+    <Purpose>
+      Copy the file with the passed sha256 digest to the passed path,
+      replacing an existing file, and optionally set the passed permission
+      bits. The file is written to a temporary file and then moved into
+      place.
+
+    <Exceptions>
+      IOError, OSError
+              If the file is not stored or cannot be copied.
+
+    <Side Effects>
+      Writes to target_path and updates the modification time of the stored
+      file, to mark it as recently used.
+
+    """
+    entry_path = self._get_entry_path(digest)
+    target_dir = os.path.dirname(os.path.abspath(target_path))
+    if not os.path.isdir(target_dir):
+      os.makedirs(target_dir)
+
+    fd, tmp_path = tempfile.mkstemp(dir=target_dir, prefix=".in-toto-")
+    try:
+      with os.fdopen(fd, "wb") as fp, open(entry_path, "rb") as entry_fp:
+        shutil.copyfileobj(entry_fp, fp)
+      if mode is not None:
+        os.chmod(tmp_path, mode)
+      os.rename(tmp_path, target_path)
+
+    except Exception:
+      if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+      raise
+
+    try:
+      os.utime(entry_path, None)
+
+    except OSError: # pragma: no cover
+      pass
+
+
+class MemoryCache(object):
+  """
+  A thread-safe, in-memory key-value store, that keeps at most `max_entries`
+  entries. If the store grows beyond `max_entries`, the least recently used
+  entries are removed.
+
+  Keys must be hashable, values are stored as is, i.e. callers must not
+  modify returned values.
+
+  """
+  def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+    """
+    <Purpose>
+      Instantiate a new empty memory cache.
+
+    <Arguments>
+      max_entries: (optional)
+              The maximum number of entries kept in the cache.
+
+    <Exceptions>
+      securesystemslib.exceptions.FormatError
+              If max_entries is not an int.
+
+    """
+    securesystemslib.formats.LENGTH_SCHEMA.check_match(max_entries)
+    self.max_entries = max_entries
+    self._entries = collections.OrderedDict()
+    self._lock = threading.Lock()
+
+
+  def __len__(self):
+    return len(self._entries)
+
+
+  def get(self, key):
+    """Return the value stored for the passed key, or None if there is no such
+    entry, and mark a found entry as recently used. """
+    with self._lock:
+      value = self._entries.pop(key, None)
+      if value is not None:
+        self._entries[key] = value
+
+      return value
+
+
+  def set(self, key, value):
+    """Store the passed value for the passed key, replacing an existing entry,
+    and remove least recently used entries if the cache is full. """
+    with self._lock:
+      self._entries.pop(key, None)
+      self._entries[key] = value
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+
+
+
+_file_caches = {}
+
+def _get_file_cache(path, max_entries):
+  """Private function to return a memoized FileCache for the passed path, or
+  None if no path is passed. """
+  if not path:
+    return None
+
+  cache = _file_caches.get(path)
+  if cache is None or cache.max_entries != max_entries:
+    cache = FileCache(path, max_entries)
+    _file_caches[path] = cache
+
+  return cache
+
+
+def get_signature_cache():
+  """
+  <Purpose>
+    Return the FileCache for the directory configured in
+    `in_toto.settings.SIGNATURE_CACHE_PATH`, or None if signature caching is
+    not enabled.
+
+  <Returns>
+    A FileCache object or None.
+
+  """
+  return _get_file_cache(in_toto.settings.SIGNATURE_CACHE_PATH,
+      in_toto.settings.SIGNATURE_CACHE_MAX_ENTRIES)
+
+
+def get_step_cache():
+  """
+  <Purpose>
+    Return the FileCache for the directory configured in
+    `in_toto.settings.STEP_CACHE_PATH`, or None if step result caching is not
+    enabled.
+
+  <Returns>
+    A FileCache object or None.
+
+  """
+  return _get_file_cache(in_toto.settings.STEP_CACHE_PATH,
+      in_toto.settings.STEP_CACHE_MAX_ENTRIES)
+
+
+def get_inspection_cache():
+  """
+  <Purpose>
+    Return the FileCache for inspection links in the directory configured in
+    `in_toto.settings.INSPECTION_CACHE_PATH`, or None if inspection caching
+    is not enabled.
+
+  <Returns>
+    A FileCache object or None.
+
+  """
+  if not in_toto.settings.INSPECTION_CACHE_PATH:
+    return None
+
+  return _get_file_cache(os.path.join(in_toto.settings.INSPECTION_CACHE_PATH,
+      "links"), in_toto.settings.INSPECTION_CACHE_MAX_ENTRIES)
+
+
+_content_stores = {}
+
+def get_inspection_content_store():
+  """
+  <Purpose>
+    Return the ContentStore for inspection products in the directory
+    configured in `in_toto.settings.INSPECTION_CACHE_PATH`, or None if
+    inspection caching is not enabled.
+
+  <Returns>
+    A ContentStore object or None.
+
+  """
+  if not in_toto.settings.INSPECTION_CACHE_PATH:
+    return None
+
+  path = os.path.join(in_toto.settings.INSPECTION_CACHE_PATH, "objects")
+  max_entries = in_toto.settings.INSPECTION_CACHE_MAX_OBJECTS
+  store = _content_stores.get(path)
+  if store is None or store.max_entries != max_entries:
+    store = ContentStore(path, max_entries)
+    _content_stores[path] = store
+
+  return store
+
+
+_link_cache = None
+
+def get_link_cache():
+  """
+  <Purpose>
+    Return the process-wide MemoryCache for parsed link metadata files, with
+    at most `in_toto.settings.LINK_CACHE_MAX_ENTRIES` entries, or None if
+    link caching is not enabled.
+
+  <Returns>
+    A MemoryCache object or None.
+
+  """
+  global _link_cache # pylint: disable=global-statement
+  max_entries = in_toto.settings.LINK_CACHE_MAX_ENTRIES
+  if not max_entries:
+    return None
+
+  if _link_cache is None or _link_cache.max_entries != max_entries:
+    _link_cache = MemoryCache(max_entries)
+
+  return _link_cache
+
+
+_layout_cache = None
+
+def get_layout_cache():
+  """
+  <Purpose>
+    Return the process-wide MemoryCache for parsed and validated layouts, keyed
+    by the sha256 digest of the layout file, with at most
+    `in_toto.settings.LAYOUT_CACHE_MAX_ENTRIES` entries, or None if layout
+    caching is not enabled.
+
+  <Returns>
+    A MemoryCache object or None.
+
+  """
+  global _layout_cache # pylint: disable=global-statement
+  max_entries = in_toto.settings.LAYOUT_CACHE_MAX_ENTRIES
+  if not max_entries:
+    return None
+
+  if _layout_cache is None or _layout_cache.max_entries != max_entries:
+    _layout_cache = MemoryCache(max_entries)
+
+  return _layout_cache
+
+
+def get_key_fingerprint(key):
+  """
+  <Purpose>
+    Return a digest over the canonical JSON representation of the public
+    portion of the passed key, including all subkeys if any. Unlike the keyid,
+    the fingerprint changes if any of the key's properties that are relevant
+    for signature verification change.
+
+  <Arguments>
+    key:
+            A key in the format in_toto.formats.ANY_VERIFICATION_KEY_SCHEMA.
+
+  <Returns>
+    A hex digest string.
+
+  """
+  public_key = dict(key)
+  # Not relevant for verification and only present in some key formats
+  public_key.pop("keyid_hash_algorithms", None)
+  public_key["keyval"] = dict(key["keyval"])
+  public_key["keyval"]["private"] = ""
+
+  return hashlib.sha256(securesystemslib.formats.encode_canonical(
+      public_key).encode("utf-8")).hexdigest()
+
+
+def get_signature_cache_key(verification_key, signature, signed_bytes):
+  """
+  <Purpose>
+    Return the signature cache key for the passed verification key, signature
+    and signed bytes, i.e. a string made of the verification key's
+    fingerprint, a digest of the signature and a digest of the signed bytes.
+
+  <Arguments>
+    verification_key:
+            A key in the format in_toto.formats.ANY_VERIFICATION_KEY_SCHEMA.
+
+    signature:
+            A signature in the format in_toto.formats.ANY_SIGNATURE_SCHEMA.
+
+    signed_bytes:
+            The bytes over which the signature was created.
+
+  <Returns>
+    A cache key string.
+
+  """
+  signature_digest = hashlib.sha256(securesystemslib.formats.encode_canonical(
+      signature).encode("utf-8")).hexdigest()
+  signed_digest = hashlib.sha256(signed_bytes).hexdigest()
+
+  return "signature:{}:{}:{}".format(get_key_fingerprint(verification_key),
+      signature_digest, signed_digest)
@@ -46,3 +46,13 @@ BASE_PATH_KWARGS = {
   "help": ("Record 'materials/products' relative to <path>. If not set,"
           " current working directory is used as base path.")
   }
+
+MERKLE_ROOTS_ARGS = ["--merkle-roots"]
+MERKLE_ROOTS_KWARGS = {
+  "dest": "merkle_roots",
+  "default": False,
+  "action": "store_true",
+  "help": ("Store Merkle roots of the recorded 'materials' and 'products' in"
+          " the resulting link metadata's environment, for membership proofs"
+          " and change detection without the full artifact lists.")
+  }
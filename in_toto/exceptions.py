@@ -28,3 +28,16 @@ class LinkNotFoundError(Error):
 class UnsupportedKeyTypeError(Error):
   """Indicates that the specified key type is not yet supported. """
   pass
+
+class MerkleVerificationError(Error):
+  """Indicates that a Merkle root or membership proof did not verify. """
+  pass
+
+class ManifestVerificationError(Error):
+  """Indicates that a link file does not match its link manifest entry. """
+  pass
+
+class ReceiptVerificationError(Error):
+  """Indicates that a verification receipt does not match the layout,
+  parameters or products it is checked against. """
+  pass
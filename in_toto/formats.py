@@ -57,3 +57,14 @@ PARAMETER_DICTIONARY_KEY = ssl_schema.RegularExpression(r'[a-zA-Z0-9_-]+')
 PARAMETER_DICTIONARY_SCHEMA = ssl_schema.DictOf(
     key_schema = PARAMETER_DICTIONARY_KEY,
     value_schema = ssl_schema.AnyString())
+
+# A product in a batch verification, see verifylib.in_toto_verify_batch
+BATCH_PRODUCT_SCHEMA = ssl_schema.Object(
+    object_name = "BATCH_PRODUCT_SCHEMA",
+    link_dir = ssl_formats.PATH_SCHEMA,
+    working_dir = ssl_schema.Optional(ssl_formats.PATH_SCHEMA),
+    inspection_link_dir = ssl_schema.Optional(ssl_formats.PATH_SCHEMA),
+    substitution_parameters = ssl_schema.Optional(
+        PARAMETER_DICTIONARY_SCHEMA))
+
+BATCH_PRODUCTS_SCHEMA = ssl_schema.ListOf(BATCH_PRODUCT_SCHEMA)
@@ -164,17 +164,16 @@ def parse_pubkey_bundle(data, keyid):
 
   # Iterate over the passed public key data and parse out master and sub keys.
   # The individual keys' headers identify the key as master or sub key.
-  packet_start = 0
-  while packet_start < len(data):
-    payload, length, _type = in_toto.gpg.util.parse_packet_header(
-        data[packet_start:])
-
+  # Only the payloads of key packets are copied, to be parsed.
+  for _type, payload, junk in in_toto.gpg.util.iter_packets(data):
     try:
       if _type == PACKET_TYPES["master_pubkey_packet"]:
-        master_public_key = in_toto.gpg.common.parse_pubkey_payload(payload)
+        master_public_key = in_toto.gpg.common.parse_pubkey_payload(
+            bytearray(payload))
 
       elif _type == PACKET_TYPES["pub_subkey_packet"]:
-        sub_public_key = in_toto.gpg.common.parse_pubkey_payload(payload)
+        sub_public_key = in_toto.gpg.common.parse_pubkey_payload(
+            bytearray(payload))
         sub_public_keys[sub_public_key["keyid"]] = sub_public_key
 
     # The data might contain non-supported subkeys, which we just ignore
@@ -182,8 +181,6 @@ def parse_pubkey_bundle(data, keyid):
         SignatureAlgorithmNotSupportedError):
       pass
 
-    packet_start += length
-
   # Since GPG returns all pubkeys associated with a keyid (master key and
   # subkeys) we check which key matches the passed keyid.
   # If the matching key is a subkey, we warn the user because we return
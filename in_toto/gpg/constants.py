@@ -24,6 +24,14 @@ GPG_VERSION_COMMAND = "gpg2 --version"
 
 FULLY_SUPPORTED_MIN_VERSION = "2.1.0"
 
+# The maximum number of exported public keys cached per process, see
+# `in_toto.gpg.functions.gpg_export_pubkeys`
+PUBKEY_CACHE_MAX_ENTRIES = 1000
+
+# The maximum number of pyca/cryptography public key objects cached per
+# process, see `in_toto.gpg.util.get_pubkey_object`
+PUBKEY_OBJECT_CACHE_MAX_ENTRIES = 1000
+
 # The packet header is described in RFC4880 section 4.2, and the respective
 # packet types can be found in sections 5.2 (signature packet), 5.5.1.1
 # (master pubkey packet) and 5.5.1.2 (sub pubkey packet).
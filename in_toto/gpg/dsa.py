@@ -195,7 +195,8 @@ def gpg_verify_signature(signature_object, pubkey_info, content):
   in_toto.gpg.formats.SIGNATURE_SCHEMA.check_match(signature_object)
   in_toto.gpg.formats.DSA_PUBKEY_SCHEMA.check_match(pubkey_info)
 
-  pubkey_object = create_pubkey(pubkey_info)
+  pubkey_object = in_toto.gpg.util.get_pubkey_object(pubkey_info,
+      create_pubkey)
 
   digest = in_toto.gpg.util.hash_object(
       binascii.unhexlify(signature_object['other_headers']),
@@ -15,15 +15,21 @@
   publicly-usable functions for exporting public-keys, signing data and
   verifying signatures.
 """
+import copy
 import subprocess
 import shlex
 import logging
 
+import six
+
 import in_toto.gpg.common
+import in_toto.gpg.keyring
 import in_toto.gpg.exceptions
 import in_toto.gpg.formats
+import in_toto.cache
 from in_toto.gpg.constants import (GPG_EXPORT_PUBKEY_COMMAND, GPG_SIGN_COMMAND,
-    SIGNATURE_HANDLERS, FULLY_SUPPORTED_MIN_VERSION)
+    SIGNATURE_HANDLERS, FULLY_SUPPORTED_MIN_VERSION,
+    PUBKEY_CACHE_MAX_ENTRIES)
 
 import securesystemslib.formats
 
@@ -31,6 +37,11 @@ import securesystemslib.formats
 # Inherits from in_toto base logger (c.f. in_toto.log)
 log = logging.getLogger(__name__)
 
+# Exported public keys by homedir status (see
+# `in_toto.gpg.keyring.get_homedir_status`) and lower-case keyid, see
+# `gpg_export_pubkeys`
+_pubkey_cache = in_toto.cache.MemoryCache(PUBKEY_CACHE_MAX_ENTRIES)
+
 
 def gpg_sign_object(content, keyid=None, homedir=None):
   """
@@ -182,6 +193,98 @@ def gpg_verify_signature(signature_object, pubkey_info, content):
       signature_object, verification_key, content)
 
 
+def gpg_export_pubkeys(keyids, homedir=None):
+  """
+  <Purpose>
+    Exports the gpg public key bundles identified by the passed keyids from
+    the gpg keyring at the passed homedir in a format suitable for in-toto,
+    see `gpg_export_pubkey`.
+
+    Keys are exported from the keyring without calling gpg2 if possible (see
+    `in_toto.gpg.keyring`). All other keys are exported with a single call
+    of the gpg2 command line utility. Exported keys, including those
+    exported with gpg2, are cached in memory by homedir and keyid, as long as
+    the homedir, its config files and keyrings are unchanged.
+
+    The executed base command is defined in
+    constants.GPG_EXPORT_PUBKEY_COMMAND.
+
+  <Arguments>
+    keyids:
+            A list of GPG keyids in format:
+            securesystemslib.formats.KEYID_SCHEMA
+
+    homedir: (optional)
+            Path to the gpg keyring. If not passed the default keyring is used.
+
+  <Exceptions>
+    ValueError
+            if any of the keyids does not match the required format.
+
+    in_toto.gpg.execeptions.KeyNotFoundError
+            if no key or subkey was found for any of the keyids.
+
+  <Side Effects>
+    Reads the keyring file, if it changed since the last export.
+
+  <Returns>
+    A dictionary with the passed keyids as keys and the exported public key
+    objects in the format gpg.formats.PUBKEY_SCHEMA as values.
+
+  """
+  for keyid in keyids:
+    if not securesystemslib.formats.KEYID_SCHEMA.matches(keyid):
+      # FIXME: probably needs smarter parsing of what a valid keyid is so as
+      # to not export more than one pubkey packet.
+      raise ValueError("we need to export an individual key."
+              " Please provide a valid keyid! Keyid was '{}'.".format(keyid))
+
+  cache_status = in_toto.gpg.keyring.get_homedir_status(homedir)
+
+  key_bundles = {}
+  missing_keyids = []
+  for keyid in keyids:
+    if keyid in key_bundles or keyid in missing_keyids:
+      continue
+
+    key_bundle = _pubkey_cache.get((cache_status, keyid.lower()))
+    if key_bundle is None:
+      key_bundle = in_toto.gpg.keyring.export_pubkey(keyid, homedir)
+
+    if key_bundle is None:
+      missing_keyids.append(keyid)
+
+    else:
+      key_bundles[keyid] = key_bundle
+
+  if missing_keyids:
+    homearg = ""
+    if homedir:
+      homearg = "--homedir {}".format(homedir)
+
+    command = GPG_EXPORT_PUBKEY_COMMAND.format(
+        keyid=" ".join(missing_keyids), homearg=homearg)
+    process = subprocess.Popen(shlex.split(command), stdout=subprocess.PIPE,
+        stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    key_packets, junk = process.communicate()
+
+    # The exported bundles are split like the bundles of a keyring
+    index = in_toto.gpg.keyring.parse_keyring(key_packets)
+    for keyid in missing_keyids:
+      key_bundle = in_toto.gpg.keyring.find_pubkey(index, keyid)
+      if key_bundle is None:
+        raise in_toto.gpg.exceptions.KeyNotFoundError("No key found for gpg"
+            " keyid '{}'".format(keyid))
+
+      key_bundles[keyid] = key_bundle
+
+  for keyid, key_bundle in six.iteritems(key_bundles):
+    _pubkey_cache.set((cache_status, keyid.lower()), key_bundle)
+
+  # Callers may modify the returned keys, e.g. add them to a layout
+  return dict((keyid, copy.deepcopy(key_bundles[keyid])) for keyid in keyids)
+
+
 def gpg_export_pubkey(keyid, homedir=None):
   """
   <Purpose>
@@ -192,6 +295,11 @@ def gpg_export_pubkey(keyid, homedir=None):
     Note: The identified key is exported including the corresponding master
     key and all subkeys.
 
+    If the homedir's keyring can be read directly and contains the key, the
+    key is exported from the keyring without calling gpg2 (see
+    `in_toto.gpg.keyring`). Exported keys are cached, see
+    `gpg_export_pubkeys`.
+
     The executed base command is defined in
     constants.GPG_EXPORT_PUBKEY_COMMAND.
 
@@ -211,27 +319,10 @@ def gpg_export_pubkey(keyid, homedir=None):
 
 
   <Side Effects>
-    None.
+    Reads the keyring file, if it changed since the last export.
 
   <Returns>
     The exported public key object in the format: gpg.formats.PUBKEY_SCHEMA
 
   """
-  if not securesystemslib.formats.KEYID_SCHEMA.matches(keyid):
-    # FIXME: probably needs smarter parsing of what a valid keyid is so as to
-    # not export more than one pubkey packet.
-    raise ValueError("we need to export an individual key."
-            " Please provide a valid keyid! Keyid was '{}'.".format(keyid))
-
-  homearg = ""
-  if homedir:
-    homearg = "--homedir {}".format(homedir)
-
-  command = GPG_EXPORT_PUBKEY_COMMAND.format(keyid=keyid, homearg=homearg)
-  process = subprocess.Popen(shlex.split(command), stdout=subprocess.PIPE,
-      stdin=subprocess.PIPE, stderr=subprocess.PIPE)
-  key_packet, junk = process.communicate()
-
-  key_bundle = in_toto.gpg.common.parse_pubkey_bundle(key_packet, keyid)
-
-  return key_bundle
+  return gpg_export_pubkeys([keyid], homedir)[keyid]
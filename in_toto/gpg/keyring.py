@@ -0,0 +1,428 @@
+"""
+<Module Name>
+  keyring.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Provides a reader for gpg public keyrings, used to export public keys
+  without spawning the gpg2 command line utility for each key (see
+  `in_toto.gpg.functions.gpg_export_pubkey`).
+
+  Both keyring formats used by gpg are supported, i.e. a sequence of RFC4880
+  packets (usually 'pubring.gpg') and the keybox format of gpg 2.1 and later
+  (usually 'pubring.kbx'). The keyring of a homedir is indexed once, by the
+  fingerprints of all master keys and subkeys, and the index is reused as long
+  as the keyring file is unchanged.
+
+  Keyrings that gpg reads from elsewhere, e.g. if additional keyrings or the
+  keyboxd daemon are configured, are not read, so that callers can fall back
+  to the gpg2 command line utility.
+
+"""
+import os
+import struct
+import logging
+import threading
+
+import six
+
+import in_toto.gpg.util
+import in_toto.gpg.common
+import in_toto.gpg.exceptions
+from in_toto.gpg.constants import PACKET_TYPES
+
+# Inherits from in_toto base logger (c.f. in_toto.log)
+log = logging.getLogger(__name__)
+
+
+# Default keyrings in the order gpg looks for them in the homedir
+KEYRING_FILENAMES = ["pubring.gpg", "pubring.kbx"]
+
+# Options in gpg.conf and common.conf, which make gpg read keys from other
+# places than the default keyring
+KEYRING_OPTIONS = ["keyring", "primary-keyring", "no-default-keyring",
+    "use-keyboxd"]
+
+# Config files in the homedir, which may contain any of the above options
+CONFIG_FILENAMES = ["gpg.conf", "common.conf"]
+
+# Directory of the keyboxd daemon's key database in the homedir
+KEYBOXD_DIRNAME = "public-keys.d"
+
+# Keybox blob types and header magic, see 'kbx/keybox-blob.c' in the gpg
+# source tree
+KEYBOX_BLOB_TYPE_OPENPGP = 2
+KEYBOX_MAGIC = b"KBXf"
+
+# See section 5.5.2 of RFC4880
+FINGERPRINTED_PUBKEY_PACKET_VERSION = 0x04
+
+# Index of the last read keyring per path, i.e. a pair of the keyring's file
+# status and a dictionary of bundles by fingerprint
+_keyring_indexes = {}
+_keyring_indexes_lock = threading.Lock()
+
+
+
+def _get_homedir(homedir=None):
+  """Private helper to return the passed homedir, or the default homedir of
+  gpg. """
+  if homedir:
+    return homedir
+
+  return os.environ.get("GNUPGHOME") or os.path.join(
+      os.path.expanduser("~"), ".gnupg")
+
+
+def _iter_options(homedir):
+  """Private generator over the options, i.e. lists of words, in gpg's
+  config files in the passed homedir. """
+  for filename in CONFIG_FILENAMES:
+    try:
+      with open(os.path.join(homedir, filename), "r") as fp:
+        for line in fp:
+          words = line.split()
+          if words:
+            yield words
+
+    except (IOError, OSError):
+      continue
+
+
+def _uses_default_keyring(homedir):
+  """Private helper to return False, if any of the options in gpg's config
+  files in the passed homedir make it read keys from other places than the
+  default keyring. """
+  for words in _iter_options(homedir):
+    if words[0] in KEYRING_OPTIONS:
+      return False
+
+  return not os.path.isdir(os.path.join(homedir, KEYBOXD_DIRNAME))
+
+
+def find_keyring(homedir=None):
+  """
+  <Purpose>
+    Return the path of the public keyring, that gpg uses for the passed
+    homedir, if it can be read by this module.
+
+  <Arguments>
+    homedir: (optional)
+            Path to the gpg homedir. If not passed the default homedir is
+            used.
+
+  <Returns>
+    The path to the keyring file, or None if there is no keyring file or gpg
+    is configured to use other keyrings.
+
+  """
+  homedir = _get_homedir(homedir)
+  if not _uses_default_keyring(homedir):
+    return None
+
+  for filename in KEYRING_FILENAMES:
+    path = os.path.join(homedir, filename)
+    if os.path.isfile(path):
+      return path
+
+  return None
+
+
+def _iter_keyblocks(data):
+  """Private generator over the keyblocks, i.e. the sequences of packets of
+  one master key, in the passed keyring memoryview. """
+  if data[8:12].tobytes() != KEYBOX_MAGIC:
+    yield data
+    return
+
+  blob_start = 0
+  while blob_start + 5 <= len(data):
+    blob_length, blob_type = struct.unpack_from(">IB", data, blob_start)
+    if blob_length < 5 or blob_start + blob_length > len(data):
+      raise in_toto.gpg.exceptions.PacketParsingError("Invalid keybox blob"
+          " length")
+
+    if blob_type == KEYBOX_BLOB_TYPE_OPENPGP:
+      if blob_length < 16:
+        raise in_toto.gpg.exceptions.PacketParsingError("Invalid keybox"
+            " blob length")
+
+      keyblock_start, keyblock_length = struct.unpack_from(">II", data,
+          blob_start + 8)
+      keyblock_start += blob_start
+      if keyblock_start + keyblock_length > blob_start + blob_length:
+        raise in_toto.gpg.exceptions.PacketParsingError("Invalid keybox"
+            " keyblock offset")
+
+      yield data[keyblock_start:keyblock_start + keyblock_length]
+
+    blob_start += blob_length
+
+
+def _get_fingerprint(payload):
+  """Private helper to return the fingerprint of the passed public key or
+  subkey packet payload, or None, if its version has no supported
+  fingerprint. """
+  payload = bytearray(payload)
+  if not payload or payload[0] != FINGERPRINTED_PUBKEY_PACKET_VERSION:
+    return None
+
+  return in_toto.gpg.util.compute_keyid(payload)
+
+
+def parse_keyring(data):
+  """
+  <Purpose>
+    Parse the passed keyring data and return the public key bundles, i.e. the
+    master key packet and the subkey packets, of all keys by the fingerprints
+    of their master keys and subkeys. Other packets, e.g. user ids and
+    signatures, are dropped.
+
+  <Arguments>
+    data:
+            The contents of a keyring file, either in packet or in keybox
+            format.
+
+  <Exceptions>
+    in_toto.gpg.exceptions.PacketParsingError
+            If the keyring is malformed.
+
+  <Returns>
+    A dictionary with lower-case fingerprints as keys and bundles as values,
+    which can be parsed with `in_toto.gpg.common.parse_pubkey_bundle`.
+
+  """
+  index = {}
+  for keyblock in _iter_keyblocks(memoryview(data)):
+    bundle = None
+    fingerprints = []
+    for packet_type, payload, packet in in_toto.gpg.util.iter_packets(
+        keyblock):
+      if packet_type == PACKET_TYPES["master_pubkey_packet"]:
+        if bundle is not None:
+          _add_bundle(index, bundle, fingerprints)
+        bundle = [packet]
+        fingerprints = [_get_fingerprint(payload)]
+
+      elif (packet_type == PACKET_TYPES["pub_subkey_packet"] and
+          bundle is not None):
+        bundle.append(packet)
+        fingerprints.append(_get_fingerprint(payload))
+
+    if bundle is not None:
+      _add_bundle(index, bundle, fingerprints)
+
+  return index
+
+
+def _add_bundle(index, bundle, fingerprints):
+  """Private helper to add the passed bundle to the passed index, for all of
+  its fingerprints. Like gpg, the first bundle found for a key is used. """
+  bundle_data = b"".join(packet.tobytes() for packet in bundle)
+  for fingerprint in fingerprints:
+    if fingerprint is not None and fingerprint not in index:
+      index[fingerprint] = bundle_data
+
+
+def get_keyring_status(path):
+  """
+  <Purpose>
+    Return a tuple of the real path and the file status values of the keyring
+    file at the passed path, which changes whenever the keyring changes.
+
+  <Exceptions>
+    OSError
+            If the keyring file does not exist.
+
+  """
+  path = os.path.realpath(path)
+  return (path,) + _get_file_status(path)
+
+
+def _get_file_status(path):
+  """Private helper to return a tuple of file status values of the passed
+  path, which changes whenever the file changes. Raises OSError if the path
+  does not exist. """
+  stat = os.stat(path)
+  return (stat.st_dev, stat.st_ino, stat.st_size,
+      getattr(stat, "st_mtime_ns", stat.st_mtime),
+      getattr(stat, "st_ctime_ns", stat.st_ctime))
+
+
+def get_homedir_status(homedir=None):
+  """
+  <Purpose>
+    Return a tuple of the real path of the passed gpg homedir and the file
+    status values of the homedir, its config files and all keyrings gpg may
+    read keys from, i.e. the default keyrings, the keyboxd database and
+    keyrings configured with the 'keyring' and 'primary-keyring' options.
+
+    The status changes whenever keys are added to or removed from the
+    homedir, also if the keyring cannot be read by this module.
+
+  <Arguments>
+    homedir: (optional)
+            Path to the gpg homedir. If not passed the default homedir is
+            used.
+
+  <Returns>
+    A hashable tuple. Missing files have the status None.
+
+  """
+  homedir = os.path.realpath(_get_homedir(homedir))
+  paths = [homedir]
+  for filename in CONFIG_FILENAMES + KEYRING_FILENAMES + [KEYBOXD_DIRNAME]:
+    paths.append(os.path.join(homedir, filename))
+
+  paths.append(os.path.join(homedir, KEYBOXD_DIRNAME, "pubring.db"))
+
+  # Like gpg, look up keyring filenames without a slash in the homedir
+  for words in _iter_options(homedir):
+    if words[0] in ["keyring", "primary-keyring"] and len(words) > 1:
+      path = os.path.expanduser(" ".join(words[1:]))
+      if os.sep not in path:
+        path = os.path.join(homedir, path)
+      paths.append(path)
+
+  status = [homedir]
+  for path in paths:
+    try:
+      status.append((path, _get_file_status(path)))
+
+    except OSError:
+      status.append((path, None))
+
+  return tuple(status)
+
+
+def get_keyring_index(path):
+  """
+  <Purpose>
+    Return the index of the keyring file at the passed path (see
+    `parse_keyring`), which is only read and parsed again if its file status
+    changed since the last call.
+
+  <Arguments>
+    path:
+            The path to a keyring file.
+
+  <Exceptions>
+    IOError, OSError
+            If the keyring cannot be read.
+
+    in_toto.gpg.exceptions.PacketParsingError
+            If the keyring is malformed.
+
+  <Side Effects>
+    Reads the keyring file.
+
+  <Returns>
+    A dictionary with lower-case fingerprints as keys and bundles as values.
+
+  """
+  file_key = get_keyring_status(path)
+  path = file_key[0]
+
+  with _keyring_indexes_lock:
+    cached = _keyring_indexes.get(path)
+  if cached is not None and cached[0] == file_key:
+    return cached[1]
+
+  with open(path, "rb") as fp:
+    index = parse_keyring(fp.read())
+
+  with _keyring_indexes_lock:
+    _keyring_indexes[path] = (file_key, index)
+
+  return index
+
+
+def export_pubkey(keyid, homedir=None):
+  """
+  <Purpose>
+    Return the public key bundle identified by the passed keyid from the
+    keyring of the passed homedir, in the same format as
+    `in_toto.gpg.functions.gpg_export_pubkey`, if the keyring can be read.
+
+  <Arguments>
+    keyid:
+            A fingerprint or a long or short keyid of the master key or one
+            of its subkeys.
+
+    homedir: (optional)
+            Path to the gpg homedir. If not passed the default homedir is
+            used.
+
+  <Exceptions>
+    in_toto.gpg.exceptions.KeyNotFoundError
+            If the key bundle was found, but the keyid does not identify any
+            of its supported keys, see
+            `in_toto.gpg.common.parse_pubkey_bundle`.
+
+  <Side Effects>
+    Reads the keyring file, if it changed since the last call.
+
+  <Returns>
+    The public key in the format in_toto.gpg.formats.PUBKEY_SCHEMA, or None
+    if the keyring cannot be read or does not contain the key.
+
+  """
+  path = find_keyring(homedir)
+  if path is None:
+    return None
+
+  try:
+    index = get_keyring_index(path)
+
+  except (IOError, OSError, in_toto.gpg.exceptions.PacketParsingError) as e:
+    log.debug("Could not read keyring '{}': {}".format(path, e))
+    return None
+
+  return find_pubkey(index, keyid)
+
+
+def find_pubkey(index, keyid):
+  """
+  <Purpose>
+    Return the public key bundle identified by the passed keyid from the
+    passed keyring index (see `parse_keyring`).
+
+  <Arguments>
+    index:
+            A dictionary with lower-case fingerprints as keys and bundles as
+            values.
+
+    keyid:
+            A fingerprint or a long or short keyid of the master key or one
+            of its subkeys.
+
+  <Exceptions>
+    in_toto.gpg.exceptions.KeyNotFoundError
+            If the key bundle was found, but the keyid does not identify any
+            of its supported keys.
+
+  <Returns>
+    The public key in the format in_toto.gpg.formats.PUBKEY_SCHEMA, or None
+    if the index does not contain the key.
+
+  """
+  keyid = keyid.lower()
+  bundle = index.get(keyid)
+  if bundle is None:
+    for fingerprint, fingerprint_bundle in six.iteritems(index):
+      if fingerprint.endswith(keyid):
+        bundle = fingerprint_bundle
+        break
+
+    else:
+      return None
+
+  return in_toto.gpg.common.parse_pubkey_bundle(bundle, keyid)
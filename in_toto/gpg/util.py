@@ -15,6 +15,7 @@
   general-purpose utilities for binary data handling and pgp data parsing
 """
 import struct
+import hashlib
 import binascii
 import subprocess
 import shlex
@@ -25,7 +26,10 @@ from distutils.version import StrictVersion # pylint: disable=no-name-in-module,
 import cryptography.hazmat.backends as backends
 import cryptography.hazmat.primitives.hashes as hashing
 
+import securesystemslib.formats
+
 import in_toto.gpg.exceptions
+import in_toto.cache
 
 
 def get_mpi_length(data):
@@ -87,11 +91,195 @@ def hash_object(headers, algorithm, content):
   return hasher.finalize()
 
 
+def _get_body_length(data, offset):
+  """Private helper to parse the new format body length at the passed offset
+  of the passed data (RFC4880 section 4.2.2) and return the number of length
+  octets, the body length and whether it is a partial body length. Raises
+  struct.error if the data is truncated. """
+  first_octet = struct.unpack_from(">B", data, offset)[0]
+  if first_octet < 192:
+    return 1, first_octet, False
+
+  elif first_octet < 224:
+    second_octet = struct.unpack_from(">B", data, offset + 1)[0]
+    return 2, ((first_octet - 192) << 8) + second_octet + 192, False
+
+  elif first_octet == 255:
+    return 5, struct.unpack_from(">I", data, offset + 1)[0], False
+
+  return 1, 1 << (first_octet & 0x1f), True
+
+
+def _get_header(data, offset):
+  """Private helper to parse the packet header at the passed offset of the
+  passed data and return the packet type, the header length, the (first)
+  body length and whether it is a partial body length. """
+  try:
+    tag = struct.unpack_from(">B", data, offset)[0]
+
+  except struct.error:
+    raise in_toto.gpg.exceptions.PacketParsingError("Invalid packet header")
+
+  if not tag & 0x80:
+    raise in_toto.gpg.exceptions.PacketParsingError("Invalid packet header")
+
+  try:
+    # New format packet header (RFC4880 section 4.2.2)
+    if tag & 0x40:
+      length_octets, body_length, partial = _get_body_length(data,
+          offset + 1)
+      return tag & 0x3f, 1 + length_octets, body_length, partial
+
+    # Old format packet header (RFC4880 section 4.2.1)
+    packet_type = (tag & 0x3c ) >> 2
+    packet_length_bytes = tag & 0x03
+    if packet_length_bytes == 0:
+      return (packet_type, 2, struct.unpack_from(">B", data, offset + 1)[0],
+          False)
+
+    elif packet_length_bytes == 1:
+      return (packet_type, 3, struct.unpack_from(">H", data, offset + 1)[0],
+          False)
+
+    elif packet_length_bytes == 2:
+      return (packet_type, 5, struct.unpack_from(">I", data, offset + 1)[0],
+          False)
+
+    raise in_toto.gpg.exceptions.PacketParsingError("Indeterminate body"
+        " lengths are not supported")
+
+  except struct.error:
+    raise in_toto.gpg.exceptions.PacketParsingError("Truncated packet"
+        " header")
+
+
+def get_packet_header(data, offset=0):
+  """
+  <Purpose>
+    Parse the RFC4880 packet header at the passed offset of the passed data
+    and return the packet type, the length of the header and the length of
+    the packet body. Only the header bytes of the passed data are read.
+
+    Both old format and new format packet headers are supported, with the
+    exception of indeterminate and partial body lengths. Packets with partial
+    body lengths can be parsed with `iter_packets`.
+
+  <Arguments>
+    data:
+            Data containing an RFC4880 packet header as described in section
+            4.2 of the rfc, e.g. bytes or a memoryview.
+
+    offset: (optional)
+            The position of the packet header in the passed data.
+
+  <Exceptions>
+    in_toto.gpg.exceptions.PacketParsingError
+            If the header is malformed or uses an unsupported body length.
+
+  <Side Effects>
+    None.
+
+  <Returns>
+    A tuple of the packet type, the header length and the body length.
+
+  """
+  packet_type, header_length, body_length, partial = _get_header(data,
+      offset)
+  if partial:
+    raise in_toto.gpg.exceptions.PacketParsingError("Partial body lengths"
+        " are not supported")
+
+  return packet_type, header_length, body_length
+
+
+def _parse_packet(data, offset):
+  """Private helper to parse the packet at the passed offset of the passed
+  memoryview and return its type, its payload and the offset after the
+  packet. The payload is a view into the data, unless the packet uses partial
+  body lengths, whose chunks have to be joined (RFC4880 section 4.2.2.4). """
+  packet_type, header_length, body_length, partial = _get_header(data,
+      offset)
+  ptr = offset + header_length
+
+  payload = None
+  while partial:
+    if ptr + body_length > len(data):
+      raise in_toto.gpg.exceptions.PacketParsingError("Packet body is"
+          " truncated")
+
+    if payload is None:
+      payload = bytearray()
+    payload += data[ptr:ptr + body_length]
+    ptr += body_length
+
+    try:
+      length_octets, body_length, partial = _get_body_length(data, ptr)
+
+    except struct.error:
+      raise in_toto.gpg.exceptions.PacketParsingError("Truncated packet"
+          " body length")
+
+    ptr += length_octets
+
+  if ptr + body_length > len(data):
+    raise in_toto.gpg.exceptions.PacketParsingError("Packet body is"
+        " truncated")
+
+  if payload is None:
+    payload = data[ptr:ptr + body_length]
+
+  else:
+    payload += data[ptr:ptr + body_length]
+    payload = memoryview(payload)
+
+  return packet_type, payload, ptr + body_length
+
+
+def iter_packets(data):
+  """
+  <Purpose>
+    Generator over the RFC4880 packets in the passed data, e.g. a keyring or
+    the output of GPG_EXPORT_PUBKEY_COMMAND. The data is read in place, i.e.
+    the packets are parsed by offset and returned as views into the data, so
+    that large keyrings are parsed in linear time.
+
+    Both old format and new format packet headers are supported, including
+    partial body lengths, with the exception of indeterminate body lengths.
+
+  <Arguments>
+    data:
+            A sequence of RFC4880 packets, e.g. bytes or a memoryview.
+
+  <Exceptions>
+    in_toto.gpg.exceptions.PacketParsingError
+            If a packet header is malformed or uses an unsupported body
+            length, or if a packet is truncated. Packets before the malformed
+            packet are yielded.
+
+  <Side Effects>
+    None.
+
+  <Yields>
+    Tuples of the packet type, the packet payload and the raw packet, i.e.
+    header and payload, as memoryviews.
+
+  """
+  data = memoryview(data)
+  ptr = 0
+  while ptr < len(data):
+    packet_type, payload, packet_end = _parse_packet(data, ptr)
+    yield packet_type, payload, data[ptr:packet_end]
+    ptr = packet_end
+
+
 def parse_packet_header(data, expected_type=None):
   """
   <Purpose>
     Parse an RFC4880 packet header and return its payload, length and type.
 
+    Both old format and new format packet headers are supported, including
+    partial body lengths, with the exception of indeterminate body lengths.
+
   <Arguments>
     data:
             An RFC4880 packet as described in section 4.2 of the rfc.
@@ -102,7 +290,9 @@ def parse_packet_header(data, expected_type=None):
 
   <Exceptions>
     in_toto.gpg.exceptions.PacketParsingError
-            If the expected_type was passed and does not match the packet type
+            If the expected_type was passed and does not match the packet
+            type, if the header is malformed or uses an unsupported body
+            length, or if the packet is longer than the passed data.
 
   <Side Effects>
     None.
@@ -110,22 +300,13 @@ def parse_packet_header(data, expected_type=None):
   <Returns>
     The RFC4880-compliant packet payload, its length and its type.
   """
-  data = bytearray(data)
-  packet_type = (data[0] & 0x3c ) >> 2
-  packet_length_bytes = data[0] & 0x03
-
-  ptr = 3
-  if packet_length_bytes == 1:
-    packet_length = struct.unpack(">H", data[1:ptr])[0]
-  else:
-    packet_length = data[1]
-    ptr = 2
+  packet_type, payload, packet_length = _parse_packet(memoryview(data), 0)
 
   if expected_type != None and packet_type != expected_type: # pragma: no cover
     raise in_toto.gpg.exceptions.PacketParsingError("Expected packet {}, "
         "but got {} instead!".format(expected_type, packet_type))
 
-  return data[ptr:ptr+packet_length], ptr+packet_length, packet_type
+  return bytearray(payload), packet_length, packet_type
 
 
 def compute_keyid(pubkey_packet_data):
@@ -203,18 +384,78 @@ def parse_subpackets(subpacket_octets):
   return parsed_subpackets
 
 
+_pubkey_objects = None
+
+def _get_pubkey_object_cache_key(pubkey_info):
+  """Private helper to return a digest over the canonical JSON representation
+  of the passed, valid public key info. """
+  return hashlib.sha256(securesystemslib.formats.encode_canonical(
+      pubkey_info).encode("utf-8")).hexdigest()
+
+
+def get_pubkey_object(pubkey_info, create_pubkey):
+  """
+  <Purpose>
+    Return a pyca/cryptography public key object for the passed public key
+    info, created with the passed create_pubkey function of a signature
+    handler, e.g. `in_toto.gpg.rsa.create_pubkey`.
+
+    Created objects are kept in a per-process LRU cache, keyed by a digest
+    over the canonical JSON representation of the public key info. The
+    public key info must be validated by the caller, i.e. before it is looked
+    up in the cache.
+
+  <Arguments>
+    pubkey_info:
+            A public key info dictionary as specified by the schema that the
+            passed create_pubkey function checks.
+
+    create_pubkey:
+            A function that validates the passed public key info and returns
+            a public key object.
+
+  <Exceptions>
+    securesystemslib.exceptions.FormatError if
+      pubkey_info cannot be canonicalized, or is not cached and malformed
+
+  <Returns>
+    A pyca/cryptography public key object.
+
+  """
+  global _pubkey_objects # pylint: disable=global-statement
+  if _pubkey_objects is None:
+    _pubkey_objects = in_toto.cache.MemoryCache(
+        in_toto.gpg.constants.PUBKEY_OBJECT_CACHE_MAX_ENTRIES)
+
+  cache_key = _get_pubkey_object_cache_key(pubkey_info)
+  pubkey_object = _pubkey_objects.get(cache_key)
+  if pubkey_object is None:
+    pubkey_object = create_pubkey(pubkey_info)
+    _pubkey_objects.set(cache_key, pubkey_object)
+
+  return pubkey_object
+
+
+_version = None
+
 def get_version():
   """
   <Purpose>
     Uses `gpg2 --version` to get the version info of the installed gpg2
     and extracts and returns the version number.
 
+    The version is only determined once per process.
+
     The executed base command is defined in constants.GPG_VERSION_COMMAND.
 
   <Returns>
     Version number string, e.g. "2.1.22"
 
   """
+  global _version # pylint: disable=global-statement
+  if _version is not None:
+    return _version
+
   command = shlex.split(in_toto.gpg.constants.GPG_VERSION_COMMAND)
   process = subprocess.Popen(command, stdout=subprocess.PIPE,
       universal_newlines=True)
@@ -222,6 +463,7 @@ def get_version():
 
   version_string = re.search(r'(\d\.\d\.\d+)', full_version_info).group(1)
 
+  _version = version_string
   return version_string
 
 
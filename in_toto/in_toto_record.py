@@ -84,6 +84,10 @@ optional arguments (stop subcommand only):
                         are stored in the resulting link metadata's product
                         section when running the 'stop' subcommand. Symlinks
                         are followed.
+  --merkle-roots        Store Merkle roots of the recorded 'materials' and
+                        'products' in the resulting link metadata's
+                        environment, for membership proofs and change
+                        detection without the full artifact lists.
 
 required named arguments:
   -n <name>, --step-name <name>
@@ -115,7 +119,7 @@ import in_toto.user_settings
 import in_toto.runlib
 
 from in_toto.common_args import (EXCLUDE_ARGS, EXCLUDE_KWARGS,
-    BASE_PATH_ARGS, BASE_PATH_KWARGS)
+    BASE_PATH_ARGS, BASE_PATH_KWARGS, MERKLE_ROOTS_ARGS, MERKLE_ROOTS_KWARGS)
 
 # Command line interfaces should use in_toto base logger (c.f. in_toto.log)
 log = logging.getLogger("in_toto")
@@ -231,6 +235,8 @@ examples:
       " resulting link metadata's product section when running the 'stop'"
       " subcommand. Symlinks are followed."))
 
+  subparser_stop.add_argument(*MERKLE_ROOTS_ARGS, **MERKLE_ROOTS_KWARGS)
+
   args = parser.parse_args()
 
   log.setLevelVerboseOrQuiet(args.verbose, args.quiet)
@@ -265,7 +271,8 @@ examples:
       in_toto.runlib.in_toto_record_stop(args.step_name, args.products,
           signing_key=key, gpg_keyid=gpg_keyid,
           gpg_use_default=gpg_use_default, gpg_home=args.gpg_home,
-          exclude_patterns=args.exclude_patterns, base_path=args.base_path)
+          exclude_patterns=args.exclude_patterns, base_path=args.base_path,
+          record_merkle_roots=args.merkle_roots)
 
   except Exception as e:
     log.error("(in-toto-record {0}) {1}: {2}"
@@ -60,6 +60,10 @@ optional arguments:
                         for additional info.
   --base-path <path>    Record 'materials/products' relative to <path>. If not
                         set, current working directory is used as base path.
+  --merkle-roots        Store Merkle roots of the recorded 'materials' and
+                        'products' in the resulting link metadata's
+                        environment, for membership proofs and change
+                        detection without the full artifact lists.
   -t {ed25519,rsa}, --key-type {ed25519,rsa}
                         Specify the key-type of the key specified by the
                         '--key' option. If '--key-type' is not passed, default
@@ -105,7 +109,7 @@ import in_toto.user_settings
 from in_toto import (util, runlib)
 
 from in_toto.common_args import (EXCLUDE_ARGS, EXCLUDE_KWARGS,
-    BASE_PATH_ARGS, BASE_PATH_KWARGS)
+    BASE_PATH_ARGS, BASE_PATH_KWARGS, MERKLE_ROOTS_ARGS, MERKLE_ROOTS_KWARGS)
 
 # Command line interfaces should use in_toto base logger (c.f. in_toto.log)
 log = logging.getLogger("in_toto")
@@ -198,6 +202,7 @@ examples:
 
   parser.add_argument(*EXCLUDE_ARGS, **EXCLUDE_KWARGS)
   parser.add_argument(*BASE_PATH_ARGS, **BASE_PATH_KWARGS)
+  parser.add_argument(*MERKLE_ROOTS_ARGS, **MERKLE_ROOTS_KWARGS)
 
   verbosity_args = parser.add_mutually_exclusive_group(required=False)
   verbosity_args.add_argument("-v", "--verbose", dest="verbose",
@@ -253,7 +258,8 @@ examples:
 
     runlib.in_toto_run(args.step_name, args.materials, args.products,
         args.link_cmd, args.record_streams, key, gpg_keyid, gpg_use_default,
-        args.gpg_home, args.exclude_patterns, args.base_path)
+        args.gpg_home, args.exclude_patterns, args.base_path,
+        record_merkle_roots=args.merkle_roots)
 
   except Exception as e:
     log.error("(in-toto-run) {0}: {1}".format(type(e).__name__, e))
@@ -109,6 +109,7 @@ from in_toto import exceptions, util
 from in_toto.models.link import FILENAME_FORMAT
 from in_toto.models.metadata import Metablock
 import in_toto.gpg.functions
+import in_toto.manifest
 
 import securesystemslib.formats
 
@@ -190,6 +191,11 @@ def _sign_and_dump_metadata(metadata, args):
     log.info("Dumping {0} to '{1}'...".format(metadata.type_, out_path))
 
     metadata.dump(out_path)
+
+    # Keep the link manifest in the output directory up to date
+    if metadata.type_ == "link":
+      in_toto.manifest.add_link_to_manifest(out_path, metadata)
+
     sys.exit(0)
 
   except Exception as e:
@@ -35,7 +35,8 @@ The verification includes the following checks:
     link files, adhere to the artifact rules specified by the step.
 
 Additionally, inspection commands defined in the layout are executed
-sequentially, followed by applying the inspection's artifact rules.
+sequentially (or concurrently, see '--inspection-workers'), followed by
+applying the inspection's artifact rules.
 
 The command returns a nonzero value if verification fails and zero otherwise.
 
@@ -48,6 +49,105 @@ optional arguments:
   --gpg-home <path>     Path to GPG keyring to load GPG key identified by '--
                         gpg' option. If '--gpg-home' is not passed, the
                         default GPG keyring is used.
+  --signature-cache <path>
+                        Path to directory used to cache successful signature
+                        verifications across invocations. Must only be
+                        writable by the verifying user. If not passed,
+                        signatures are not cached.
+  --step-cache <path>   Path to directory used to cache the results of steps
+                        that passed verification, which are not verified
+                        again if the layout and relevant links are unchanged.
+                        Must only be writable by the verifying user. If not
+                        passed, step results are not cached.
+  --inspection-cache <path>
+                        Path to directory used to cache the links and products
+                        of successful inspections. Inspections, whose command,
+                        relevant environment variables and materials are
+                        unchanged, are not run again, but their products are
+                        restored. Must only be writable by the verifying user.
+                        If not passed, inspections are not cached.
+  --max-workers <number>
+                        Maximum number of sublayouts verified concurrently,
+                        across all levels of sublayout nesting. Inspections of
+                        concurrently verified sublayouts are run in temporary
+                        copies of the current working directory, which are
+                        only created for sublayouts with inspections. Default
+                        is 1, i.e. sublayouts are verified sequentially.
+  --inspection-workers <number>
+                        Maximum number of inspections run concurrently, each
+                        in a temporary copy of the current working directory.
+                        Default is 1, i.e. inspections are run sequentially.
+  --link-workers <number>
+                        Maximum number of link metadata files loaded
+                        concurrently, e.g. to hide per-file latency of network
+                        filesystems. Default is 1, i.e. link files are loaded
+                        sequentially.
+  --rule-workers <number>
+                        Maximum number of worker processes, in which the
+                        artifact rules of steps, and subsequently
+                        inspections, are verified concurrently. Default is
+                        1, i.e. rules are verified sequentially.
+  --inspection-hardlinks
+                        Hardlink instead of copy files into the working
+                        directory copies of concurrently run inspections,
+                        sublayouts and products. Only use if inspections don't
+                        modify files in place.
+  --rule-stats <path>   Path to write JSON statistics for each artifact rule
+                        of the layout's steps and inspections to, e.g. the
+                        number of examined and consumed artifacts and the
+                        elapsed time. Written even if verification fails.
+                        Ignored with '--batch'.
+  --batch <path>        Path to a JSON file with a list of products to verify
+                        against the layout, instead of the product in '--link-
+                        dir'. Each product is an object with a "link_dir" and
+                        optional "working_dir", "inspection_link_dir" and
+                        "substitution_parameters". Relative paths are resolved
+                        against the directory of the batch file. Inspection
+                        links are written to each product's
+                        "inspection_link_dir", or else its "working_dir". The
+                        layout signatures and expiration are verified only
+                        once.
+  --product-workers <number>
+                        Maximum number of products in '--batch' verified
+                        concurrently, each with inspections run in a temporary
+                        copy of its working directory. Default is 1.
+  --report <path>       Path to write the JSON report of a '--batch'
+                        verification to, with a result for each product. If
+                        not passed, the report is written to stdout.
+  --workers <address> [<address> ...]
+                        Addresses of 'in-toto-verify-worker' processes, to
+                        distribute the verification of the steps' links and
+                        artifact rules to, one task per address at a time.
+                        The link directory must be accessible by the workers
+                        at the same absolute path. Ignored with '--batch'.
+                        Cannot be used with '--max-workers', '--rule-workers'
+                        or '--step-cache'.
+  --worker-secret-file <path>
+                        Path to a file with the secret of the '--workers'
+                        (see 'in-toto-verify-worker --secret-file'), which
+                        authenticates tasks and responses.
+  --watch               Wait for the link files of all steps to arrive in the
+                        link directory, reporting the steps that are still
+                        missing links, and verify the supply chain once each
+                        step has enough validly signed links. New and changed
+                        link files are verified once when they arrive.
+                        Ignored with '--batch'.
+  --watch-interval <seconds>
+                        Seconds between checks of the link directory in '--
+                        watch' mode. Default is 2.
+  --watch-timeout <seconds>
+                        Seconds to wait for links in '--watch' mode at most.
+                        If not passed, wait indefinitely.
+  --receipt <path>      Path to write a verification receipt to, if
+                        verification passes, signed with '--receipt-key'.
+                        Downstream consumers can check the receipt with 'in-
+                        toto-verify-receipt' instead of verifying the supply
+                        chain again. Cannot be used with '--batch', '--watch'
+                        or '--workers'.
+  --receipt-key <path>  Path to a private key to sign the receipt with.
+  --receipt-key-type {ed25519,rsa}
+                        Specify the key-type of the key specified by the '--
+                        receipt-key' option. If not passed, default is "rsa".
   -v, --verbose         Verbose execution.
   -q, --quiet           Suppress all output.
 
@@ -88,20 +188,78 @@ examples:
       in-toto-verify --layout root.layout \
       --gpg 8465A1E2E0FB2B40ADB2478E18FB3F537E0C8A17 --gpg-home ~/.gnupg
 
+
+  Verify the supply chains of all products listed in 'products.json' against
+  'root.layout', four at a time, and write the results to 'report.json'.
+
+      in-toto-verify --layout root.layout --layout-keys key_file.pub \
+          --batch products.json --product-workers 4 --report report.json
+
+
+  Verify supply chain in 'root.layout' with links in the shared directory
+  '/mnt/links/build', distributed to two verification workers, which share
+  the secret in 'worker.secret'.
+
+      in-toto-verify --layout root.layout --layout-keys key_file.pub \
+          --link-dir /mnt/links/build --workers host1:8788 host2:8788 \
+          --worker-secret-file worker.secret
+
+
+  Wait up to ten hours for the links of all steps of 'root.layout' to arrive
+  in 'link_dir' and verify the supply chain once they are complete.
+
+      in-toto-verify --layout root.layout --layout-keys key_file.pub \
+          --link-dir link_dir --watch --watch-timeout 36000
+
+
+  Verify supply chain in 'root.layout' and write a receipt signed with the
+  private key 'verifier' to 'product.receipt'.
+
+      in-toto-verify --layout root.layout --layout-keys key_file.pub \
+          --receipt product.receipt --receipt-key verifier
+
 """
+import os
 import sys
+import json
 import argparse
 import logging
 
+import six
+
 import in_toto.util
+import in_toto.settings
 from in_toto import verifylib
+from in_toto import verify_watch
+from in_toto import verify_worker
 from in_toto.models.metadata import Metablock
 
+try:
+  import resource
+
+except ImportError: # pragma: no cover
+  # Not available on Windows
+  resource = None
+
 # Command line interfaces should use in_toto base logger (c.f. in_toto.log)
 log = logging.getLogger("in_toto")
 
 
 
+def _get_peak_memory_usage():
+  """Private helper to return the peak resident set size of this process in
+  bytes, or None if it cannot be determined on this platform. """
+  if resource is None: # pragma: no cover
+    return None
+
+  max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+  if sys.platform == "darwin": # pragma: no cover
+    return max_rss
+
+  return max_rss * 1024
+
+
 def main():
   """Parse arguments and call in_toto_verify. """
 
@@ -120,7 +278,8 @@ The verification includes the following checks:
     link files, adhere to the artifact rules specified by the step.
 
 Additionally, inspection commands defined in the layout are executed
-sequentially, followed by applying the inspection's artifact rules.
+sequentially (or concurrently, see '--inspection-workers'), followed by
+applying the inspection's artifact rules.
 
 The command returns a nonzero value if verification fails and zero otherwise.
 """)
@@ -149,6 +308,36 @@ examples:
       --gpg 8465A1E2E0FB2B40ADB2478E18FB3F537E0C8A17 --gpg-home ~/.gnupg
 
 
+  Verify the supply chains of all products listed in 'products.json' against
+  'root.layout', four at a time, and write the results to 'report.json'.
+
+      {prog} --layout root.layout --layout-keys key_file.pub \\
+          --batch products.json --product-workers 4 --report report.json
+
+
+  Verify supply chain in 'root.layout' with links in the shared directory
+  '/mnt/links/build', distributed to two verification workers, which share
+  the secret in 'worker.secret'.
+
+      {prog} --layout root.layout --layout-keys key_file.pub \\
+          --link-dir /mnt/links/build --workers host1:8788 host2:8788 \\
+          --worker-secret-file worker.secret
+
+
+  Wait up to ten hours for the links of all steps of 'root.layout' to arrive
+  in 'link_dir' and verify the supply chain once they are complete.
+
+      {prog} --layout root.layout --layout-keys key_file.pub \\
+          --link-dir link_dir --watch --watch-timeout 36000
+
+
+  Verify supply chain in 'root.layout' and write a receipt signed with the
+  private key 'verifier' to 'product.receipt'.
+
+      {prog} --layout root.layout --layout-keys key_file.pub \\
+          --receipt product.receipt --receipt-key verifier
+
+
 """.format(prog=parser.prog)
 
 
@@ -193,6 +382,127 @@ examples:
       " by '--gpg' option.  If '--gpg-home' is not passed, the default GPG"
       " keyring is used."))
 
+  parser.add_argument("--signature-cache", dest="signature_cache", type=str,
+      metavar="<path>", help=("Path to directory used to cache successful"
+      " signature verifications across invocations. Must only be writable by"
+      " the verifying user. If not passed, signatures are not cached."))
+
+  parser.add_argument("--step-cache", dest="step_cache", type=str,
+      metavar="<path>", help=("Path to directory used to cache the results of"
+      " steps that passed verification, which are not verified again if the"
+      " layout and relevant links are unchanged. Must only be writable by the"
+      " verifying user. If not passed, step results are not cached."))
+
+  parser.add_argument("--inspection-cache", dest="inspection_cache",
+      type=str, metavar="<path>", help=("Path to directory used to cache the"
+      " links and products of successful inspections. Inspections, whose"
+      " command, relevant environment variables and materials are unchanged,"
+      " are not run again, but their products are restored. Must only be"
+      " writable by the verifying user. If not passed, inspections are not"
+      " cached."))
+
+  parser.add_argument("--max-workers", dest="max_workers", type=int,
+      metavar="<number>", default=1, help=("Maximum number of sublayouts"
+      " verified concurrently, across all levels of sublayout nesting."
+      " Inspections of concurrently verified sublayouts are run in temporary"
+      " copies of the current working directory, which are only created for"
+      " sublayouts with inspections. Default is 1, i.e. sublayouts are"
+      " verified sequentially."))
+
+  parser.add_argument("--inspection-workers", dest="inspection_workers",
+      type=int, metavar="<number>", default=1, help=("Maximum number of"
+      " inspections run concurrently, each in a temporary copy of the current"
+      " working directory. Default is 1, i.e. inspections are run"
+      " sequentially."))
+
+  parser.add_argument("--link-workers", dest="link_workers", type=int,
+      metavar="<number>", default=1, help=("Maximum number of link metadata"
+      " files loaded concurrently, e.g. to hide per-file latency of network"
+      " filesystems. Default is 1, i.e. link files are loaded sequentially."))
+
+  parser.add_argument("--rule-workers", dest="rule_workers", type=int,
+      metavar="<number>", default=1, help=("Maximum number of worker"
+      " processes, in which the artifact rules of steps, and subsequently"
+      " inspections, are verified concurrently. Default is 1, i.e. rules are"
+      " verified sequentially."))
+
+  parser.add_argument("--inspection-hardlinks", dest="inspection_hardlinks",
+      action="store_true", help=("Hardlink instead of copy files into the"
+      " working directory copies of concurrently run inspections, sublayouts"
+      " and products. Only use if inspections don't modify files in place."))
+
+  parser.add_argument("--rule-stats", dest="rule_stats", type=str,
+      metavar="<path>", help=("Path to write JSON statistics for each"
+      " artifact rule of the layout's steps and inspections to, e.g. the"
+      " number of examined and consumed artifacts and the elapsed time."
+      " Written even if verification fails. Ignored with '--batch'."))
+
+  parser.add_argument("--batch", dest="batch", type=str, metavar="<path>",
+      help=("Path to a JSON file with a list of products to verify against"
+      " the layout, instead of the product in '--link-dir'. Each product is"
+      " an object with a \"link_dir\" and optional \"working_dir\","
+      " \"inspection_link_dir\" and \"substitution_parameters\". Relative"
+      " paths are resolved against the directory of the batch file."
+      " Inspection links are written to each product's"
+      " \"inspection_link_dir\", or else its \"working_dir\". The layout"
+      " signatures and expiration are verified only once."))
+
+  parser.add_argument("--product-workers", dest="product_workers", type=int,
+      metavar="<number>", default=1, help=("Maximum number of products in"
+      " '--batch' verified concurrently, each with inspections run in a"
+      " temporary copy of its working directory. Default is 1."))
+
+  parser.add_argument("--report", dest="report", type=str, metavar="<path>",
+      help=("Path to write the JSON report of a '--batch' verification to,"
+      " with a result for each product. If not passed, the report is written"
+      " to stdout."))
+
+  parser.add_argument("--workers", dest="workers", type=str,
+      metavar="<address>", nargs="+", help=("Addresses of"
+      " 'in-toto-verify-worker' processes, to distribute the verification of"
+      " the steps' links and artifact rules to, one task per address at a"
+      " time. The link directory must be accessible by the workers at the"
+      " same absolute path. Ignored with '--batch'. Cannot be used with"
+      " '--max-workers', '--rule-workers' or '--step-cache'."))
+
+  parser.add_argument("--worker-secret-file", dest="worker_secret_file",
+      type=str, metavar="<path>", help=("Path to a file with the secret of"
+      " the '--workers' (see 'in-toto-verify-worker --secret-file'), which"
+      " authenticates tasks and responses."))
+
+  parser.add_argument("--watch", dest="watch", action="store_true",
+      help=("Wait for the link files of all steps to arrive in the link"
+      " directory, reporting the steps that are still missing links, and"
+      " verify the supply chain once each step has enough validly signed"
+      " links. New and changed link files are verified once when they"
+      " arrive. Ignored with '--batch'."))
+
+  parser.add_argument("--watch-interval", dest="watch_interval", type=float,
+      metavar="<seconds>", default=verify_watch.DEFAULT_POLL_INTERVAL,
+      help=("Seconds between checks of the link directory in '--watch' mode."
+      " Default is {:g}.".format(verify_watch.DEFAULT_POLL_INTERVAL)))
+
+  parser.add_argument("--watch-timeout", dest="watch_timeout", type=float,
+      metavar="<seconds>", help=("Seconds to wait for links in '--watch' mode"
+      " at most. If not passed, wait indefinitely."))
+
+  parser.add_argument("--receipt", dest="receipt", type=str,
+      metavar="<path>", help=("Path to write a verification receipt to, if"
+      " verification passes, signed with '--receipt-key'. Downstream"
+      " consumers can check the receipt with 'in-toto-verify-receipt' instead"
+      " of verifying the supply chain again. Cannot be used with '--batch',"
+      " '--watch' or '--workers'."))
+
+  parser.add_argument("--receipt-key", dest="receipt_key", type=str,
+      metavar="<path>", help=("Path to a private key to sign the receipt"
+      " with."))
+
+  parser.add_argument("--receipt-key-type", dest="receipt_key_type",
+      type=str, choices=in_toto.util.SUPPORTED_KEY_TYPES,
+      default=in_toto.util.KEY_TYPE_RSA, help=("Specify the key-type of the"
+      " key specified by the '--receipt-key' option. If not passed, default"
+      " is \"rsa\"."))
+
   verbosity_args = parser.add_mutually_exclusive_group(required=False)
   verbosity_args.add_argument("-v", "--verbose", dest="verbose",
       help="Verbose execution.", action="store_true")
@@ -211,6 +521,34 @@ examples:
     parser.error("wrong arguments: specify at least one of"
         " `--layout-keys path [path ...]` or `--gpg id [id ...]`")
 
+  if args.receipt and not args.receipt_key:
+    parser.print_help()
+    parser.error("wrong arguments: `--receipt` requires `--receipt-key`")
+
+  # Workers verify links and rules, sublayouts are verified sequentially and
+  # no step results are cached
+  if args.workers and not args.batch and (args.max_workers != 1 or args.rule_workers != 1 or
+      args.step_cache):
+    parser.print_help()
+    parser.error("conflicting arguments: `--workers` cannot be used with"
+        " `--max-workers`, `--rule-workers` or `--step-cache`")
+
+  if args.receipt and (args.batch or args.watch or args.workers):
+    parser.print_help()
+    parser.error("conflicting arguments: `--receipt` cannot be used with"
+        " `--batch`, `--watch` or `--workers`")
+
+  if args.signature_cache:
+    in_toto.settings.SIGNATURE_CACHE_PATH = args.signature_cache
+
+  if args.step_cache:
+    in_toto.settings.STEP_CACHE_PATH = args.step_cache
+
+  if args.inspection_cache:
+    in_toto.settings.INSPECTION_CACHE_PATH = args.inspection_cache
+
+  rule_stats = [] if args.rule_stats else None
+
   try:
     log.info("Loading layout...")
     layout = Metablock.load(args.layout)
@@ -228,12 +566,112 @@ examples:
           in_toto.util.import_gpg_public_keys_from_keyring_as_dict(
           args.gpg, gpg_home=args.gpg_home))
 
-    verifylib.in_toto_verify(layout, layout_key_dict, args.link_dir)
+    if args.batch:
+      log.info("Loading batch products...")
+      with open(args.batch, "r") as fp:
+        products = json.load(fp)
+
+      # Paths in the batch file are relative to the batch file, not the cwd
+      batch_dir = os.path.dirname(os.path.abspath(args.batch))
+      for product in products:
+        for key in ["link_dir", "working_dir", "inspection_link_dir"]:
+          if isinstance(product, dict) and isinstance(product.get(key),
+              six.string_types):
+            product[key] = os.path.join(batch_dir, product[key])
+
+      results = verifylib.in_toto_verify_batch(layout, layout_key_dict,
+          products, product_workers=args.product_workers,
+          max_workers=args.max_workers,
+          inspection_workers=args.inspection_workers,
+          inspection_hardlinks=args.inspection_hardlinks,
+          link_workers=args.link_workers, rule_workers=args.rule_workers)
+
+      report = json.dumps(results, indent=1, sort_keys=True)
+      if args.report:
+        with open(args.report, "w") as fp:
+          fp.write(report)
+
+      else:
+        sys.stdout.write(report + "\n")
+
+      failed = [result for result in results if not result["success"]]
+      if failed:
+        log.error("(in-toto-verify) {0} of {1} products failed"
+            " verification.".format(len(failed), len(results)))
+        sys.exit(1)
+
+    elif args.watch:
+      def _report_missing_steps(missing_steps):
+        if args.quiet:
+          return
+
+        for status in missing_steps:
+          sys.stdout.write("Waiting for step '{}': {} of {} link(s)\n".format(
+              status["name"], len(status["verified"]), status["threshold"]))
+
+        if not missing_steps:
+          sys.stdout.write("All steps have enough links.\n")
+        sys.stdout.flush()
+
+      verify_watch.in_toto_verify_watch(layout, layout_key_dict,
+          link_dir_path=args.link_dir, poll_interval=args.watch_interval,
+          timeout=args.watch_timeout, progress_callback=_report_missing_steps,
+          max_workers=args.max_workers,
+          inspection_workers=args.inspection_workers,
+          inspection_hardlinks=args.inspection_hardlinks,
+          link_workers=args.link_workers, rule_stats=rule_stats,
+          rule_workers=args.rule_workers)
+
+    elif args.workers:
+      secret = None
+      if args.worker_secret_file:
+        secret = verify_worker.load_secret(args.worker_secret_file)
+
+      verify_worker.in_toto_verify_distributed(layout, layout_key_dict,
+          args.workers, link_dir_path=args.link_dir,
+          inspection_workers=args.inspection_workers,
+          inspection_hardlinks=args.inspection_hardlinks,
+          link_workers=args.link_workers, rule_stats=rule_stats,
+          secret=secret)
+
+    elif args.receipt:
+      log.info("Loading receipt key...")
+      receipt_key = in_toto.util.import_private_key_from_file(
+          args.receipt_key, args.receipt_key_type)
+
+      receipt = verifylib.in_toto_verify_with_receipt(layout,
+          layout_key_dict, receipt_key, link_dir_path=args.link_dir,
+          max_workers=args.max_workers,
+          inspection_workers=args.inspection_workers,
+          inspection_hardlinks=args.inspection_hardlinks,
+          link_workers=args.link_workers, rule_stats=rule_stats,
+          rule_workers=args.rule_workers)
+
+      log.info("Writing receipt to '{}'...".format(args.receipt))
+      receipt.dump(args.receipt)
+
+    else:
+      verifylib.in_toto_verify(layout, layout_key_dict, args.link_dir,
+          max_workers=args.max_workers,
+          inspection_workers=args.inspection_workers,
+          inspection_hardlinks=args.inspection_hardlinks,
+          link_workers=args.link_workers, rule_stats=rule_stats,
+          rule_workers=args.rule_workers)
 
   except Exception as e:
     log.error("(in-toto-verify) {0}: {1}".format(type(e).__name__, e))
     sys.exit(1)
 
+  finally:
+    if rule_stats is not None:
+      with open(args.rule_stats, "w") as fp:
+        json.dump(rule_stats, fp, indent=1, sort_keys=True)
+
+    peak_memory_usage = _get_peak_memory_usage()
+    if peak_memory_usage is not None:
+      log.info("Peak memory usage: {:.1f} MiB".format(
+          peak_memory_usage / (1024.0 * 1024)))
+
   sys.exit(0)
 
 
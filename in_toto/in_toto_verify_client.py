@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+"""
+<Program Name>
+  in_toto_verify_client.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Provides a command line interface for verify_server.request_verification.
+
+<Return Codes>
+  2 if an exception occurred during argument parsing
+  1 if an exception occurred (server unreachable or verification failed)
+  0 if no exception occurred (verification passed)
+
+<Help>
+usage: in-toto-verify-client <named arguments> [optional arguments]
+
+Requests verification of a software supply chain from a running
+'in-toto-verify-server', which uses the layout keys it was started with.
+
+The command returns a nonzero value if verification fails and zero otherwise.
+
+optional arguments:
+  -h, --help            show this help message and exit
+  --server <address>    Address of the verification server, either
+                        'unix:<path>' or '<host>:<port>'. Default is
+                        'unix:~/.in-toto-verify-server.sock'.
+  --layout-sha256 <digest>
+                        SHA256 digest of a layout file, which the server
+                        loaded for a prior request, instead of '--layout'.
+  --layout-keyids <keyid> [<keyid> ...]
+                        Keyids of the server's layout keys, used to verify the
+                        layout. If not passed, all layout keys of the server
+                        are used.
+  --link-dir <path>     Path to directory where link metadata files for steps
+                        defined in the root layout should be loaded from. If
+                        not passed links are loaded from the current working
+                        directory.
+  --param <key>=<value> [<key>=<value> ...]
+                        Parameter substitution value(s) for the layout.
+  --timeout <seconds>   Seconds to wait for the server's response. If not
+                        passed, wait indefinitely.
+  -v, --verbose         Verbose execution.
+  -q, --quiet           Suppress all output.
+
+required named arguments:
+  -l <path>, --layout <path>
+                        Path to root layout specifying the software supply
+                        chain to be verified.
+
+examples:
+  Verify supply chain in 'root.layout' with links in the current working
+  directory, using a server listening on a Unix domain socket.
+
+      in-toto-verify-client --server unix:/run/in-toto.sock \
+          --layout root.layout
+
+"""
+import os
+import sys
+import argparse
+import logging
+
+from in_toto import verify_server
+
+# Command line interfaces should use in_toto base logger (c.f. in_toto.log)
+log = logging.getLogger("in_toto")
+
+
+
+def _parse_param(value):
+  """Private argparse type to parse a '<key>=<value>' string. """
+  key, sep, param = value.partition("=")
+  if not sep or not key:
+    raise argparse.ArgumentTypeError("expected '<key>=<value>', got"
+        " '{}'".format(value))
+
+  return key, param
+
+
+def main():
+  """Parse arguments and request verification from a verification server. """
+
+  parser = argparse.ArgumentParser(
+      formatter_class=argparse.RawDescriptionHelpFormatter,
+      description="""
+Requests verification of a software supply chain from a running
+'in-toto-verify-server', which uses the layout keys it was started with.
+
+The command returns a nonzero value if verification fails and zero otherwise.
+""")
+
+  parser.usage = "%(prog)s <named arguments> [optional arguments]"
+
+  parser.epilog = """
+examples:
+  Verify supply chain in 'root.layout' with links in the current working
+  directory, using a server listening on a Unix domain socket.
+
+      {prog} --server unix:/run/in-toto.sock \\
+          --layout root.layout
+
+""".format(prog=parser.prog)
+
+  named_args = parser.add_argument_group("required named arguments")
+
+  parser.add_argument("--server", dest="server", type=str,
+      metavar="<address>", default=verify_server.DEFAULT_ADDRESS,
+      help=("Address of the verification server, either 'unix:<path>' or"
+      " '<host>:<port>'. Default is '{}'.".format(
+      verify_server.DEFAULT_ADDRESS)))
+
+  layout_args = named_args.add_mutually_exclusive_group(required=True)
+  layout_args.add_argument("-l", "--layout", type=str, metavar="<path>",
+      help=("Path to root layout specifying the software supply chain to be"
+      " verified."))
+
+  layout_args.add_argument("--layout-sha256", dest="layout_sha256", type=str,
+      metavar="<digest>", help=("SHA256 digest of a layout file, which the"
+      " server loaded for a prior request, instead of '--layout'."))
+
+  parser.add_argument("--layout-keyids", dest="layout_keyids", type=str,
+      metavar="<keyid>", nargs="+", help=("Keyids of the server's layout keys,"
+      " used to verify the layout. If not passed, all layout keys of the"
+      " server are used."))
+
+  parser.add_argument("--link-dir", dest="link_dir", type=str,
+      metavar="<path>", default=".", help=(
+          "Path to directory where link metadata files for steps defined in"
+          " the root layout should be loaded from. If not passed links are"
+          " loaded from the current working directory."))
+
+  parser.add_argument("--param", dest="params", type=_parse_param,
+      metavar="<key>=<value>", nargs="+", help=("Parameter substitution"
+      " value(s) for the layout."))
+
+  parser.add_argument("--timeout", dest="timeout", type=float,
+      metavar="<seconds>", help=("Seconds to wait for the server's response."
+      " If not passed, wait indefinitely."))
+
+  verbosity_args = parser.add_mutually_exclusive_group(required=False)
+  verbosity_args.add_argument("-v", "--verbose", dest="verbose",
+      help="Verbose execution.", action="store_true")
+
+  verbosity_args.add_argument("-q", "--quiet", dest="quiet",
+      help="Suppress all output.", action="store_true")
+
+  args = parser.parse_args()
+
+  log.setLevelVerboseOrQuiet(args.verbose, args.quiet)
+
+  request = {
+    "layout": args.layout,
+    "layout_sha256": args.layout_sha256,
+    "layout_keyids": args.layout_keyids,
+    "link_dir": args.link_dir,
+    # Inspections are run in the client's working directory
+    "working_dir": os.getcwd(),
+    "substitution_parameters": dict(args.params or [])
+  }
+
+  try:
+    log.info("Requesting verification from '{}'...".format(args.server))
+    response = verify_server.request_verification(args.server, request,
+        timeout=args.timeout)
+
+  except Exception as e:
+    log.error("(in-toto-verify-client) {0}: {1}".format(type(e).__name__, e))
+    sys.exit(1)
+
+  if not response.get("success"):
+    log.error("(in-toto-verify-client) {0}: {1}".format(
+        response.get("error_type"), response.get("error")))
+    sys.exit(1)
+
+  log.info("Verification passed (layout sha256: {}).".format(
+      response.get("layout_sha256")))
+  sys.exit(0)
+
+
+if __name__ == "__main__":
+  main()
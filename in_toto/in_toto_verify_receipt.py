@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+"""
+<Program Name>
+  in_toto_verify_receipt.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Provides a command line interface for verifylib.verify_receipt, which
+  checks a verification receipt, created with 'in-toto-verify --receipt',
+  instead of verifying the supply chain again.
+
+<Return Codes>
+  2 if an exception occurred during argument parsing
+  1 if an exception occurred (verification failed)
+  0 if no exception occurred (verification passed)
+
+<Help>
+usage: in-toto-verify-receipt <named arguments> [optional arguments]
+
+Checks a verification receipt, i.e. a statement of a verifier that a final
+product passed in-toto verification, created with 'in-toto-verify --receipt'.
+A receipt is only as trustworthy as the verifier, whose key is used to check
+its signature.
+
+The command checks that the receipt carries a valid signature for each passed
+verifier key and has not expired. Optionally, it checks that the receipt was
+created for the passed layout and that the passed artifacts are products of
+the receipt.
+
+optional arguments:
+  -h, --help            show this help message and exit
+  -t {ed25519,rsa} [{ed25519,rsa} ...], --key-types {ed25519,rsa} [{ed25519,rsa} ...]
+                        Specify the key-type of the keys specified by the '--
+                        receipt-keys' option. Number of values should be the
+                        same as the number of receipt keys. If not passed,
+                        default is "rsa" for all keys.
+  --gpg-home <path>     Path to GPG keyring to load GPG key identified by '--
+                        gpg' option. If '--gpg-home' is not passed, the
+                        default GPG keyring is used.
+  --layout <path>       Path to the layout, which the receipt must have been
+                        created for.
+  --products <path> [<path> ...]
+                        Paths to artifacts, which must be products of the
+                        receipt.
+  -v, --verbose         Verbose execution.
+  -q, --quiet           Suppress all output.
+
+required named arguments:
+  --receipt <path>      Path to the receipt to be checked.
+  -k <path> [<path> ...], --receipt-keys <path> [<path> ...]
+                        Paths to public key files of trusted verifiers.
+                        Passing at least one key using '--receipt-keys' and/or
+                        '--gpg' is required.
+  -g <id> [<id> ...], --gpg <id> [<id> ...]
+                        GPG keyid of trusted verifiers. Passing at least one
+                        key using '--receipt-keys' and/or '--gpg' is required.
+
+examples:
+  Check receipt 'product.receipt' with the public key 'verifier.pub' and that
+  'foo.tar.gz' is a product of the receipt.
+
+      in-toto-verify-receipt --receipt product.receipt \\
+          --receipt-keys verifier.pub --products foo.tar.gz
+
+"""
+import sys
+import argparse
+import logging
+
+import in_toto.util
+import in_toto.runlib
+from in_toto import verifylib
+from in_toto.models.metadata import Metablock
+
+# Command line interfaces should use in_toto base logger (c.f. in_toto.log)
+log = logging.getLogger("in_toto")
+
+
+
+def main():
+  """Parse arguments and call verify_receipt. """
+
+  parser = argparse.ArgumentParser(
+      formatter_class=argparse.RawDescriptionHelpFormatter,
+      description="""
+Checks a verification receipt, i.e. a statement of a verifier that a final
+product passed in-toto verification, created with 'in-toto-verify --receipt'.
+A receipt is only as trustworthy as the verifier, whose key is used to check
+its signature.
+
+The command checks that the receipt carries a valid signature for each passed
+verifier key and has not expired. Optionally, it checks that the receipt was
+created for the passed layout and that the passed artifacts are products of
+the receipt.""")
+
+  parser.usage = "%(prog)s <named arguments> [optional arguments]"
+
+  parser.epilog = """
+examples:
+  Check receipt 'product.receipt' with the public key 'verifier.pub' and that
+  'foo.tar.gz' is a product of the receipt.
+
+      {prog} --receipt product.receipt \\
+          --receipt-keys verifier.pub --products foo.tar.gz
+
+""".format(prog=parser.prog)
+
+  named_args = parser.add_argument_group("required named arguments")
+
+  named_args.add_argument("--receipt", type=str, required=True,
+      metavar="<path>", help=("Path to the receipt to be checked."))
+
+  named_args.add_argument("-k", "--receipt-keys", type=str, metavar="<path>",
+      nargs="+", help=("Paths to public key files of trusted verifiers."
+      " Passing at least one key using '--receipt-keys' and/or '--gpg' is"
+      " required."))
+
+  parser.add_argument("-t", "--key-types", dest="key_types",
+      type=str, choices=in_toto.util.SUPPORTED_KEY_TYPES,
+      nargs="+", help=("Specify the key-type of the keys specified by the"
+      " '--receipt-keys' option. Number of values should be the same as the"
+      " number of receipt keys. If not passed, default is \"rsa\" for all"
+      " keys."))
+
+  named_args.add_argument("-g", "--gpg", nargs="+", metavar="<id>",
+      help=("GPG keyid of trusted verifiers. Passing at least one key using"
+      " '--receipt-keys' and/or '--gpg' is required."))
+
+  parser.add_argument("--gpg-home", dest="gpg_home", type=str,
+      metavar="<path>", help=("Path to GPG keyring to load GPG key identified"
+      " by '--gpg' option. If '--gpg-home' is not passed, the default GPG"
+      " keyring is used."))
+
+  parser.add_argument("--layout", type=str, metavar="<path>", help=("Path to"
+      " the layout, which the receipt must have been created for."))
+
+  parser.add_argument("--products", type=str, metavar="<path>", nargs="+",
+      help=("Paths to artifacts, which must be products of the receipt."))
+
+  verbosity_args = parser.add_mutually_exclusive_group(required=False)
+  verbosity_args.add_argument("-v", "--verbose", dest="verbose",
+      help="Verbose execution.", action="store_true")
+
+  verbosity_args.add_argument("-q", "--quiet", dest="quiet",
+      help="Suppress all output.", action="store_true")
+
+  args = parser.parse_args()
+
+  log.setLevelVerboseOrQuiet(args.verbose, args.quiet)
+
+  # For verifying at least one of --receipt-keys or --gpg must be specified
+  if (args.receipt_keys == None) and (args.gpg == None):
+    parser.print_help()
+    parser.error("wrong arguments: specify at least one of"
+        " `--receipt-keys path [path ...]` or `--gpg id [id ...]`")
+
+  try:
+    log.info("Loading receipt...")
+    receipt = Metablock.load(args.receipt)
+
+    receipt_key_dict = {}
+    if args.receipt_keys != None:
+      log.info("Loading receipt key(s)...")
+      receipt_key_dict.update(
+          in_toto.util.import_public_keys_from_files_as_dict(
+          args.receipt_keys, args.key_types))
+
+    if args.gpg != None:
+      log.info("Loading receipt gpg key(s)...")
+      receipt_key_dict.update(
+          in_toto.util.import_gpg_public_keys_from_keyring_as_dict(
+          args.gpg, gpg_home=args.gpg_home))
+
+    layout = None
+    if args.layout:
+      log.info("Loading layout...")
+      layout = Metablock.load(args.layout)
+
+    products = None
+    if args.products:
+      log.info("Recording products...")
+      products = in_toto.runlib.record_artifacts_as_dict(args.products)
+
+    log.info("Verifying receipt...")
+    verifylib.verify_receipt(receipt, receipt_key_dict, layout=layout,
+        products=products)
+
+  except Exception as e:
+    log.error("(in-toto-verify-receipt) {0}: {1}".format(type(e).__name__, e))
+    sys.exit(1)
+
+  log.info("The receipt has been successfully verified.")
+  sys.exit(0)
+
+
+if __name__ == "__main__":
+  main()
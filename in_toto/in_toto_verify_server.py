@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+"""
+<Program Name>
+  in_toto_verify_server.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Provides a command line interface for verify_server, which runs a
+  verification server until interrupted.
+
+<Return Codes>
+  2 if an exception occurred during argument parsing
+  1 if the server could not be started
+  0 if the server was interrupted
+
+<Help>
+usage: in-toto-verify-server <named arguments> [optional arguments]
+
+Runs a verification server, which verifies software supply chains on request
+of 'in-toto-verify-client', and keeps parsed layouts, layout keys and link
+metadata in memory across requests.
+
+Layouts must be signed with the layout keys passed to the server. Requests
+may select a subset of these keys, but cannot pass other keys. Layouts, link
+directories and working directories of requests must be below one of the
+passed root directories.
+
+optional arguments:
+  -h, --help            show this help message and exit
+  --listen <address>    Address to listen on, either 'unix:<path>' for a Unix
+                        domain socket, which is only accessible by the current
+                        user, or '<host>:<port>' with a loopback host. Default
+                        is 'unix:~/.in-toto-verify-server.sock'.
+  -t {ed25519,rsa} [{ed25519,rsa} ...], --key-types {ed25519,rsa} [{ed25519,rsa} ...]
+                        Specify the key-type of the keys specified by the '--
+                        layout-keys' option. If '--key-types' is not passed,
+                        default key_type is assumed to be "rsa".
+  --gpg-home <path>     Path to GPG keyring to load GPG key identified by '--
+                        gpg' option. If '--gpg-home' is not passed, the
+                        default GPG keyring is used.
+  --max-workers <number>
+                        Maximum number of verification requests handled
+                        concurrently. Default is 4.
+  --cache-entries <number>
+                        Maximum number of layouts, and of link metadata files,
+                        kept in memory. Default is 1000.
+  -v, --verbose         Verbose execution.
+  -q, --quiet           Suppress all output.
+
+required named arguments:
+  --root <path> [<path> ...]
+                        Path(s) to directories, which the layouts, link
+                        directories and working directories of requests must
+                        be in.
+  -k <path> [<path> ...], --layout-keys <path> [<path> ...]
+                        Path(s) to PEM formatted public key(s), used to verify
+                        layout signatures. Passing at least one key using '--
+                        layout-keys' and/or '--gpg' is required.
+  -g <id> [<id> ...], --gpg <id> [<id> ...]
+                        GPG keyid, identifying a public key in the GPG
+                        keychain, used to verify layout signatures. Passing at
+                        least one key using '--layout-keys' and/or '--gpg' is
+                        required.
+
+examples:
+  Serve verification requests on a Unix domain socket, for layouts signed with
+  the private part of 'key_file.pub' and supply chains below '/srv/builds'.
+
+      in-toto-verify-server --listen unix:/run/in-toto.sock \
+          --root /srv/builds --layout-keys key_file.pub
+
+"""
+import sys
+import argparse
+import logging
+
+import in_toto.util
+from in_toto import verify_server
+
+# Command line interfaces should use in_toto base logger (c.f. in_toto.log)
+log = logging.getLogger("in_toto")
+
+
+
+def main():
+  """Parse arguments, load layout keys and serve verification requests. """
+
+  parser = argparse.ArgumentParser(
+      formatter_class=argparse.RawDescriptionHelpFormatter,
+      description="""
+Runs a verification server, which verifies software supply chains on request
+of 'in-toto-verify-client', and keeps parsed layouts, layout keys and link
+metadata in memory across requests.
+
+Layouts must be signed with the layout keys passed to the server. Requests
+may select a subset of these keys, but cannot pass other keys. Layouts, link
+directories and working directories of requests must be below one of the
+passed root directories.
+""")
+
+  parser.usage = "%(prog)s <named arguments> [optional arguments]"
+
+  parser.epilog = """
+examples:
+  Serve verification requests on a Unix domain socket, for layouts signed with
+  the private part of 'key_file.pub' and supply chains below '/srv/builds'.
+
+      {prog} --listen unix:/run/in-toto.sock \\
+          --root /srv/builds --layout-keys key_file.pub
+
+""".format(prog=parser.prog)
+
+  named_args = parser.add_argument_group("required named arguments")
+
+  parser.add_argument("--listen", dest="listen", type=str,
+      metavar="<address>", default=verify_server.DEFAULT_ADDRESS,
+      help=("Address to listen on, either 'unix:<path>' for a Unix domain"
+      " socket, which is only accessible by the current user, or"
+      " '<host>:<port>' with a loopback host. Default is"
+      " '{}'.".format(verify_server.DEFAULT_ADDRESS)))
+
+  named_args.add_argument("--root", dest="roots", type=str, metavar="<path>",
+      nargs="+", required=True, help=("Path(s) to directories, which the"
+      " layouts, link directories and working directories of requests must"
+      " be in."))
+
+  named_args.add_argument("-k", "--layout-keys", type=str, metavar="<path>",
+      nargs="+", help=(
+      "Path(s) to PEM formatted public key(s), used to verify layout"
+      " signatures. Passing at least one key using '--layout-keys' and/or"
+      " '--gpg' is required."))
+
+  parser.add_argument("-t", "--key-types", dest="key_types",
+      type=str, choices=in_toto.util.SUPPORTED_KEY_TYPES,
+      nargs="+", help=(
+      "Specify the key-type of the keys specified by the '--layout-keys'"
+      " option. If '--key-types' is not passed, default key_type is assumed"
+      " to be \"rsa\"."))
+
+  named_args.add_argument("-g", "--gpg", nargs="+", metavar="<id>",
+      help=(
+      "GPG keyid, identifying a public key in the GPG keychain, used to verify"
+      " layout signatures. Passing at least one key using '--layout-keys'"
+      " and/or '--gpg' is required."))
+
+  parser.add_argument("--gpg-home", dest="gpg_home", type=str,
+      metavar="<path>", help=("Path to GPG keyring to load GPG key identified"
+      " by '--gpg' option.  If '--gpg-home' is not passed, the default GPG"
+      " keyring is used."))
+
+  parser.add_argument("--max-workers", dest="max_workers", type=int,
+      metavar="<number>", default=verify_server.DEFAULT_MAX_WORKERS,
+      help=("Maximum number of verification requests handled concurrently."
+      " Default is {}.".format(verify_server.DEFAULT_MAX_WORKERS)))
+
+  parser.add_argument("--cache-entries", dest="cache_entries", type=int,
+      metavar="<number>", default=verify_server.DEFAULT_CACHE_ENTRIES,
+      help=("Maximum number of layouts, and of link metadata files, kept in"
+      " memory. Default is {}.".format(verify_server.DEFAULT_CACHE_ENTRIES)))
+
+  verbosity_args = parser.add_mutually_exclusive_group(required=False)
+  verbosity_args.add_argument("-v", "--verbose", dest="verbose",
+      help="Verbose execution.", action="store_true")
+
+  verbosity_args.add_argument("-q", "--quiet", dest="quiet",
+      help="Suppress all output.", action="store_true")
+
+  args = parser.parse_args()
+
+  log.setLevelVerboseOrQuiet(args.verbose, args.quiet)
+
+  if (args.layout_keys == None) and (args.gpg == None):
+    parser.print_help()
+    parser.error("wrong arguments: specify at least one of"
+        " `--layout-keys path [path ...]` or `--gpg id [id ...]`")
+
+  try:
+    layout_key_dict = {}
+    if args.layout_keys != None:
+      log.info("Loading layout key(s)...")
+      layout_key_dict.update(
+          in_toto.util.import_public_keys_from_files_as_dict(
+            args.layout_keys, args.key_types))
+
+    if args.gpg != None:
+      log.info("Loading layout gpg key(s)...")
+      layout_key_dict.update(
+          in_toto.util.import_gpg_public_keys_from_keyring_as_dict(
+          args.gpg, gpg_home=args.gpg_home))
+
+    service = verify_server.VerificationService(layout_key_dict, args.roots,
+        max_workers=args.max_workers, cache_entries=args.cache_entries)
+    server = verify_server.create_server(args.listen, service)
+
+  except Exception as e:
+    log.error("(in-toto-verify-server) {0}: {1}".format(type(e).__name__, e))
+    sys.exit(1)
+
+  log.info("Listening on '{}'...".format(args.listen))
+  try:
+    server.serve_forever()
+
+  except KeyboardInterrupt:
+    pass
+
+  finally:
+    server.server_close()
+
+  sys.exit(0)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+"""
+<Program Name>
+  in_toto_verify_worker.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Provides a command line interface for verify_worker, which runs a
+  verification worker until interrupted.
+
+<Return Codes>
+  2 if an exception occurred during argument parsing
+  1 if the worker could not be started
+  0 if the worker was interrupted
+
+<Help>
+usage: in-toto-verify-worker <named arguments> [optional arguments]
+
+Runs a verification worker, which verifies the links and artifact rules of
+individual steps on request of 'in-toto-verify --workers'. Link files are read
+from link directories below the passed link root, e.g. the mount point of a
+filesystem shared with the coordinator, and kept in memory across requests.
+Link signatures are verified with the passed functionary keys. Sublayouts are
+verified by the coordinator.
+
+Worker responses decide the outcome of verification. Workers only listen on
+a Unix domain socket or a loopback address, unless they are started with a
+secret, which authenticates the coordinator's tasks and the worker's
+responses.
+
+optional arguments:
+  -h, --help            show this help message and exit
+  --listen <address>    Address to listen on, either 'unix:<path>' for a Unix
+                        domain socket, which is only accessible by the current
+                        user, or '<host>:<port>', with a loopback host unless
+                        '--secret-file' is passed. Default is
+                        'localhost:8788'.
+  --secret-file <path>  Path to a file with a secret shared with the
+                        coordinator (see 'in-toto-verify --worker-secret-
+                        file'), which authenticates tasks and responses.
+                        Required to listen on a non-loopback address.
+  -t {ed25519,rsa} [{ed25519,rsa} ...], --key-types {ed25519,rsa} [{ed25519,rsa} ...]
+                        Specify the key-type of the keys specified by the '--
+                        keys' option. If '--key-types' is not passed, default
+                        key_type is assumed to be "rsa".
+  --gpg-home <path>     Path to GPG keyring to load GPG key identified by '--
+                        gpg' option. If '--gpg-home' is not passed, the
+                        default GPG keyring is used.
+  --max-workers <number>
+                        Maximum number of tasks performed concurrently.
+                        Default is 4.
+  --cache-entries <number>
+                        Maximum number of link metadata files kept in memory.
+                        Default is 1000.
+  -v, --verbose         Verbose execution.
+  -q, --quiet           Suppress all output.
+
+required named arguments:
+  --link-root <path>    Path to the directory, which link directories of
+                        verification tasks must be in.
+  -k <path> [<path> ...], --keys <path> [<path> ...]
+                        Path(s) to PEM formatted public key(s) of
+                        functionaries, used to verify link signatures. Passing
+                        at least one key using '--keys' and/or '--gpg' is
+                        required.
+  -g <id> [<id> ...], --gpg <id> [<id> ...]
+                        GPG keyid, identifying a public key of a functionary
+                        in the GPG keychain, used to verify link signatures.
+                        Passing at least one key using '--keys' and/or '--gpg'
+                        is required.
+
+examples:
+  Serve verification tasks for link directories below '/mnt/links', signed
+  with the private parts of 'alice.pub' or 'bob.pub', on all interfaces,
+  authenticated with the secret in 'worker.secret'.
+
+      in-toto-verify-worker --listen 0.0.0.0:8788 --link-root /mnt/links \
+          --keys alice.pub bob.pub --secret-file worker.secret
+
+"""
+import sys
+import argparse
+import logging
+
+import in_toto.util
+from in_toto import verify_server
+from in_toto import verify_worker
+
+# Command line interfaces should use in_toto base logger (c.f. in_toto.log)
+log = logging.getLogger("in_toto")
+
+
+
+def main():
+  """Parse arguments and serve verification tasks. """
+
+  parser = argparse.ArgumentParser(
+      formatter_class=argparse.RawDescriptionHelpFormatter,
+      description="""
+Runs a verification worker, which verifies the links and artifact rules of
+individual steps on request of 'in-toto-verify --workers'. Link files are read
+from link directories below the passed link root, e.g. the mount point of a
+filesystem shared with the coordinator, and kept in memory across requests.
+Link signatures are verified with the passed functionary keys. Sublayouts are
+verified by the coordinator.
+
+Worker responses decide the outcome of verification. Workers only listen on
+a Unix domain socket or a loopback address, unless they are started with a
+secret, which authenticates the coordinator's tasks and the worker's
+responses.
+""")
+
+  parser.usage = "%(prog)s <named arguments> [optional arguments]"
+
+  parser.epilog = """
+examples:
+  Serve verification tasks for link directories below '/mnt/links', signed
+  with the private parts of 'alice.pub' or 'bob.pub', on all interfaces,
+  authenticated with the secret in 'worker.secret'.
+
+      {prog} --listen 0.0.0.0:8788 --link-root /mnt/links \\
+          --keys alice.pub bob.pub --secret-file worker.secret
+
+""".format(prog=parser.prog)
+
+  named_args = parser.add_argument_group("required named arguments")
+
+  parser.add_argument("--listen", dest="listen", type=str,
+      metavar="<address>", default="localhost:8788", help=("Address to listen"
+      " on, either 'unix:<path>' for a Unix domain socket, which is only"
+      " accessible by the current user, or '<host>:<port>', with a loopback"
+      " host unless '--secret-file' is passed. Default is 'localhost:8788'."))
+
+  parser.add_argument("--secret-file", dest="secret_file", type=str,
+      metavar="<path>", help=("Path to a file with a secret shared with the"
+      " coordinator (see 'in-toto-verify --worker-secret-file'), which"
+      " authenticates tasks and responses. Required to listen on a"
+      " non-loopback address."))
+
+  named_args.add_argument("--link-root", dest="link_root", type=str,
+      metavar="<path>", required=True, help=("Path to the directory, which"
+      " link directories of verification tasks must be in."))
+
+  named_args.add_argument("-k", "--keys", type=str, metavar="<path>",
+      nargs="+", help=(
+      "Path(s) to PEM formatted public key(s) of functionaries, used to"
+      " verify link signatures. Passing at least one key using '--keys'"
+      " and/or '--gpg' is required."))
+
+  parser.add_argument("-t", "--key-types", dest="key_types",
+      type=str, choices=in_toto.util.SUPPORTED_KEY_TYPES,
+      nargs="+", help=(
+      "Specify the key-type of the keys specified by the '--keys' option. If"
+      " '--key-types' is not passed, default key_type is assumed to be"
+      " \"rsa\"."))
+
+  named_args.add_argument("-g", "--gpg", nargs="+", metavar="<id>",
+      help=(
+      "GPG keyid, identifying a public key of a functionary in the GPG"
+      " keychain, used to verify link signatures. Passing at least one key"
+      " using '--keys' and/or '--gpg' is required."))
+
+  parser.add_argument("--gpg-home", dest="gpg_home", type=str,
+      metavar="<path>", help=("Path to GPG keyring to load GPG key identified"
+      " by '--gpg' option.  If '--gpg-home' is not passed, the default GPG"
+      " keyring is used."))
+
+  parser.add_argument("--max-workers", dest="max_workers", type=int,
+      metavar="<number>", default=verify_worker.DEFAULT_MAX_WORKERS,
+      help=("Maximum number of tasks performed concurrently. Default is"
+      " {}.".format(verify_worker.DEFAULT_MAX_WORKERS)))
+
+  parser.add_argument("--cache-entries", dest="cache_entries", type=int,
+      metavar="<number>", default=verify_worker.DEFAULT_CACHE_ENTRIES,
+      help=("Maximum number of link metadata files kept in memory. Default is"
+      " {}.".format(verify_worker.DEFAULT_CACHE_ENTRIES)))
+
+  verbosity_args = parser.add_mutually_exclusive_group(required=False)
+  verbosity_args.add_argument("-v", "--verbose", dest="verbose",
+      help="Verbose execution.", action="store_true")
+
+  verbosity_args.add_argument("-q", "--quiet", dest="quiet",
+      help="Suppress all output.", action="store_true")
+
+  args = parser.parse_args()
+
+  log.setLevelVerboseOrQuiet(args.verbose, args.quiet)
+
+  if (args.keys == None) and (args.gpg == None):
+    parser.print_help()
+    parser.error("wrong arguments: specify at least one of"
+        " `--keys path [path ...]` or `--gpg id [id ...]`")
+
+  try:
+    key_dict = {}
+    if args.keys != None:
+      log.info("Loading functionary key(s)...")
+      key_dict.update(in_toto.util.import_public_keys_from_files_as_dict(
+          args.keys, args.key_types))
+
+    if args.gpg != None:
+      log.info("Loading functionary gpg key(s)...")
+      key_dict.update(in_toto.util.import_gpg_public_keys_from_keyring_as_dict(
+          args.gpg, gpg_home=args.gpg_home))
+
+    secret = None
+    if args.secret_file:
+      secret = verify_worker.load_secret(args.secret_file)
+
+    service = verify_worker.WorkerService(args.link_root, key_dict,
+        max_workers=args.max_workers, cache_entries=args.cache_entries)
+    server = verify_server.create_server(args.listen, service, secret=secret)
+
+  except Exception as e:
+    log.error("(in-toto-verify-worker) {0}: {1}".format(type(e).__name__, e))
+    sys.exit(1)
+
+  log.info("Listening on '{}'...".format(args.listen))
+  try:
+    server.serve_forever()
+
+  except KeyboardInterrupt:
+    pass
+
+  finally:
+    server.server_close()
+
+  sys.exit(0)
+
+
+if __name__ == "__main__":
+  main()
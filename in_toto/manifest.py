@@ -0,0 +1,200 @@
+"""
+<Program Name>
+  manifest.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Provides functions to maintain and read a manifest of the link metadata
+  files in a link directory.
+
+  The manifest is a file named `MANIFEST_FILENAME` in the link directory,
+  with one JSON object per line for each link file and signing keyid:
+
+    {
+      "step": <step name>,
+      "keyid": <full signing keyid>,
+      "filename": <link file name in the link directory>,
+      "length": <file size in bytes>,
+      "sha256": <hex digest of the file>
+    }
+
+  Entries are only ever appended, each with a single write, so that
+  concurrent writers don't corrupt each other's entries. Later entries for
+  the same step and keyid replace earlier ones. Verification uses the
+  manifest to find link files by full keyid and to detect modified or
+  truncated link files before parsing them.
+
+  NOTE: The manifest is not signed and only protects against accidental
+  modification. Link signatures are verified regardless of the manifest.
+
+"""
+import os
+import json
+import hashlib
+import logging
+
+import securesystemslib.formats
+import securesystemslib.schema
+import securesystemslib.exceptions
+
+from in_toto.exceptions import ManifestVerificationError
+
+# Inherits from in_toto base logger (c.f. in_toto.log)
+log = logging.getLogger(__name__)
+
+
+# Matches the default ARTIFACT_EXCLUDE_PATTERNS, so that the manifest is not
+# recorded as artifact
+MANIFEST_FILENAME = "in-toto.link-manifest"
+
+MANIFEST_ENTRY_SCHEMA = securesystemslib.schema.Object(
+    object_name="MANIFEST_ENTRY_SCHEMA",
+    step=securesystemslib.formats.NAME_SCHEMA,
+    keyid=securesystemslib.formats.KEYID_SCHEMA,
+    filename=securesystemslib.formats.NAME_SCHEMA,
+    length=securesystemslib.formats.LENGTH_SCHEMA,
+    sha256=securesystemslib.formats.HASH_SCHEMA)
+
+
+def _get_manifest_path(link_dir_path):
+  """Private helper to return the manifest path in the passed directory. """
+  return os.path.join(link_dir_path or ".", MANIFEST_FILENAME)
+
+
+def add_link_to_manifest(link_path, metablock):
+  """
+  <Purpose>
+    Append an entry for each signature of the passed link metadata, which was
+    written to the passed path, to the manifest in the same directory.
+
+  <Arguments>
+    link_path:
+            The path of the written link metadata file.
+
+    metablock:
+            The Metablock object containing the Link object, which was
+            written to link_path.
+
+  <Exceptions>
+    IOError, OSError if the link file cannot be read or the manifest cannot
+    be written.
+
+  <Side Effects>
+    Reads the link file and creates or appends to the manifest file.
+
+  """
+  with open(link_path, "rb") as fp:
+    data = fp.read()
+
+  link_dir_path, filename = os.path.split(link_path)
+  lines = []
+  for signature in metablock.signatures:
+    lines.append(json.dumps({
+      "step": metablock.signed.name,
+      "keyid": signature["keyid"],
+      "filename": filename,
+      "length": len(data),
+      "sha256": hashlib.sha256(data).hexdigest()
+    }, sort_keys=True) + "\n")
+
+  if not lines:
+    return
+
+  # A single write in append mode does not interleave with other writers
+  fd = os.open(_get_manifest_path(link_dir_path),
+      os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+  try:
+    os.write(fd, "".join(lines).encode("utf-8"))
+
+  finally:
+    os.close(fd)
+
+
+def load_manifest(link_dir_path):
+  """
+  <Purpose>
+    Load the manifest in the passed link directory.
+
+  <Arguments>
+    link_dir_path:
+            A path to a link directory.
+
+  <Returns>
+    A dictionary of manifest entries per (step name, keyid) tuple, which is
+    empty if there is no manifest. Malformed entries, e.g. of an interrupted
+    write, are skipped.
+
+  """
+  manifest = {}
+  try:
+    with open(_get_manifest_path(link_dir_path), "rb") as fp:
+      lines = fp.read().decode("utf-8", "replace").splitlines()
+
+  except (IOError, OSError):
+    return manifest
+
+  for line in lines:
+    try:
+      entry = json.loads(line)
+      MANIFEST_ENTRY_SCHEMA.check_match(entry)
+      # Only plain file names in the link directory are allowed
+      if (os.path.basename(entry["filename"]) != entry["filename"] or
+          entry["filename"] in [".", ".."]):
+        raise ValueError("bad filename '{}'".format(entry["filename"]))
+
+    except (ValueError, securesystemslib.exceptions.FormatError) as e:
+      log.warning("Skipping malformed link manifest entry in '{}': {}".format(
+          link_dir_path, e))
+      continue
+
+    manifest[(entry["step"], entry["keyid"])] = entry
+
+  return manifest
+
+
+def read_link_file(link_path, entry):
+  """
+  <Purpose>
+    Read the link file at the passed path and verify it against the passed
+    manifest entry.
+
+  <Arguments>
+    link_path:
+            The path of a link file.
+
+    entry:
+            A manifest entry for the link file.
+
+  <Exceptions>
+    IOError, OSError if the file cannot be read.
+
+    ManifestVerificationError if the file's size or digest does not match the
+    entry.
+
+  <Returns>
+    The file contents as bytes.
+
+  """
+  with open(link_path, "rb") as fp:
+    # Don't read more than expected from unexpectedly large files
+    data = fp.read(entry["length"] + 1)
+
+  if len(data) != entry["length"]:
+    raise ManifestVerificationError("Link file '{}' has unexpected size, it"
+        " was modified or truncated after it was recorded in the link"
+        " manifest.".format(link_path))
+
+  if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+    raise ManifestVerificationError("Link file '{}' has unexpected digest, it"
+        " was modified after it was recorded in the link manifest.".format(
+        link_path))
+
+  return data
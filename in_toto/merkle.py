@@ -0,0 +1,358 @@
+"""
+<Program Name>
+  merkle.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Provides Merkle trees over the materials or products of a link, to compare
+  artifact sets and prove membership of single artifacts without the full
+  artifact dictionaries.
+
+  The leaves of a tree are the digests of the artifact entries, i.e. of the
+  (path, hash dictionary) pairs, in the order of their sorted paths. Each
+  inner node is the digest of its two children. An odd node at the end of a
+  level is promoted unchanged to the next level. Leaf and inner node digests
+  use different prefixes, so that an inner node cannot pose as a leaf.
+
+  Merkle roots can be stored in a link's `environment` under the key
+  `merkle_roots`, which leaves the link format unchanged and is covered by
+  the link signature:
+
+    {
+      "materials": <hex digest>,
+      "products": <hex digest>
+    }
+
+"""
+import json
+import hashlib
+import binascii
+import logging
+
+import six
+
+from in_toto.exceptions import MerkleVerificationError
+
+# Inherits from in_toto base logger (c.f. in_toto.log)
+log = logging.getLogger(__name__)
+
+
+MERKLE_ROOTS_KEY = "merkle_roots"
+
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
+
+
+def _get_leaf_digest(path, hash_dict):
+  """Private helper to return the digest of an artifact entry. """
+  entry = json.dumps([path, hash_dict], sort_keys=True, separators=(",", ":"))
+  return hashlib.sha256(_LEAF_PREFIX + entry.encode("utf-8")).digest()
+
+
+def _get_node_digest(left, right):
+  """Private helper to return the digest of an inner node. """
+  return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+
+
+def _hexlify(digest):
+  """Private helper to return a digest as hex string on Python 2 and 3. """
+  return binascii.hexlify(digest).decode("ascii")
+
+
+
+class MerkleTree(object):
+  """
+  A Merkle tree over a dictionary of artifacts in the format of link
+  materials or products. Building the tree is O(n), subsequent proofs are
+  O(log n).
+
+  <Attributes>
+    paths:
+        the sorted artifact paths, i.e. the order of the leaves
+
+    levels:
+        a list of lists of node digests, from the leaves (first) to the root
+        (last)
+
+  """
+  def __init__(self, artifacts):
+    """
+    <Purpose>
+      Build a Merkle tree over the passed artifacts.
+
+    <Arguments>
+      artifacts:
+              A dictionary of artifacts in the format of link materials or
+              products.
+
+    """
+    self._artifacts = artifacts
+    self.paths = sorted(artifacts)
+
+    level = [_get_leaf_digest(path, artifacts[path]) for path in self.paths]
+    self.levels = [level]
+
+    while len(level) > 1:
+      next_level = [_get_node_digest(level[i], level[i + 1])
+          for i in six.moves.range(0, len(level) - 1, 2)]
+      if len(level) % 2:
+        next_level.append(level[-1])
+
+      level = next_level
+      self.levels.append(level)
+
+
+  @property
+  def root(self):
+    """Getter for the hex digest of the root node. The root of an empty tree
+    is the digest of the empty string. """
+    if not self.paths:
+      return hashlib.sha256(b"").hexdigest()
+
+    return _hexlify(self.levels[-1][0])
+
+
+  def get_proof(self, path):
+    """
+    <Purpose>
+      Return a membership proof for the artifact at the passed path, i.e. the
+      sibling digests on the way from the artifact's leaf to the root.
+
+    <Arguments>
+      path:
+              The path of an artifact in the tree.
+
+    <Exceptions>
+      KeyError if the path is not in the tree.
+
+    <Returns>
+      A list of ["left" | "right", <hex digest>] pairs, where "left" means
+      that the sibling is the left child of the parent node.
+
+    """
+    if path not in self._artifacts:
+      raise KeyError(path)
+
+    index = self._get_index(path)
+    proof = []
+    for level in self.levels[:-1]:
+      sibling_index = index ^ 1
+      # A promoted node has no sibling on this level
+      if sibling_index < len(level):
+        side = "left" if sibling_index < index else "right"
+        proof.append([side, _hexlify(level[sibling_index])])
+
+      index //= 2
+
+    return proof
+
+
+  def _get_index(self, path):
+    """Private method to return the leaf index of a path using bisection. """
+    low, high = 0, len(self.paths)
+    while low < high:
+      mid = (low + high) // 2
+      if self.paths[mid] < path:
+        low = mid + 1
+
+      else:
+        high = mid
+
+    return low
+
+
+  def _get_node(self, level_index, index):
+    """Private method to return the digest of the node at the passed position
+    or None, if there is no such node. Positions above the root are treated
+    like the root, which covers the same leaves. """
+    if level_index >= len(self.levels):
+      if index == 0 and self.paths:
+        return self.levels[-1][0]
+
+      return None
+
+    level = self.levels[level_index]
+    if index < len(level):
+      return level[index]
+
+    return None
+
+
+  def _collect_differing_leaves(self, other, level_index, index, indices):
+    """Private method to descend into the subtrees at the passed position of
+    this and the other tree, and collect the indices of differing leaves. """
+    node = self._get_node(level_index, index)
+    other_node = other._get_node(level_index, index)
+    if node == other_node:
+      return
+
+    if level_index == 0:
+      indices.append(index)
+      return
+
+    for child_index in [2 * index, 2 * index + 1]:
+      self._collect_differing_leaves(other, level_index - 1, child_index,
+          indices)
+
+
+  def diff(self, other):
+    """
+    <Purpose>
+      Return the artifacts that differ between this and the other tree. Only
+      subtrees with differing digests are visited, i.e. changed artifacts are
+      found in O(k log n) for k changes. Added or removed artifacts shift the
+      leaves that follow them, which in the worst case requires visiting all
+      of them.
+
+    <Arguments>
+      other:
+              A MerkleTree object.
+
+    <Returns>
+      A dictionary with the sorted lists of "added", "removed" and "modified"
+      artifact paths, where "added" means only present in the other tree.
+
+    """
+    height = max(len(self.levels), len(other.levels)) - 1
+    indices = []
+    self._collect_differing_leaves(other, height, 0, indices)
+
+    artifacts = {}
+    other_artifacts = {}
+    for index in indices:
+      if index < len(self.paths):
+        path = self.paths[index]
+        artifacts[path] = self._artifacts[path]
+
+      if index < len(other.paths):
+        path = other.paths[index]
+        other_artifacts[path] = other._artifacts[path]
+
+    # An artifact found at differing positions in both trees is unchanged,
+    # if its hash dictionary is equal.
+    return {
+      "added": sorted(set(other_artifacts) - set(artifacts)),
+      "removed": sorted(set(artifacts) - set(other_artifacts)),
+      "modified": sorted(path for path in set(artifacts) & set(other_artifacts)
+          if artifacts[path] != other_artifacts[path])
+    }
+
+
+
+def get_merkle_root(artifacts):
+  """
+  <Purpose>
+    Return the Merkle root over the passed artifacts.
+
+  <Arguments>
+    artifacts:
+            A dictionary of artifacts in the format of link materials or
+            products.
+
+  <Returns>
+    A hex digest string.
+
+  """
+  return MerkleTree(artifacts).root
+
+
+def verify_merkle_proof(root, path, hash_dict, proof):
+  """
+  <Purpose>
+    Verify that the artifact with the passed path and hash dictionary is a
+    member of the artifacts with the passed Merkle root, using a proof
+    created with `MerkleTree.get_proof`.
+
+  <Arguments>
+    root:
+            A Merkle root hex digest, e.g. from a link's environment.
+
+    path:
+            The artifact path.
+
+    hash_dict:
+            The artifact's hash dictionary, e.g. {"sha256": <hex digest>}.
+
+    proof:
+            A list of ["left" | "right", <hex digest>] pairs.
+
+  <Exceptions>
+    MerkleVerificationError if the proof is malformed or does not lead to the
+    passed root.
+
+  """
+  digest = _get_leaf_digest(path, hash_dict)
+  try:
+    for side, sibling in proof:
+      sibling = binascii.unhexlify(sibling)
+      if side == "left":
+        digest = _get_node_digest(sibling, digest)
+
+      elif side == "right":
+        digest = _get_node_digest(digest, sibling)
+
+      else:
+        raise ValueError("bad side '{}'".format(side))
+
+  except (TypeError, ValueError, binascii.Error) as e:
+    raise MerkleVerificationError("Malformed Merkle proof for artifact '{}':"
+        " {}".format(path, e))
+
+  if _hexlify(digest) != root:
+    raise MerkleVerificationError("Artifact '{}' is not a member of the"
+        " artifacts with Merkle root '{}'".format(path, root))
+
+
+def add_merkle_roots(link):
+  """
+  <Purpose>
+    Store the Merkle roots of the passed link's materials and products in the
+    link's environment.
+
+  <Arguments>
+    link:
+            A Link object.
+
+  <Side Effects>
+    Modifies the link's environment, which invalidates existing signatures.
+
+  """
+  link.environment[MERKLE_ROOTS_KEY] = {
+    "materials": get_merkle_root(link.materials),
+    "products": get_merkle_root(link.products)
+  }
+
+
+def verify_merkle_roots(link):
+  """
+  <Purpose>
+    Verify that the Merkle roots stored in the passed link's environment match
+    the link's materials and products.
+
+  <Arguments>
+    link:
+            A Link object.
+
+  <Exceptions>
+    MerkleVerificationError if the link has no Merkle roots or if they don't
+    match the link's artifacts.
+
+  """
+  roots = link.environment.get(MERKLE_ROOTS_KEY)
+  if not isinstance(roots, dict):
+    raise MerkleVerificationError("Link '{}' has no Merkle roots".format(
+        link.name))
+
+  for artifact_type in ["materials", "products"]:
+    if roots.get(artifact_type) != get_merkle_root(
+        getattr(link, artifact_type)):
+      raise MerkleVerificationError("Merkle root of {} of link '{}' does not"
+          " match".format(artifact_type, link.name))
@@ -23,6 +23,24 @@ import inspect
 import securesystemslib.formats
 
 
+# Key for attr.ib metadata, to mark optional attributes that are omitted from
+# the dictionary representation of a metadata object (and thus from its
+# signable bytes) if empty. This allows adding optional attributes to the
+# metadata model, without changing the signatures of existing metadata.
+OMIT_IF_EMPTY = "omit_if_empty"
+
+
+def _keep_attribute(attribute, value):
+  """Filter used with attr.asdict to omit empty optional attributes. """
+  return not (attribute.metadata.get(OMIT_IF_EMPTY) and not value)
+
+
+def asdict(obj):
+  """Returns the dictionary representation of an attr class metadata object,
+  without empty attributes marked with OMIT_IF_EMPTY (see above). """
+  return attr.asdict(obj, filter=_keep_attribute)
+
+
 
 class ValidationMixin(object):
   """ The validation mixin provides a self-inspecting method, validate, to
@@ -63,7 +81,7 @@ class Signable(ValidationMixin):
 
   def __repr__(self):
     """Returns an indented JSON string of the metadata object. """
-    return json.dumps(attr.asdict(self),
+    return json.dumps(asdict(self),
         indent=1, separators=(",", ": "), sort_keys=True)
 
   @property
@@ -76,7 +94,7 @@ class Signable(ValidationMixin):
     function might break backwards compatibility with existing metadata. """
 
     return securesystemslib.formats.encode_canonical(
-        attr.asdict(self)).encode("UTF-8")
+        asdict(self)).encode("UTF-8")
 
   @property
   def signable_dict(self):
@@ -89,4 +107,4 @@ class Signable(ValidationMixin):
     functions. This would require a change to securesystemslib.
     """
 
-    return attr.asdict(self)
+    return asdict(self)
@@ -38,7 +38,8 @@ from datetime import datetime
 from dateutil.relativedelta import relativedelta
 from dateutil.parser import parse
 
-from in_toto.models.common import Signable, ValidationMixin
+from in_toto.models.common import (Signable, ValidationMixin, asdict,
+    OMIT_IF_EMPTY)
 import in_toto.rulelib
 import in_toto.exceptions
 import in_toto.formats
@@ -370,6 +371,60 @@ class Layout(Signable):
     return list(self.keys.keys())
 
 
+  def get_step_verification_keys(self):
+    """
+    <Purpose>
+      Return the keys to verify the signatures of links for each step, by the
+      keyids that are authorized for the step. A keyid is authorized, if it
+      is listed in the step's pubkeys, or if it is a subkey of a listed key.
+      In case of subkeys the master key is used for verification.
+
+      The returned dictionary is built from the current steps and keys on
+      each call, callers that authorize many links, e.g. during verification,
+      should build it once and not modify the layout in the meantime.
+
+    <Returns>
+      A dictionary of the form:
+      {
+        <step name>: {
+          <authorized keyid>: <public key conformant with
+                               in_toto.formats.ANY_PUBKEY_SCHEMA>,
+          ...
+        }, ...
+      }
+
+    """
+    # NOTE: We assume that a given subkey can only belong to one master key
+    main_keys_for_subkeys = {}
+    for main_key in self.keys.values():
+      for sub_keyid in main_key.get("subkeys", {}):
+        main_keys_for_subkeys[sub_keyid] = main_key
+
+    # The first matching listed keyid determines the verification key, i.e.
+    # the key itself or its master key. Only the first step with a name is
+    # considered, see `get_step_by_name`.
+    step_keys = {}
+    for step in self.steps:
+      if step.name in step_keys:
+        continue
+
+      authorized_keys = {}
+      for authorized_keyid in step.pubkeys:
+        authorized_key = self.keys.get(authorized_keyid)
+        if authorized_key:
+          authorized_keys.setdefault(authorized_keyid, authorized_key)
+          for sub_keyid in authorized_key.get("subkeys", {}):
+            authorized_keys.setdefault(sub_keyid, authorized_key)
+
+        elif authorized_keyid in main_keys_for_subkeys:
+          authorized_keys.setdefault(authorized_keyid,
+              main_keys_for_subkeys[authorized_keyid])
+
+      step_keys[step.name] = authorized_keys
+
+    return step_keys
+
+
   def add_functionary_key(self, key):
     """
     <Purpose>
@@ -504,7 +559,8 @@ class Layout(Signable):
     <Purpose>
       Load functionary public keys from the GPG keychain, located at the
       passed GPG home path, identified by the passed GPG keyids, and add it to
-      the layout's dictionary of keys.
+      the layout's dictionary of keys. The keys are exported in bulk, see
+      `in_toto.gpg.functions.gpg_export_pubkeys`.
 
     <Arguments>
       gpg_keyid_list:
@@ -531,9 +587,14 @@ class Layout(Signable):
 
     """
     securesystemslib.formats.KEYIDS_SCHEMA.check_match(gpg_keyid_list)
+    if gpg_home: # pragma: no branch
+      securesystemslib.formats.PATH_SCHEMA.check_match(gpg_home)
+
+    keys = in_toto.gpg.functions.gpg_export_pubkeys(gpg_keyid_list,
+        homedir=gpg_home)
     key_dict = {}
     for gpg_keyid in gpg_keyid_list:
-      key = self.add_functionary_key_from_gpg_keyid(gpg_keyid, gpg_home)
+      key = self.add_functionary_key(keys[gpg_keyid])
       key_dict[key["keyid"]] = key
 
     return key_dict
@@ -647,7 +708,7 @@ class SupplyChainItem(ValidationMixin):
 
   def __repr__(self):
     """Returns an indented JSON string of the metadata object. """
-    return json.dumps(attr.asdict(self),
+    return json.dumps(asdict(self),
         indent=1, separators=(",", ": "), sort_keys=True)
 
 
@@ -864,6 +925,8 @@ class Inspection(SupplyChainItem):
   """
   _type = attr.ib()
   run = attr.ib()
+  # Optional, omitted if empty to not change signatures of existing layouts
+  artifact_paths = attr.ib(metadata={OMIT_IF_EMPTY: True})
 
 
   def __init__(self, **kwargs):
@@ -881,6 +944,11 @@ class Inspection(SupplyChainItem):
       run:
               The command to be executed during final product verification
 
+      artifact_paths:
+              A list of paths that are recorded as materials and products of
+              the inspection. If empty, the recorded paths are derived from
+              the artifact rules (see `verifylib.run_all_inspections`).
+
     <Exceptions>
       securesystemslib.exceptions.FormatError
               If the instantiated inspection has invalid properties, e.g.
@@ -890,6 +958,7 @@ class Inspection(SupplyChainItem):
     super(Inspection, self).__init__(**kwargs)
     self._type = "inspection"
     self.run = kwargs.get("run", [])
+    self.artifact_paths = kwargs.get("artifact_paths", [])
 
     self.validate()
 
@@ -947,3 +1016,8 @@ class Inspection(SupplyChainItem):
     if type(self.run) != list:
       raise securesystemslib.exceptions.FormatError(
           "The run field is malformed!")
+
+
+  def _validate_artifact_paths(self):
+    """Private method to check that the artifact paths are a list of paths."""
+    securesystemslib.formats.PATHS_SCHEMA.check_match(self.artifact_paths)
@@ -18,6 +18,9 @@
   step of the supply chain is performed.
 """
 
+import json
+import hashlib
+
 import attr
 import securesystemslib.formats
 from in_toto.models.common import Signable
@@ -29,6 +32,34 @@ UNFINISHED_FILENAME_FORMAT = ".{step_name}.{keyid:.8}.link-unfinished"
 UNFINISHED_FILENAME_FORMAT_GLOB = ".{step_name}.{pattern}.link-unfinished"
 
 
+def get_artifacts_fingerprint(artifacts):
+  """
+  <Purpose>
+    Return a digest over the passed artifacts, i.e. over the artifact paths
+    and their hash dictionaries in sorted order. Two artifact dictionaries
+    have the same fingerprint if and only if they are equal (barring digest
+    collisions), regardless of their insertion order.
+
+  <Arguments>
+    artifacts:
+            A dictionary of artifacts in the format of Link materials or
+            products.
+
+  <Returns>
+    A hex digest string.
+
+  """
+  digest = hashlib.sha256()
+  for path in sorted(artifacts):
+    # One unambiguous JSON line per artifact
+    digest.update(json.dumps([path, artifacts[path]], sort_keys=True,
+        separators=(",", ":")).encode("utf-8"))
+    digest.update(b"\n")
+
+  return digest.hexdigest()
+
+
+
 @attr.s(repr=False, init=False)
 class Link(Signable):
   """
@@ -77,6 +108,13 @@ class Link(Signable):
         Note: None of the values in environment is mandated
         runlib currently only records the workdir
 
+  <Methods>
+    get_materials_fingerprint and get_products_fingerprint:
+        return an order-independent digest over the materials or products, which
+        can be compared instead of the full artifact dictionaries. The
+        digest is computed on each call and not stored on the link, so that
+        it reflects in-place modifications of the artifacts.
+
   """
   _type = attr.ib()
   name = attr.ib()
@@ -106,6 +144,18 @@ class Link(Signable):
     convention (pep8) to avoid conflict with Python's type keyword. """
     return self._type
 
+  def get_materials_fingerprint(self):
+    """Return the fingerprint of `materials` (see
+    `get_artifacts_fingerprint`). """
+    return get_artifacts_fingerprint(self.materials)
+
+
+  def get_products_fingerprint(self):
+    """Return the fingerprint of `products` (see
+    `get_artifacts_fingerprint`). """
+    return get_artifacts_fingerprint(self.products)
+
+
   @staticmethod
   def read(data):
     """Static method to instantiate a new Link from a Python dictionary """
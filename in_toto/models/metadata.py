@@ -20,18 +20,22 @@
 """
 
 import attr
+import copy
 import json
+import hashlib
 
 import securesystemslib.keys
 import securesystemslib.formats
 import securesystemslib.exceptions
 
+import in_toto.cache
 import in_toto.formats
 import in_toto.gpg.functions
 
-from in_toto.models.common import ValidationMixin
+from in_toto.models.common import ValidationMixin, asdict
 from in_toto.models.link import Link
 from in_toto.models.layout import Layout
+from in_toto.models.receipt import Receipt
 from in_toto.exceptions import SignatureVerificationError
 
 @attr.s(repr=False, init=False)
@@ -55,7 +59,7 @@ class Metablock(ValidationMixin):
     return json.dumps(
         {
           "signatures": self.signatures,
-          "signed": attr.asdict(self.signed)
+          "signed": asdict(self.signed)
         }, indent=1, separators=(",", ": "), sort_keys=True)
 
 
@@ -90,20 +94,50 @@ class Metablock(ValidationMixin):
       or Layout object, depending on the `_type` field in the loaded
       metadata file.
 
+      If layout caching is enabled (see `in_toto.cache.get_layout_cache`), a
+      copy of a layout, which was loaded from a file with the same digest
+      before, is returned instead of parsing and validating the same contents
+      again. Signatures are not cached and must be verified by the caller as
+      usual.
+
     <Arguments>
       path:
               The path to write the file to.
 
     <Side Effects>
       Reading metadata file from disk
+      Reads from and writes to the layout cache, if enabled.
 
     <Returns>
       None.
 
     """
-    with open(path, "r") as fp:
-      data = json.load(fp)
+    with open(path, "rb") as fp:
+      data = fp.read()
+
+    layout_cache = in_toto.cache.get_layout_cache()
+    if layout_cache is None:
+      return Metablock.read(json.loads(data.decode("utf-8")))
+
+    # Callers may modify the returned layout, e.g. to substitute parameters,
+    # hence the cached layout is only ever returned as a copy
+    digest = hashlib.sha256(data).hexdigest()
+    metablock = layout_cache.get(digest)
+    if metablock is not None:
+      return copy.deepcopy(metablock)
+
+    metablock = Metablock.read(json.loads(data.decode("utf-8")))
+    if metablock.type_ == "layout":
+      layout_cache.set(digest, copy.deepcopy(metablock))
+
+    return metablock
+
 
+  @staticmethod
+  def read(data):
+    """Static method to instantiate a new Metablock, containing a Link,
+    Layout or Receipt object depending on the `_type` field, from a Python
+    dictionary. """
     signatures = data.get("signatures", [])
     signed_data = data.get("signed", {})
     signed_type = signed_data.get("_type")
@@ -114,6 +148,9 @@ class Metablock(ValidationMixin):
     elif signed_type == "layout":
       signed = Layout.read(signed_data)
 
+    elif signed_type == "receipt":
+      signed = Receipt.read(signed_data)
+
     else:
       raise securesystemslib.exceptions.FormatError("Invalid Metadata format")
 
@@ -202,6 +239,12 @@ class Metablock(ValidationMixin):
       `securesystemslib.keys.verify_signature` converts it to
       canonical JSON utf-8 encoded bytes before verifying the signature.
 
+      If `in_toto.settings.SIGNATURE_CACHE_PATH` is set, successful
+      verifications are cached, keyed by the verification key's fingerprint,
+      the signature and a digest of the signed bytes, and a cached result is
+      used instead of repeating the public key operation. Failed
+      verifications are never cached.
+
     <Arguments>
       verification_key:
               Verifying key in the format:
@@ -245,6 +288,13 @@ class Metablock(ValidationMixin):
       raise SignatureVerificationError("No signature found for key '{}'"
           .format(verification_keyid))
 
+    signature_cache = in_toto.cache.get_signature_cache()
+    if signature_cache:
+      cache_key = in_toto.cache.get_signature_cache_key(verification_key,
+          signature, self.signed.signable_bytes)
+      if signature_cache.get(cache_key) is True:
+        return
+
     if in_toto.gpg.formats.SIGNATURE_SCHEMA.matches(signature):
       valid = in_toto.gpg.functions.gpg_verify_signature(signature,
           verification_key, self.signed.signable_bytes)
@@ -260,16 +310,19 @@ class Metablock(ValidationMixin):
       raise SignatureVerificationError("Invalid signature for keyid '{}'"
           .format(verification_keyid))
 
+    if signature_cache:
+      signature_cache.set(cache_key, True)
+
 
   def _validate_signed(self):
     """Private method to check if the 'signed' attribute contains a valid
-    Layout or Link object. """
+    Layout, Link or Receipt object. """
 
-    if not (isinstance(self.signed, Layout) or isinstance(self.signed, Link)):
+    if not isinstance(self.signed, (Layout, Link, Receipt)):
       raise securesystemslib.exceptions.FormatError("The Metblock's 'signed'"
-        " property has has to be of type 'Link' or 'Layout'.")
+        " property has has to be of type 'Link', 'Layout' or 'Receipt'.")
 
-    # If the signed object is a Link or Layout object validate it.
+    # If the signed object is a Link, Layout or Receipt object validate it.
     self.signed.validate()
 
 
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+"""
+<Program Name>
+  receipt.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Provides a class for verification receipts, i.e. statements of a verifier
+  that a final product passed in-toto verification with a given layout and
+  set of links. Downstream consumers of the product, who trust the verifier's
+  key, can check a signed receipt instead of verifying the supply chain again
+  (see `verifylib.verify_receipt`).
+
+"""
+import attr
+import six
+import securesystemslib.formats
+import securesystemslib.exceptions
+
+from dateutil.parser import parse
+
+from in_toto.models.common import Signable
+
+
+
+@attr.s(repr=False, init=False)
+class Receipt(Signable):
+  """
+  A receipt records the successful verification of a final product.
+
+  The object should be contained in a generic Metablock object, which
+  provides functionality for signing and signature verification, and reading
+  from and writing to disk.
+
+  <Attributes>
+    _type:
+        "receipt"
+
+    layout:
+        a hash dictionary over the canonical JSON representation of the
+        verified layout, including its signatures, e.g.
+        {"sha256": <hex digest>}
+
+    links:
+        a hash dictionary over the canonical JSON representation of the
+        digests of all verified links per step and functionary keyid
+
+    parameters:
+        the substitution parameters the layout was verified with, i.e. a
+        dictionary of strings
+
+    products:
+        the products of the summary link of the verification, i.e. the final
+        product, in the format of Link products
+
+    expires:
+        the expiration date of the verified layout, after which the receipt
+        is no longer valid
+
+  """
+  _type = attr.ib()
+  layout = attr.ib()
+  links = attr.ib()
+  parameters = attr.ib()
+  products = attr.ib()
+  expires = attr.ib()
+
+
+  def __init__(self, **kwargs):
+    super(Receipt, self).__init__()
+
+    self._type = "receipt"
+    self.layout = kwargs.get("layout", {})
+    self.links = kwargs.get("links", {})
+    self.parameters = kwargs.get("parameters", {})
+    self.products = kwargs.get("products", {})
+    self.expires = kwargs.get("expires")
+
+    self.validate()
+
+
+  @property
+  def type_(self):
+    """Getter for protected _type attribute. Trailing underscore used by
+    convention (pep8) to avoid conflict with Python's type keyword. """
+    return self._type
+
+
+  @staticmethod
+  def read(data):
+    """Static method to instantiate a new Receipt from a Python dictionary """
+    return Receipt(**data)
+
+
+  def _validate_type(self):
+    """Private method to check that `_type` is set to "receipt"."""
+    if self._type != "receipt":
+      raise securesystemslib.exceptions.FormatError(
+          "Invalid Receipt: field `_type` must be set to 'receipt', got: {}"
+          .format(self._type))
+
+
+  def _validate_layout(self):
+    """Private method to check that `layout` is a `HASHDICT`."""
+    securesystemslib.formats.HASHDICT_SCHEMA.check_match(self.layout)
+
+
+  def _validate_links(self):
+    """Private method to check that `links` is a `HASHDICT`."""
+    securesystemslib.formats.HASHDICT_SCHEMA.check_match(self.links)
+
+
+  def _validate_parameters(self):
+    """Private method to check that `parameters` is a `dict` of strings."""
+    if not isinstance(self.parameters, dict):
+      raise securesystemslib.exceptions.FormatError(
+          "Invalid Receipt: field `parameters` must be of type dict, got: {}"
+          .format(type(self.parameters)))
+
+    for key, value in six.iteritems(self.parameters):
+      if not (isinstance(key, six.string_types) and
+          isinstance(value, six.string_types)):
+        raise securesystemslib.exceptions.FormatError(
+            "Invalid Receipt: field `parameters` must map strings to"
+            " strings, got: {}: {}".format(key, value))
+
+
+  def _validate_products(self):
+    """Private method to check that `products` is a `dict` of `HASHDICTs`."""
+    if not isinstance(self.products, dict):
+      raise securesystemslib.exceptions.FormatError(
+          "Invalid Receipt: field `products` must be of type dict, got: {}"
+          .format(type(self.products)))
+
+    for product in list(self.products.values()):
+      securesystemslib.formats.HASHDICT_SCHEMA.check_match(product)
+
+
+  def _validate_expires(self):
+    """Private method to check that `expires` is an ISO 8601 date string."""
+    try:
+      parse(self.expires)
+      securesystemslib.formats.ISO8601_DATETIME_SCHEMA.check_match(
+          self.expires)
+
+    except Exception as e:
+      raise securesystemslib.exceptions.FormatError(
+          "Malformed date string in receipt. Exception: {}".format(e))
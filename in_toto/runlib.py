@@ -32,6 +32,8 @@ import logging
 
 import in_toto.settings
 import in_toto.exceptions
+import in_toto.merkle
+import in_toto.manifest
 from in_toto.models.link import (UNFINISHED_FILENAME_FORMAT, FILENAME_FORMAT,
     FILENAME_FORMAT_SHORT, UNFINISHED_FILENAME_FORMAT_GLOB)
 
@@ -59,14 +61,36 @@ else: # pragma: no cover
   import subprocess
 
 
-def _hash_artifact(filepath, hash_algorithms=None):
+def _get_stat_signature(filepath):
+  """Internal helper that returns a tuple of stat values of the passed file,
+  which change if the file is modified or replaced. """
+  stat = os.stat(filepath)
+  # Nanosecond timestamps are only available on Python 3
+  return (stat.st_dev, stat.st_ino, stat.st_size,
+      getattr(stat, "st_mtime_ns", stat.st_mtime),
+      getattr(stat, "st_ctime_ns", stat.st_ctime))
+
+
+def _hash_artifact(filepath, hash_algorithms=None, hash_cache=None):
   """Internal helper that takes a filename and hashes the respective file's
   contents using the passed hash_algorithms and returns a hashdict conformant
-  with securesystemslib.formats.HASHDICT_SCHEMA. """
+  with securesystemslib.formats.HASHDICT_SCHEMA.
+
+  If a hash_cache dictionary is passed, hashes are reused from and stored to
+  it, keyed by the file's absolute path, as long as the file's stat signature
+  (see `_get_stat_signature`) is unchanged. """
   if not hash_algorithms:
     hash_algorithms = ['sha256']
 
   securesystemslib.formats.HASHALGORITHMS_SCHEMA.check_match(hash_algorithms)
+
+  if hash_cache is not None:
+    cache_key = (os.path.abspath(filepath), tuple(hash_algorithms))
+    stat_signature = _get_stat_signature(filepath)
+    cached = hash_cache.get(cache_key)
+    if cached and cached[0] == stat_signature:
+      return dict(cached[1])
+
   hash_dict = {}
 
   for algorithm in hash_algorithms:
@@ -75,6 +99,11 @@ def _hash_artifact(filepath, hash_algorithms=None):
 
   securesystemslib.formats.HASHDICT_SCHEMA.check_match(hash_dict)
 
+  # Only cache the hashes if the file did not change while we hashed it
+  if hash_cache is not None and \
+      _get_stat_signature(filepath) == stat_signature:
+    hash_cache[cache_key] = (stat_signature, dict(hash_dict))
+
   return hash_dict
 
 
@@ -88,7 +117,7 @@ def _apply_exclude_patterns(names, exclude_patterns):
 
 
 def record_artifacts_as_dict(artifacts, exclude_patterns=None,
-    base_path=None, follow_symlink_dirs=False):
+    base_path=None, follow_symlink_dirs=False, hash_cache=None):
   """
   <Purpose>
     Hashes each file in the passed path list. If the path list contains
@@ -136,7 +165,9 @@ def record_artifacts_as_dict(artifacts, exclude_patterns=None,
             If passed, patterns specified via settings are overriden.
 
     base_path: (optional)
-            Change to base_path and record artifacts relative from there.
+            Record artifacts relative to base_path, i.e. base_path is
+            prefixed to each artifact path for reading and hashing. The
+            current working directory is not changed.
             If not passed, current working directory is used as base_path.
             NOTE: The base_path part of the recorded artifact is not included
             in the returned paths.
@@ -149,9 +180,15 @@ def record_artifacts_as_dict(artifacts, exclude_patterns=None,
             NOTE: Beware of infinite recursions that can occur if a symlink
             points to a parent directory or itself.
 
+    hash_cache: (optional)
+            A dictionary used to reuse the hashes of files, whose stat values
+            (device, inode, size, modification and change time) did not
+            change since they were last hashed using the same dictionary.
+            Recorded hashes are added to the dictionary.
+
   <Exceptions>
     in_toto.exceptions.ValueError,
-        if we cannot change to base path directory
+        if base path is not a directory
 
     in_toto.exceptions.FormatError,
         if the list of exlcude patterns does not match format
@@ -176,15 +213,17 @@ def record_artifacts_as_dict(artifacts, exclude_patterns=None,
     base_path = in_toto.settings.ARTIFACT_BASE_PATH
 
 
-  # Temporarily change into base path dir if set
-  if base_path:
-    original_cwd = os.getcwd()
-    try:
-      os.chdir(base_path)
+  # Artifacts are recorded relative to the base path, without changing into
+  # it, so that artifacts can be recorded concurrently from multiple threads
+  if base_path and not os.path.isdir(base_path):
+    raise ValueError("Could not use '{}' as base path: '{}'".format(
+        base_path, "not a directory"))
 
-    except Exception as e:
-      raise ValueError("Could not use '{}' as base path: '{}'".format(
-          base_path, e))
+  def _base_path_join(path):
+    """Prefixes the passed relative path with the base path if any. """
+    if base_path:
+      return os.path.join(base_path, path)
+    return path
 
   # Normalize passed paths
   norm_artifacts = []
@@ -206,13 +245,20 @@ def record_artifacts_as_dict(artifacts, exclude_patterns=None,
 
   # Iterate over remaining normalized artifact paths
   for artifact in norm_artifacts:
-    if os.path.isfile(artifact):
+    artifact_path = _base_path_join(artifact)
+
+    if os.path.isfile(artifact_path):
       # Path was already normalized above
-      artifacts_dict[artifact] = _hash_artifact(artifact)
+      artifacts_dict[artifact] = _hash_artifact(artifact_path,
+          hash_cache=hash_cache)
 
-    elif os.path.isdir(artifact):
-      for root, dirs, files in os.walk(artifact,
+    elif os.path.isdir(artifact_path):
+      for root, dirs, files in os.walk(artifact_path,
           followlinks=follow_symlink_dirs):
+        # Paths returned by walk are prefixed with the base path, we strip it
+        # to get the same root as if we had walked from within the base path
+        root = artifact + root[len(artifact_path):]
+
         # Create a list of normalized dirpaths
         dirpaths = []
         for dirname in dirs:
@@ -241,7 +287,7 @@ def record_artifacts_as_dict(artifacts, exclude_patterns=None,
 
           # `os.walk` could also list dead symlinks, which would
           # result in an error later when trying to read the file
-          if os.path.isfile(norm_filepath):
+          if os.path.isfile(_base_path_join(norm_filepath)):
             filepaths.append(norm_filepath)
 
           else:
@@ -253,20 +299,16 @@ def record_artifacts_as_dict(artifacts, exclude_patterns=None,
           filepaths = _apply_exclude_patterns(filepaths, exclude_patterns)
 
         for filepath in filepaths:
-          artifacts_dict[filepath] = _hash_artifact(filepath)
+          artifacts_dict[filepath] = _hash_artifact(_base_path_join(filepath),
+              hash_cache=hash_cache)
 
     # Path is no file and no directory
     else:
       log.info("path: {} does not exist, skipping..".format(artifact))
 
-
-  # Change back to where original current working dir
-  if base_path:
-    os.chdir(original_cwd)
-
   return artifacts_dict
 
-def execute_link(link_cmd_args, record_streams):
+def execute_link(link_cmd_args, record_streams, cwd=None):
   """
   <Purpose>
     Executes the passed command plus arguments in a subprocess and returns
@@ -282,6 +324,9 @@ def execute_link(link_cmd_args, record_streams):
             A bool that specifies whether to redirect standard output and
             and standard error to a temporary file which is returned to the
             caller (True) or not (False).
+    cwd: (optional)
+            A path to a directory in which the command is executed. Default
+            is the current working directory.
 
   <Exceptions>
     TBA (see https://github.com/in-toto/in-toto/issues/6)
@@ -299,13 +344,13 @@ def execute_link(link_cmd_args, record_streams):
   # TODO: Properly duplicate standard streams (issue #11)
   if record_streams:
     process = subprocess.Popen(link_cmd_args, stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE, universal_newlines=True)
+        stderr=subprocess.PIPE, universal_newlines=True, cwd=cwd)
 
     stdout_str, stderr_str = process.communicate()
     return_value = process.returncode
 
   else:
-    return_value = subprocess.call(link_cmd_args)
+    return_value = subprocess.call(link_cmd_args, cwd=cwd)
     stdout_str = stderr_str = ""
 
   return {
@@ -365,7 +410,7 @@ def _check_match_signing_key(signing_key):
 def in_toto_run(name, material_list, product_list, link_cmd_args,
     record_streams=False, signing_key=None, gpg_keyid=None,
     gpg_use_default=False, gpg_home=None, exclude_patterns=None,
-    base_path=None):
+    base_path=None, cwd=None, hash_cache=None, record_merkle_roots=False):
   """
   <Purpose>
     Calls functions in this module to run the command passed as link_cmd_args
@@ -419,18 +464,30 @@ def in_toto_run(name, material_list, product_list, link_cmd_args,
             current working directory.
             NOTE: The base_path part of the recorded material is not included
             in the resulting preliminary link's material/product sections.
+    cwd: (optional)
+            If passed, execute the link command in cwd and record it as
+            working directory in the link's environment. Default is current
+            working directory.
+            NOTE: Artifacts are still recorded relative to base_path.
+    hash_cache: (optional)
+            A dictionary used to reuse hashes of unchanged artifacts across
+            recordings (see `record_artifacts_as_dict`).
+    record_merkle_roots: (optional)
+            If True, the Merkle roots of materials and products are stored in
+            the link's environment (see `in_toto.merkle`). Default is False.
 
   <Exceptions>
     securesystemslib.FormatError if a signing_key is passed and does not match
         securesystemslib.formats.KEY_SCHEMA or a gpg_keyid is passed and does
         not match securesystemslib.formats.KEYID_SCHEMA or exclude_patterns
         are passed and don't match securesystemslib.formats.NAMES_SCHEMA, or
-        base_path is passed and does not match
-        securesystemslib.formats.PATH_SCHEMA or is not a directory.
+        base_path or cwd are passed and do not match
+        securesystemslib.formats.PATH_SCHEMA or base_path is not a directory.
 
   <Side Effects>
     If a key parameter is passed for signing, the newly created link metadata
     file is written to disk using the filename scheme: `link.FILENAME_FORMAT`
+    and added to the link manifest (see `in_toto.manifest`)
 
   <Returns>
     Newly created Metablock object containing a Link object
@@ -450,16 +507,21 @@ def in_toto_run(name, material_list, product_list, link_cmd_args,
   if base_path:
     securesystemslib.formats.PATH_SCHEMA.check_match(base_path)
 
+  if cwd:
+    securesystemslib.formats.PATH_SCHEMA.check_match(cwd)
+  else:
+    cwd = os.getcwd()
+
   if material_list:
     log.info("Recording materials '{}'...".format(", ".join(material_list)))
 
   materials_dict = record_artifacts_as_dict(material_list,
       exclude_patterns=exclude_patterns, base_path=base_path,
-      follow_symlink_dirs=True)
+      follow_symlink_dirs=True, hash_cache=hash_cache)
 
   if link_cmd_args:
     log.info("Running command '{}'...".format(" ".join(link_cmd_args)))
-    byproducts = execute_link(link_cmd_args, record_streams)
+    byproducts = execute_link(link_cmd_args, record_streams, cwd=cwd)
   else:
     byproducts = {}
 
@@ -468,12 +530,16 @@ def in_toto_run(name, material_list, product_list, link_cmd_args,
 
   products_dict = record_artifacts_as_dict(product_list,
       exclude_patterns=exclude_patterns, base_path=base_path,
-      follow_symlink_dirs=True)
+      follow_symlink_dirs=True, hash_cache=hash_cache)
 
   log.info("Creating link metadata...")
   link = in_toto.models.link.Link(name=name,
       materials=materials_dict, products=products_dict, command=link_cmd_args,
-      byproducts=byproducts, environment={"workdir": os.getcwd()})
+      byproducts=byproducts, environment={"workdir": cwd})
+
+  if record_merkle_roots:
+    log.info("Adding Merkle roots of materials and products...")
+    in_toto.merkle.add_merkle_roots(link)
 
   link_metadata = Metablock(signed=link)
 
@@ -496,6 +562,7 @@ def in_toto_run(name, material_list, product_list, link_cmd_args,
     filename = FILENAME_FORMAT.format(step_name=name, keyid=signing_keyid)
     log.info("Storing link metadata to '{}'...".format(filename))
     link_metadata.dump(filename)
+    in_toto.manifest.add_link_to_manifest(filename, link_metadata)
 
   return link_metadata
 
@@ -616,7 +683,7 @@ def in_toto_record_start(step_name, material_list, signing_key=None,
 
 def in_toto_record_stop(step_name, product_list, signing_key=None,
     gpg_keyid=None, gpg_use_default=False, gpg_home=None,
-    exclude_patterns=None, base_path=None):
+    exclude_patterns=None, base_path=None, record_merkle_roots=False):
   """
   <Purpose>
     Finishes creating link metadata for a multi-part in-toto step.
@@ -655,6 +722,9 @@ def in_toto_record_stop(step_name, product_list, signing_key=None,
             current working directory.
             NOTE: The base_path part of the recorded products is not included
             in the resulting preliminary link's product section.
+    record_merkle_roots: (optional)
+            If True, the Merkle roots of materials and products are stored in
+            the link's environment (see `in_toto.merkle`). Default is False.
 
   <Exceptions>
     ValueError if none of signing_key, gpg_keyid or gpg_use_default=True
@@ -672,7 +742,8 @@ def in_toto_record_stop(step_name, product_list, signing_key=None,
 
   <Side Effects>
     Writes newly created link metadata file to disk using the filename scheme
-    from link.FILENAME_FORMAT
+    from link.FILENAME_FORMAT and adds it to the link manifest (see
+    `in_toto.manifest`)
     Removes unfinished link file link.UNFINISHED_FILENAME_FORMAT from disk
 
   <Returns>
@@ -761,6 +832,10 @@ def in_toto_record_stop(step_name, product_list, signing_key=None,
       exclude_patterns=exclude_patterns, base_path=base_path,
       follow_symlink_dirs=True)
 
+  if record_merkle_roots:
+    log.info("Adding Merkle roots of materials and products...")
+    in_toto.merkle.add_merkle_roots(link_metadata.signed)
+
   link_metadata.signatures = []
   if signing_key:
     log.info("Updating signature with key '{:.8}...'...".format(keyid))
@@ -775,6 +850,7 @@ def in_toto_record_stop(step_name, product_list, signing_key=None,
   fn = FILENAME_FORMAT.format(step_name=step_name, keyid=keyid)
   log.info("Storing link metadata to '{}'...".format(fn))
   link_metadata.dump(fn)
+  in_toto.manifest.add_link_to_manifest(fn, link_metadata)
 
   log.info("Removing unfinished link metadata '{}'...".format(unfinished_fn))
   os.remove(unfinished_fn)
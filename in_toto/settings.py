@@ -40,3 +40,58 @@ ARTIFACT_EXCLUDE_PATTERNS = ["*.link*", ".git", "*.pyc", "*~"]
 # If not set the current working directory is used as base path
 # FIXME: Do we want different base paths for materials and products?
 ARTIFACT_BASE_PATH = None
+
+# Path to a directory used to cache successful signature verifications, see
+# `in_toto.cache` and `Metablock.verify_signature`. Caching is disabled if
+# not set. The directory must only be writable by the verifying user.
+SIGNATURE_CACHE_PATH = None
+
+# The maximum number of cached signature verifications, least recently used
+# entries are removed first
+SIGNATURE_CACHE_MAX_ENTRIES = 10000
+
+# Path to a directory used to cache the results of steps that passed
+# signature, threshold and rule verification, see `verifylib.in_toto_verify`.
+# Caching is disabled if not set. The directory must only be writable by the
+# verifying user.
+STEP_CACHE_PATH = None
+
+# The maximum number of cached step results, least recently used entries are
+# removed first
+STEP_CACHE_MAX_ENTRIES = 10000
+
+# Path to a directory used to cache the links of successfully run inspections,
+# keyed by the inspection command, the environment variables listed in
+# INSPECTION_CACHE_ENVIRONMENT and the inspection's materials, and the product
+# files they created or modified, see `verifylib.run_all_inspections`. Cached
+# inspections are not run again, but their products are restored. Caching is
+# disabled if not set. The directory must only be writable by the verifying
+# user.
+INSPECTION_CACHE_PATH = None
+
+# The maximum number of cached inspection links, least recently used entries
+# are removed first
+INSPECTION_CACHE_MAX_ENTRIES = 1000
+
+# The maximum number of product files kept in the content store of the
+# inspection cache, least recently used files are removed first
+INSPECTION_CACHE_MAX_OBJECTS = 10000
+
+# Names of environment variables, whose values are part of the inspection
+# cache keys, i.e. a cached inspection is run again if any of them changes.
+# Inspection commands are assumed to depend on no other variables.
+INSPECTION_CACHE_ENVIRONMENT = ["PATH"]
+
+# The maximum number of parsed link metadata files kept in memory, see
+# `in_toto.cache.get_link_cache`. Cached links are reused as long as the file
+# status (size, modification time, etc.) does not change, which is useful in
+# long-running processes, e.g. the verification server. Caching is disabled
+# if set to 0.
+LINK_CACHE_MAX_ENTRIES = 0
+
+# The maximum number of parsed and validated layouts kept in memory, see
+# `in_toto.cache.get_layout_cache` and `Metablock.load`. Cached layouts are
+# keyed by the digest of the layout file, so that a layout file, which is
+# loaded again unchanged, is not parsed and validated again. Signatures are
+# verified by the caller regardless. Caching is disabled if set to 0.
+LAYOUT_CACHE_MAX_ENTRIES = 0
@@ -185,11 +185,13 @@ def import_public_keys_from_files_as_dict(filepaths, key_types=None):
 def import_gpg_public_keys_from_keyring_as_dict(keyids, gpg_home=False):
   """Creates a dictionary of gpg public keys retrieving gpg public keys
   identified by the list of passed `keyids` from the gpg keyring at `gpg_home`.
-  If `gpg_home` is False the default keyring is used. """
+  If `gpg_home` is False the default keyring is used. Keys are exported in
+  bulk, see `in_toto.gpg.functions.gpg_export_pubkeys`. """
+  pub_keys = in_toto.gpg.functions.gpg_export_pubkeys(keyids,
+      homedir=gpg_home)
   key_dict = {}
   for gpg_keyid in keyids:
-    pub_key = in_toto.gpg.functions.gpg_export_pubkey(gpg_keyid,
-        homedir=gpg_home)
+    pub_key = pub_keys[gpg_keyid]
     in_toto.gpg.formats.PUBKEY_SCHEMA.check_match(pub_key)
     keyid = pub_key["keyid"]
     key_dict[keyid] = pub_key
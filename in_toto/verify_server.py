@@ -0,0 +1,692 @@
+"""
+<Program Name>
+  verify_server.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Provides a long-running verification server, which accepts in-toto
+  verification requests over HTTP on a Unix domain socket (default) or a
+  loopback TCP address, and keeps parsed layouts, layout keys and link
+  metadata in memory across requests.
+
+  Requests are JSON objects, sent via `POST /verify`:
+
+    {
+      "layout": <absolute path to a layout file>,
+      "layout_sha256": <digest of a layout file loaded by a prior request>,
+      "layout_keyids": [<keyid of a layout key loaded by the server>, ...],
+      "link_dir": <absolute path to a link directory>,
+      "working_dir": <absolute path to run inspections in>,
+      "substitution_parameters": {<key>: <value>, ...}
+    }
+
+  One of "layout" and "layout_sha256", and "link_dir" and "working_dir" are
+  required, all other fields are optional. All paths must be below one of the
+  root directories the server was started with. Responses are JSON objects:
+
+    {
+      "success": <true if verification passed>,
+      "layout_sha256": <digest of the verified layout file, if loaded>,
+      "error": <error message, if verification failed>,
+      "error_type": <exception class name, if verification failed>
+    }
+
+  NOTE: Layout keys are loaded once, when the server is started, and cannot
+  be passed with a request. Otherwise anyone who can connect to the server
+  could make it run inspection commands of a layout signed by any key.
+  Unix domain sockets are created accessible by the server user only. TCP
+  servers only listen on loopback addresses, and only accept requests with a
+  loopback "Host" header, to protect against DNS rebinding. All requests
+  must have the "Content-Type" "application/json", which browsers don't send
+  cross-origin without a preflight request, which the server rejects.
+
+  Servers started with a shared secret, e.g. verification workers (see
+  `in_toto.verify_worker`), may listen on any address. They only accept
+  requests with an HMAC-SHA256, keyed with the secret, in the
+  AUTHENTICATION_HEADER, over a random nonce (NONCE_HEADER), an expiration
+  time (EXPIRES_HEADER) and the request body. Expired requests, and requests
+  with a nonce that the server has seen before, are rejected, so that
+  captured requests cannot be replayed. Responses are authenticated with an
+  HMAC of the request's HMAC and the response body in the
+  AUTHENTICATION_HEADER, which `request_verification` checks.
+
+"""
+import os
+import hmac
+import copy
+import json
+import stat
+import time
+import errno
+import socket
+import hashlib
+import logging
+import binascii
+import threading
+
+import six
+from six.moves import socketserver
+from six.moves import BaseHTTPServer
+
+import securesystemslib.formats
+
+import in_toto.cache
+import in_toto.settings
+from in_toto import verifylib
+from in_toto.models.metadata import Metablock
+
+# Inherits from in_toto base logger (c.f. in_toto.log)
+log = logging.getLogger(__name__)
+
+
+UNIX_ADDRESS_PREFIX = "unix:"
+LOOPBACK_HOSTS = ["localhost", "127.0.0.1", "::1"]
+
+# A Unix domain socket in the home directory of the user, see `create_server`
+DEFAULT_ADDRESS = UNIX_ADDRESS_PREFIX + os.path.join("~",
+    ".in-toto-verify-server.sock")
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_CACHE_ENTRIES = 1000
+
+# Requests larger than this are rejected
+MAX_REQUEST_SIZE = 1024 * 1024
+
+# Seconds a connection may block reading a request or writing a response,
+# so that slow clients cannot hold a request handler thread indefinitely
+REQUEST_TIMEOUT = 60
+
+# Carries the HMAC of requests and responses, and the nonce and expiration
+# time (seconds since the epoch) of requests, if the server has a secret
+AUTHENTICATION_HEADER = "X-In-Toto-HMAC"
+NONCE_HEADER = "X-In-Toto-Nonce"
+EXPIRES_HEADER = "X-In-Toto-Expires"
+
+# Seconds for which an authenticated request is valid after it was created,
+# and the most a server accepts, e.g. to tolerate clock differences. Servers
+# remember nonces until their request expires.
+REQUEST_VALIDITY = 60
+MAX_REQUEST_VALIDITY = 600
+
+
+
+class VerificationService(object):
+  """
+  Verifies in-toto supply chains on request, using the layout keys passed on
+  instantiation and caching parsed layouts and links in memory.
+
+  <Attributes>
+    layout_key_dict:
+        the public keys that layouts may be verified with, in the format of
+        in_toto.formats.ANY_VERIFY_KEY_DICT_SCHEMA
+
+    roots:
+        the absolute real paths of the directories that layouts, link
+        directories and working directories of requests must be in
+
+    max_workers:
+        the maximum number of concurrently handled requests
+
+  """
+  def __init__(self, layout_key_dict, roots, max_workers=DEFAULT_MAX_WORKERS,
+      cache_entries=DEFAULT_CACHE_ENTRIES):
+    """
+    <Purpose>
+      Instantiate a new verification service and enable in-memory caching of
+      link metadata (see `in_toto.settings.LINK_CACHE_MAX_ENTRIES`).
+
+    <Arguments>
+      layout_key_dict:
+              A dictionary of public keys, used to verify layout signatures.
+
+      roots:
+              A list of paths to directories, which the layouts, link
+              directories and working directories of requests must be in.
+
+      max_workers: (optional)
+              The maximum number of concurrently handled requests.
+
+      cache_entries: (optional)
+              The maximum number of cached layouts, and, separately, of
+              cached link metadata files.
+
+    <Exceptions>
+      securesystemslib.exceptions.FormatError
+              If roots is not a list of paths, or max_workers or
+              cache_entries are not positive integers.
+
+      ValueError
+              If no roots are passed.
+
+    <Side Effects>
+      Sets `in_toto.settings.LINK_CACHE_MAX_ENTRIES` to cache_entries.
+
+    """
+    securesystemslib.formats.PATHS_SCHEMA.check_match(roots)
+    securesystemslib.formats.LENGTH_SCHEMA.check_match(max_workers)
+    securesystemslib.formats.LENGTH_SCHEMA.check_match(cache_entries)
+    if not roots:
+      raise ValueError("At least one root directory is required")
+
+    self.layout_key_dict = layout_key_dict
+    self.roots = [os.path.realpath(root) for root in roots]
+    self.max_workers = max(max_workers, 1)
+    self._worker_semaphore = threading.BoundedSemaphore(self.max_workers)
+
+    # Parsed layouts by file status and by digest of their file
+    self._layouts = in_toto.cache.MemoryCache(cache_entries)
+    self._layouts_by_digest = in_toto.cache.MemoryCache(cache_entries)
+
+    in_toto.settings.LINK_CACHE_MAX_ENTRIES = cache_entries
+
+
+  def _load_layout(self, path):
+    """Private method to return the parsed layout at the passed path and the
+    digest of its file, reusing a cached layout if the file is unchanged. """
+    status = os.stat(path)
+    cache_key = (os.path.realpath(path), status.st_dev, status.st_ino,
+        status.st_size, getattr(status, "st_mtime_ns", status.st_mtime))
+
+    cached = self._layouts.get(cache_key)
+    if cached is not None:
+      return cached
+
+    with open(path, "rb") as fp:
+      data = fp.read()
+
+    cached = (Metablock.read(json.loads(data.decode("utf-8"))),
+        hashlib.sha256(data).hexdigest())
+    self._layouts.set(cache_key, cached)
+    self._layouts_by_digest.set(cached[1], cached)
+    return cached
+
+
+  def _get_path(self, field, path):
+    """Private method to return the real path of the passed request path,
+    which must be an absolute path below one of the roots. """
+    securesystemslib.formats.PATH_SCHEMA.check_match(path)
+    # The server's working directory is unrelated to the client's
+    if not os.path.isabs(path):
+      raise ValueError("Field '{}' must be an absolute path".format(field))
+
+    real_path = os.path.realpath(path)
+    for root in self.roots:
+      if os.path.commonprefix([real_path + os.sep,
+          root + os.sep]) == root + os.sep:
+        return real_path
+
+    raise ValueError("Field '{}' is not in a root directory of the"
+        " server".format(field))
+
+
+  def _get_layout_key_dict(self, keyids):
+    """Private method to return the layout keys for the passed keyids, or all
+    layout keys if keyids is None. """
+    if keyids is None:
+      return self.layout_key_dict
+
+    securesystemslib.formats.KEYIDS_SCHEMA.check_match(keyids)
+    layout_key_dict = {}
+    for keyid in keyids:
+      if keyid not in self.layout_key_dict:
+        raise ValueError("Layout key '{}' is not loaded by the"
+            " server".format(keyid))
+
+      layout_key_dict[keyid] = self.layout_key_dict[keyid]
+
+    if not layout_key_dict:
+      raise ValueError("No layout keys selected")
+
+    return layout_key_dict
+
+
+  def verify(self, request):
+    """
+    <Purpose>
+      Handle a verification request, see module docstring for the request
+      format. Blocks while `max_workers` other requests are being handled.
+
+    <Arguments>
+      request:
+              A dictionary with the verification request.
+
+    <Exceptions>
+      None. Errors are reported in the response.
+
+    <Returns>
+      A response dictionary, see module docstring.
+
+    """
+    response = {"success": False}
+    with self._worker_semaphore:
+      try:
+        if not isinstance(request, dict):
+          raise ValueError("Request must be a JSON object")
+
+        link_dir = self._get_path("link_dir", request.get("link_dir"))
+        working_dir = self._get_path("working_dir",
+            request.get("working_dir"))
+
+        if request.get("layout"):
+          layout, layout_sha256 = self._load_layout(
+              self._get_path("layout", request["layout"]))
+
+        elif request.get("layout_sha256"):
+          securesystemslib.formats.HASH_SCHEMA.check_match(
+              request["layout_sha256"])
+          cached = self._layouts_by_digest.get(request["layout_sha256"])
+          if cached is None:
+            raise ValueError("Layout with digest '{}' is not cached by the"
+                " server".format(request["layout_sha256"]))
+          layout, layout_sha256 = cached
+
+        else:
+          raise ValueError("Request must specify 'layout' or 'layout_sha256'")
+
+        response["layout_sha256"] = layout_sha256
+        layout_key_dict = self._get_layout_key_dict(
+            request.get("layout_keyids"))
+
+        substitution_parameters = request.get("substitution_parameters")
+        if (substitution_parameters is not None and
+            not isinstance(substitution_parameters, dict)):
+          raise ValueError("Field 'substitution_parameters' must be a JSON"
+              " object")
+
+        # Verification modifies the layout, e.g. through parameter
+        # substitution, hence the cached layout must not be used directly
+        verifylib.in_toto_verify(copy.deepcopy(layout), layout_key_dict,
+            link_dir_path=link_dir,
+            substitution_parameters=substitution_parameters,
+            working_dir=working_dir)
+
+      except Exception as e: # pylint: disable=broad-except
+        response["error"] = str(e)
+        response["error_type"] = type(e).__name__
+
+      else:
+        response["success"] = True
+
+    return response
+
+
+
+def _get_hmac(secret, *parts):
+  """Private helper to return the hex HMAC-SHA256 of the passed byte strings,
+  keyed with the passed secret. """
+  mac = hmac.new(secret, digestmod=hashlib.sha256)
+  for part in parts:
+    mac.update(part)
+
+  return mac.hexdigest()
+
+
+
+def _get_request_hmac(secret, nonce, expires, body):
+  """Private helper to return the HMAC of a request with the passed nonce,
+  expiration time and body, which must all be byte strings. """
+  return _get_hmac(secret, nonce, b"\n", expires, b"\n", body)
+
+
+
+def _get_authentication_headers(secret, body, validity=REQUEST_VALIDITY):
+  """Private helper to return the headers that authenticate a request with
+  the passed body, which expires in `validity` seconds. """
+  nonce = binascii.hexlify(os.urandom(16))
+  expires = str(int(time.time() + validity)).encode("ascii")
+  return {
+    NONCE_HEADER: nonce.decode("ascii"),
+    EXPIRES_HEADER: expires.decode("ascii"),
+    AUTHENTICATION_HEADER: _get_request_hmac(secret, nonce, expires, body)
+  }
+
+
+
+class _ReplayCache(object):
+  """Private, thread-safe store of the nonces of authenticated requests,
+  which are kept until the requests expire. """
+
+  def __init__(self):
+    self._expires_by_nonce = {}
+    self._lock = threading.Lock()
+
+
+  def add(self, nonce, expires):
+    """Add the passed nonce of a request, which expires at the passed time,
+    and return True, or return False if the nonce was added before. """
+    now = time.time()
+    with self._lock:
+      for old_nonce, old_expires in list(self._expires_by_nonce.items()):
+        if old_expires < now:
+          del self._expires_by_nonce[old_nonce]
+
+      if nonce in self._expires_by_nonce:
+        return False
+
+      self._expires_by_nonce[nonce] = expires
+      return True
+
+
+
+def _get_host(host_header):
+  """Private helper to return the host of the passed "Host" header value,
+  without port and IPv6 brackets. """
+  if host_header.startswith("["):
+    return host_header[1:].partition("]")[0]
+
+  return host_header.partition(":")[0]
+
+
+
+class _VerificationRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+  """Handles `POST /verify` requests, using the server's service, if they
+  pass the header checks in `_check_headers`. """
+  timeout = REQUEST_TIMEOUT
+
+  def log_message(self, format, *args): # pylint: disable=redefined-builtin
+    log.debug("(in-toto-verify-server) " + format % args)
+
+
+  def _send_json(self, status, data, request_hmac=None):
+    body = json.dumps(data).encode("utf-8")
+    self.send_response(status)
+    self.send_header("Content-Type", "application/json")
+    self.send_header("Content-Length", str(len(body)))
+    # Only responses to authenticated requests are authenticated
+    if request_hmac:
+      self.send_header(AUTHENTICATION_HEADER, _get_hmac(self.server.secret,
+          request_hmac.encode("ascii"), body))
+    self.end_headers()
+    self.wfile.write(body)
+
+
+  def _check_headers(self):
+    """Returns the HTTP status and error message for a request that must be
+    rejected because of its headers, or None. """
+    content_type = self.headers.get("Content-Type") or ""
+    if content_type.split(";")[0].strip().lower() != "application/json":
+      return 415, "Content-Type must be 'application/json'"
+
+    # Browsers send the host name they resolved, which, in a DNS rebinding
+    # attack, is not a loopback host
+    if (not self.server.secret and
+        _get_host(self.headers.get("Host") or "") not in LOOPBACK_HOSTS):
+      return 403, "Host must be a loopback host"
+
+    return None
+
+
+  def _check_authentication(self, body):
+    """Returns the error message for a request with the passed body, that
+    must be rejected because it is not authenticated with the server's
+    secret, expired or was replayed, or None. """
+    request_hmac = str(self.headers.get(AUTHENTICATION_HEADER) or "")
+    nonce = str(self.headers.get(NONCE_HEADER) or "")
+    expires = str(self.headers.get(EXPIRES_HEADER) or "")
+    if not hmac.compare_digest(request_hmac, _get_request_hmac(
+        self.server.secret, nonce.encode("utf-8"), expires.encode("utf-8"),
+        body)):
+      return "Request is not authenticated"
+
+    now = time.time()
+    if (not securesystemslib.formats.HEX_SCHEMA.matches(nonce) or
+        not expires.isdigit() or
+        not now <= int(expires) <= now + MAX_REQUEST_VALIDITY):
+      return "Request is expired or malformed"
+
+    if not self.server.replay_cache.add(nonce, int(expires)):
+      return "Request was replayed"
+
+    return None
+
+
+  def do_POST(self): # pylint: disable=invalid-name
+    if self.path != "/verify":
+      self._send_json(404, {"error": "Not found"})
+      return
+
+    rejection = self._check_headers()
+    if rejection:
+      status, error = rejection
+      self._send_json(status, {"success": False, "error": error})
+      return
+
+    try:
+      length = self.headers.get("Content-Length")
+      if length is None:
+        raise ValueError("Content-Length is required")
+
+      length = int(length)
+      if length < 0:
+        raise ValueError("Content-Length must not be negative")
+
+      if length > MAX_REQUEST_SIZE:
+        raise ValueError("Request too large")
+
+    except ValueError as e:
+      self._send_json(400, {"success": False, "error": str(e),
+          "error_type": type(e).__name__})
+      return
+
+    try:
+      body = self.rfile.read(length)
+
+    except socket.timeout:
+      log.debug("(in-toto-verify-server) Timed out reading request")
+      self.close_connection = True
+      return
+
+    request_hmac = None
+    if self.server.secret:
+      error = self._check_authentication(body)
+      if error:
+        self._send_json(401, {"success": False, "error": error})
+        return
+
+      request_hmac = str(self.headers.get(AUTHENTICATION_HEADER))
+
+    try:
+      request = json.loads(body.decode("utf-8"))
+
+    except ValueError as e:
+      self._send_json(400, {"success": False, "error": str(e),
+          "error_type": type(e).__name__}, request_hmac)
+      return
+
+    self._send_json(200, self.server.service.verify(request), request_hmac)
+
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn,
+    BaseHTTPServer.HTTPServer):
+  daemon_threads = True
+
+
+
+class _ThreadingUnixHTTPServer(socketserver.ThreadingMixIn,
+    socketserver.UnixStreamServer):
+  daemon_threads = True
+
+  def get_request(self):
+    # BaseHTTPRequestHandler expects a (host, port) client address
+    request, _ = self.socket.accept()
+    return request, ("local", 0)
+
+
+
+def create_server(address, service, secret=None):
+  """
+  <Purpose>
+    Create an HTTP server for the passed verification service, listening on
+    the passed address.
+
+    Requests are only handled if their "Content-Type" is "application/json"
+    and, if a secret is passed, if they are authenticated with the secret,
+    or otherwise, if their "Host" header is a loopback host (see module
+    docstring).
+
+  <Arguments>
+    address:
+            Either "unix:<path>" for a Unix domain socket, which is created
+            accessible by the current user only, or "<host>:<port>" for a TCP
+            socket, where host must be a loopback address unless a secret is
+            passed. A leading "~" in the path is expanded to the home
+            directory of the user.
+
+    service:
+            A service object with a `verify(request)` method, e.g. a
+            VerificationService object.
+
+    secret: (optional)
+            A byte string shared with the clients, which requests and
+            responses are authenticated with. If passed, a TCP socket may
+            listen on any host, e.g. for verification workers (see
+            `in_toto.verify_worker`). Default is None.
+
+  <Exceptions>
+    ValueError if the address is malformed, or not a loopback address and no
+    secret is passed, or if the path of a Unix domain socket exists and is
+    not a socket.
+
+    socket.error if the server cannot listen on the address.
+
+  <Returns>
+    A socketserver.BaseServer object, whose `serve_forever` method handles
+    requests until `shutdown` is called.
+
+  """
+  if address.startswith(UNIX_ADDRESS_PREFIX):
+    path = os.path.expanduser(address[len(UNIX_ADDRESS_PREFIX):])
+    # Remove a stale socket of a previous server, but nothing else
+    try:
+      if not stat.S_ISSOCK(os.lstat(path).st_mode):
+        raise ValueError("Path '{}' exists and is not a socket".format(path))
+      os.remove(path)
+
+    except OSError as e:
+      if e.errno != errno.ENOENT:
+        raise
+
+    old_umask = os.umask(0o177)
+    try:
+      server = _ThreadingUnixHTTPServer(path, _VerificationRequestHandler)
+
+    finally:
+      os.umask(old_umask)
+
+  else:
+    host, _, port = address.rpartition(":")
+    host = host.strip("[]")
+    if not secret and host not in LOOPBACK_HOSTS:
+      raise ValueError("Server without secret must listen on a loopback"
+          " address, got '{}'".format(host))
+
+    server_class = _ThreadingHTTPServer
+    if ":" in host:
+      server_class = type("_ThreadingHTTPServerV6", (_ThreadingHTTPServer,),
+          {"address_family": socket.AF_INET6})
+
+    server = server_class((host, int(port)), _VerificationRequestHandler)
+
+  server.service = service
+  server.secret = secret
+  server.replay_cache = _ReplayCache()
+  return server
+
+
+class _UnixHTTPConnection(six.moves.http_client.HTTPConnection):
+  """HTTP connection over a Unix domain socket. """
+  def __init__(self, path, timeout=None):
+    six.moves.http_client.HTTPConnection.__init__(self, "localhost",
+        timeout=timeout)
+    self._path = path
+
+  def connect(self):
+    self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    if self.timeout is not None:
+      self.sock.settimeout(self.timeout)
+    self.sock.connect(self._path)
+
+
+def request_verification(address, request, timeout=None, secret=None):
+  """
+  <Purpose>
+    Send the passed verification request to the server at the passed address
+    and return its response. Relative paths in the request are made absolute
+    with regards to the current working directory.
+
+  <Arguments>
+    address:
+            A server address, see `create_server`.
+
+    request:
+            A request dictionary, see module docstring.
+
+    timeout: (optional)
+            A timeout in seconds for connecting and waiting for the response.
+
+    secret: (optional)
+            The secret of the server, see `create_server`, to authenticate
+            the request and the response with. Authenticated requests expire
+            after REQUEST_VALIDITY seconds and can only be sent once.
+
+  <Exceptions>
+    socket.error, six.moves.http_client.HTTPException if the server cannot be
+    reached.
+
+    ValueError if the response is malformed, or not authenticated although a
+    secret is passed.
+
+  <Returns>
+    A response dictionary, see module docstring.
+
+  """
+  request = dict(request)
+  for field in ["layout", "link_dir", "working_dir"]:
+    if request.get(field):
+      request[field] = os.path.abspath(request[field])
+
+  if address.startswith(UNIX_ADDRESS_PREFIX):
+    connection = _UnixHTTPConnection(
+        os.path.expanduser(address[len(UNIX_ADDRESS_PREFIX):]),
+        timeout=timeout)
+
+  else:
+    host, _, port = address.rpartition(":")
+    connection = six.moves.http_client.HTTPConnection(host.strip("[]"),
+        int(port), timeout=timeout)
+
+  body = json.dumps(request).encode("utf-8")
+  headers = {"Content-Type": "application/json"}
+  if secret:
+    headers.update(_get_authentication_headers(secret, body))
+
+  try:
+    connection.request("POST", "/verify", body, headers)
+    http_response = connection.getresponse()
+    response_body = http_response.read()
+
+  finally:
+    connection.close()
+
+  if secret and not hmac.compare_digest(
+      str(http_response.getheader(AUTHENTICATION_HEADER) or ""),
+      _get_hmac(secret, headers[AUTHENTICATION_HEADER].encode("ascii"),
+      response_body)):
+    raise ValueError("Response of verification server is not authenticated"
+        " (HTTP status {})".format(http_response.status))
+
+  response = json.loads(response_body.decode("utf-8"))
+
+  if not isinstance(response, dict):
+    raise ValueError("Malformed response from verification server")
+
+  return response
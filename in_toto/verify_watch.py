@@ -0,0 +1,348 @@
+"""
+<Program Name>
+  verify_watch.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Provides a watch mode for in-toto verification, which waits for link
+  metadata files to arrive in a link directory, e.g. during a release that
+  takes several hours, and verifies the supply chain as soon as the links
+  of all steps are available.
+
+  The link directory is polled. Each new or changed link file is loaded and
+  its signatures are verified once when it is detected, unchanged files are
+  not loaded or verified again. Once each step has at least `threshold`
+  links, validly signed by authorized functionaries, the full verification
+  is performed (see `verifylib.in_toto_verify`), which reuses the parsed
+  links through the in-memory link cache, and does not verify the
+  signatures of links again, that were verified while watching and are
+  unchanged.
+
+  NOTE: Polling is used instead of filesystem notifications, which are not
+  portable and not available on most network filesystems.
+
+"""
+import os
+import copy
+import time
+import timeit
+import logging
+
+import securesystemslib.exceptions
+
+import in_toto.settings
+import in_toto.exceptions
+from in_toto import verifylib
+
+# Inherits from in_toto base logger (c.f. in_toto.log)
+log = logging.getLogger(__name__)
+
+
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_CACHE_ENTRIES = 1000
+
+
+
+class LinkWatcher(object):
+  """
+  Keeps per-step state of the link files in a link directory, i.e. the
+  functionary keyids whose links for a step were found and carry a valid
+  signature, and updates it incrementally for new, changed and removed
+  files.
+
+  <Attributes>
+    layout:
+        the Layout object, whose steps' links are watched
+
+    link_dir_path:
+        the path to the watched link directory
+
+  """
+  def __init__(self, layout, link_dir_path):
+    self.layout = layout
+    self.link_dir_path = link_dir_path
+
+    # The watched layout must not be modified while watching
+    self._step_keys = layout.get_step_verification_keys()
+
+    # Per file name, the status of the file when it was last verified, the
+    # (step name, keyid) pairs for which it carries a valid signature, and
+    # the loaded link metadata
+    self._files = {}
+
+
+  def _verify_link_file(self, filename, step_keyids, manifest_entry):
+    """Private method to load the passed link file and return the set of
+    passed (step name, keyid) pairs, for which it carries a valid signature
+    of an authorized functionary, and the loaded Metablock. Files that cannot
+    be loaded, e.g. because they are still being written, yield an empty set
+    and None. """
+    path = os.path.join(self.link_dir_path, filename)
+    try:
+      metadata = verifylib._load_link_file(path, manifest_entry)
+
+    except (ValueError, KeyError, TypeError,
+        securesystemslib.exceptions.Error) as e:
+      log.info("Skipping link file '{}', it could not be loaded: {}".format(
+          filename, e))
+      return set(), None
+
+    if metadata is None:
+      return set(), None
+
+    verified = set()
+    for step_name, keyid in step_keyids:
+      verification_key = self._step_keys.get(step_name, {}).get(keyid)
+      if verification_key is None:
+        continue
+
+      try:
+        metadata.verify_signature(verification_key)
+
+      except in_toto.exceptions.SignatureVerificationError:
+        log.info("Skipping link file '{}'. Broken link signature with keyid"
+            " '{}' for step '{}'".format(filename, keyid, step_name))
+
+      else:
+        verified.add((step_name, keyid))
+
+    return verified, metadata
+
+
+  def poll(self):
+    """
+    <Purpose>
+      List the link directory and verify the signatures of new and changed
+      link files of the layout's steps. Files are identified as unchanged by
+      their file status and link manifest entry, if any.
+
+    <Exceptions>
+      None.
+
+    <Side Effects>
+      Lists the link directory and reads new and changed link files.
+
+    <Returns>
+      A sorted list of the names of new, changed and removed link files.
+
+    """
+    filename_keyids, filename_entries = verifylib.find_link_files(
+        self.layout, self.link_dir_path)
+
+    changed = sorted(set(self._files) - set(filename_keyids))
+    for filename in changed:
+      del self._files[filename]
+
+    for filename in sorted(filename_keyids):
+      try:
+        stat = os.stat(os.path.join(self.link_dir_path, filename))
+
+      except OSError:
+        if self._files.pop(filename, None) is not None:
+          changed.append(filename)
+        continue
+
+      manifest_entry = filename_entries.get(filename)
+      file_key = (stat.st_dev, stat.st_ino, stat.st_size,
+          getattr(stat, "st_mtime_ns", stat.st_mtime),
+          getattr(stat, "st_ctime_ns", stat.st_ctime),
+          manifest_entry and manifest_entry["sha256"],
+          tuple(sorted(filename_keyids[filename])))
+
+      if filename in self._files and self._files[filename][0] == file_key:
+        continue
+
+      changed.append(filename)
+      self._files[filename] = (file_key,) + self._verify_link_file(filename,
+          filename_keyids[filename], manifest_entry)
+
+    return sorted(changed)
+
+
+  def get_step_status(self):
+    """
+    <Purpose>
+      Return the watch status of each step of the layout.
+
+    <Returns>
+      A list with a dictionary for each step, in the order of the layout,
+      with the step's "name", its "threshold" and the sorted list of keyids
+      of "verified" links.
+
+    """
+    verified = {}
+    for _, step_keyids, _ in self._files.values():
+      for step_name, keyid in step_keyids:
+        verified.setdefault(step_name, set()).add(keyid)
+
+    return [{
+        "name": step.name,
+        "threshold": step.threshold,
+        "verified": sorted(verified.get(step.name, []))
+      } for step in self.layout.steps]
+
+
+  def get_verified_links(self):
+    """
+    <Purpose>
+      Return the links, whose signatures were verified, per step and
+      functionary keyid, e.g. to not verify them again in the full
+      verification (see `verifylib.verify_link_signature_thresholds`).
+
+    <Returns>
+      A dictionary of Metablock objects per step name and keyid.
+
+    """
+    verified_links = {}
+    for _, step_keyids, metadata in self._files.values():
+      for step_name, keyid in step_keyids:
+        verified_links.setdefault(step_name, {})[keyid] = metadata
+
+    return verified_links
+
+
+  def get_missing_steps(self):
+    """
+    <Purpose>
+      Return the steps of the layout, that don't have `threshold` validly
+      signed links yet.
+
+    <Returns>
+      A list of step status dictionaries, see `get_step_status`.
+
+    """
+    return [status for status in self.get_step_status()
+        if len(status["verified"]) < status["threshold"]]
+
+
+
+def _format_missing_steps(missing_steps):
+  """Private helper to return a readable list of the passed missing steps. """
+  return ", ".join("'{}' ({} of {} links)".format(status["name"],
+      len(status["verified"]), status["threshold"])
+      for status in missing_steps)
+
+
+def in_toto_verify_watch(layout, layout_key_dict, link_dir_path=".",
+    poll_interval=DEFAULT_POLL_INTERVAL, timeout=None,
+    substitution_parameters=None, progress_callback=None, **kwargs):
+  """
+  <Purpose>
+    Waits until each step of the layout has enough validly signed links in
+    the link directory and then performs the full supply chain verification,
+    see module docstring.
+
+    The layout signatures and expiration are verified before waiting.
+
+  <Arguments>
+    layout:
+            Layout object that is being verified.
+
+    layout_key_dict:
+            Dictionary of project owner public keys, used to verify the
+            layout's signature.
+
+    link_dir_path: (optional)
+            A path to directory where link metadata files for steps are
+            loaded from. If not passed links are loaded from the current
+            working directory.
+
+    poll_interval: (optional)
+            Seconds to wait between listings of the link directory.
+
+    timeout: (optional)
+            Seconds to wait for links at most. Default is None, i.e. wait
+            indefinitely.
+
+    substitution_parameters: (optional)
+            See `verifylib.in_toto_verify`.
+
+    progress_callback: (optional)
+            A function, which is called with the list of missing steps (see
+            `LinkWatcher.get_missing_steps`) initially and whenever files in
+            the link directory changed.
+
+    **kwargs: (optional)
+            Any other optional argument of `verifylib.in_toto_verify`, e.g.
+            link_workers or rule_stats.
+
+  <Exceptions>
+    in_toto.exceptions.LinkNotFoundError
+            If the timeout passed before all steps had enough links.
+
+    Raises the exceptions of `verifylib.in_toto_verify`.
+
+  <Side Effects>
+    Reads link metadata files from disk.
+    Enables in-memory link caching (see
+    `in_toto.settings.LINK_CACHE_MAX_ENTRIES`), if it is not enabled, while
+    waiting and verifying.
+
+  <Returns>
+    A link which summarizes the materials and products of the overall
+    software supply chain, see `verifylib.in_toto_verify`.
+
+  """
+  log.info("Verifying layout signatures...")
+  verifylib.verify_layout_signatures(layout, layout_key_dict)
+
+  log.info("Verifying layout expiration...")
+  verifylib.verify_layout_expiration(layout.signed)
+
+  # The watcher needs the layout with substituted parameters, the full
+  # verification substitutes them itself
+  watched_layout = copy.deepcopy(layout.signed)
+  if substitution_parameters is not None:
+    verifylib.substitute_parameters(watched_layout, substitution_parameters)
+
+  link_cache_max_entries = in_toto.settings.LINK_CACHE_MAX_ENTRIES
+  if not link_cache_max_entries:
+    in_toto.settings.LINK_CACHE_MAX_ENTRIES = DEFAULT_CACHE_ENTRIES
+
+  try:
+    watcher = LinkWatcher(watched_layout, link_dir_path)
+    start_time = timeit.default_timer()
+    missing_steps = None
+
+    while True:
+      if watcher.poll() or missing_steps is None:
+        missing_steps = watcher.get_missing_steps()
+        if missing_steps:
+          log.info("Waiting for links of step(s): {}".format(
+              _format_missing_steps(missing_steps)))
+
+        if progress_callback is not None:
+          progress_callback(missing_steps)
+
+      if not missing_steps:
+        break
+
+      if (timeout is not None and
+          timeit.default_timer() - start_time >= timeout):
+        raise in_toto.exceptions.LinkNotFoundError("Timed out waiting for"
+            " links of step(s): {}".format(
+            _format_missing_steps(missing_steps)))
+
+      time.sleep(poll_interval)
+
+    log.info("All steps have enough links, verifying supply chain...")
+    # The layout signatures were verified above, but the layout may have
+    # expired while waiting. Link signatures verified by the watcher are not
+    # verified again, as long as the links are unchanged.
+    verifylib.verify_layout_expiration(layout.signed)
+    link_source = verifylib._DirectoryLinkSource(link_dir_path,
+        max_workers=kwargs.pop("link_workers", 1))
+    return verifylib._verify_layout_payload(layout.signed, link_source,
+        substitution_parameters=substitution_parameters,
+        verified_links=watcher.get_verified_links(), **kwargs)
+
+  finally:
+    in_toto.settings.LINK_CACHE_MAX_ENTRIES = link_cache_max_entries
@@ -0,0 +1,717 @@
+"""
+<Program Name>
+  verify_worker.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Provides verification workers and a coordinator, which distributes the
+  per-step work of an in-toto verification to the workers, e.g. on multiple
+  hosts that share the link directory, e.g. via a network filesystem.
+
+  The coordinator (see `in_toto_verify_distributed`) verifies the layout,
+  lists the link directory and determines the size and digest of each link
+  file, either from the link manifest (see `in_toto.manifest`) or by hashing
+  the file. It then sends two tasks per step to the workers:
+
+    1. "links": Verify the signatures, the signature threshold, the command
+       alignment and the threshold constraints of the step's links, and
+       return a reference to the link that represents the step.
+
+    2. "rules": Verify the step's artifact rules against the references of
+       the step's own link and of the links its MATCH rules refer to.
+
+  The "links" of a "links" task are the step's link files by functionary
+  keyid, those of a "rules" task are the link references by step name.
+
+  Workers read link files from the shared link directory and verify them
+  against the digests sent by the coordinator before parsing them. Parsed
+  links are cached in memory, so that the links a step's rules refer to are
+  usually not parsed again. Link signatures are verified with the
+  functionary keys the worker was started with.
+
+  Workers never verify sublayouts, which may run inspection commands. If a
+  step's links contain a sublayout, the worker reports it instead, and the
+  coordinator verifies the step's links, and the rules of all steps that
+  refer to its summary link. Inspections and their rules are verified by the
+  coordinator, which is the only host that runs commands.
+
+  Tasks are sent via `POST /verify` (see `in_toto.verify_server`):
+
+    {
+      "task": "links" | "rules",
+      "link_dir": <absolute path to the link directory>,
+      "step": <step, as in the layout>,
+      "links": {<keyid or step name>: <link reference>, ...},
+      "rule_stats": <true to return rule statistics>   # "rules" only
+    }
+
+  A link reference is an object with the "filename" of a file in the link
+  directory, and its "length" and "sha256". Responses are JSON objects:
+
+    {
+      "success": <true if the task passed>,
+      "keyids": [<keyid of a verified link>, ...],   # "links" only
+      "reference": <link reference of the step>,   # "links" only
+      "sublayout": <true if the links contain a sublayout>,   # "links" only
+      "rule_stats": [<rule statistics>, ...],   # "rules" only
+      "error": <error message, if the task failed>,
+      "error_type": <exception class name, if the task failed>
+    }
+
+  NOTE: Worker responses decide the outcome of verification. Workers without
+  a secret only listen on Unix domain sockets or loopback addresses. Workers
+  on other hosts must be started with a secret, which the coordinator uses to
+  authenticate its requests and the workers' responses. Authenticated
+  requests expire and are rejected if they are replayed (see
+  `verify_server.create_server`). Workers only read files below the link
+  root they were started with and never run commands.
+
+"""
+import os
+import sys
+import hashlib
+import logging
+import threading
+
+from multiprocessing.pool import ThreadPool
+
+import six
+
+import securesystemslib.formats
+import securesystemslib.exceptions
+
+import in_toto.formats
+import in_toto.settings
+import in_toto.exceptions
+from in_toto import verifylib
+from in_toto import verify_server
+from in_toto.models.common import asdict
+from in_toto.models.layout import Layout, Step
+
+# Inherits from in_toto base logger (c.f. in_toto.log)
+log = logging.getLogger(__name__)
+
+
+TASK_LINKS = "links"
+TASK_RULES = "rules"
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_CACHE_ENTRIES = 1000
+
+
+
+class WorkerService(object):
+  """
+  Performs verification tasks on request of a coordinator, reading link files
+  from below a link root, e.g. a mount point of a shared filesystem, and
+  caching parsed links in memory.
+
+  <Attributes>
+    link_root:
+        the absolute real path of the directory that link directories of
+        tasks must be in
+
+    keys:
+        the functionary public keys that link signatures are verified with
+
+    max_workers:
+        the maximum number of concurrently performed tasks
+
+  """
+  def __init__(self, link_root, keys, max_workers=DEFAULT_MAX_WORKERS,
+      cache_entries=DEFAULT_CACHE_ENTRIES):
+    """
+    <Purpose>
+      Instantiate a new worker service and enable in-memory caching of link
+      metadata (see `in_toto.settings.LINK_CACHE_MAX_ENTRIES`).
+
+    <Arguments>
+      link_root:
+              A path to the directory that link directories of tasks must be
+              in.
+
+      keys:
+              A dictionary of functionary public keys, used to verify link
+              signatures. Links signed by other keys are not verified.
+
+      max_workers: (optional)
+              The maximum number of concurrently performed tasks.
+
+      cache_entries: (optional)
+              The maximum number of cached link metadata files.
+
+    <Exceptions>
+      securesystemslib.exceptions.FormatError
+              If the arguments are malformed.
+
+    <Side Effects>
+      Sets `in_toto.settings.LINK_CACHE_MAX_ENTRIES` to cache_entries.
+
+    """
+    securesystemslib.formats.PATH_SCHEMA.check_match(link_root)
+    in_toto.formats.ANY_PUBKEY_DICT_SCHEMA.check_match(keys)
+    securesystemslib.formats.LENGTH_SCHEMA.check_match(max_workers)
+    securesystemslib.formats.LENGTH_SCHEMA.check_match(cache_entries)
+
+    self.link_root = os.path.realpath(link_root)
+    self.keys = keys
+    self.max_workers = max(max_workers, 1)
+    self._worker_semaphore = threading.BoundedSemaphore(self.max_workers)
+
+    in_toto.settings.LINK_CACHE_MAX_ENTRIES = cache_entries
+
+
+  def _get_link_dir(self, path):
+    """Private method to return the real path of the passed link directory,
+    which must be an absolute path below the link root. """
+    securesystemslib.formats.PATH_SCHEMA.check_match(path)
+    if not os.path.isabs(path):
+      raise ValueError("Field 'link_dir' must be an absolute path")
+
+    link_dir = os.path.realpath(path)
+    if os.path.commonprefix([link_dir + os.sep,
+        self.link_root + os.sep]) != self.link_root + os.sep:
+      raise ValueError("Link directory '{}' is not in the link root of the"
+          " worker".format(path))
+
+    return link_dir
+
+
+  def _read_link(self, link_dir, reference):
+    """Private method to return the link metadata for the passed link
+    reference, reading link files from the passed link directory. """
+    if not isinstance(reference, dict):
+      raise ValueError("Link reference must be a JSON object")
+
+    securesystemslib.formats.PATH_SCHEMA.check_match(reference.get("filename"))
+    securesystemslib.formats.LENGTH_SCHEMA.check_match(reference.get("length"))
+    securesystemslib.formats.HASH_SCHEMA.check_match(reference.get("sha256"))
+    # Only plain file names in the link directory are allowed
+    if (os.path.basename(reference["filename"]) != reference["filename"] or
+        reference["filename"] in [".", ".."]):
+      raise ValueError("Bad link file name '{}'".format(reference["filename"]))
+
+    path = os.path.join(link_dir, reference["filename"])
+    metadata = verifylib._load_link_file(path, reference)
+    if metadata is None:
+      raise in_toto.exceptions.LinkNotFoundError("Could not read link file"
+          " '{}'.".format(path))
+
+    return metadata
+
+
+  def _verify_links(self, step, link_dir, request):
+    """Private method to perform a "links" task, see module docstring. """
+    if not isinstance(request.get("links"), dict):
+      raise ValueError("Field 'links' must be a JSON object")
+
+    # A layout with just the step and the pinned functionary keys, to reuse
+    # the verification functions of the coordinator
+    layout = Layout(steps=[step], keys=self.keys)
+
+    chain_link_dict = {step.name: dict((keyid,
+        self._read_link(link_dir, reference))
+        for keyid, reference in six.iteritems(request["links"]))}
+
+    # Sublayouts are verified by the coordinator
+    if any(link.type_ == "layout"
+        for link in chain_link_dict[step.name].values()):
+      return {"sublayout": True}
+
+    verifylib._check_links_found(layout, chain_link_dict)
+    chain_link_dict = verifylib.verify_link_signature_thresholds(layout,
+        chain_link_dict)
+    verifylib.verify_all_steps_command_alignment(layout, chain_link_dict)
+    verifylib.verify_threshold_constraints(layout, chain_link_dict)
+
+    # The step is represented by the first verified link, as in
+    # `verifylib.reduce_chain_links`
+    keyid = list(chain_link_dict[step.name].keys())[0]
+    return {
+      "keyids": list(chain_link_dict[step.name].keys()),
+      "reference": request["links"][keyid]
+    }
+
+
+  def _verify_rules(self, step, link_dir, request):
+    """Private method to perform a "rules" task, see module docstring. """
+    if not isinstance(request.get("links"), dict):
+      raise ValueError("Field 'links' must be a JSON object")
+
+    links = dict((name, self._read_link(link_dir, reference))
+        for name, reference in six.iteritems(request["links"]))
+
+    rule_stats = [] if request.get("rule_stats") else None
+    verifylib.verify_all_item_rules([step], links, rule_stats=rule_stats)
+
+    return {"rule_stats": rule_stats}
+
+
+  def verify(self, request):
+    """
+    <Purpose>
+      Perform a verification task, see module docstring for the task format.
+      Blocks while `max_workers` other tasks are being performed.
+
+    <Arguments>
+      request:
+              A dictionary with the task.
+
+    <Exceptions>
+      None. Errors are reported in the response.
+
+    <Returns>
+      A response dictionary, see module docstring.
+
+    """
+    response = {"success": False}
+    with self._worker_semaphore:
+      try:
+        if not isinstance(request, dict):
+          raise ValueError("Request must be a JSON object")
+
+        link_dir = self._get_link_dir(request.get("link_dir"))
+        if not isinstance(request.get("step"), dict):
+          raise ValueError("Field 'step' must be a JSON object")
+        step = Step.read(request["step"])
+
+        if request.get("task") == TASK_LINKS:
+          response.update(self._verify_links(step, link_dir, request))
+
+        elif request.get("task") == TASK_RULES:
+          response.update(self._verify_rules(step, link_dir, request))
+
+        else:
+          raise ValueError("Unknown task '{}'".format(request.get("task")))
+
+      except Exception as e: # pylint: disable=broad-except
+        response["error"] = str(e)
+        response["error_type"] = type(e).__name__
+
+      else:
+        response["success"] = True
+
+    return response
+
+
+
+def load_secret(path):
+  """
+  <Purpose>
+    Load the secret that the coordinator and the workers authenticate tasks
+    and responses with (see `verify_server.create_server`) from the passed
+    file, ignoring surrounding whitespace.
+
+  <Arguments>
+    path:
+            A path to a file with the secret.
+
+  <Exceptions>
+    IOError, OSError if the file cannot be read.
+
+    ValueError if the file contains no secret.
+
+  <Returns>
+    The secret as byte string.
+
+  """
+  with open(path, "rb") as fp:
+    secret = fp.read().strip()
+
+  if not secret:
+    raise ValueError("Secret file '{}' is empty".format(path))
+
+  return secret
+
+
+
+def _get_link_file_reference(link_dir_path, filename, manifest_entry=None):
+  """Private helper to return the link reference for the passed link file,
+  using its link manifest entry if any, or None if the file cannot be read.
+  """
+  if manifest_entry is not None:
+    return {
+      "filename": filename,
+      "length": manifest_entry["length"],
+      "sha256": manifest_entry["sha256"]
+    }
+
+  try:
+    with open(os.path.join(link_dir_path, filename), "rb") as fp:
+      data = fp.read()
+
+  except (IOError, OSError):
+    return None
+
+  return {
+    "filename": filename,
+    "length": len(data),
+    "sha256": hashlib.sha256(data).hexdigest()
+  }
+
+
+
+def get_link_file_references(layout, link_dir_path, max_workers=1):
+  """
+  <Purpose>
+    Find the link files of each Step of the Layout in the link directory, see
+    `verifylib.load_links_for_layout`, and return link references with their
+    size and digest, without parsing them. Sizes and digests are taken from
+    the link manifest, if any, or computed from the files.
+
+  <Arguments>
+    layout:
+            Layout object
+
+    link_dir_path:
+            A path to directory where links are loaded from
+
+    max_workers: (optional)
+            The maximum number of link files hashed concurrently. Default is
+            1, i.e. link files are hashed sequentially.
+
+  <Exceptions>
+    in_toto.exceptions.LinkNotFoundError
+            If fewer link files than the threshold of a step are found.
+
+  <Side Effects>
+    Reads link files without link manifest entry from disk.
+
+  <Returns>
+    A dictionary of link references per step name and functionary keyid,
+    see module docstring.
+
+  """
+  filename_keyids, filename_entries = verifylib.find_link_files(layout,
+      link_dir_path)
+
+  filenames = sorted(filename_keyids)
+  load_args = [(link_dir_path, filename, filename_entries.get(filename))
+      for filename in filenames]
+
+  if max_workers <= 1 or len(load_args) <= 1:
+    references = [_get_link_file_reference(*args) for args in load_args]
+
+  else:
+    pool = ThreadPool(min(max_workers, len(load_args)))
+    try:
+      references = pool.map(lambda args: _get_link_file_reference(*args),
+          load_args)
+
+    finally:
+      pool.close()
+      pool.join()
+
+  steps_references = {step.name: {} for step in layout.steps}
+  for filename, reference in zip(filenames, references):
+    if reference is None:
+      continue
+
+    for step_name, keyid in filename_keyids[filename]:
+      steps_references[step_name][keyid] = reference
+
+  verifylib._check_links_found(layout, steps_references)
+  return steps_references
+
+
+def _get_task_error(address, response):
+  """Private helper to return an exception for the failed task response of
+  the worker at the passed address, of the same class as the worker's
+  exception, if it is a known in-toto, securesystemslib or builtin exception.
+  """
+  error_type = response.get("error_type")
+  error_class = None
+  for module in [in_toto.exceptions, securesystemslib.exceptions,
+      six.moves.builtins]:
+    error_class = getattr(module, str(error_type), None)
+    if isinstance(error_class, type) and issubclass(error_class, Exception):
+      break
+    error_class = None
+
+  if error_class is None:
+    return RuntimeError("Worker '{}' failed with {}: {}".format(address,
+        error_type, response.get("error")))
+
+  return error_class(response.get("error"))
+
+
+def _run_tasks(workers, requests, timeout=None, secret=None):
+  """Private helper to send the passed task requests to the workers at the
+  passed addresses, authenticated with the passed secret, if any, with at
+  most one pending task per address, and return the responses in the order
+  of the requests. Once a task failed, no further
+  tasks are sent, and the error of the first failed task in the order of the
+  requests is raised. """
+  if not requests:
+    return []
+
+  addresses = six.moves.queue.Queue()
+  for address in workers:
+    addresses.put(address)
+
+  responses = [None] * len(requests)
+  errors = [None] * len(requests)
+  failed = threading.Event()
+
+  def _run_task(index):
+    """Sends the task at the passed index to the next idle worker, unless
+    another task has already failed, and stores the response or error. """
+    if failed.is_set():
+      return
+
+    address = addresses.get()
+    try:
+      response = verify_server.request_verification(address, requests[index],
+          timeout=timeout, secret=secret)
+      if not response.get("success"):
+        raise _get_task_error(address, response)
+
+      responses[index] = response
+
+    except Exception: # pylint: disable=broad-except
+      errors[index] = sys.exc_info()
+      failed.set()
+
+    finally:
+      addresses.put(address)
+
+  pool = ThreadPool(min(len(workers), len(requests)))
+  try:
+    # Tasks are started in order (chunksize=1), hence skipped tasks always
+    # appear after a failed task
+    pool.map(_run_task, range(len(requests)), chunksize=1)
+
+  finally:
+    pool.close()
+    pool.join()
+
+  for error in errors:
+    if error is not None:
+      six.reraise(*error)
+
+  return responses
+
+
+def _read_link_reference(link_dir_path, reference):
+  """Private helper to return the link metadata for the passed link
+  reference on the coordinator. """
+  path = os.path.join(link_dir_path, reference["filename"])
+  metadata = verifylib._load_link_file(path, reference)
+  if metadata is None:
+    raise in_toto.exceptions.LinkNotFoundError("Could not read link file"
+        " '{}'.".format(path))
+
+  return metadata
+
+
+def _verify_step_links(layout, step, link_dir_path, step_references,
+    working_dir=None, inspection_workers=1, inspection_hardlinks=False):
+  """Private helper to verify the passed link references of the passed step
+  on the coordinator, like a "links" task, but including sublayouts, and
+  return the link that represents the step. """
+  step_layout = Layout(steps=[step], keys=layout.keys)
+  chain_link_dict = {step.name: dict((keyid,
+      _read_link_reference(link_dir_path, reference))
+      for keyid, reference in six.iteritems(step_references))}
+
+  chain_link_dict = verifylib.verify_link_signature_thresholds(step_layout,
+      chain_link_dict)
+  chain_link_dict = verifylib.verify_sublayouts(step_layout, chain_link_dict,
+      link_dir_path, working_dir=working_dir,
+      inspection_workers=inspection_workers,
+      inspection_hardlinks=inspection_hardlinks)
+  verifylib.verify_all_steps_command_alignment(step_layout, chain_link_dict)
+  verifylib.verify_threshold_constraints(step_layout, chain_link_dict)
+
+  return verifylib.reduce_chain_links(chain_link_dict)[step.name]
+
+
+def in_toto_verify_distributed(layout, layout_key_dict, workers,
+    link_dir_path=".", substitution_parameters=None, working_dir=None,
+    inspection_workers=1, inspection_hardlinks=False, link_workers=1,
+    rule_stats=None, timeout=None, secret=None):
+  """
+  <Purpose>
+    Does entire in-toto supply chain verification of a final product like
+    `verifylib.in_toto_verify`, but distributes the verification of the
+    steps' links and artifact rules to verification workers, see module
+    docstring. The link directory must be accessible by the workers at the
+    same absolute path.
+
+    All steps' links are verified before any step's rules. Within each of
+    these two phases, steps are verified concurrently, one pending task per
+    worker address. Pass an address multiple times to send multiple tasks to
+    a worker concurrently. If multiple steps fail, the error of the step
+    that appears first in the layout is raised. Errors of known exception
+    classes are raised with the same class as by `verifylib.in_toto_verify`.
+
+    Steps whose links contain a sublayout are verified by the coordinator
+    once the workers reported them, and so are the rules of the steps that
+    refer to their summary links, after the rules verified by the workers.
+
+  <Arguments>
+    layout:
+            Layout object that is being verified.
+
+    layout_key_dict:
+            Dictionary of project owner public keys, used to verify the
+            layout's signature.
+
+    workers:
+            A list of worker addresses, see `verify_server.create_server`.
+
+    link_dir_path: (optional)
+            A path to directory where link metadata files for steps are
+            loaded from. If not passed links are loaded from the current
+            working directory.
+
+    substitution_parameters, working_dir, inspection_workers,
+    inspection_hardlinks, rule_stats: (optional)
+            See `verifylib.in_toto_verify`.
+
+    link_workers: (optional)
+            The maximum number of link files, without link manifest entry,
+            hashed concurrently by the coordinator. Default is 1.
+
+    timeout: (optional)
+            A timeout in seconds for each task.
+
+    secret: (optional)
+            The secret of the workers, to authenticate tasks and responses
+            with, see `verify_server.create_server`.
+
+  <Exceptions>
+    ValueError if no workers are passed.
+
+    socket.error, six.moves.http_client.HTTPException if a worker cannot be
+    reached.
+
+    Raises the exceptions of `verifylib.in_toto_verify`.
+
+  <Side Effects>
+    Reads link metadata files from disk.
+    Runs inspection commands in a subprocess.
+
+  <Returns>
+    A link which summarizes the materials and products of the overall
+    software supply chain (used by super-layout verification if any)
+
+  """
+  if not workers:
+    raise ValueError("At least one worker address is required")
+
+  log.info("Verifying layout signatures...")
+  verifylib.verify_layout_signatures(layout, layout_key_dict)
+  layout = layout.signed
+
+  log.info("Verifying layout expiration...")
+  verifylib.verify_layout_expiration(layout)
+
+  if substitution_parameters is not None:
+    log.info('Performing parameter substitution...')
+    verifylib.substitute_parameters(layout, substitution_parameters)
+
+  link_dir_path = os.path.abspath(link_dir_path)
+
+  log.info("Reading link metadata file digests...")
+  steps_references = get_link_file_references(layout, link_dir_path,
+      max_workers=link_workers)
+
+  log.info("Verifying link metadata on {} worker(s)...".format(len(workers)))
+  responses = _run_tasks(workers, [{
+      "task": TASK_LINKS,
+      "link_dir": link_dir_path,
+      "step": asdict(step),
+      "links": steps_references[step.name]
+    } for step in layout.steps], timeout=timeout, secret=secret)
+
+  # Link references of steps verified by workers, and summary links of steps
+  # with sublayouts, verified by the coordinator
+  references = {}
+  sublayout_links = {}
+  for step, response in zip(layout.steps, responses):
+    if response.get("sublayout"):
+      log.info("Verifying sublayout {}...".format(step.name))
+      sublayout_links[step.name] = _verify_step_links(layout, step,
+          link_dir_path, steps_references[step.name], working_dir=working_dir,
+          inspection_workers=inspection_workers,
+          inspection_hardlinks=inspection_hardlinks)
+
+    else:
+      references[step.name] = response["reference"]
+
+  del steps_references
+
+  def _get_links(names):
+    """Returns the links for the passed step names, reading link files of
+    steps verified by workers. """
+    links = dict((name, _read_link_reference(link_dir_path,
+        references[name])) for name in names if name in references)
+    links.update((name, sublayout_links[name])
+        for name in names if name in sublayout_links)
+    return links
+
+  log.info("Verifying Step rules on {} worker(s)...".format(len(workers)))
+  # Only the references of the step's own link and of MATCH destinations are
+  # sent, which are the only links that verifying the step's rules reads.
+  # Rules that refer to summary links of sublayouts are verified locally.
+  remote_steps = []
+  local_steps = []
+  for step, step_references in zip(layout.steps,
+      verifylib._get_item_link_references(layout.steps)):
+    if any(name in sublayout_links for name in step_references):
+      local_steps.append((step, step_references))
+
+    else:
+      remote_steps.append((step, step_references))
+
+  responses = _run_tasks(workers, [{
+      "task": TASK_RULES,
+      "link_dir": link_dir_path,
+      "step": asdict(step),
+      "links": dict((name, references[name])
+          for name in step_references if name in references),
+      "rule_stats": rule_stats is not None
+    } for step, step_references in remote_steps], timeout=timeout,
+    secret=secret)
+
+  steps_rule_stats = dict((step.name, response.get("rule_stats") or [])
+      for (step, _), response in zip(remote_steps, responses))
+  for step, step_references in local_steps:
+    steps_rule_stats[step.name] = []
+    verifylib.verify_all_item_rules([step], _get_links(step_references),
+        rule_stats=steps_rule_stats[step.name])
+
+  if rule_stats is not None:
+    for step in layout.steps:
+      rule_stats.extend(steps_rule_stats.get(step.name) or [])
+
+  # Only links referenced by inspections or needed for the summary link are
+  # read by the coordinator
+  link_names = set(verifylib._get_referenced_link_names(layout.inspect))
+  if layout.steps:
+    link_names.update([layout.steps[0].name, layout.steps[-1].name])
+
+  reduced_chain_link_dict = _get_links(link_names)
+
+  log.info("Executing Inspection commands...")
+  inspection_link_dict = verifylib.run_all_inspections(layout,
+      working_dir=working_dir, max_workers=inspection_workers,
+      use_hardlinks=inspection_hardlinks)
+
+  log.info("Verifying Inspection rules...")
+  combined_links = reduced_chain_link_dict.copy()
+  combined_links.update(inspection_link_dict)
+  verifylib.verify_all_item_rules(layout.inspect, combined_links,
+      rule_stats=rule_stats)
+
+  log.info("The software product passed all verification.")
+  return verifylib.get_summary_link(layout, reduced_chain_link_dict)
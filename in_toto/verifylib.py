@@ -23,27 +23,43 @@
 """
 
 import os
+import sys
+import copy
+import errno
+import json
+import hashlib
+import shutil
+import tempfile
 import datetime
+import timeit
 import iso8601
 import fnmatch
 import six
 import logging
+import threading
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 from dateutil import tz
 
 import securesystemslib.exceptions
+import securesystemslib.formats
 
+import in_toto.cache
+import in_toto.manifest
 import in_toto.settings
 import in_toto.util
 import in_toto.runlib
+import in_toto.models.common
 import in_toto.models.layout
 import in_toto.models.link
 import in_toto.formats
 from in_toto.models.metadata import Metablock
+from in_toto.models.receipt import Receipt
 from in_toto.models.link import (FILENAME_FORMAT, FILENAME_FORMAT_SHORT)
 from in_toto.models.layout import SUBLAYOUT_LINK_DIR_FORMAT
 from in_toto.exceptions import (RuleVerificationError, LayoutExpiredError,
     ThresholdVerificationError, BadReturnValueError,
-    SignatureVerificationError)
+    SignatureVerificationError, ReceiptVerificationError)
 import in_toto.rulelib
 
 # Inherits from in_toto base logger (c.f. in_toto.log)
@@ -89,7 +105,48 @@ def _raise_on_bad_retval(return_value, command=None):
     raise BadReturnValueError(msg.format(what="zero"))
 
 
-def load_links_for_layout(layout, link_dir_path):
+def _load_link_file(filepath, manifest_entry=None):
+  """Private helper to load the metadata file at the passed path, verifying
+  it against the passed link manifest entry if any, before parsing it.
+  Returns None if the file cannot be read, e.g. because it was removed after
+  the link directory was listed.
+
+  If link caching is enabled (see `in_toto.cache.get_link_cache`), a parsed
+  file is reused until its file status changes. """
+  link_cache = in_toto.cache.get_link_cache()
+  cache_key = None
+  try:
+    if link_cache is not None:
+      stat = os.stat(filepath)
+      cache_key = (os.path.realpath(filepath), stat.st_dev, stat.st_ino,
+          stat.st_size, getattr(stat, "st_mtime_ns", stat.st_mtime),
+          getattr(stat, "st_ctime_ns", stat.st_ctime))
+
+      cached = link_cache.get(cache_key)
+      # A cached link must still match its manifest entry
+      if cached is not None and (manifest_entry is None or
+          cached[0] == manifest_entry["sha256"]):
+        return cached[1]
+
+    if manifest_entry is None:
+      with open(filepath, "rb") as fp:
+        data = fp.read()
+
+    else:
+      data = in_toto.manifest.read_link_file(filepath, manifest_entry)
+
+  except (IOError, OSError):
+    return None
+
+  metadata = Metablock.read(json.loads(data.decode("utf-8")))
+
+  if cache_key is not None:
+    link_cache.set(cache_key, (hashlib.sha256(data).hexdigest(), metadata))
+
+  return metadata
+
+
+def load_links_for_layout(layout, link_dir_path, max_workers=1):
   """
   <Purpose>
     Try to load all existing metadata files for each Step of the Layout
@@ -98,6 +155,16 @@ def load_links_for_layout(layout, link_dir_path):
     For each step the metadata might consist of multiple (thresholds) Link
     or Layout (sub-layouts) files.
 
+    The link directory is listed once to find the files of all authorized
+    functionaries and their subkeys, which are then loaded, optionally in
+    a bounded pool of concurrent workers.
+
+    If the link directory contains a link manifest (see `in_toto.manifest`),
+    link files are found by the full keyid of the manifest entries, and
+    their size and digest are verified before parsing. Files of
+    functionaries without manifest entry are found by the
+    `FILENAME_FORMAT` naming convention.
+
   <Arguments>
     layout:
           Layout object
@@ -105,6 +172,16 @@ def load_links_for_layout(layout, link_dir_path):
     link_dir_path:
           A path to directory where links are loaded from
 
+    max_workers: (optional)
+          The maximum number of link files loaded concurrently. Default is 1,
+          i.e. link files are loaded sequentially.
+
+  <Exceptions>
+    in_toto.exceptions.LinkNotFoundError
+          If fewer link files than the threshold of a step are found.
+
+    in_toto.exceptions.ManifestVerificationError
+          If a link file does not match its link manifest entry.
 
   <Side Effects>
     Calls function to read files from disk
@@ -122,42 +199,547 @@ def load_links_for_layout(layout, link_dir_path):
 
 
   """
-  steps_metadata = {}
+  filename_keyids, filename_entries = find_link_files(layout, link_dir_path)
 
-  # Iterate over all the steps in the layout
-  for step in layout.steps:
-    links_per_step = {}
+  filenames = sorted(filename_keyids)
+  load_args = [(os.path.join(link_dir_path, filename),
+      filename_entries.get(filename)) for filename in filenames]
+
+  if max_workers <= 1 or len(load_args) <= 1:
+    metadata_list = [_load_link_file(*args) for args in load_args]
+
+  else:
+    pool = ThreadPool(min(max_workers, len(load_args)))
+    try:
+      metadata_list = pool.map(lambda args: _load_link_file(*args), load_args)
+
+    finally:
+      pool.close()
+      pool.join()
 
-    # We try to load a link for every authorized functionary, but don't fail
-    # if the file does not exist (authorized != required)
-    # FIXME: Should we really pass on IOError, or just skip inexistent links?
-    for authorized_keyid in step.pubkeys:
-      # Iterate over the authorized key and if present over subkeys
-      for keyid in [authorized_keyid] + list(layout.keys.get(authorized_keyid,
-          {}).get("subkeys", {}).keys()):
+  steps_metadata = {step.name: {} for step in layout.steps}
+  for filename, metadata in zip(filenames, metadata_list):
+    if metadata is None:
+      continue
+
+    for step_name, keyid in filename_keyids[filename]:
+      steps_metadata[step_name][keyid] = metadata
+
+  _check_links_found(layout, steps_metadata)
+  return steps_metadata
 
+
+def find_link_files(layout, link_dir_path):
+  """
+  <Purpose>
+    List the link directory once and find the existing link files of all
+    authorized functionaries, and their subkeys, for each Step of the Layout,
+    see `load_links_for_layout`.
+
+  <Arguments>
+    layout:
+          Layout object
+
+    link_dir_path:
+          A path to directory where links are loaded from
+
+  <Exceptions>
+    None.
+
+  <Side Effects>
+    Lists the link directory and reads its link manifest, if any.
+
+  <Returns>
+    A tuple of two dictionaries, the first with a list of (step name, keyid)
+    pairs per existing link file name, the second with the link manifest
+    entry per link file name, for files that have one.
+
+  """
+  # A missing or unreadable link directory is treated like an empty one, so
+  # that missing links are reported by step
+  try:
+    existing_filenames = set(os.listdir(link_dir_path))
+
+  except OSError:
+    existing_filenames = set()
+
+  manifest = {}
+  if in_toto.manifest.MANIFEST_FILENAME in existing_filenames:
+    manifest = in_toto.manifest.load_manifest(link_dir_path)
+
+  # Map the file names of all authorized functionaries' links to the
+  # (step name, keyid) pairs they are loaded for, and to their manifest
+  # entry if any. Without manifest, keyids with the same prefix share a file
+  # name.
+  # FIXME: Should we really pass on missing links, or fail?
+  filename_keyids = {}
+  filename_entries = {}
+  for step in layout.steps:
+    for keyid in _get_authorized_keyids(layout, step):
+      entry = manifest.get((step.name, keyid))
+      if entry is not None:
+        filename = entry["filename"]
+        filename_entries[filename] = entry
+
+      else:
         filename = FILENAME_FORMAT.format(step_name=step.name, keyid=keyid)
-        filepath = os.path.join(link_dir_path, filename)
 
-        try:
-          metadata = Metablock.load(filepath)
-          links_per_step[keyid] = metadata
+      if filename in existing_filenames:
+        filename_keyids.setdefault(filename, []).append((step.name, keyid))
+
+  return filename_keyids, filename_entries
 
-        except IOError:
-          pass
 
-    # Check if the step has been performed by enough number of functionaries
+def _get_authorized_keyids(layout, step):
+  """Private helper to return the keyids of the passed step's authorized
+  functionary keys and of their subkeys, if any. """
+  keyids = []
+  for authorized_keyid in step.pubkeys:
+    keyids.append(authorized_keyid)
+    keyids += list(layout.keys.get(authorized_keyid, {}).get("subkeys",
+        {}).keys())
+
+  return keyids
+
+
+def _check_links_found(layout, steps_metadata):
+  """Private helper to raise LinkNotFoundError, if fewer links than the
+  threshold of a step were found. """
+  # Check if each step has been performed by enough number of functionaries
+  for step in layout.steps:
+    links_per_step = steps_metadata[step.name]
     if len(links_per_step) < step.threshold:
       raise in_toto.exceptions.LinkNotFoundError("Step '{0}' requires '{1}'"
           " link metadata file(s), found '{2}'."
           .format(step.name, step.threshold, len(links_per_step)))
 
-    steps_metadata[step.name] = links_per_step
 
+def get_links_for_layout(layout, links):
+  """
+  <Purpose>
+    Select the links of the authorized functionaries of each Step of the
+    Layout from the passed in-memory links, i.e. the equivalent of
+    `load_links_for_layout` without reading from disk.
+
+  <Arguments>
+    layout:
+          Layout object
+
+    links:
+          A dictionary of link metadata per step and functionary keyid, e.g.:
+          {
+            <step name> : {
+              <functionary key id> : <Metablock containing a Link or Layout
+                                      object>,
+              ...
+            }, ...
+          }
+
+  <Exceptions>
+    in_toto.exceptions.LinkNotFoundError
+          If fewer links than the threshold of a step are passed.
+
+  <Returns>
+    A dictionary carrying the links of the authorized functionaries per step,
+    in the format of the passed links.
+
+  """
+  steps_metadata = {}
+  for step in layout.steps:
+    step_links = links.get(step.name) or {}
+    steps_metadata[step.name] = dict((keyid, step_links[keyid])
+        for keyid in _get_authorized_keyids(layout, step)
+        if keyid in step_links)
+
+  _check_links_found(layout, steps_metadata)
   return steps_metadata
 
 
-def run_all_inspections(layout):
+class _DirectoryLinkSource(object):
+  """Private link source, which loads the links of a layout from a link
+  directory, and the links of its sublayouts from subdirectories in the
+  format SUBLAYOUT_LINK_DIR_FORMAT (see `in_toto_verify`).
+
+  Link sources provide the links of a layout, i.e. the result of
+  `load_links`, and the link source of each of its sublayouts, i.e. the
+  result of `get_sublayout_source`. """
+
+  def __init__(self, link_dir_path, max_workers=1):
+    self.link_dir_path = link_dir_path
+    self.max_workers = max_workers
+
+
+  @property
+  def owns_links(self):
+    """True, if verification may modify the loaded links, i.e. if they are
+    not shared with the link cache. """
+    return in_toto.cache.get_link_cache() is None
+
+
+  def load_links(self, layout):
+    """Return the links for the passed layout, see `load_links_for_layout`.
+    """
+    return load_links_for_layout(layout, self.link_dir_path,
+        max_workers=self.max_workers)
+
+
+  def get_sublayout_source(self, step_name, keyid):
+    """Return the link source for the sublayout of the passed step and
+    functionary keyid. """
+    # Sublayout links are expected to be in a directory with the following
+    # name relative the the current link directory path, i.e. if there
+    # are multiple levels of sublayout nesting, the links are expected to
+    # be nested accordingly
+    return _DirectoryLinkSource(os.path.join(self.link_dir_path,
+        SUBLAYOUT_LINK_DIR_FORMAT.format(name=step_name, keyid=keyid)),
+        max_workers=self.max_workers)
+
+
+
+class _MemoryLinkSource(object):
+  """Private link source with the same interface as `_DirectoryLinkSource`,
+  which provides passed in-memory links (see `in_toto_verify_links`). """
+
+  # In-memory links belong to the caller and must not be modified
+  owns_links = False
+
+  def __init__(self, links, sublayout_links=None):
+    self.links = links
+    self.sublayout_links = sublayout_links or {}
+
+
+  def load_links(self, layout):
+    """Return the links for the passed layout, see `get_links_for_layout`.
+    """
+    return get_links_for_layout(layout, self.links)
+
+
+  def get_sublayout_source(self, step_name, keyid):
+    """Return the link source for the sublayout of the passed step and
+    functionary keyid. """
+    sublayout_links = (self.sublayout_links.get(step_name) or {}).get(
+        keyid) or {}
+    return _MemoryLinkSource(sublayout_links.get("links") or {},
+        sublayout_links.get("sublayout_links"))
+
+
+def _link_tree(src, dst):
+  """Recreates the directory tree at src in dst, hardlinking regular files
+  and recreating symlinks. Files that cannot be hardlinked, e.g. because dst
+  is on a different device, are copied instead. """
+  os.makedirs(dst)
+  for root, dirs, files in os.walk(src):
+    dst_root = os.path.join(dst, os.path.relpath(root, src))
+    for name in list(dirs):
+      src_path = os.path.join(root, name)
+      dst_path = os.path.join(dst_root, name)
+      if os.path.islink(src_path):
+        # os.walk does not recurse into symlinked dirs, nor should we copy them
+        os.symlink(os.readlink(src_path), dst_path)
+      else:
+        os.mkdir(dst_path)
+
+    for name in files:
+      src_path = os.path.join(root, name)
+      dst_path = os.path.join(dst_root, name)
+      if os.path.islink(src_path):
+        os.symlink(os.readlink(src_path), dst_path)
+        continue
+
+      try:
+        os.link(src_path, dst_path)
+
+      except OSError:
+        shutil.copy2(src_path, dst_path)
+
+
+def _copy_workspace(working_dir, use_hardlinks=False):
+  """Copies the passed working directory to a new temporary directory, to
+  isolate commands run on a copy from commands run on the original or other
+  copies, and returns the path to the copy. The caller is responsible for
+  removing the copy's parent directory, i.e. `os.path.dirname(<copy>)`.
+
+  If use_hardlinks is True, files are hardlinked instead of copied, which is
+  faster but only isolates commands that replace files instead of modifying
+  them in place. """
+  scratch_dir = tempfile.mkdtemp(prefix="in-toto-")
+  workspace_copy = os.path.join(scratch_dir, "workspace")
+  try:
+    if use_hardlinks:
+      _link_tree(working_dir, workspace_copy)
+    else:
+      shutil.copytree(working_dir, workspace_copy, symlinks=True)
+
+  except Exception:
+    shutil.rmtree(scratch_dir, ignore_errors=True)
+    raise
+
+  return workspace_copy
+
+
+def _get_literal_path_prefix(pattern, prefix=None):
+  """Returns the path made of the leading components of the passed artifact
+  rule pattern, optionally joined with a literal prefix, that contain no glob
+  characters, i.e. a path under which all paths matched by the pattern are
+  found. Returns "." if the first component contains a glob character and
+  None if the pattern can only match paths outside of the current directory.
+  """
+  if prefix:
+    pattern = os.path.join(prefix, pattern)
+
+  pattern = os.path.normpath(pattern)
+  if os.path.isabs(pattern) or pattern.split("/")[0] == "..":
+    return None
+
+  literal_parts = []
+  for part in pattern.split("/"):
+    if any(char in part for char in "*?["):
+      break
+    literal_parts.append(part)
+
+  return "/".join(literal_parts) or "."
+
+
+def _is_excluded_path(path):
+  """Returns True if the passed path, or any of its parent directories,
+  is matched by an exclude pattern from the ARTIFACT_EXCLUDE_PATTERNS setting,
+  i.e. would not be recorded when recording the current directory. """
+  exclude_patterns = in_toto.settings.ARTIFACT_EXCLUDE_PATTERNS or []
+  parts = path.split("/")
+  for index in range(1, len(parts) + 1):
+    parent_path = "/".join(parts[:index])
+    for exclude_pattern in exclude_patterns:
+      if fnmatch.fnmatch(parent_path, exclude_pattern):
+        return True
+
+  return False
+
+
+def get_inspection_artifact_paths(layout, inspection):
+  """
+  <Purpose>
+    Returns the paths that are recorded as materials and products of the
+    passed inspection, i.e. the inspection's artifact_paths if specified, or
+    else the paths that can be observed by the inspection's artifact rules
+    or by other inspections' match rules that reference the inspection.
+
+    If the inspection neither has rules nor is referenced by other
+    inspections, the entire current directory is recorded.
+
+  <Arguments>
+    layout:
+            The Layout object that contains the inspection.
+
+    inspection:
+            The Inspection object whose artifact paths are returned.
+
+  <Exceptions>
+    securesystemslib.exceptions.FormatError
+            If any of the relevant artifact rules is malformed.
+
+  <Returns>
+    A sorted list of paths relative to the inspection's working directory.
+
+  """
+  if inspection.artifact_paths:
+    return sorted(set(inspection.artifact_paths))
+
+  # Pairs of path prefix and rule pattern that can observe the inspection's
+  # materials or products
+  observable_patterns = []
+  for rule in inspection.expected_materials + inspection.expected_products:
+    rule_data = in_toto.rulelib.unpack_rule(rule)
+    observable_patterns.append(
+        (rule_data.get("source_prefix"), rule_data["pattern"]))
+
+  for other_inspection in layout.inspect:
+    for rule in (other_inspection.expected_materials +
+        other_inspection.expected_products):
+      rule_data = in_toto.rulelib.unpack_rule(rule)
+      if rule_data.get("dest_name") == inspection.name:
+        observable_patterns.append(
+            (rule_data["dest_prefix"], rule_data["pattern"]))
+
+  if not observable_patterns:
+    return ["."]
+
+  paths = set()
+  for prefix, pattern in observable_patterns:
+    path = _get_literal_path_prefix(pattern, prefix)
+    if path == ".":
+      return ["."]
+
+    if path is not None and not _is_excluded_path(path):
+      paths.add(path)
+
+  # Don't record paths in directories that are recorded anyway
+  return sorted(path for path in paths if not any(
+      path.startswith(other + "/") for other in paths))
+
+
+def get_inspection_cache_key(inspection, artifact_paths, materials):
+  """
+  <Purpose>
+    Returns the inspection cache key for the passed inspection, i.e. a digest
+    of the inspection's name and command, the values of the environment
+    variables listed in `in_toto.settings.INSPECTION_CACHE_ENVIRONMENT`, the
+    recorded artifact paths and exclude patterns, and the inspection's
+    materials. Hence the key changes, if any of the inputs of the inspection
+    command, that in-toto knows of, change.
+
+  <Arguments>
+    inspection:
+            The Inspection object, with substituted parameters.
+
+    artifact_paths:
+            The paths recorded as materials and products of the inspection,
+            see `get_inspection_artifact_paths`.
+
+    materials:
+            A dictionary of the inspection's materials, in the format of Link
+            materials.
+
+  <Returns>
+    A cache key string.
+
+  """
+  key_data = {
+    "name": inspection.name,
+    "run": inspection.run,
+    "environment": dict((name, os.environ[name]) for name in
+        in_toto.settings.INSPECTION_CACHE_ENVIRONMENT if name in os.environ),
+    "artifact_paths": artifact_paths,
+    "exclude_patterns": in_toto.settings.ARTIFACT_EXCLUDE_PATTERNS or [],
+    "materials": materials
+  }
+  return "inspection:" + hashlib.sha256(
+      securesystemslib.formats.encode_canonical(
+      key_data).encode("utf-8")).hexdigest()
+
+
+def _is_working_dir_path(path):
+  """Private helper to check that an artifact path of a cached link is a
+  relative path, that does not leave the working directory. """
+  normalized_path = os.path.normpath(path)
+  return not (os.path.isabs(normalized_path) or
+      normalized_path.split(os.sep)[0] == os.pardir)
+
+
+def _replay_inspection(cache_key, materials, working_dir, restore_products):
+  """Private helper to return the link cached for the passed inspection
+  cache key, or None if there is no such entry or its products cannot be
+  restored. If restore_products is True, materials that are no products are
+  removed from, and products that differ from the materials are restored to
+  the working directory. """
+  value = in_toto.cache.get_inspection_cache().get(cache_key)
+  if not value:
+    return None
+
+  try:
+    link = in_toto.models.link.Link.read(value["link"])
+    modes = value["modes"]
+
+  except (KeyError, TypeError, securesystemslib.exceptions.Error) as e:
+    log.warning("Ignoring malformed inspection cache entry: {}".format(e))
+    return None
+
+  if restore_products:
+    content_store = in_toto.cache.get_inspection_content_store()
+    restored_paths = [path for path, hashes in six.iteritems(link.products)
+        if materials.get(path) != hashes]
+    removed_paths = [path for path in materials
+        if path not in link.products]
+
+    for path in restored_paths:
+      if not (_is_working_dir_path(path) and path in modes and
+          content_store.has(link.products[path].get("sha256", ""))):
+        return None
+
+    for path in removed_paths:
+      try:
+        os.remove(os.path.join(working_dir, path))
+
+      except OSError as e:
+        if e.errno != errno.ENOENT:
+          raise
+
+    for path in restored_paths:
+      content_store.restore(link.products[path]["sha256"],
+          os.path.join(working_dir, path), mode=modes[path])
+
+  link.environment = {"workdir": working_dir}
+  return Metablock(signed=link)
+
+
+def _cache_inspection(cache_key, link, working_dir):
+  """Private helper to cache the passed link of a successfully run
+  inspection, and the products that differ from its materials. Nothing is
+  cached if any of these products cannot be stored. """
+  content_store = in_toto.cache.get_inspection_content_store()
+  modes = {}
+  for path, hashes in six.iteritems(link.signed.products):
+    if link.signed.materials.get(path) == hashes:
+      continue
+
+    product_path = os.path.join(working_dir, path)
+    if "sha256" not in hashes or not content_store.add(hashes["sha256"],
+        product_path):
+      return
+
+    modes[path] = os.stat(product_path).st_mode & 0o7777
+
+  in_toto.cache.get_inspection_cache().set(cache_key, {
+    "link": in_toto.models.common.asdict(link.signed),
+    "modes": modes
+  })
+
+
+def _run_inspection(layout, inspection, working_dir, hash_cache=None,
+    restore_products=True):
+  """Runs the passed inspection's command in the passed working dir, records
+  materials and products relative to it and returns the resulting link.
+
+  If inspection caching is enabled (see `in_toto.settings`), the link of a
+  previous successful run with the same cache key (see
+  `get_inspection_cache_key`) is returned instead, and, if restore_products
+  is True, its products are restored to the working dir. """
+  material_list = product_list = get_inspection_artifact_paths(layout,
+      inspection)
+
+  cache_key = None
+  if in_toto.cache.get_inspection_cache():
+    materials = in_toto.runlib.record_artifacts_as_dict(material_list,
+        base_path=working_dir, follow_symlink_dirs=True,
+        hash_cache=hash_cache)
+    cache_key = get_inspection_cache_key(inspection, material_list,
+        materials)
+
+    link = _replay_inspection(cache_key, materials, working_dir,
+        restore_products)
+    if link is not None:
+      log.info("Using cached result of inspection '{}'...".format(
+          inspection.name))
+      return link
+
+  log.info("Executing command for inspection '{}'...".format(
+      inspection.name))
+
+  link = in_toto.runlib.in_toto_run(inspection.name, material_list,
+      product_list, inspection.run, base_path=working_dir, cwd=working_dir,
+      hash_cache=hash_cache)
+
+  # Only cache successful runs, whose materials were not changed while the
+  # cache key was created
+  if (cache_key is not None and
+      link.signed.byproducts.get("return-value") == 0 and
+      link.signed.materials == materials):
+    _cache_inspection(cache_key, link, working_dir)
+
+  return link
+
+
+def run_all_inspections(layout, working_dir=None, max_workers=1,
+    use_hardlinks=False, link_dir=None):
   """
   <Purpose>
     Extracts all inspections from a passed Layout's inspect field and
@@ -167,13 +749,58 @@ def run_all_inspections(layout):
 
     If a link command returns non-zero the verification is aborted.
 
+    Only the paths returned by `get_inspection_artifact_paths` are recorded
+    as the inspection's materials and products. Hashes of files that were
+    recorded before are reused if the file's stat values are unchanged.
+
+    If inspection caching is enabled (see
+    `in_toto.settings.INSPECTION_CACHE_PATH`), inspections whose command,
+    relevant environment and materials match a previous successful run are
+    not run again. Instead, the cached link is used and the cached products
+    are restored to the working directory.
+    NOTE: Only the recorded products are restored. Inspections must not
+    depend on other files created by previous inspections.
+
+    If max_workers is greater than one, inspections are run concurrently,
+    each in a separate temporary copy of the working directory, i.e.
+    inspections don't see each other's changes. Once an inspection returned
+    a bad value, no further inspections are started.
+
   <Arguments>
     layout:
             A Layout object which is used to extract the Inspections.
 
+    working_dir: (optional)
+            A path to a directory, in which the inspection commands are
+            executed and relative to which their materials and products are
+            recorded, or which is copied for each inspection, if they are run
+            concurrently. Default is the current working directory.
+            NOTE: The ARTIFACT_BASE_PATH setting is ignored for inspections.
+
+    max_workers: (optional)
+            The maximum number of inspections run concurrently. Default is 1,
+            i.e. inspections are run sequentially.
+
+    use_hardlinks: (optional)
+            If True, the working directory copies for concurrently run
+            inspections hardlink files instead of copying them. Only use this
+            if inspection commands don't modify files in place. Default is
+            False.
+
+    link_dir: (optional)
+            A path to a directory, to which the inspection link files are
+            written. The directory is created if it does not exist. Default
+            is the working directory.
+
   <Exceptions>
     Calls function that raises BadReturnValueError if an inspection returned
-    non-int or non-zero.
+    non-int or non-zero. If multiple inspections returned bad values, the
+    exception for the inspection that appears first in the layout is raised.
+
+  <Side Effects>
+    Writes inspection link files to link_dir.
+    Creates and removes temporary copies of the working directory, if
+    inspections are run concurrently.
 
   <Returns>
     A dictionary of metadata about the executed inspections, e.g.:
@@ -186,23 +813,63 @@ def run_all_inspections(layout):
     }
 
   """
+  if not working_dir:
+    working_dir = os.getcwd()
+
+  if not link_dir:
+    link_dir = working_dir
+
+  # Hashes of recorded files are reused within and across inspections
+  hash_cache = {}
+
+  if max_workers <= 1 or len(layout.inspect) <= 1:
+    links = None
+
+  else:
+    failed = threading.Event()
+
+    def _run_isolated_inspection(inspection):
+      """Runs the passed inspection in a copy of the working directory,
+      unless another inspection has already failed. """
+      if failed.is_set():
+        return None
+
+      inspection_working_dir = _copy_workspace(working_dir, use_hardlinks)
+      try:
+        link = _run_inspection(layout, inspection, inspection_working_dir,
+            hash_cache, restore_products=False)
+
+      except Exception:
+        failed.set()
+        raise
+
+      finally:
+        shutil.rmtree(os.path.dirname(inspection_working_dir),
+            ignore_errors=True)
+
+      # Bad return values are raised below, in layout order
+      if link.signed.byproducts.get("return-value") != 0:
+        failed.set()
+
+      return link
+
+    pool = ThreadPool(min(max_workers, len(layout.inspect)))
+    try:
+      # Inspections are started in layout order (chunksize=1), hence skipped
+      # inspections always appear after a failed inspection
+      links = pool.map(_run_isolated_inspection, layout.inspect, chunksize=1)
+
+    finally:
+      pool.close()
+      pool.join()
+
   inspection_links_dict = {}
-  for inspection in layout.inspect:
-    log.info("Executing command for inspection '{}'...".format(
-        inspection.name))
-
-    # FIXME: We don't want to use the base path for runlib so we patch this
-    # for now. This will not stay!
-    base_path_backup = in_toto.settings.ARTIFACT_BASE_PATH
-    in_toto.settings.ARTIFACT_BASE_PATH = None
-
-    # FIXME: What should we record as material/product?
-    # Is the current directory a sensible default? In general?
-    # If so, we should probably make it a default in run_link
-    # We could use artifact rule paths.
-    material_list = product_list = ["."]
-    link = in_toto.runlib.in_toto_run(inspection.name, material_list,
-        product_list, inspection.run)
+  for index, inspection in enumerate(layout.inspect):
+    if links is None:
+      link = _run_inspection(layout, inspection, working_dir, hash_cache)
+
+    else:
+      link = links[index]
 
     _raise_on_bad_retval(link.signed.byproducts.get("return-value"), inspection.run)
 
@@ -210,10 +877,10 @@ def run_all_inspections(layout):
 
     # Dump the inspection link file for auditing
     # Keep in mind that this pollutes the verifier's (client's) filesystem.
+    if not os.path.isdir(link_dir):
+      os.makedirs(link_dir)
     filename = FILENAME_FORMAT_SHORT.format(step_name=inspection.name)
-    link.dump(filename)
-
-    in_toto.settings.ARTIFACT_BASE_PATH = base_path_backup
+    link.dump(os.path.join(link_dir, filename))
 
   return inspection_links_dict
 
@@ -314,7 +981,12 @@ def substitute_parameters(layout, parameter_dictionary):
     for argv in inspection.run:
       new_run.append(argv.format(**parameter_dictionary))
 
+    new_artifact_paths = []
+    for path in inspection.artifact_paths:
+      new_artifact_paths.append(path.format(**parameter_dictionary))
+
     inspection.run = new_run
+    inspection.artifact_paths = new_artifact_paths
     inspection.expected_materials = new_material_rules
     inspection.expected_products = new_product_rules
 
@@ -359,7 +1031,8 @@ def verify_layout_signatures(layout_metablock, keys_dict):
     layout_metablock.verify_signature(verify_key)
 
 
-def verify_link_signature_thresholds(layout, chain_link_dict):
+def verify_link_signature_thresholds(layout, chain_link_dict, steps=None,
+    verified_links=None, step_keys=None):
   """
   <Purpose>
     Verify that for each step of the layout there are at least `threshold`
@@ -387,6 +1060,23 @@ def verify_link_signature_thresholds(layout, chain_link_dict):
               }, ...
             }
 
+    steps: (optional)
+            A list of Step objects of the passed layout, whose links are
+            verified. Default is all steps of the layout.
+
+    verified_links: (optional)
+            A dictionary in the format of chain_link_dict, with links whose
+            signatures were already verified against the passed layout, e.g.
+            while waiting for links (see `in_toto.verify_watch`). The
+            signature of a link is not verified again, if it is the very same
+            object in both dictionaries. Default is None.
+
+    step_keys: (optional)
+            The verification keys of the passed layout's steps, as returned by
+            `Layout.get_step_verification_keys`, e.g. to build them only once
+            per verification. Default is None, i.e. they are built from the
+            passed layout.
+
   <Exceptions>
     ThresholdVerificationError
             If any of the steps of the passed layout does not have enough
@@ -398,14 +1088,14 @@ def verify_link_signature_thresholds(layout, chain_link_dict):
     authorized functionaries.
 
   """
-  # Create an inverse keys-subkeys dictionary, with subkey keyids as
-  # dictionary keys and main keys as dictionary values.
-  # NOTE: We assume that a given subkey can only belong to one master key
-  # TODO: Is this a safe assumption? Should we assert for it?
-  main_keys_for_subkeys = {}
-  for main_key in list(layout.keys.values()):
-    for sub_keyid in main_key.get("subkeys", []):
-      main_keys_for_subkeys[sub_keyid] = main_key
+  if steps is None:
+    steps = layout.steps
+
+  if verified_links is None:
+    verified_links = {}
+
+  if step_keys is None:
+    step_keys = layout.get_step_verification_keys()
 
   verfied_chain_link_dict = {}
   # Check signatures on passed links, if they are valid and authorized, but
@@ -414,46 +1104,28 @@ def verify_link_signature_thresholds(layout, chain_link_dict):
   # requirements are fulfilled. That is, we don't care if there are a few
   # bad links, as long as we have enough good links. Only the good links will
   # be considered for further final product verification.
-  for step in layout.steps:
+  for step in steps:
     # Will contain all links corresponding to a step with successfully
     # verified signatures, authorized to perform the step
     verified_key_link_dict = {}
 
     # Iterate over links corresponding to a step
     for link_keyid, link in six.iteritems(chain_link_dict.get(step.name, {})):
-      # Check if the link's keyid is authorized to provide a link for the step.
-      # Iterate over authorized keyids to find a key or subkey corresponding
-      # to the given link. Subkeys of authorized main keys are authorized
+      # Check if the link's keyid is authorized to provide a link for the step,
+      # i.e. if it is an authorized key or subkey, or a subkey belonging to an
+      # authorized key. Subkeys of authorized main keys are authorized
       # implicitly.
-      for authorized_keyid in step.pubkeys:
-
-        authorized_key = layout.keys.get(authorized_keyid)
-        main_key_for_subkey = main_keys_for_subkeys.get(authorized_keyid)
-
-        # The signing key is authorized
-        if authorized_key and link_keyid == authorized_keyid:
-          verification_key = authorized_key
-          break
-
-        # The signing key is an authorized subkey
-        elif main_key_for_subkey and link_keyid == authorized_keyid:
-          verification_key = main_key_for_subkey
-          break
-
-        # The signing key is a subkey belonging to an authorized key
-        elif (authorized_key and
-            link_keyid in authorized_key.get("subkeys", {}).keys()):
-          verification_key = authorized_key
-          break
-
-      else:
+      verification_key = step_keys.get(step.name, {}).get(link_keyid)
+      if verification_key is None:
         log.info("Skipping link. Keyid '{0}' is not authorized to sign links"
             " for step '{1}'".format(link_keyid, step.name))
         continue
 
-      # Verify signature and skip invalidly signed links
+      # Verify signature and skip invalidly signed links, unless the same
+      # link object was verified before
       try:
-        link.verify_signature(verification_key)
+        if verified_links.get(step.name, {}).get(link_keyid) is not link:
+          link.verify_signature(verification_key)
 
       except SignatureVerificationError:
         log.info("Skipping link. Broken link signature with keyid '{0}'"
@@ -473,7 +1145,7 @@ def verify_link_signature_thresholds(layout, chain_link_dict):
   # we rely on the layout to not carry duplicate verification keys under
   # different dictionary keys, e.g. {keyid1: KEY1, keyid2: KEY1}
   # Maybe we should add such a check to the layout validation? Or here?
-  for step in layout.steps:
+  for step in steps:
     valid_authorized_links_cnt = len(verfied_chain_link_dict[step.name])
     if valid_authorized_links_cnt < step.threshold:
       raise ThresholdVerificationError("Step requires at least '{}' links"
@@ -992,7 +1664,34 @@ def verify_disallow_rule(rule, source_artifacts_queue):
         " artifacts: '{1}' ".format(" ".join(rule), matched_artifacts))
 
 
-def verify_item_rules(source_name, source_type, rules, links):
+def _get_queue_sizes(source_type, source_artifacts_queue,
+    source_materials_queue, source_products_queue):
+  """Private helper to return the sizes of the materials and products queues.
+  MATCH and ALLOW rules only update the generic artifacts queue, which hence
+  takes precedence for the source type. """
+  if source_type == "materials":
+    return len(source_artifacts_queue), len(source_products_queue)
+
+  return len(source_materials_queue), len(source_artifacts_queue)
+
+
+def _get_rule_candidates_count(rule_type, source_artifacts_queue,
+    source_materials_queue, source_products_queue):
+  """Private helper to return the number of queued artifacts that a rule of
+  the passed type examines, i.e. tests against its pattern. """
+  if rule_type == "create":
+    return len(source_products_queue)
+
+  if rule_type == "delete":
+    return len(source_materials_queue)
+
+  if rule_type == "modify":
+    return len(source_materials_queue) + len(source_products_queue)
+
+  return len(source_artifacts_queue)
+
+
+def verify_item_rules(source_name, source_type, rules, links, rule_stats=None):
   """
   <Purpose>
     Iteratively apply all passed material or product rules of one item (step or
@@ -1033,6 +1732,25 @@ def verify_item_rules(source_name, source_type, rules, links):
               ...
             }
 
+    rule_stats: (optional)
+            A list, to which a dictionary of statistics is appended for each
+            applied rule, including a rule that fails verification, e.g.:
+            {
+              "item": <source_name>,
+              "source_type": <source_type>,
+              "rule": <rule as string>,
+              "rule_type": <rule type, e.g. "match">,
+              "passed": <False if the rule failed verification>,
+              "candidates": <number of queued artifacts examined by the rule>,
+              "materials_queue_before": <materials queue size>,
+              "materials_queue_after": <materials queue size>,
+              "products_queue_before": <products queue size>,
+              "products_queue_after": <products queue size>,
+              "consumed": <number of artifacts removed from the queues>,
+              "seconds": <elapsed time>
+            }
+            Default is None, i.e. no statistics are collected.
+
 
   <Exceptions>
     FormatError
@@ -1076,63 +1794,189 @@ def verify_item_rules(source_name, source_type, rules, links):
     rule_data = in_toto.rulelib.unpack_rule(rule)
     rule_type = rule_data["rule_type"]
 
-    # MATCH, ALLOW, DISALLOW operate equally on either products or materials
-    # depending on the source_type
-    if rule_type == "match":
-      source_artifacts_queue = verify_match_rule(
-          rule, source_artifacts_queue, source_artifacts, links)
-
-    elif rule_type == "allow":
-      source_artifacts_queue = verify_allow_rule(rule, source_artifacts_queue)
-
-    elif rule_type == "disallow":
-      verify_disallow_rule(rule, source_artifacts_queue)
-
-
-    # CREATE, DELETE and MODIFY always operate either on products, on materials
-    # or both, independently of the source_type ...
-    elif rule_type == "create":
-      source_products_queue = verify_create_rule(
-          rule, source_materials_queue, source_products_queue)
-
-      # The create rule only updates the products_queue, which in turn
-      # only affects the generic artifacts queue if source_type is "products"
-      if source_type == "products":
-        source_artifacts_queue = source_products_queue
-
-    elif rule_type == "delete":
-      source_materials_queue = verify_delete_rule(
-          rule, source_materials_queue, source_products_queue)
-
-      # The delete rule only updates the materials_queue, which in turn
-      # only affects the generic artifacts queue if source_type is "materials"
-      if source_type == "materials":
-        source_artifacts_queue = source_materials_queue
-
-    # NOTE: Can't reach `else` branch, if the rule is none of these types
-    # an exception would have been raised above in `unpack_rule`
-    elif rule_type == "modify": # pragma: no branch
-      # The modify rule updates materials_queue and products_queue. We have to
-      # update the generic artifacts queue accordingly.
-      if source_type == "materials":
-        source_materials_queue, source_products_queue = verify_modify_rule(
-            rule, source_artifacts_queue, source_products_queue,
-            source_materials, source_products)
-        source_artifacts_queue = source_materials_queue
-
-      # NOTE: Can't reach `else` branch, if the source_type is none of these
-      # types an exception would have been raised above in `unpack_rule`
-      elif source_type == "products": # pragma: no branch
-        source_materials_queue, source_products_queue = verify_modify_rule(
-            rule, source_materials_queue, source_artifacts_queue,
-            source_materials, source_products)
-        source_artifacts_queue = source_products_queue
-
-
-def verify_all_item_rules(items, links):
+    if rule_stats is not None:
+      stats = {
+        "item": source_name,
+        "source_type": source_type,
+        "rule": " ".join(rule),
+        "rule_type": rule_type,
+        "passed": False,
+        "candidates": _get_rule_candidates_count(rule_type,
+            source_artifacts_queue, source_materials_queue,
+            source_products_queue)
+      }
+      stats["materials_queue_before"], stats["products_queue_before"] = \
+          _get_queue_sizes(source_type, source_artifacts_queue,
+          source_materials_queue, source_products_queue)
+      rule_stats.append(stats)
+      start_time = timeit.default_timer()
+
+    try:
+      # MATCH, ALLOW, DISALLOW operate equally on either products or materials
+      # depending on the source_type
+      if rule_type == "match":
+        source_artifacts_queue = verify_match_rule(
+            rule, source_artifacts_queue, source_artifacts, links)
+
+      elif rule_type == "allow":
+        source_artifacts_queue = verify_allow_rule(rule, source_artifacts_queue)
+
+      elif rule_type == "disallow":
+        verify_disallow_rule(rule, source_artifacts_queue)
+
+
+      # CREATE, DELETE and MODIFY always operate either on products, on
+      # materials or both, independently of the source_type ...
+      elif rule_type == "create":
+        source_products_queue = verify_create_rule(
+            rule, source_materials_queue, source_products_queue)
+
+        # The create rule only updates the products_queue, which in turn
+        # only affects the generic artifacts queue if source_type is "products"
+        if source_type == "products":
+          source_artifacts_queue = source_products_queue
+
+      elif rule_type == "delete":
+        source_materials_queue = verify_delete_rule(
+            rule, source_materials_queue, source_products_queue)
+
+        # The delete rule only updates the materials_queue, which in turn
+        # only affects the generic artifacts queue if source_type is "materials"
+        if source_type == "materials":
+          source_artifacts_queue = source_materials_queue
+
+      # NOTE: Can't reach `else` branch, if the rule is none of these types
+      # an exception would have been raised above in `unpack_rule`
+      elif rule_type == "modify": # pragma: no branch
+        # The modify rule updates materials_queue and products_queue. We have
+        # to update the generic artifacts queue accordingly.
+        if source_type == "materials":
+          source_materials_queue, source_products_queue = verify_modify_rule(
+              rule, source_artifacts_queue, source_products_queue,
+              source_materials, source_products)
+          source_artifacts_queue = source_materials_queue
+
+        # NOTE: Can't reach `else` branch, if the source_type is none of these
+        # types an exception would have been raised above in `unpack_rule`
+        elif source_type == "products": # pragma: no branch
+          source_materials_queue, source_products_queue = verify_modify_rule(
+              rule, source_materials_queue, source_artifacts_queue,
+              source_materials, source_products)
+          source_artifacts_queue = source_products_queue
+
+      if rule_stats is not None:
+        stats["passed"] = True
+
+    finally:
+      if rule_stats is not None:
+        stats["seconds"] = timeit.default_timer() - start_time
+        stats["materials_queue_after"], stats["products_queue_after"] = \
+            _get_queue_sizes(source_type, source_artifacts_queue,
+            source_materials_queue, source_products_queue)
+        stats["consumed"] = (
+            stats["materials_queue_before"] - stats["materials_queue_after"] +
+            stats["products_queue_before"] - stats["products_queue_after"])
+
+
+def _get_item_link_references(items):
+  """Private helper to return a list with the set of link names referenced by
+  each of the passed items (Steps or Inspections), i.e. the item's own name
+  and the destinations of its MATCH rules. These are the only links that
+  verifying the item's rules reads. """
+  references = []
+  for item in items:
+    item_references = set([item.name])
+    for rule in item.expected_materials + item.expected_products:
+      try:
+        rule_data = in_toto.rulelib.unpack_rule(rule)
+
+      except securesystemslib.exceptions.FormatError:
+        # Malformed rules fail verification anyway
+        continue
+
+      if rule_data["rule_type"] == "match":
+        item_references.add(rule_data["dest_name"])
+
+    references.append(item_references)
+
+  return references
+
+
+def _get_referenced_link_names(items):
+  """Private helper to return a dictionary with the index of the last of the
+  passed items (Steps or Inspections), that references each link name. """
+  last_references = {}
+  for index, item_references in enumerate(_get_item_link_references(items)):
+    for name in item_references:
+      last_references[name] = index
+
+  return last_references
+
+
+def _verify_single_item_rules(item, links, rule_stats=None):
+  """Private helper to verify the material and product rules of one item. """
+  log.info("Verifying material rules for '{}'...".format(item.name))
+  verify_item_rules(item.name, "materials", item.expected_materials, links,
+      rule_stats=rule_stats)
+
+  log.info("Verifying product rules for '{}'...".format(item.name))
+  verify_item_rules(item.name, "products", item.expected_products, links,
+      rule_stats=rule_stats)
+
+
+def _verify_item_rules_task(args):
+  """Private helper to verify the rules of one item in a worker process, see
+  `verify_all_item_rules`. Takes a tuple of the item, the links it
+  references and whether statistics are collected, and returns a tuple of
+  the item's rule statistics and the raised exception, if any. """
+  item, links, collect_stats = args
+  item_rule_stats = [] if collect_stats else None
+  try:
+    _verify_single_item_rules(item, links, rule_stats=item_rule_stats)
+
+  except Exception as e: # pylint: disable=broad-except
+    return item_rule_stats, e
+
+  return item_rule_stats, None
+
+
+def _create_process_pool(processes):
+  """Private helper to return a pool of the passed number of worker
+  processes, or None if worker processes cannot be started safely.
+
+  Worker processes are spawned, not forked, because rules may be verified
+  while other threads of this process hold locks, e.g. when sublayouts,
+  batch products or server requests are verified concurrently, and a forked
+  child would inherit these locks in their held state. Where spawning is not
+  available, i.e. on Python 2, worker processes are only forked if the
+  current thread is the only thread of the process. """
+  get_context = getattr(multiprocessing, "get_context", None)
+  if get_context is not None:
+    return get_context("spawn").Pool(processes)
+
+  if threading.active_count() == 1: # pragma: no cover
+    return multiprocessing.Pool(processes)
+
+  log.info("Verifying rules sequentially, worker processes cannot be forked"
+      " safely while other threads are running.")
+  return None # pragma: no cover
+
+
+def verify_all_item_rules(items, links, rule_stats=None, keep_links=None,
+    max_workers=1):
   """
   <Purpose>
-    Iteratively verifies artifact rules of passed items (Steps or Inspections).
+    Verifies artifact rules of passed items (Steps or Inspections).
+
+    Verifying an item's rules only reads the links that the item references,
+    i.e. its own link and the destination links of its MATCH rules, and
+    never changes them. These references form the dependency graph of the
+    passed items, and no item depends on the result of another item. Hence,
+    if max_workers is greater than one, the rules of different items are
+    verified concurrently in a pool of worker processes, to which each item
+    is sent only with the links it references. If multiple items fail, the
+    exception of the item that appears first in the passed list is raised,
+    and the remaining items are not awaited.
 
   <Arguments>
     items:
@@ -1146,23 +1990,108 @@ def verify_all_item_rules(items, links):
               ...
             }
 
+    rule_stats: (optional)
+            A list, to which rule statistics are appended, see
+            `verify_item_rules`. Statistics are appended in the order of the
+            passed items, also if they are verified concurrently.
+
+    keep_links: (optional)
+            A set of link names. If passed, all other links are removed from
+            the passed links dictionary, as soon as all items that reference
+            them were verified, so that they can be garbage collected. Default
+            is None, i.e. the links dictionary is not modified.
+
+    max_workers: (optional)
+            The maximum number of worker processes, in which the rules of
+            different items are verified concurrently. Only use this if the
+            items' rules are expensive to verify, e.g. for many artifacts,
+            because items and links are copied to the worker processes,
+            which are spawned anew for each call. Default is 1, i.e. items
+            are verified sequentially in the current process.
+
   <Exceptions>
     None.
 
   <Side Effects>
-    None.
+    Removes links from the passed links dictionary, if keep_links is passed.
+    Starts worker processes, if max_workers is greater than one.
 
   """
+  references = _get_item_link_references(items)
+  last_references = _get_referenced_link_names(items)
+
+  if keep_links is not None:
+    # Release links that no item references at all
+    for name in list(links.keys()):
+      if name not in last_references and name not in keep_links:
+        del links[name]
+
+  def _release_links(index):
+    """Releases the links, whose last referencing item was verified. """
+    if keep_links is None:
+      return
+
+    for name in references[index]:
+      if last_references[name] == index and name not in keep_links:
+        links.pop(name, None)
+
+  pool = None
+  if max_workers > 1 and len(items) > 1:
+    pool = _create_process_pool(min(max_workers, len(items)))
+
+  if pool is None:
+    for index, item in enumerate(items):
+      _verify_single_item_rules(item, links, rule_stats=rule_stats)
+      _release_links(index)
+
+    return
+
+  def _get_tasks():
+    """Yields the task of each item, with the links the item references. A
+    link is only released once the results of all items referencing it were
+    received, i.e. after the tasks of these items were created. """
+    for index, item in enumerate(items):
+      item_links = dict((name, links[name]) for name in references[index]
+          if name in links)
+      yield item, item_links, rule_stats is not None
 
-  for item in items:
-    log.info("Verifying material rules for '{}'...".format(item.name))
-    verify_item_rules(item.name, "materials", item.expected_materials, links)
+  try:
+    # Results are received in item order, hence the first error received is
+    # the one of the first failing item
+    for index, (item_rule_stats, error) in enumerate(
+        pool.imap(_verify_item_rules_task, _get_tasks(), chunksize=1)):
+      if rule_stats is not None and item_rule_stats:
+        rule_stats += item_rule_stats
+
+      if error is not None:
+        raise error
+
+      _release_links(index)
+
+  finally:
+    pool.terminate()
+    pool.join()
+
+
+def _get_artifacts_diff_message(reference_link, link):
+  """Private helper to return a message that lists the paths of artifacts,
+  which differ between the passed links, e.g. for an error message. """
+  messages = []
+  for artifact_type in ["materials", "products"]:
+    reference_artifacts = getattr(reference_link, artifact_type)
+    artifacts = getattr(link, artifact_type)
+    paths = sorted(path
+        for path in set(reference_artifacts) | set(artifacts)
+        if reference_artifacts.get(path) != artifacts.get(path))
+
+    if paths:
+      messages.append("{0} {1}".format(artifact_type,
+          ", ".join("'{}'".format(path) for path in paths)))
 
-    log.info("Verifying product rules for '{}'...".format(item.name))
-    verify_item_rules(item.name, "products", item.expected_products, links)
+  return "; ".join(messages)
 
 
-def verify_threshold_constraints(layout, chain_link_dict):
+def verify_threshold_constraints(layout, chain_link_dict, steps=None):
   """
   <Purpose>
     Verifies that all links corresponding to a given step report the same
@@ -1187,6 +2116,10 @@ def verify_threshold_constraints(layout, chain_link_dict):
               }, ...
             }
 
+    steps: (optional)
+            A list of Step objects of the passed layout, whose thresholds are
+            verified. Default is all steps of the layout.
+
   <Exceptions>
     ThresholdVerificationError
         If there are not enough (threshold) links for a steps
@@ -1199,9 +2132,12 @@ def verify_threshold_constraints(layout, chain_link_dict):
 
   """
 
+  if steps is None:
+    steps = layout.steps
+
   # We are only interested in links that are related to steps defined in the
   # Layout, so iterate over layout.steps
-  for step in layout.steps:
+  for step in steps:
     # Skip steps that don't require multiple functionaries
     if step.threshold <= 1:
       log.info("Skipping threshold verification for step '{0}' with"
@@ -1224,18 +2160,31 @@ def verify_threshold_constraints(layout, chain_link_dict):
     reference_keyid = list(key_link_dict.keys())[0]
     reference_link = key_link_dict[reference_keyid]
 
+    # NOTE: Compare artifact fingerprints, which are computed once per link
+    # for this check, instead of the artifact dictionaries, and only diff
+    # the artifacts to report a mismatch. The fingerprints are not stored on
+    # the links, which may be modified in place by callers.
+    reference_fingerprints = (
+        reference_link.signed.get_materials_fingerprint(),
+        reference_link.signed.get_products_fingerprint())
+
     # Iterate over all links to compare their properties with a reference_link
     for keyid, link in six.iteritems(key_link_dict):
+      if keyid == reference_keyid:
+        continue
+
       # TODO: Do we only care for artifacts, or do we want to
       # assert equality of other properties as well?
-      if (reference_link.signed.materials != link.signed.materials or
-          reference_link.signed.products != link.signed.products):
+      if reference_fingerprints != (link.signed.get_materials_fingerprint(),
+          link.signed.get_products_fingerprint()):
         raise ThresholdVerificationError("Links '{0}' and '{1}' have different"
-            " artifacts!".format(
+            " artifacts: {2}".format(
                 in_toto.models.link.FILENAME_FORMAT.format(
                     step_name=step.name, keyid=reference_keyid),
                 in_toto.models.link.FILENAME_FORMAT.format(
-                    step_name=step.name, keyid=keyid)))
+                    step_name=step.name, keyid=keyid),
+                _get_artifacts_diff_message(reference_link.signed,
+                    link.signed)))
 
 
 def reduce_chain_links(chain_link_dict):
@@ -1284,13 +2233,65 @@ def reduce_chain_links(chain_link_dict):
   return reduced_chain_link_dict
 
 
-def verify_sublayouts(layout, chain_link_dict, superlayout_link_dir_path):
+class _WorkerSlots(object):
+  """A bounded number of worker slots, shared by all levels of a nested
+  sublayout verification. A thread that holds a slot and waits for the
+  verification of nested sublayouts temporarily gives up its slot, so that
+  nested verifications cannot starve. """
+
+  def __init__(self, count):
+    self._semaphore = threading.Semaphore(count)
+    self._local = threading.local()
+
+  def acquire(self):
+    self._semaphore.acquire()
+    self._local.held = True
+
+  def release(self):
+    self._local.held = False
+    self._semaphore.release()
+
+  def is_held(self):
+    return getattr(self._local, "held", False)
+
+
+def _get_sublayouts(layout, chain_link_dict, link_source):
+  """Returns a list of (step name, keyid, layout metablock, link source)
+  tuples for each sublayout in the passed chain_link_dict, in the order the
+  corresponding steps appear in the layout. """
+  step_names = [step.name for step in layout.steps]
+  step_names += sorted(set(chain_link_dict.keys()) - set(step_names))
+
+  sublayouts = []
+  for step_name in step_names:
+    for keyid, link in six.iteritems(chain_link_dict.get(step_name, {})):
+      if link.type_ == "layout":
+        sublayouts.append((step_name, keyid, link,
+            link_source.get_sublayout_source(step_name, keyid)))
+
+  return sublayouts
+
+
+def verify_sublayouts(layout, chain_link_dict, superlayout_link_dir_path,
+    max_workers=1, working_dir=None, worker_slots=None, inspection_workers=1,
+    inspection_hardlinks=False, link_workers=1, rule_workers=1,
+    link_digests=None):
   """
   <Purpose>
     Checks if any step has been delegated by the functionary, recurses into
     the delegation and replaces the layout object in the chain_link_dict
     by an equivalent link object.
 
+    If max_workers is greater than one, sublayouts are verified concurrently.
+    To isolate the inspections of concurrently verified sublayouts from each
+    other, each sublayout's inspections are run in a separate copy of the
+    working directory. Sublayouts without inspections don't copy the working
+    directory.
+
+    The inspection links of each sublayout are written to a subdirectory of
+    the working directory, whose name has the format
+    in_toto.models.layout.SUBLAYOUT_LINK_DIR_FORMAT.
+
   <Arguments>
     layout:
             The layout specified by the project owner.
@@ -1312,11 +2313,42 @@ def verify_sublayouts(layout, chain_link_dict, superlayout_link_dir_path):
             relative to this path, with a name in the format
             in_toto.models.layout.SUBLAYOUT_LINK_DIR_FORMAT.
 
+    max_workers: (optional)
+            The maximum number of sublayouts that are verified concurrently,
+            across all levels of sublayout nesting. Default is 1, i.e.
+            sublayouts are verified sequentially.
+
+    working_dir: (optional)
+            A path to a directory, in which inspections of sublayouts are run,
+            if sublayouts are verified sequentially, or which is copied for
+            each sublayout with inspections, if they are verified
+            concurrently. Default is the current working directory.
+
+    worker_slots: (optional)
+            Used internally to share worker slots across levels of sublayout
+            nesting. Should not be passed by the caller.
+
+    inspection_workers, inspection_hardlinks, link_workers, rule_workers:
+    (optional)
+            Passed on to the verification of each sublayout, see
+            `in_toto_verify`.
+
+    link_digests: (optional)
+            A dictionary of link digests per step name and functionary keyid
+            (see `in_toto_verify`). The digest of each verified sublayout is
+            replaced with a dictionary of the sublayout's digest, as "layout",
+            and the digests of the sublayout's links, as "links".
+
   <Exceptions>
-    raises an Exception if verification of the delegated step fails.
+    raises an Exception if verification of the delegated step fails. If
+    multiple sublayouts fail verification, the exception of the sublayout
+    whose step appears first in the layout is raised.
 
   <Side Effects>
-    None.
+    Writes inspection link files of sublayouts to subdirectories of the
+    working directory.
+    Creates and removes temporary copies of the working directory, if
+    sublayouts with inspections are verified concurrently.
 
   <Returns>
     The passed dictionary containing link metadata per functionary per step,
@@ -1330,38 +2362,242 @@ def verify_sublayouts(layout, chain_link_dict, superlayout_link_dir_path):
     }
 
   """
-  for step_name, key_link_dict in six.iteritems(chain_link_dict):
+  return _verify_sublayouts(layout, chain_link_dict,
+      _DirectoryLinkSource(superlayout_link_dir_path,
+      max_workers=link_workers), max_workers=max_workers,
+      working_dir=working_dir, worker_slots=worker_slots,
+      inspection_workers=inspection_workers,
+      inspection_hardlinks=inspection_hardlinks, rule_workers=rule_workers,
+      link_digests=link_digests)
+
+
+def _verify_sublayouts(layout, chain_link_dict, link_source, max_workers=1,
+    working_dir=None, worker_slots=None, inspection_workers=1,
+    inspection_hardlinks=False, rule_workers=1, link_digests=None,
+    isolate_inspections=False, inspection_link_dir=None):
+  """Private helper to verify the sublayouts in the passed chain_link_dict
+  with links from the passed link source (see `_DirectoryLinkSource`), see
+  `verify_sublayouts`. Inspection links of each sublayout are written to a
+  subdirectory of inspection_link_dir, named like the sublayout's link
+  directory. """
+  sublayouts = _get_sublayouts(layout, chain_link_dict, link_source)
+
+  if not working_dir:
+    working_dir = os.getcwd()
+
+  if not inspection_link_dir:
+    inspection_link_dir = working_dir
+
+  def _get_inspection_link_dir(step_name, keyid):
+    """Returns the directory for the inspection links of the sublayout of
+    the passed step and functionary. """
+    return os.path.join(inspection_link_dir,
+        SUBLAYOUT_LINK_DIR_FORMAT.format(name=step_name, keyid=keyid))
+
+  # Digests of the links of each sublayout, in the order of sublayouts
+  sublayout_link_digests = [None] * len(sublayouts)
+  if link_digests is not None:
+    sublayout_link_digests = [{} for sublayout in sublayouts]
+
+  if max_workers <= 1 or len(sublayouts) <= 1:
+    for index, sublayout in enumerate(sublayouts):
+      step_name, keyid, link, sublayout_link_source = sublayout
+      log.info("Verifying sublayout {}...".format(step_name))
+
+      # Retrieve the entire key object for the keyid
+      # corresponding to the link
+      layout_key_dict = {keyid: layout.keys.get(keyid)}
+
+      # Make a recursive call to in-toto verification with the
+      # layout and the extracted key object
+      summary_link = _in_toto_verify(link, layout_key_dict,
+          sublayout_link_source, max_workers=max_workers,
+          working_dir=working_dir, worker_slots=worker_slots,
+          inspection_workers=inspection_workers,
+          inspection_hardlinks=inspection_hardlinks,
+          rule_workers=rule_workers,
+          link_digests=sublayout_link_digests[index],
+          isolate_inspections=isolate_inspections,
+          inspection_link_dir=_get_inspection_link_dir(step_name, keyid))
+
+      # Replace the layout object in the passed chain_link_dict
+      # with the summary link returned by in-toto verification
+      chain_link_dict[step_name][keyid] = summary_link
+
+    _add_sublayout_link_digests(link_digests, sublayouts,
+        sublayout_link_digests)
+    return chain_link_dict
+
+  if worker_slots is None:
+    worker_slots = _WorkerSlots(max_workers)
+
+  summary_links = [None] * len(sublayouts)
+  errors = [None] * len(sublayouts)
+
+  def _verify_sublayout(index):
+    """Verifies the sublayout at the passed index, using a worker slot, and
+    stores the result or error. Inspections are run in a copy of the working
+    directory, which is only created for (nested) layouts with inspections.
+    """
+    step_name, keyid, link, sublayout_link_source = sublayouts[index]
+    worker_slots.acquire()
+    try:
+      log.info("Verifying sublayout {}...".format(step_name))
+      layout_key_dict = {keyid: layout.keys.get(keyid)}
+      summary_links[index] = _in_toto_verify(link, layout_key_dict,
+          sublayout_link_source, max_workers=max_workers,
+          working_dir=working_dir, worker_slots=worker_slots,
+          inspection_workers=inspection_workers,
+          inspection_hardlinks=inspection_hardlinks,
+          rule_workers=rule_workers,
+          link_digests=sublayout_link_digests[index],
+          isolate_inspections=True,
+          inspection_link_dir=_get_inspection_link_dir(step_name, keyid))
+
+    except Exception: # pylint: disable=broad-except
+      errors[index] = sys.exc_info()
+
+    finally:
+      worker_slots.release()
+
+  threads = []
+  for index in range(len(sublayouts)):
+    thread = threading.Thread(target=_verify_sublayout, args=(index,))
+    thread.daemon = True
+    threads.append(thread)
+
+  # If this is a nested verification, give up our slot while we wait for
+  # the sublayouts to be verified
+  slot_held = worker_slots.is_held()
+  if slot_held:
+    worker_slots.release()
 
-    for keyid, link in six.iteritems(key_link_dict):
+  try:
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+  finally:
+    if slot_held:
+      worker_slots.acquire()
+
+  # Report errors in layout order, independently of completion order
+  for error in errors:
+    if error:
+      six.reraise(*error)
+
+  for index, sublayout in enumerate(sublayouts):
+    step_name, keyid = sublayout[:2]
+    chain_link_dict[step_name][keyid] = summary_links[index]
+
+  _add_sublayout_link_digests(link_digests, sublayouts,
+      sublayout_link_digests)
+  return chain_link_dict
 
-      if link.type_ == "layout":
-        log.info("Verifying sublayout {}...".format(step_name))
-        layout_key_dict = {}
 
-        # Retrieve the entire key object for the keyid
-        # corresponding to the link
-        layout_key_dict = {keyid: layout.keys.get(keyid)}
+def _add_sublayout_link_digests(link_digests, sublayouts,
+    sublayout_link_digests):
+  """Private helper to nest the passed digests of the links of each verified
+  sublayout under the sublayout's step name and keyid in the passed
+  link_digests, if any. """
+  if link_digests is None:
+    return
+
+  for index, sublayout in enumerate(sublayouts):
+    step_name, keyid, link = sublayout[:3]
+    key_digest_dict = link_digests.setdefault(step_name, {})
+    # The sublayout's digest is normally added before its verification
+    layout_digest = key_digest_dict.get(keyid)
+    if not isinstance(layout_digest, six.string_types):
+      layout_digest = _get_metablock_digest(link)
+
+    key_digest_dict[keyid] = {
+      "layout": layout_digest,
+      "links": sublayout_link_digests[index]
+    }
 
-        # Sublayout links are expected to be in a directory with the following
-        # name relative the the current link directory path, i.e. if there
-        # are multiple levels of sublayout nesting, the links are expected to
-        # be nested accordingly
-        sublayout_link_dir = SUBLAYOUT_LINK_DIR_FORMAT.format(
-            name=step_name, keyid=keyid)
 
-        sublayout_link_dir_path = os.path.join(
-            superlayout_link_dir_path, sublayout_link_dir)
+def _release_byproducts(layout, chain_link_dict):
+  """Private helper to drop the byproducts of the links of all but the last
+  step of the passed layout, which are not needed after command alignment was
+  verified. """
+  for step in layout.steps[:-1]:
+    for metablock in six.itervalues(chain_link_dict.get(step.name, {})):
+      metablock.signed.byproducts = {}
 
-        # Make a recursive call to in_toto_verify with the
-        # layout and the extracted key object
-        summary_link = in_toto_verify(link, layout_key_dict,
-            link_dir_path=sublayout_link_dir_path)
 
-        # Replace the layout object in the passed chain_link_dict
-        # with the link file returned by in-toto-verify
-        key_link_dict[keyid] = summary_link
+def _get_metablock_digest(metablock):
+  """Returns a hex digest over the canonical JSON representation of the
+  passed Metablock, including its signatures. """
+  return hashlib.sha256(securesystemslib.formats.encode_canonical({
+      "signatures": metablock.signatures,
+      "signed": metablock.signed.signable_dict
+    }).encode("utf-8")).hexdigest()
 
-  return chain_link_dict
+
+def get_step_cache_keys(layout, chain_link_dict):
+  """
+  <Purpose>
+    Returns the step cache keys for all steps of the passed layout, whose
+    verification results can be cached. A step's cache key is made of digests
+    of the layout, the step and all links of the step itself and of the steps
+    referenced by the step's match rules. Hence the key changes, if any of the
+    inputs of the step's signature, threshold and rule verification change.
+
+    Steps that have a sublayout, or whose rules reference a step that has a
+    sublayout, are not cached, because their verification depends on further
+    links, loaded during sublayout verification.
+
+  <Arguments>
+    layout:
+            The Layout object that contains the steps.
+
+    chain_link_dict:
+            A dictionary containing all loaded (unverified) link metadata per
+            functionary per step, as returned by `load_links_for_layout`.
+
+  <Exceptions>
+    securesystemslib.exceptions.FormatError
+            If any of the steps' artifact rules is malformed.
+
+  <Returns>
+    A dictionary with step names as keys and cache key strings as values.
+
+  """
+  layout_digest = hashlib.sha256(layout.signable_bytes).hexdigest()
+
+  link_digests = {}
+  uncacheable_step_names = set()
+  for step_name, key_link_dict in six.iteritems(chain_link_dict):
+    link_digests[step_name] = sorted(
+        _get_metablock_digest(link) for link in key_link_dict.values())
+
+    if any(link.type_ == "layout" for link in key_link_dict.values()):
+      uncacheable_step_names.add(step_name)
+
+  step_cache_keys = {}
+  for step in layout.steps:
+    step_names = set([step.name])
+    for rule in step.expected_materials + step.expected_products:
+      rule_data = in_toto.rulelib.unpack_rule(rule)
+      if rule_data.get("dest_name"):
+        step_names.add(rule_data["dest_name"])
+
+    if step_names & uncacheable_step_names:
+      continue
+
+    key_data = {
+      "layout": layout_digest,
+      "step": in_toto.models.common.asdict(step),
+      "links": dict((step_name, link_digests.get(step_name, []))
+          for step_name in step_names)
+    }
+    step_cache_keys[step.name] = "step:" + hashlib.sha256(
+        securesystemslib.formats.encode_canonical(
+        key_data).encode("utf-8")).hexdigest()
+
+  return step_cache_keys
 
 
 def get_summary_link(layout, reduced_chain_link_dict):
@@ -1419,7 +2655,9 @@ def get_summary_link(layout, reduced_chain_link_dict):
 
 
 def in_toto_verify(layout, layout_key_dict, link_dir_path=".",
-    substitution_parameters=None):
+    substitution_parameters=None, max_workers=1, working_dir=None,
+    worker_slots=None, inspection_workers=1, inspection_hardlinks=False,
+    link_workers=1, rule_stats=None, rule_workers=1, link_digests=None):
   """
   <Purpose>
     Does entire in-toto supply chain verification of a final product
@@ -1471,11 +2709,17 @@ def in_toto_verify(layout, layout_key_dict, link_dir_path=".",
             Verifying Steps' artifact rules before executing Inspections
             guarantees that Inspection commands don't run on compromised
             target files, which would be a surface for attacks.
+            NOTE: If `in_toto.settings.STEP_CACHE_PATH` is set, steps that
+            passed signature (4.), threshold (7.) and rule (8.) verification
+            before, with the same layout and links (see
+            `get_step_cache_keys`), are not verified again.
 
         9.  Execute Inspection commands
             NOTE: Inspections, similar to Steps executed with 'in-toto-run',
             will record materials before and products after command execution.
-            For now it records everything in the current working directory.
+            Only paths in the current working directory that can be observed
+            by artifact rules, or the inspection's artifact_paths if
+            specified, are recorded (see `get_inspection_artifact_paths`).
 
         10. Verify rules defined in each Inspection's expected_materials and
             expected_products field
@@ -1501,17 +2745,158 @@ def in_toto_verify(layout, layout_key_dict, link_dir_path=".",
               - the run fields in the inspection definitions
               - the expected command in the step definitions
 
+    max_workers: (optional)
+            The maximum number of sublayouts that are verified concurrently,
+            across all levels of sublayout nesting. If greater than one, the
+            inspections of each concurrently verified sublayout are run in a
+            separate temporary copy of the working directory. Default is 1,
+            i.e. sublayouts are verified sequentially.
+
+    working_dir: (optional)
+            A path to a directory, in which inspection commands are executed
+            and to which inspection link files are written. Default is the
+            current working directory.
+
+    worker_slots: (optional)
+            Used internally to share worker slots across levels of sublayout
+            nesting. Should not be passed by the caller.
+
+    inspection_workers: (optional)
+            The maximum number of inspections run concurrently. If greater
+            than one, each inspection is run in a separate temporary copy of
+            the working directory, i.e. inspections must not depend on each
+            other's changes. Default is 1, i.e. inspections are run
+            sequentially in the working directory.
+
+    inspection_hardlinks: (optional)
+            If True, the working directory copies for concurrently run
+            inspections and sublayouts hardlink files instead of copying
+            them. Only use this if inspection commands don't modify files in
+            place. Default is False.
+
+    link_workers: (optional)
+            The maximum number of link metadata files loaded concurrently,
+            e.g. to hide per-file latency of network filesystems. Default
+            is 1, i.e. link files are loaded sequentially.
+
+    rule_stats: (optional)
+            A list, to which statistics for each artifact rule of the layout's
+            steps and inspections are appended, see `verify_item_rules`. Rules
+            of cached steps and of sublayouts are not included. Default is
+            None, i.e. no statistics are collected.
+
+    rule_workers: (optional)
+            The maximum number of worker processes, in which the artifact
+            rules of steps, and subsequently inspections, are verified
+            concurrently (see `verify_all_item_rules`). Default is 1, i.e.
+            rules are verified sequentially.
+
+    link_digests: (optional)
+            A dictionary, to which the digest of each link, whose signature
+            was verified, is added per step name and functionary keyid, e.g.
+            to create a verification receipt (see
+            `in_toto_verify_with_receipt`). For a sublayout, a dictionary of
+            the sublayout's digest, as "layout", and the digests of its
+            links in the same format, as "links", is added instead. Default
+            is None, i.e. no digests are collected.
+
   <Exceptions>
     None.
 
   <Side Effects>
     Read link metadata files from disk
+    Writes inspection link files to the working directory, and those of
+    sublayouts to subdirectories thereof (see `verify_sublayouts`).
 
   <Returns>
     A link which summarizes the materials and products of the overall
     software supply chain (used by super-layout verification if any)
 
   """
+  return _in_toto_verify(layout, layout_key_dict,
+      _DirectoryLinkSource(link_dir_path, max_workers=link_workers),
+      substitution_parameters=substitution_parameters,
+      max_workers=max_workers, working_dir=working_dir,
+      worker_slots=worker_slots, inspection_workers=inspection_workers,
+      inspection_hardlinks=inspection_hardlinks, rule_stats=rule_stats,
+      rule_workers=rule_workers, link_digests=link_digests)
+
+
+def in_toto_verify_links(layout, layout_key_dict, links, sublayout_links=None,
+    substitution_parameters=None, max_workers=1, working_dir=None,
+    inspection_workers=1, inspection_hardlinks=False, rule_stats=None,
+    rule_workers=1, link_digests=None):
+  """
+  <Purpose>
+    Does entire in-toto supply chain verification of a final product, like
+    `in_toto_verify`, but with the passed in-memory links instead of links
+    loaded from a link directory, e.g. for links received over the network.
+    No link metadata is read from disk.
+
+  <Arguments>
+    layout:
+            Layout object that is being verified.
+
+    layout_key_dict:
+            Dictionary of project owner public keys, used to verify the
+            layout's signature.
+
+    links:
+            A dictionary of link metadata per step and functionary keyid,
+            including sublayouts, e.g.:
+            {
+              <step name> : {
+                <functionary key id> : <Metablock containing a Link or Layout
+                                        object>,
+                ...
+              }, ...
+            }
+            Links of unauthorized functionaries and unknown steps are ignored.
+
+    sublayout_links: (optional)
+            A dictionary of the links of each sublayout in `links`, e.g.:
+            {
+              <step name> : {
+                <functionary key id> : {
+                  "links": <links of the sublayout, see above>,
+                  "sublayout_links": <links of nested sublayouts, if any>
+                },
+                ...
+              }, ...
+            }
+
+    substitution_parameters, max_workers, working_dir, inspection_workers,
+    inspection_hardlinks, rule_stats, rule_workers, link_digests: (optional)
+            See `in_toto_verify`.
+
+  <Exceptions>
+    See `in_toto_verify`.
+
+  <Side Effects>
+    Runs inspection commands and writes their link files to the working
+    directory (see `in_toto_verify`).
+
+  <Returns>
+    A link which summarizes the materials and products of the overall
+    software supply chain.
+
+  """
+  return _in_toto_verify(layout, layout_key_dict,
+      _MemoryLinkSource(links, sublayout_links),
+      substitution_parameters=substitution_parameters,
+      max_workers=max_workers, working_dir=working_dir,
+      inspection_workers=inspection_workers,
+      inspection_hardlinks=inspection_hardlinks, rule_stats=rule_stats,
+      rule_workers=rule_workers, link_digests=link_digests)
+
+
+def _in_toto_verify(layout, layout_key_dict, link_source,
+    substitution_parameters=None, max_workers=1, working_dir=None,
+    worker_slots=None, inspection_workers=1, inspection_hardlinks=False,
+    rule_stats=None, rule_workers=1, link_digests=None,
+    isolate_inspections=False, inspection_link_dir=None):
+  """Private helper to verify the passed layout with links from the passed
+  link source (see `_DirectoryLinkSource` and `_MemoryLinkSource`). """
   log.info("Verifying layout signatures...")
   verify_layout_signatures(layout, layout_key_dict)
 
@@ -1523,39 +2908,151 @@ def in_toto_verify(layout, layout_key_dict, link_dir_path=".",
   log.info("Verifying layout expiration...")
   verify_layout_expiration(layout)
 
+  return _verify_layout_payload(layout, link_source,
+      substitution_parameters=substitution_parameters,
+      max_workers=max_workers, working_dir=working_dir,
+      worker_slots=worker_slots, inspection_workers=inspection_workers,
+      inspection_hardlinks=inspection_hardlinks, rule_stats=rule_stats,
+      rule_workers=rule_workers, link_digests=link_digests,
+      isolate_inspections=isolate_inspections,
+      inspection_link_dir=inspection_link_dir)
+
+
+def _verify_layout_payload(layout, link_source, substitution_parameters=None,
+    max_workers=1, working_dir=None, worker_slots=None, inspection_workers=1,
+    inspection_hardlinks=False, rule_stats=None, rule_workers=1,
+    link_digests=None, isolate_inspections=False, inspection_link_dir=None,
+    verified_links=None):
+  """Private helper to verify the supply chain of the passed Layout object,
+  whose signatures and expiration were already verified, i.e. steps 3 to 10
+  of `in_toto_verify`, with links from the passed link source, and return
+  the summary link.
+
+  Signatures of links in verified_links are not verified again, see
+  `verify_link_signature_thresholds`.
+
+  If isolate_inspections is True, e.g. because other verifications run
+  concurrently in the same working directory, inspections (including those
+  of sublayouts) are run in a temporary copy of the working directory.
+  Inspection links are written to inspection_link_dir, or to the working
+  directory, and sublayout inspection links to a subdirectory thereof (see
+  `_verify_sublayouts`). """
+  if not working_dir:
+    working_dir = os.getcwd()
+
+  if not inspection_link_dir:
+    inspection_link_dir = working_dir
+
   # If there are parameters sent to the tanslation layer, substitute them
   if substitution_parameters is not None:
     log.info('Performing parameter substitution...')
     substitute_parameters(layout, substitution_parameters)
 
   log.info("Reading link metadata files...")
-  chain_link_dict = load_links_for_layout(layout, link_dir_path)
+  chain_link_dict = link_source.load_links(layout)
+
+  # Steps that passed signature, threshold and rule verification with the
+  # same layout and links before, are not verified again
+  step_cache = in_toto.cache.get_step_cache()
+  step_cache_keys = {}
+  cached_chain_link_dict = {}
+  if step_cache:
+    step_cache_keys = get_step_cache_keys(layout, chain_link_dict)
+    for step_name, cache_key in six.iteritems(step_cache_keys):
+      cached_keyids = (step_cache.get(cache_key) or {}).get("keyids")
+      if cached_keyids and all(keyid in chain_link_dict[step_name]
+          for keyid in cached_keyids):
+        log.info("Using cached verification result for step '{}'...".format(
+            step_name))
+        cached_chain_link_dict[step_name] = dict((keyid,
+            chain_link_dict[step_name][keyid]) for keyid in cached_keyids)
+
+  uncached_steps = [step for step in layout.steps
+      if step.name not in cached_chain_link_dict]
+
+  # The keys authorized for each step are looked up once per verification,
+  # from the layout whose signatures were verified
+  step_keys = layout.get_step_verification_keys()
 
   log.info("Verifying link metadata signatures...")
-  chain_link_dict = verify_link_signature_thresholds(layout, chain_link_dict)
+  chain_link_dict = verify_link_signature_thresholds(layout, chain_link_dict,
+      steps=uncached_steps, verified_links=verified_links,
+      step_keys=step_keys)
+  chain_link_dict.update(cached_chain_link_dict)
+
+  if link_digests is not None:
+    for step_name, key_link_dict in six.iteritems(chain_link_dict):
+      link_digests[step_name] = dict((keyid, _get_metablock_digest(link))
+          for keyid, link in six.iteritems(key_link_dict))
 
   log.info("Verifying sublayouts...")
-  chain_link_dict = verify_sublayouts(layout, chain_link_dict, link_dir_path)
+  chain_link_dict = _verify_sublayouts(layout, chain_link_dict, link_source,
+      max_workers=max_workers, working_dir=working_dir,
+      worker_slots=worker_slots, inspection_workers=inspection_workers,
+      inspection_hardlinks=inspection_hardlinks, rule_workers=rule_workers,
+      link_digests=link_digests, isolate_inspections=isolate_inspections,
+      inspection_link_dir=inspection_link_dir)
 
   log.info("Verifying alignment of reported commands...")
   verify_all_steps_command_alignment(layout, chain_link_dict)
 
+  # Byproducts are only needed for the summary link, i.e. of the last step.
+  # Cached and in-memory links belong to others and must not be changed.
+  if link_source.owns_links:
+    _release_byproducts(layout, chain_link_dict)
+
   log.info("Verifying threshold constraints...")
-  verify_threshold_constraints(layout, chain_link_dict)
+  verify_threshold_constraints(layout, chain_link_dict, steps=uncached_steps)
   reduced_chain_link_dict = reduce_chain_links(chain_link_dict)
 
+  # Only the keyids of the verified links are needed from here on, release
+  # the links of all but one functionary per step
+  verified_keyids = dict((step_name, list(links.keys()))
+      for step_name, links in six.iteritems(chain_link_dict))
+  del chain_link_dict
+
+  # Step links are released once no other step references them, unless they
+  # are referenced by inspections or needed for the summary link
+  keep_links = set(_get_referenced_link_names(layout.inspect))
+  if layout.steps:
+    keep_links.update([layout.steps[0].name, layout.steps[-1].name])
+
   log.info("Verifying Step rules...")
-  verify_all_item_rules(layout.steps, reduced_chain_link_dict)
+  verify_all_item_rules(uncached_steps, reduced_chain_link_dict,
+      rule_stats=rule_stats, keep_links=keep_links, max_workers=rule_workers)
+
+  # Only cache results of steps that passed verification
+  for step in uncached_steps:
+    if step.name in step_cache_keys:
+      step_cache.set(step_cache_keys[step.name],
+          {"keyids": verified_keyids[step.name]})
 
   log.info("Executing Inspection commands...")
-  inspection_link_dict = run_all_inspections(layout)
+  # Concurrently run inspections are isolated in their own copies anyway
+  inspection_working_dir = working_dir
+  scratch_dir = None
+  if (isolate_inspections and layout.inspect and
+      (inspection_workers <= 1 or len(layout.inspect) <= 1)):
+    inspection_working_dir = _copy_workspace(working_dir,
+        inspection_hardlinks)
+    scratch_dir = os.path.dirname(inspection_working_dir)
+
+  try:
+    inspection_link_dict = run_all_inspections(layout,
+        working_dir=inspection_working_dir, max_workers=inspection_workers,
+        use_hardlinks=inspection_hardlinks, link_dir=inspection_link_dir)
+
+  finally:
+    if scratch_dir:
+      shutil.rmtree(scratch_dir, ignore_errors=True)
 
   log.info("Verifying Inspection rules...")
   # Artifact rules for inspections can reference links that correspond to
   # Steps or Inspections, hence the concatenation of both collections of links
   combined_links = reduced_chain_link_dict.copy()
   combined_links.update(inspection_link_dict)
-  verify_all_item_rules(layout.inspect, combined_links)
+  verify_all_item_rules(layout.inspect, combined_links,
+      rule_stats=rule_stats, keep_links=set(), max_workers=rule_workers)
 
   # We made it this far without exception that means, verification passed
   log.info("The software product passed all verification.")
@@ -1564,3 +3061,303 @@ def in_toto_verify(layout, layout_key_dict, link_dir_path=".",
   # This is mostly relevant if the currently verified supply chain is embedded
   # in another supply chain
   return get_summary_link(layout, reduced_chain_link_dict)
+
+
+def in_toto_verify_batch(layout, layout_key_dict, products, product_workers=1,
+    max_workers=1, inspection_workers=1, inspection_hardlinks=False,
+    link_workers=1, rule_workers=1):
+  """
+  <Purpose>
+    Verifies the supply chains of many final products against one layout,
+    e.g. of the nightly builds of a project.
+
+    Layout signatures and expiration are verified once for all products.
+    Steps 3 to 10 of `in_toto_verify` are performed for each product, using
+    the product's link directory, working directory and substitution
+    parameters. Products that share the same substitution parameters also
+    share the same parsed layout, including its functionary keys.
+
+    If product_workers is greater than one, products are verified
+    concurrently. To isolate their inspections from each other, each product's
+    inspections are run in a separate copy of its working directory.
+
+  <Arguments>
+    layout:
+            Layout object that is being verified.
+
+    layout_key_dict:
+            Dictionary of project owner public keys, used to verify the
+            layout's signature.
+
+    products:
+            A list of products in the format of
+            in_toto.formats.BATCH_PRODUCTS_SCHEMA, i.e. of dictionaries with
+            a "link_dir" and optional "working_dir", "inspection_link_dir"
+            and "substitution_parameters". Inspection links are written to
+            the "inspection_link_dir", if passed, or else to the working
+            directory, like in `in_toto_verify`. Products that are verified
+            concurrently should not share the directory inspection links are
+            written to.
+
+    product_workers: (optional)
+            The maximum number of products verified concurrently. Default is
+            1, i.e. products are verified sequentially.
+
+    max_workers, inspection_workers, inspection_hardlinks, link_workers,
+    rule_workers: (optional)
+            Passed on to the verification of each product, see
+            `in_toto_verify`.
+
+  <Exceptions>
+    securesystemslib.exceptions.FormatError if products is malformed.
+
+    Raises the exceptions of `verify_layout_signatures` and
+    `verify_layout_expiration`, i.e. if the layout cannot be trusted for any
+    product. Failures of individual products are returned.
+
+  <Side Effects>
+    Read link metadata files from disk.
+    Writes inspection link files to the inspection link directory or working
+    directory of each product, but never to its link directory.
+    Creates and removes temporary copies of working directories, if products
+    with inspections are verified concurrently.
+
+  <Returns>
+    A list with a result for each passed product, in the same order:
+    {
+      "link_dir": <link directory of the product>,
+      "success": <True if verification passed, False otherwise>,
+      "error": <error message, or None>,
+      "error_type": <exception class name, or None>
+    }
+
+  """
+  in_toto.formats.BATCH_PRODUCTS_SCHEMA.check_match(products)
+
+  log.info("Verifying layout signatures...")
+  verify_layout_signatures(layout, layout_key_dict)
+  layout = layout.signed
+
+  log.info("Verifying layout expiration...")
+  verify_layout_expiration(layout)
+
+  # Substitution modifies the layout, hence each distinct set of parameters
+  # gets its own copy, which is substituted once and shared by all products
+  # that use the same parameters
+  substituted_layouts = {}
+  substituted_layouts_lock = threading.Lock()
+
+  def _get_product_layout(substitution_parameters):
+    """Returns the layout substituted with the passed parameters. """
+    if substitution_parameters is None:
+      return layout
+
+    cache_key = tuple(sorted(substitution_parameters.items()))
+    with substituted_layouts_lock:
+      product_layout = substituted_layouts.get(cache_key)
+      if product_layout is None:
+        product_layout = copy.deepcopy(layout)
+        substitute_parameters(product_layout, substitution_parameters)
+        substituted_layouts[cache_key] = product_layout
+
+    return product_layout
+
+  def _verify_product(product):
+    """Verifies the passed product and returns its result. """
+    result = {"link_dir": product["link_dir"], "success": False,
+        "error": None, "error_type": None}
+    try:
+      log.info("Verifying product in '{}'...".format(product["link_dir"]))
+      product_layout = _get_product_layout(
+          product.get("substitution_parameters"))
+
+      _verify_layout_payload(product_layout,
+          _DirectoryLinkSource(product["link_dir"], max_workers=link_workers),
+          max_workers=max_workers, working_dir=product.get("working_dir"),
+          inspection_workers=inspection_workers,
+          inspection_hardlinks=inspection_hardlinks,
+          rule_workers=rule_workers,
+          isolate_inspections=product_workers > 1,
+          inspection_link_dir=product.get("inspection_link_dir"))
+
+    except Exception as e: # pylint: disable=broad-except
+      log.info("Product in '{}' failed verification: {}".format(
+          product["link_dir"], e))
+      result["error"] = str(e)
+      result["error_type"] = type(e).__name__
+
+    else:
+      result["success"] = True
+
+    return result
+
+  if product_workers <= 1 or len(products) <= 1:
+    return [_verify_product(product) for product in products]
+
+  pool = ThreadPool(min(product_workers, len(products)))
+  try:
+    return pool.map(_verify_product, products, chunksize=1)
+
+  finally:
+    pool.close()
+    pool.join()
+
+
+def in_toto_verify_with_receipt(layout, layout_key_dict, receipt_key,
+    link_dir_path=".", substitution_parameters=None, **kwargs):
+  """
+  <Purpose>
+    Does entire in-toto supply chain verification of a final product (see
+    `in_toto_verify`), and, if it passes, returns a verification receipt
+    signed with the passed key.
+
+    The receipt records digests of the layout and of all links, whose
+    signatures were verified, including the links of sublayouts at any
+    level of nesting, the substitution parameters, the products of
+    the summary link, i.e. the final product, and the layout's expiration
+    date. Downstream consumers, who trust the receipt key, can check the
+    receipt against the product instead of verifying the supply chain again
+    (see `verify_receipt`).
+
+  <Arguments>
+    layout:
+            Layout object that is being verified.
+
+    layout_key_dict:
+            Dictionary of project owner public keys, used to verify the
+            layout's signature.
+
+    receipt_key:
+            A private key, used to sign the receipt, in the format of
+            securesystemslib.formats.ANYKEY_SCHEMA.
+
+    link_dir_path, substitution_parameters: (optional)
+            See `in_toto_verify`.
+
+    **kwargs: (optional)
+            Passed on to `in_toto_verify`.
+
+  <Exceptions>
+    securesystemslib.exceptions.FormatError if receipt_key is malformed.
+
+    Raises the exceptions of `in_toto_verify`.
+
+  <Side Effects>
+    Read link metadata files from disk
+    Runs inspection commands in a subprocess.
+
+  <Returns>
+    A Metablock object containing the signed Receipt.
+
+  """
+  securesystemslib.formats.ANYKEY_SCHEMA.check_match(receipt_key)
+
+  # The digest is taken before verification, which substitutes parameters in
+  # the passed layout
+  layout_digest = _get_metablock_digest(layout)
+  expires = layout.signed.expires
+
+  link_digests = {}
+  summary_link = in_toto_verify(layout, layout_key_dict, link_dir_path,
+      substitution_parameters=substitution_parameters,
+      link_digests=link_digests, **kwargs)
+
+  links_digest = hashlib.sha256(securesystemslib.formats.encode_canonical(
+      link_digests).encode("utf-8")).hexdigest()
+
+  receipt = Metablock(signed=Receipt(
+      layout={"sha256": layout_digest},
+      links={"sha256": links_digest},
+      parameters=substitution_parameters or {},
+      products=summary_link.signed.products,
+      expires=expires))
+  receipt.sign(receipt_key)
+
+  return receipt
+
+
+def verify_receipt(receipt, receipt_key_dict, layout=None,
+    substitution_parameters=None, products=None):
+  """
+  <Purpose>
+    Verifies a verification receipt (see `in_toto_verify_with_receipt`),
+    i.e. its signatures and expiration, and optionally that it was created
+    for the passed layout, substitution parameters and products.
+
+  <Arguments>
+    receipt:
+            A Metablock object containing a Receipt.
+
+    receipt_key_dict:
+            Dictionary of trusted verifier public keys. For each key the
+            receipt must carry a valid signature.
+
+    layout: (optional)
+            A Metablock object containing the layout, which the receipt must
+            have been created for.
+
+    substitution_parameters: (optional)
+            A dictionary of substitution parameters, which the receipt must
+            have been created with.
+
+    products: (optional)
+            A dictionary of artifacts in the format of Link products, e.g.
+            created with `in_toto.runlib.record_artifacts_as_dict`. Each
+            artifact must be a product of the receipt, with the same digest
+            for each hash algorithm recorded in both.
+
+  <Exceptions>
+    securesystemslib.exceptions.FormatError
+            If the passed receipt does not contain a Receipt.
+
+    SignatureVerificationError
+            If an empty key dictionary was passed, or if any of the passed
+            keys fails to verify a signature.
+
+    LayoutExpiredError
+            If the receipt, i.e. the layout it was created for, expired.
+
+    ReceiptVerificationError
+            If the receipt does not match the passed layout, parameters or
+            products.
+
+  <Side Effects>
+    None.
+
+  """
+  if not isinstance(receipt.signed, Receipt):
+    raise securesystemslib.exceptions.FormatError("Expected receipt, got"
+        " '{}'".format(receipt.type_))
+
+  in_toto.formats.ANY_VERIFICATION_KEY_DICT_SCHEMA.check_match(
+      receipt_key_dict)
+  if len(receipt_key_dict) < 1:
+    raise SignatureVerificationError("Receipt signature verification"
+        " requires at least one key.")
+
+  for verify_key in six.itervalues(receipt_key_dict):
+    receipt.verify_signature(verify_key)
+
+  verify_layout_expiration(receipt.signed)
+
+  if layout is not None and (receipt.signed.layout.get("sha256") !=
+      _get_metablock_digest(layout)):
+    raise ReceiptVerificationError("Receipt was not"
+        " created for the passed layout.")
+
+  if (substitution_parameters is not None and
+      receipt.signed.parameters != substitution_parameters):
+    raise ReceiptVerificationError("Receipt was not"
+        " created with the passed substitution parameters.")
+
+  for path, hashes in six.iteritems(products or {}):
+    receipt_hashes = receipt.signed.products.get(path)
+    if receipt_hashes is None:
+      raise ReceiptVerificationError("Artifact '{}' is"
+          " not a product of the receipt.".format(path))
+
+    algorithms = set(hashes) & set(receipt_hashes)
+    if not algorithms or any(hashes[algorithm] != receipt_hashes[algorithm]
+        for algorithm in algorithms):
+      raise ReceiptVerificationError("Artifact '{}' does"
+          " not match the product of the receipt.".format(path))
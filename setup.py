@@ -79,6 +79,10 @@ setup(
                         "in-toto-record = in_toto.in_toto_record:main",
                         "in-toto-verify = in_toto.in_toto_verify:main",
                         "in-toto-sign = in_toto.in_toto_sign:main",
-                        "in-toto-keygen = in_toto.in_toto_keygen:main"]
+                        "in-toto-keygen = in_toto.in_toto_keygen:main",
+                        "in-toto-verify-server = in_toto.in_toto_verify_server:main",
+                        "in-toto-verify-client = in_toto.in_toto_verify_client:main",
+                        "in-toto-verify-worker = in_toto.in_toto_verify_worker:main",
+                        "in-toto-verify-receipt = in_toto.in_toto_verify_receipt:main"]
   },
 )
@@ -64,5 +64,29 @@ class TestInspectionValidator(unittest.TestCase):
     self.assertListEqual(inspection.run, ["echo", "foo bar"])
 
 
+  def test_wrong_artifact_paths(self):
+    """Test that the artifact paths validator catches malformed values."""
+    self.inspection.artifact_paths = "not-a-list"
+    with self.assertRaises(securesystemslib.exceptions.FormatError):
+      self.inspection._validate_artifact_paths()
+
+    self.inspection.artifact_paths = ["foo", "bar/baz"]
+    self.inspection.validate()
+
+
+  def test_omit_empty_artifact_paths(self):
+    """Test that empty artifact paths don't change the signable bytes. """
+    inspection = Inspection(name="some-inspection", run=["true"])
+    self.assertFalse("artifact_paths" in repr(inspection))
+
+    layout = Layout(inspect=[inspection])
+    self.assertFalse(b"artifact_paths" in layout.signable_bytes)
+
+    inspection.artifact_paths = ["foo"]
+    self.assertTrue(b"artifact_paths" in layout.signable_bytes)
+    self.assertEqual(Layout.read(layout.signable_dict).inspect[0].artifact_paths,
+        ["foo"])
+
+
 if __name__ == "__main__":
   unittest.main()
@@ -169,6 +169,56 @@ class TestLayoutMethods(unittest.TestCase):
       layout.remove_inspection_by_name(False)
 
 
+  def test_get_by_name_after_modification(self):
+    """Test getting steps and inspections after modifying the layout. """
+    layout = Layout(steps=[Step(name="a")], inspect=[Inspection(name="b")])
+    self.assertEqual(layout.get_step_by_name("a").name, "a")
+    self.assertIsNone(layout.get_step_by_name("c"))
+
+    # Modified in place
+    layout.steps.append(Step(name="c"))
+    self.assertEqual(layout.get_step_by_name("c").name, "c")
+    layout.remove_inspection_by_name("b")
+    self.assertIsNone(layout.get_inspection_by_name("b"))
+
+    # Re-assigned
+    layout.steps = [Step(name="d")]
+    self.assertIsNone(layout.get_step_by_name("a"))
+    self.assertEqual(layout.get_step_by_name("d").name, "d")
+
+
+  def test_get_step_verification_keys(self):
+    """Test getting keys authorized for steps, including gpg subkeys. """
+    layout = Layout()
+    key = layout.add_functionary_key_from_path(self.pubkey_path1)
+    gpg_key = layout.add_functionary_key_from_gpg_keyid(self.gpg_keyid1,
+        gpg_home=self.gnupg_home)
+    subkeyid = list(gpg_key["subkeys"].keys())[0]
+
+    layout.steps = [
+      Step(name="key", pubkeys=[key["keyid"]]),
+      Step(name="master", pubkeys=[gpg_key["keyid"]]),
+      Step(name="subkey", pubkeys=[subkeyid]),
+      Step(name="unknown", pubkeys=["a" * 64])
+    ]
+
+    step_keys = layout.get_step_verification_keys()
+    self.assertDictEqual(step_keys["key"], {key["keyid"]: key})
+
+    # Subkeys of authorized master keys are authorized implicitly, and the
+    # master key is used for verification of authorized subkeys
+    self.assertEqual(step_keys["master"][subkeyid], gpg_key)
+    self.assertDictEqual(step_keys["subkey"], {subkeyid: gpg_key})
+    self.assertDictEqual(step_keys["unknown"], {})
+
+    # In place changes of keys and pubkeys are reflected in the next call
+    layout.keys[key["keyid"]] = gpg_key
+    layout.steps[1] = Step(name="master", pubkeys=[key["keyid"]])
+    step_keys = layout.get_step_verification_keys()
+    self.assertEqual(step_keys["key"][key["keyid"]], gpg_key)
+    self.assertNotIn(gpg_key["keyid"], step_keys["master"])
+
+
   def test_functionary_keys(self):
     """Test adding and listing functionary keys (securesystemslib and gpg). """
     layout = Layout()
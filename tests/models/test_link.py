@@ -117,3 +117,37 @@ class TestLinkValidator(unittest.TestCase):
     test_link.environment = "not a dict"
     with self.assertRaises(FormatError):
       test_link.validate()
+
+
+
+class TestLinkArtifactFingerprints(unittest.TestCase):
+  """Test materials and products fingerprints. """
+
+  def test_fingerprints(self):
+    """Fingerprints are order-independent and reflect modifications. """
+    artifacts = {"foo": {"sha256": "aa"}, "bar": {"sha256": "bb"}}
+    reordered_artifacts = {"bar": {"sha256": "bb"}, "foo": {"sha256": "aa"}}
+
+    link = Link(materials=artifacts, products=artifacts)
+    other_link = Link(materials=reordered_artifacts)
+
+    self.assertEqual(link.get_materials_fingerprint(),
+        other_link.get_materials_fingerprint())
+    self.assertEqual(link.get_materials_fingerprint(), link.get_products_fingerprint())
+    self.assertNotEqual(link.get_products_fingerprint(),
+        other_link.get_products_fingerprint())
+
+    # Re-assigning artifacts changes the fingerprint
+    link.materials = {"foo": {"sha256": "cc"}}
+    self.assertNotEqual(link.get_materials_fingerprint(),
+        other_link.get_materials_fingerprint())
+    self.assertEqual(link.get_products_fingerprint(),
+        other_link.get_materials_fingerprint())
+
+    # So does modifying artifacts in place
+    link.products["foo"] = {"sha256": "cc"}
+    self.assertNotEqual(link.get_products_fingerprint(),
+        other_link.get_materials_fingerprint())
+
+    # The fingerprint is not part of the link metadata
+    self.assertNotIn("fingerprint", link.signable_bytes.decode())
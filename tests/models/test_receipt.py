@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+<Program Name>
+  test_receipt.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Test receipt class functions.
+
+"""
+
+import unittest
+from in_toto.models.receipt import Receipt
+from in_toto.models.metadata import Metablock
+from securesystemslib.exceptions import FormatError
+
+SHA = "d65165279105ca6773180500688df4bdc69a2c7b771752f0a46ef120b7fd8ec3"
+
+
+
+class TestReceiptValidator(unittest.TestCase):
+  """Test receipt format validators """
+
+  def setUp(self):
+    self.receipt = Receipt(layout={"sha256": SHA}, links={"sha256": SHA},
+        parameters={"EDITOR": "vim"}, products={"foo": {"sha256": SHA}},
+        expires="2026-10-18T00:00:00Z")
+
+
+  def test_validate_type(self):
+    """Test `_type` field. Must be "receipt" """
+    self.receipt._type = "link"
+    with self.assertRaises(FormatError):
+      self.receipt.validate()
+
+
+  def test_validate_hashes(self):
+    """Test `layout` and `links` fields. Must be HASH_DICTs """
+    self.receipt.layout = "not a hash dict"
+    with self.assertRaises(FormatError):
+      self.receipt.validate()
+
+    self.receipt.layout = {"sha256": SHA}
+    self.receipt.links = {"sha256": 1}
+    with self.assertRaises(FormatError):
+      self.receipt.validate()
+
+
+  def test_validate_parameters(self):
+    """Test `parameters` field. Must be a `dict` of strings """
+    self.receipt.parameters = ["not a dict"]
+    with self.assertRaises(FormatError):
+      self.receipt.validate()
+
+    self.receipt.parameters = {"EDITOR": 1}
+    with self.assertRaises(FormatError):
+      self.receipt.validate()
+
+
+  def test_validate_products(self):
+    """Test `products` field. Must be a `dict` of HASH_DICTs """
+    self.receipt.products = "not a dict"
+    with self.assertRaises(FormatError):
+      self.receipt.validate()
+
+    self.receipt.products = {"not": "a product dict"}
+    with self.assertRaises(FormatError):
+      self.receipt.validate()
+
+
+  def test_validate_expires(self):
+    """Test `expires` field. Must be an ISO 8601 date string """
+    self.receipt.expires = "bad date"
+    with self.assertRaises(FormatError):
+      self.receipt.validate()
+
+
+  def test_read_metablock(self):
+    """Test that receipts are read from Metablock dictionaries """
+    metablock = Metablock.read({"signed": self.receipt.__dict__,
+        "signatures": []})
+    self.assertTrue(isinstance(metablock.signed, Receipt))
+    self.assertEqual(metablock.type_, "receipt")
+
+
+
+if __name__ == "__main__":
+  unittest.main()
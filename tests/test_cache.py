@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+"""
+<Program Name>
+  test_cache.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Test in_toto.cache module and the signature verification cache used in
+  Metablock.verify_signature.
+
+"""
+import os
+import json
+import hashlib
+import time
+import shutil
+import tempfile
+import unittest
+from mock import patch
+
+import in_toto.cache
+import in_toto.settings
+from in_toto.cache import (FileCache, MemoryCache, ContentStore,
+    get_signature_cache,
+    get_link_cache, get_layout_cache, get_key_fingerprint, get_signature_cache_key)
+from in_toto.models.link import Link
+from in_toto.models.metadata import Metablock
+from in_toto.exceptions import SignatureVerificationError
+from securesystemslib.interface import (import_rsa_privatekey_from_file,
+    import_rsa_publickey_from_file)
+import securesystemslib.exceptions
+
+
+
+class TestFileCache(unittest.TestCase):
+  """Test FileCache get, set and eviction. """
+
+  def setUp(self):
+    self.test_dir = os.path.realpath(tempfile.mkdtemp())
+    self.cache_dir = os.path.join(self.test_dir, "cache")
+
+
+  def tearDown(self):
+    shutil.rmtree(self.test_dir)
+
+
+  def test_create_cache_dir(self):
+    """Cache directory is created on instantiation and may already exist. """
+    FileCache(self.cache_dir)
+    self.assertTrue(os.path.isdir(self.cache_dir))
+    FileCache(self.cache_dir)
+
+  @unittest.skipIf(not hasattr(os, "getuid"), "POSIX only")
+  def test_writable_cache_dir(self):
+    """Existing cache directories writable by other users are rejected. """
+    os.mkdir(self.cache_dir)
+    os.chmod(self.cache_dir, 0o777)
+    with self.assertRaises(OSError):
+      FileCache(self.cache_dir)
+    with self.assertRaises(OSError):
+      ContentStore(self.cache_dir)
+
+    os.chmod(self.cache_dir, 0o755)
+    FileCache(self.cache_dir)
+
+
+  def test_bad_args(self):
+    """Fail instantiation with bad arguments. """
+    with self.assertRaises(securesystemslib.exceptions.FormatError):
+      FileCache(1)
+    with self.assertRaises(securesystemslib.exceptions.FormatError):
+      FileCache(self.cache_dir, "many")
+
+    # Path exists but is not a directory
+    file_path = os.path.join(self.test_dir, "file")
+    open(file_path, "w").close()
+    with self.assertRaises(OSError):
+      FileCache(file_path)
+
+
+  def test_get_set(self):
+    """Get returns set values and None for unknown or corrupted entries. """
+    cache = FileCache(self.cache_dir)
+    self.assertIsNone(cache.get("foo"))
+
+    cache.set("foo", True)
+    cache.set("bar", {"baz": [1, 2]})
+    self.assertTrue(cache.get("foo"))
+    self.assertEqual(cache.get("bar"), {"baz": [1, 2]})
+
+    # Entries persist across cache instances
+    self.assertTrue(FileCache(self.cache_dir).get("foo"))
+
+    # Entry with mismatching key (e.g. a digest collision) is ignored
+    with open(cache._get_entry_path("foo"), "w") as fp:
+      json.dump({"key": "not-foo", "value": True}, fp)
+    self.assertIsNone(cache.get("foo"))
+
+    # Corrupted entry is ignored
+    with open(cache._get_entry_path("bar"), "w") as fp:
+      fp.write("not-json")
+    self.assertIsNone(cache.get("bar"))
+
+
+  def test_evict_least_recently_used(self):
+    """Least recently used entries are removed if the cache is full. """
+    cache = FileCache(self.cache_dir, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # Make "a" the most recently used entry
+    past = time.time() - 100
+    os.utime(cache._get_entry_path("a"), (past, past))
+    os.utime(cache._get_entry_path("b"), (past - 10, past - 10))
+    self.assertEqual(cache.get("a"), 1)
+
+    cache.set("c", 3)
+    self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+    self.assertIsNone(cache.get("b"))
+    self.assertEqual(cache.get("a"), 1)
+    self.assertEqual(cache.get("c"), 3)
+
+
+
+class TestContentStore(unittest.TestCase):
+  """Test ContentStore add, restore and eviction. """
+
+  def setUp(self):
+    self.test_dir = os.path.realpath(tempfile.mkdtemp())
+    self.store_dir = os.path.join(self.test_dir, "store")
+    self.file_path = os.path.join(self.test_dir, "foo")
+    with open(self.file_path, "wb") as fp:
+      fp.write(b"foo")
+    self.digest = hashlib.sha256(b"foo").hexdigest()
+
+
+  def tearDown(self):
+    shutil.rmtree(self.test_dir)
+
+
+  def test_add_restore(self):
+    """Added files are restored to new paths with the passed mode. """
+    store = ContentStore(self.store_dir)
+    self.assertFalse(store.has(self.digest))
+    self.assertTrue(store.add(self.digest, self.file_path))
+    self.assertTrue(store.has(self.digest))
+    self.assertTrue(store.add(self.digest, self.file_path))
+
+    target_path = os.path.join(self.test_dir, "bar", "baz")
+    store.restore(self.digest, target_path, mode=0o750)
+    with open(target_path, "rb") as fp:
+      self.assertEqual(fp.read(), b"foo")
+    self.assertEqual(os.stat(target_path).st_mode & 0o777, 0o750)
+
+    # Files aren't stored under a digest that does not match their contents
+    self.assertFalse(store.add("0" * 64, self.file_path))
+    self.assertFalse(store.has("0" * 64))
+    with self.assertRaises(IOError):
+      store.restore("0" * 64, target_path)
+
+    with self.assertRaises(securesystemslib.exceptions.FormatError):
+      store.has("../foo")
+
+
+  def test_evict_least_recently_used(self):
+    """Least recently used files are removed if the store is full. """
+    store = ContentStore(self.store_dir, max_entries=1)
+    store.add(self.digest, self.file_path)
+    with open(self.file_path, "wb") as fp:
+      fp.write(b"bar")
+    store.add(hashlib.sha256(b"bar").hexdigest(), self.file_path)
+    self.assertEqual(os.listdir(self.store_dir),
+        [hashlib.sha256(b"bar").hexdigest()])
+
+
+
+class TestMemoryCache(unittest.TestCase):
+  """Test MemoryCache get, set and eviction, and the link cache setting. """
+
+  def test_get_set_evict(self):
+    """Get returns set values, least recently used entries are removed. """
+    cache = MemoryCache(max_entries=2)
+    self.assertIsNone(cache.get("a"))
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # Make "a" the most recently used entry
+    self.assertEqual(cache.get("a"), 1)
+
+    cache.set("c", 3)
+    self.assertEqual(len(cache), 2)
+    self.assertIsNone(cache.get("b"))
+    self.assertEqual(cache.get("a"), 1)
+    self.assertEqual(cache.get("c"), 3)
+
+    with self.assertRaises(securesystemslib.exceptions.FormatError):
+      MemoryCache("many")
+
+
+  def test_get_link_cache(self):
+    """Link cache is only returned if enabled in settings. """
+    self.assertIsNone(get_link_cache())
+    with patch("in_toto.settings.LINK_CACHE_MAX_ENTRIES", 5):
+      cache = get_link_cache()
+      self.assertEqual(cache.max_entries, 5)
+      self.assertIs(get_link_cache(), cache)
+
+
+  def test_get_layout_cache(self):
+    """Layout cache is only returned if enabled in settings. """
+    self.assertIsNone(get_layout_cache())
+    with patch("in_toto.settings.LAYOUT_CACHE_MAX_ENTRIES", 5):
+      cache = get_layout_cache()
+      self.assertEqual(cache.max_entries, 5)
+      self.assertIs(get_layout_cache(), cache)
+
+
+
+class TestLayoutCache(unittest.TestCase):
+  """Test that Metablock.load reuses parsed layouts by file digest. """
+
+  def setUp(self):
+    self.test_dir = os.path.realpath(tempfile.mkdtemp())
+    self.layout_path = os.path.join(self.test_dir, "demo.layout")
+    shutil.copy(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+        "demo_files", "demo.layout.template"), self.layout_path)
+
+    # Start every test with a new, empty layout cache
+    for patcher in [patch("in_toto.settings.LAYOUT_CACHE_MAX_ENTRIES", 5),
+        patch("in_toto.cache._layout_cache", None)]:
+      patcher.start()
+      self.addCleanup(patcher.stop)
+
+
+  def tearDown(self):
+    shutil.rmtree(self.test_dir)
+
+
+  def test_load_cached_layout(self):
+    """Unchanged layout files are parsed once, and returned as copies. """
+    with patch("in_toto.models.metadata.Metablock.read",
+        wraps=Metablock.read) as read:
+      layout = Metablock.load(self.layout_path)
+      cached_layout = Metablock.load(self.layout_path)
+      self.assertEqual(read.call_count, 1)
+
+    self.assertEqual(repr(layout), repr(cached_layout))
+    self.assertIsNot(layout.signed, cached_layout.signed)
+
+    # Modifying a returned layout does not modify the cached layout
+    cached_layout.signed.steps[0].expected_products = [["DISALLOW", "*"]]
+    self.assertEqual(repr(Metablock.load(self.layout_path)), repr(layout))
+
+    # A changed layout file is parsed again
+    layout.signed.readme = "changed"
+    layout.dump(self.layout_path)
+    with patch("in_toto.models.metadata.Metablock.read",
+        wraps=Metablock.read) as read:
+      self.assertEqual(Metablock.load(self.layout_path).signed.readme,
+          "changed")
+      self.assertEqual(read.call_count, 1)
+
+
+  def test_links_not_cached(self):
+    """Link files are not kept in the layout cache. """
+    link_path = os.path.join(self.test_dir, "test.link")
+    Metablock(signed=Link(name="test")).dump(link_path)
+    Metablock.load(link_path)
+    self.assertEqual(len(get_layout_cache()), 0)
+
+
+class TestSignatureCache(unittest.TestCase):
+  """Test signature cache helpers and cached signature verification. """
+
+  @classmethod
+  def setUpClass(self):
+    demo_files = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "demo_files")
+    self.alice = import_rsa_privatekey_from_file(
+        os.path.join(demo_files, "alice"))
+    self.alice_pub = import_rsa_publickey_from_file(
+        os.path.join(demo_files, "alice.pub"))
+
+
+  def setUp(self):
+    self.test_dir = os.path.realpath(tempfile.mkdtemp())
+    in_toto.settings.SIGNATURE_CACHE_PATH = os.path.join(
+        self.test_dir, "cache")
+
+
+  def tearDown(self):
+    in_toto.settings.SIGNATURE_CACHE_PATH = None
+    shutil.rmtree(self.test_dir)
+
+
+  def test_get_signature_cache(self):
+    """Signature cache is None if disabled and memoized otherwise. """
+    cache = get_signature_cache()
+    self.assertTrue(isinstance(cache, FileCache))
+    self.assertIs(cache, get_signature_cache())
+
+    in_toto.settings.SIGNATURE_CACHE_PATH = None
+    self.assertIsNone(get_signature_cache())
+
+
+  def test_get_key_fingerprint(self):
+    """Fingerprint ignores private portion and changes with public portion. """
+    self.assertEqual(get_key_fingerprint(self.alice),
+        get_key_fingerprint(self.alice_pub))
+
+    other_key = dict(self.alice_pub)
+    other_key["scheme"] = "other-scheme"
+    self.assertNotEqual(get_key_fingerprint(self.alice_pub),
+        get_key_fingerprint(other_key))
+
+
+  def test_get_signature_cache_key(self):
+    """Cache key changes with signed bytes. """
+    signature = {"keyid": self.alice["keyid"], "sig": "abc"}
+    self.assertNotEqual(
+        get_signature_cache_key(self.alice_pub, signature, b"foo"),
+        get_signature_cache_key(self.alice_pub, signature, b"bar"))
+
+
+  def test_cached_verify_signature(self):
+    """Cached verification skips crypto, failures are not cached. """
+    metablock = Metablock(signed=Link(name="foo"))
+    metablock.sign(self.alice)
+
+    # First verification populates the cache
+    metablock.verify_signature(self.alice_pub)
+
+    # Second verification uses the cache
+    with patch("securesystemslib.keys.verify_signature") as mock_verify:
+      metablock.verify_signature(self.alice_pub)
+      mock_verify.assert_not_called()
+
+    # Changed metadata is not found in cache and fails verification
+    metablock.signed.name = "bar"
+    with self.assertRaises(SignatureVerificationError):
+      metablock.verify_signature(self.alice_pub)
+    with self.assertRaises(SignatureVerificationError):
+      metablock.verify_signature(self.alice_pub)
+
+    self.assertEqual(len(os.listdir(get_signature_cache().path)), 1)
+
+
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -23,18 +23,24 @@ import os
 import shutil
 import tempfile
 import unittest
+import subprocess
+from mock import patch, Mock
 from six import string_types
 
 import cryptography.hazmat.primitives.serialization as serialization
 import cryptography.hazmat.backends as backends
 
 from in_toto.gpg.functions import (gpg_sign_object, gpg_export_pubkey,
-    gpg_verify_signature)
-from in_toto.gpg.util import get_version, is_version_fully_supported
+    gpg_export_pubkeys, gpg_verify_signature)
+from in_toto.gpg.util import (get_version, is_version_fully_supported,
+    get_packet_header, parse_packet_header, iter_packets, get_pubkey_object)
+from in_toto.gpg.keyring import find_keyring, get_keyring_index
+from in_toto.gpg.exceptions import PacketParsingError, KeyNotFoundError
 from in_toto.gpg.rsa import create_pubkey as rsa_create_pubkey
 from in_toto.gpg.dsa import create_pubkey as dsa_create_pubkey
 from in_toto.gpg.common import parse_pubkey_payload
 
+import in_toto.gpg.keyring
 import securesystemslib.formats
 import securesystemslib.exceptions
 
@@ -45,6 +51,61 @@ class TestUtil(unittest.TestCase):
     self.assertTrue(isinstance(get_version(), string_types))
     self.assertTrue(isinstance(is_version_fully_supported(), bool))
 
+  def test_get_version_cached(self):
+    """The gpg2 version is only determined once. """
+    with patch("in_toto.gpg.util._version", None), patch(
+        "in_toto.gpg.util.subprocess.Popen", wraps=subprocess.Popen) as popen:
+      self.assertEqual(get_version(), get_version())
+    self.assertEqual(popen.call_count, 1)
+
+  def test_packet_headers(self):
+    """Parse old and new format packet headers. """
+    body = b"x" * 300
+    for header, header_length in [
+        (b"\x99\x01\x2c", 3), # old format, two-octet length
+        (b"\x9a\x00\x00\x01\x2c", 5), # old format, four-octet length
+        (b"\xc6\xc0\x6c", 3), # new format, two-octet length
+        (b"\xc6\xff\x00\x00\x01\x2c", 6)]: # new format, five-octet length
+      self.assertEqual(get_packet_header(header), (6, header_length, 300))
+      payload, length, packet_type = parse_packet_header(header + body)
+      self.assertEqual((bytes(payload), length, packet_type),
+          (body, header_length + 300, 6))
+
+    for data in [b"", b"\x00", b"\x9b\x01", b"\xc6\xe0\x00",
+        b"\x99\x01\x2c" + b"x"]:
+      with self.assertRaises(PacketParsingError):
+        parse_packet_header(data)
+
+  def test_iter_packets(self):
+    """Iterate over packets, including packets with partial body lengths. """
+    body = b"x" * 700
+    packets = [
+        b"\x99\x01\x2c" + body[:300], # old format, two-octet length
+        b"\xce\xe9" + body[:512] + b"\xbc" + body[512:], # partial lengths
+        b"\xc6\x03abc"] # new format, one-octet length
+    data = b"".join(packets)
+
+    self.assertListEqual([(packet_type, bytes(payload), bytes(packet))
+        for packet_type, payload, packet in iter_packets(data)], [
+        (6, body[:300], packets[0]),
+        (14, body, packets[1]),
+        (6, b"abc", packets[2])])
+
+    # Packets are read by offset
+    self.assertEqual(get_packet_header(memoryview(data), len(data) - 5),
+        (6, 2, 3))
+    with self.assertRaises(PacketParsingError):
+      get_packet_header(data, len(packets[0]))
+
+    payload, length, packet_type = parse_packet_header(packets[1])
+    self.assertEqual((bytes(payload), length, packet_type),
+        (body, len(packets[1]), 14))
+
+    # Truncated partial bodies and missing lengths of the next chunk
+    for data in [packets[1][:300], packets[1][:514]]:
+      with self.assertRaises(PacketParsingError):
+        list(iter_packets(data))
+
 class TestCommon(unittest.TestCase):
   """Test common functions of the in_toto.gpg module. """
   def test_parse_empty_pubkey_payload(self):
@@ -150,6 +211,42 @@ class TestGPGRSA(unittest.TestCase):
     self.assertFalse(gpg_verify_signature(signature, key_data, wrong_data))
 
 
+  def test_gpg_verify_signature_cached_pubkey(self):
+    """Public key objects are only created once per key. """
+    test_data = b'test_data'
+    signature = gpg_sign_object(test_data, keyid=self.default_keyid,
+        homedir=self.gnupg_home)
+    key_data = gpg_export_pubkey(self.default_keyid, homedir=self.gnupg_home)
+
+    with patch("in_toto.gpg.util._pubkey_objects", None), patch(
+        "in_toto.gpg.rsa.create_pubkey", wraps=rsa_create_pubkey) as create:
+      for _ in range(3):
+        self.assertTrue(gpg_verify_signature(signature, key_data, test_data))
+      self.assertEqual(create.call_count, 1)
+
+      # Changed public parameters of the same keyid are not served from cache
+      verification_key = key_data["subkeys"].get(signature["keyid"], key_data)
+      verification_key["keyval"]["public"]["e"] = "03"
+      self.assertFalse(gpg_verify_signature(signature, key_data, test_data))
+      self.assertEqual(create.call_count, 2)
+
+      # Malformed public key info is rejected before the cache is looked up
+      verification_key["keyval"]["public"]["n"] = "not hex"
+      with self.assertRaises(securesystemslib.exceptions.FormatError):
+        gpg_verify_signature(signature, key_data, test_data)
+      self.assertEqual(create.call_count, 2)
+
+      # Public key infos with different parameters never share a cache entry
+      create_object = Mock(side_effect=lambda pubkey_info: object())
+      pubkey_objects = [
+        get_pubkey_object(dict(verification_key, keyval={"public": public}),
+            create_object)
+        for public in [{"e": "010001\nn=abcd"}, {"e": "010001", "n": "abcd"}]
+      ]
+      self.assertEqual(create_object.call_count, 2)
+      self.assertIsNot(pubkey_objects[0], pubkey_objects[1])
+
+
   def test_gpg_sign_and_verify_object_default_keyring(self):
     """Sign/verify using keyring from envvar. """
 
@@ -169,6 +266,154 @@ class TestGPGRSA(unittest.TestCase):
       del os.environ["GNUPGHOME"]
 
 
+class TestGPGKeyring(unittest.TestCase):
+  """Test exporting public keys from keyrings without calling gpg2. """
+
+  @classmethod
+  def setUpClass(self):
+    self.keyrings = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "gpg_keyrings")
+    self.test_dir = os.path.realpath(tempfile.mkdtemp())
+
+
+  @classmethod
+  def tearDownClass(self):
+    shutil.rmtree(self.test_dir)
+
+
+  def _assert_native_export(self, homedir, keyids):
+    """Assert that the keys exported from the keyring in homedir are the keys
+    exported by gpg2. """
+    for keyid in keyids:
+      with patch("in_toto.gpg.keyring.export_pubkey", return_value=None):
+        expected_key_data = gpg_export_pubkey(keyid, homedir=homedir)
+
+      with patch("in_toto.gpg.functions.subprocess.Popen") as popen:
+        key_data = gpg_export_pubkey(keyid, homedir=homedir)
+      popen.assert_not_called()
+      self.assertDictEqual(key_data, expected_key_data)
+
+
+  def test_export_from_packet_keyring(self):
+    """Export master keys and subkeys from 'pubring.gpg'. """
+    self._assert_native_export(os.path.join(self.keyrings, "rsa"), [
+        TestGPGRSA.default_keyid, TestGPGRSA.signing_subkey_keyid,
+        TestGPGRSA.default_keyid[-16:].lower(),
+        "7B3ABB26B97B655AB9296BD15B0BD02E1C768C43"])
+    self._assert_native_export(os.path.join(self.keyrings, "dsa"),
+        [TestGPGDSA.default_keyid])
+
+
+  def test_export_from_keybox_keyring(self):
+    """Export keys from a 'pubring.kbx' created by gpg2. """
+    homedir = os.path.join(self.test_dir, "kbx")
+    os.mkdir(homedir, 0o700)
+    subprocess.check_call(["gpg2", "--homedir", homedir, "--batch", "--quiet",
+        "--import", os.path.join(self.keyrings, "rsa", "pubring.gpg")],
+        stderr=subprocess.PIPE)
+    if find_keyring(homedir) != os.path.join(homedir, "pubring.kbx"):
+      self.skipTest("gpg2 did not create a keybox keyring")
+
+    self._assert_native_export(homedir, [TestGPGRSA.default_keyid,
+        TestGPGRSA.encryption_subkey_keyid])
+
+
+  def test_fall_back_to_gpg(self):
+    """Call gpg2 for missing keys and keyrings configured elsewhere. """
+    homedir = os.path.join(self.test_dir, "conf")
+    shutil.copytree(os.path.join(self.keyrings, "rsa"), homedir)
+
+    with self.assertRaises(KeyNotFoundError):
+      gpg_export_pubkey("A" * 40, homedir=homedir)
+
+    # The unsupported subkey is found, but not exported, like with gpg2
+    with patch("in_toto.gpg.functions.subprocess.Popen") as popen:
+      with self.assertRaises(KeyNotFoundError):
+        gpg_export_pubkey(TestGPGRSA.unsupported_subkey_keyid,
+            homedir=homedir)
+    popen.assert_not_called()
+
+    with open(os.path.join(homedir, "gpg.conf"), "w") as fp:
+      fp.write("# comment\nno-default-keyring\n")
+    self.assertIsNone(find_keyring(homedir))
+    self.assertIsNotNone(gpg_export_pubkey(TestGPGRSA.default_keyid,
+        homedir=homedir))
+
+    self.assertIsNone(find_keyring(os.path.join(self.test_dir, "missing")))
+
+
+  def test_export_pubkeys(self):
+    """Export keys in bulk with a single call of gpg2 and cache them. """
+    homedir = os.path.join(self.test_dir, "bulk")
+    shutil.copytree(os.path.join(self.keyrings, "rsa"), homedir)
+    keyids = [TestGPGRSA.default_keyid, TestGPGRSA.signing_subkey_keyid,
+        "7B3ABB26B97B655AB9296BD15B0BD02E1C768C43"]
+    expected_key_data = dict((keyid, gpg_export_pubkey(keyid,
+        homedir=os.path.join(self.keyrings, "rsa"))) for keyid in keyids)
+
+    # Keys of keyrings that cannot be read directly are exported with gpg2
+    with open(os.path.join(homedir, "gpg.conf"), "w") as fp:
+      fp.write("no-default-keyring\n")
+    with patch("in_toto.gpg.functions.subprocess.Popen",
+        wraps=subprocess.Popen) as popen:
+      self.assertDictEqual(gpg_export_pubkeys(keyids, homedir=homedir),
+          expected_key_data)
+      self.assertEqual(popen.call_count, 1)
+
+      # Keys exported with gpg2 are cached until the homedir changes
+      self.assertDictEqual(gpg_export_pubkeys(keyids, homedir=homedir),
+          expected_key_data)
+      self.assertEqual(popen.call_count, 1)
+
+      with open(os.path.join(homedir, "gpg.conf"), "a") as fp:
+        fp.write("# changed\n")
+      gpg_export_pubkeys(keyids, homedir=homedir)
+      self.assertEqual(popen.call_count, 2)
+
+    with self.assertRaises(KeyNotFoundError):
+      gpg_export_pubkeys(keyids + ["A" * 40], homedir=homedir)
+    with self.assertRaises(ValueError):
+      gpg_export_pubkeys(keyids + ["bogus-key"], homedir=homedir)
+
+    # Keys of readable keyrings are cached until the keyring changes
+    os.remove(os.path.join(homedir, "gpg.conf"))
+    with patch("in_toto.gpg.keyring.export_pubkey",
+        wraps=in_toto.gpg.keyring.export_pubkey) as export_pubkey:
+      gpg_export_pubkeys(keyids, homedir=homedir)
+      key_data = gpg_export_pubkeys(keyids, homedir=homedir)
+      self.assertEqual(export_pubkey.call_count, 3)
+
+      # Returned keys are copies of the cached keys
+      key_data[TestGPGRSA.default_keyid]["keyid"] = "modified"
+      self.assertDictEqual(gpg_export_pubkeys(keyids, homedir=homedir),
+          expected_key_data)
+
+      with open(os.path.join(homedir, "pubring.gpg"), "ab") as fp:
+        fp.write(b"\xb0\x02\x00\x00") # trust packet
+      gpg_export_pubkeys(keyids, homedir=homedir)
+      self.assertEqual(export_pubkey.call_count, 6)
+
+
+  def test_keyring_index_cache(self):
+    """Keyrings are only parsed again if they changed. """
+    homedir = os.path.join(self.test_dir, "cache")
+    shutil.copytree(os.path.join(self.keyrings, "dsa"), homedir)
+    path = os.path.join(homedir, "pubring.gpg")
+    index = get_keyring_index(path)
+    self.assertIs(get_keyring_index(path), index)
+
+    with open(path, "ab") as fp:
+      fp.write(b"\xb0\x02\x00\x00") # trust packet
+    self.assertIsNot(get_keyring_index(path), index)
+    self.assertDictEqual(get_keyring_index(path), index)
+
+    with open(path, "ab") as fp:
+      fp.write(b"\x99\x01")
+    with self.assertRaises(PacketParsingError):
+      get_keyring_index(path)
+
+
+
 class TestGPGDSA(unittest.TestCase):
   """ Test signature creation, verification and key export from the gpg
   module """
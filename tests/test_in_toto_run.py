@@ -45,6 +45,7 @@ from in_toto.in_toto_run import main as in_toto_run_main
 from in_toto.models.link import FILENAME_FORMAT
 
 import in_toto.gpg.util
+import in_toto.merkle
 import tests.common
 
 
@@ -152,6 +153,12 @@ class TestInTotoRunTool(tests.common.CliTestCase):
       args4 = named_args + ["--base-path", "bogus/path"] + positional_args
       self.assert_cli_sys_exit(args4, 1)
 
+      # Test with Merkle roots
+      args5 = named_args + ["--merkle-roots"] + positional_args
+      self.assert_cli_sys_exit(args5, 0)
+      link_metadata = Metablock.load(self.test_link_rsa)
+      in_toto.merkle.verify_merkle_roots(link_metadata.signed)
+
 
   def test_main_with_unencrypted_ed25519_key(self):
     """Test CLI command with ed25519 key. """
@@ -20,6 +20,7 @@
 
 import os
 import sys
+import json
 import unittest
 import argparse
 import shutil
@@ -31,6 +32,7 @@ from in_toto.models.layout import Layout
 from in_toto.models.metadata import Metablock
 from in_toto.in_toto_verify import main as in_toto_verify_main
 from in_toto import exceptions
+import in_toto.settings
 from in_toto.util import import_rsa_key_from_file
 from securesystemslib.interface import import_ed25519_privatekey_from_file
 
@@ -128,6 +130,86 @@ class TestInTotoVerifyTool(tests.common.CliTestCase):
       self.assert_cli_sys_exit(wrong_args, 2)
 
 
+  def test_main_rule_stats(self):
+    """Test in-toto-verify CLI tool writes rule statistics. """
+    args = ["--layout", self.layout_single_signed_path,
+        "--layout-keys", self.alice_path, "--rule-stats", "rule-stats.json"]
+    self.assert_cli_sys_exit(args, 0)
+    with open("rule-stats.json") as fp:
+      rule_stats = json.load(fp)
+    self.assertTrue(rule_stats)
+    self.assertTrue(all(stats["passed"] for stats in rule_stats))
+
+
+  def test_main_batch(self):
+    """Test in-toto-verify CLI tool with batch of products and report. """
+    with open("products.json", "w") as fp:
+      json.dump([{"link_dir": "."}, {"link_dir": "."}], fp)
+    args = ["--layout", self.layout_single_signed_path,
+        "--layout-keys", self.alice_path, "--batch", "products.json",
+        "--product-workers", "2", "--report", "report.json"]
+    self.assert_cli_sys_exit(args, 0)
+    with open("report.json") as fp:
+      self.assertListEqual([result["success"] for result in json.load(fp)],
+          [True, True])
+
+    # One failing product fails the batch
+    with open("products.json", "w") as fp:
+      json.dump([{"link_dir": "."}, {"link_dir": "missing"}], fp)
+    self.assert_cli_sys_exit(args, 1)
+    with open("report.json") as fp:
+      self.assertListEqual([result["success"] for result in json.load(fp)],
+          [True, False])
+
+    # Relative paths are resolved against the directory of the batch file
+    os.mkdir("batch")
+    try:
+      with open(os.path.join("batch", "products.json"), "w") as fp:
+        json.dump([{"link_dir": "..", "working_dir": ".."}], fp)
+      self.assert_cli_sys_exit(args[:-5] + [os.path.join("batch",
+          "products.json")], 0)
+
+    finally:
+      shutil.rmtree("batch")
+
+
+  def test_main_watch(self):
+    """Test in-toto-verify CLI tool in watch mode. """
+    args = ["--layout", self.layout_single_signed_path,
+        "--layout-keys", self.alice_path, "--watch", "--watch-interval",
+        "0.01", "--watch-timeout", "0.05"]
+    self.assert_cli_sys_exit(args, 0)
+
+    # Links are missing in the link directory
+    self.assert_cli_sys_exit(args + ["--link-dir", "missing"], 1)
+
+
+  def test_main_receipt(self):
+    """Test in-toto-verify CLI tool writing a verification receipt. """
+    args = ["--layout", self.layout_single_signed_path,
+        "--layout-keys", self.alice_path, "--receipt", "foo.receipt",
+        "--receipt-key", "bob"]
+    self.assert_cli_sys_exit(args, 0)
+    self.assertEqual(Metablock.load("foo.receipt").type_, "receipt")
+
+    # A receipt key is required to sign the receipt
+    self.assert_cli_sys_exit(args[:-2], 2)
+
+    # Receipts are only written for a single verification
+    for extra_args in [["--batch", "products.json"], ["--watch"],
+        ["--workers", "unix:worker.sock"]]:
+      self.assert_cli_sys_exit(args + extra_args, 2)
+
+
+  def test_main_workers_wrong_args(self):
+    """Test in-toto-verify CLI tool rejects options not used with workers. """
+    args = ["--layout", self.layout_single_signed_path,
+        "--layout-keys", self.alice_path, "--workers", "unix:worker.sock"]
+    for extra_args in [["--max-workers", "2"], ["--rule-workers", "2"],
+        ["--step-cache", "step-cache"]]:
+      self.assert_cli_sys_exit(args + extra_args, 2)
+
+
   def test_main_multiple_keys(self):
     """Test in-toto-verify CLI tool with multiple keys. """
     args = ["--layout", self.layout_double_signed_path,
@@ -155,6 +237,43 @@ class TestInTotoVerifyTool(tests.common.CliTestCase):
     self.assert_cli_sys_exit(args, 1)
 
 
+  def test_main_signature_cache(self):
+    """Test in-toto-verify CLI tool with signature cache. """
+    args = ["--layout", self.layout_single_signed_path,
+        "--layout-keys", self.alice_path, "--signature-cache", "sig-cache"]
+    try:
+      # Populate the cache and verify again using the cache
+      self.assert_cli_sys_exit(args, 0)
+      self.assertTrue(os.listdir("sig-cache"))
+      self.assert_cli_sys_exit(args, 0)
+
+    finally:
+      in_toto.settings.SIGNATURE_CACHE_PATH = None
+      shutil.rmtree("sig-cache", ignore_errors=True)
+
+
+  def test_main_inspection_cache(self):
+    """Test in-toto-verify CLI tool with inspection cache. """
+    args = ["--layout", self.layout_single_signed_path,
+        "--layout-keys", self.alice_path, "--inspection-cache", "insp-cache"]
+    try:
+      # Populate the cache and verify again using the cache, which restores
+      # the untar inspection's product
+      if os.path.exists("foo.py"):
+        os.remove("foo.py")
+      self.assert_cli_sys_exit(args, 0)
+      self.assertTrue(os.listdir(os.path.join("insp-cache", "links")))
+      os.remove("foo.py")
+      with patch("in_toto.runlib.execute_link") as execute_link:
+        self.assert_cli_sys_exit(args, 0)
+      execute_link.assert_not_called()
+      self.assertTrue(os.path.isfile("foo.py"))
+
+    finally:
+      in_toto.settings.INSPECTION_CACHE_PATH = None
+      shutil.rmtree("insp-cache", ignore_errors=True)
+
+
 
 class TestInTotoVerifyToolMixedKeys(tests.common.CliTestCase):
   """ Tests in-toto-verify like TestInTotoVerifyTool but with
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+<Program Name>
+  test_in_toto_verify_receipt.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Test in_toto_verify_receipt command line tool.
+
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from in_toto.models.metadata import Metablock
+from in_toto.verifylib import in_toto_verify_with_receipt
+from in_toto.in_toto_verify_receipt import main as in_toto_verify_receipt_main
+from in_toto.util import (import_rsa_key_from_file,
+    import_public_keys_from_files_as_dict)
+
+import tests.common
+
+
+
+class TestInTotoVerifyReceiptTool(tests.common.CliTestCase):
+  """Check a receipt of the demo supply chain, signed by bob. """
+  cli_main_func = staticmethod(in_toto_verify_receipt_main)
+
+  @classmethod
+  def setUpClass(self):
+    self.working_dir = os.getcwd()
+    demo_files = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "demo_files")
+
+    self.test_dir = os.path.realpath(tempfile.mkdtemp())
+    os.chdir(self.test_dir)
+    for name in os.listdir(demo_files):
+      shutil.copy(os.path.join(demo_files, name), self.test_dir)
+
+    layout = Metablock.load("demo.layout.template")
+    layout.sign(import_rsa_key_from_file("alice"))
+    layout.dump("demo.layout")
+
+    receipt = in_toto_verify_with_receipt(Metablock.load("demo.layout"),
+        import_public_keys_from_files_as_dict(["alice.pub"]),
+        import_rsa_key_from_file("bob"))
+    receipt.dump("foo.receipt")
+
+
+  @classmethod
+  def tearDownClass(self):
+    os.chdir(self.working_dir)
+    shutil.rmtree(self.test_dir)
+
+
+  def test_main(self):
+    """Test in-toto-verify-receipt CLI tool with passing receipts. """
+    self.assert_cli_sys_exit(["--receipt", "foo.receipt",
+        "--receipt-keys", "bob.pub"], 0)
+    self.assert_cli_sys_exit(["--receipt", "foo.receipt",
+        "-k", "bob.pub", "--layout", "demo.layout",
+        "--products", "foo.tar.gz", "-v"], 0)
+
+
+  def test_main_wrong_args(self):
+    """Test in-toto-verify-receipt CLI tool with wrong arguments. """
+    for wrong_args in [[], ["--receipt", "foo.receipt"], ["-k", "bob.pub"]]:
+      self.assert_cli_sys_exit(wrong_args, 2)
+
+
+  def test_main_fail(self):
+    """Test in-toto-verify-receipt CLI tool with failing receipts. """
+    failing_args_list = [
+      ["--receipt", "foo.receipt", "-k", "alice.pub"],
+      ["--receipt", "foo.receipt", "-k", "bob.pub", "--layout",
+          "demo.layout.template"],
+      ["--receipt", "foo.receipt", "-k", "bob.pub", "--products",
+          "demo.layout"],
+      ["--receipt", "missing.receipt", "-k", "bob.pub"]
+    ]
+    for failing_args in failing_args_list:
+      self.assert_cli_sys_exit(failing_args, 1)
+
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+<Program Name>
+  test_manifest.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Test in_toto.manifest module and loading links with a link manifest.
+
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from in_toto.manifest import (MANIFEST_FILENAME, add_link_to_manifest,
+    load_manifest, read_link_file)
+from in_toto.models.link import FILENAME_FORMAT
+from in_toto.models.metadata import Metablock
+from in_toto.runlib import in_toto_run
+from in_toto.verifylib import load_links_for_layout
+from in_toto.util import import_rsa_key_from_file
+from in_toto.exceptions import ManifestVerificationError
+
+
+
+class TestLinkManifest(unittest.TestCase):
+  """Test writing, reading and using the link manifest. """
+
+  @classmethod
+  def setUpClass(self):
+    self.demo_files = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "demo_files")
+    self.layout = Metablock.load(os.path.join(self.demo_files,
+        "demo.layout.template")).signed
+    self.bob = import_rsa_key_from_file(os.path.join(self.demo_files, "bob"))
+
+
+  def setUp(self):
+    self.working_dir = os.getcwd()
+    self.test_dir = os.path.realpath(tempfile.mkdtemp())
+    os.chdir(self.test_dir)
+    for name in os.listdir(self.demo_files):
+      if name.endswith(".link"):
+        shutil.copy(os.path.join(self.demo_files, name), name)
+
+
+  def tearDown(self):
+    os.chdir(self.working_dir)
+    shutil.rmtree(self.test_dir)
+
+
+  def _add_demo_links_to_manifest(self):
+    """Add all demo links in the test dir to the manifest. """
+    for name in sorted(os.listdir(".")):
+      if name.endswith(".link"):
+        add_link_to_manifest(name, Metablock.load(name))
+
+
+  def test_add_and_load_manifest(self):
+    """Entries are appended, later entries replace earlier ones. """
+    self.assertEqual(load_manifest("."), {})
+    self._add_demo_links_to_manifest()
+
+    manifest = load_manifest(".")
+    self.assertEqual(len(manifest), 2)
+    keyid = Metablock.load("package.2f89b927.link").signatures[0]["keyid"]
+    entry = manifest[("package", keyid)]
+    self.assertEqual(entry["filename"], "package.2f89b927.link")
+    self.assertEqual(entry["length"],
+        os.path.getsize("package.2f89b927.link"))
+    read_link_file("package.2f89b927.link", entry)
+
+    # Malformed and truncated lines are skipped
+    with open(MANIFEST_FILENAME, "a") as fp:
+      fp.write("not-json\n")
+      fp.write('{"step": "package", "keyid": "abc", "filename": "../x"}\n')
+      fp.write('{"step": "pack')
+    self.assertEqual(load_manifest("."), manifest)
+
+
+  def test_in_toto_run_adds_to_manifest(self):
+    """Links written by in_toto_run are added to the manifest. """
+    in_toto_run("foo", [], [], [], signing_key=self.bob)
+    entry = load_manifest(".")[("foo", self.bob["keyid"])]
+    self.assertEqual(entry["filename"],
+        FILENAME_FORMAT.format(step_name="foo", keyid=self.bob["keyid"]))
+
+
+  def test_load_links_with_manifest(self):
+    """Load links using the manifest and fail for modified link files. """
+    self._add_demo_links_to_manifest()
+    chain_link_dict = load_links_for_layout(self.layout, ".")
+    self.assertEqual(sorted(chain_link_dict.keys()), ["package", "write-code"])
+
+    # Link files are found by manifest entry, regardless of their names
+    os.rename("package.2f89b927.link", "package-renamed.link")
+    with open(MANIFEST_FILENAME) as fp:
+      content = fp.read().replace("package.2f89b927.link",
+          "package-renamed.link")
+    with open(MANIFEST_FILENAME, "w") as fp:
+      fp.write(content)
+    self.assertEqual(load_links_for_layout(self.layout, ".", max_workers=2),
+        chain_link_dict)
+
+    # Modified or truncated link files fail before parsing
+    with open("package-renamed.link", "a") as fp:
+      fp.write(" ")
+    with self.assertRaises(ManifestVerificationError):
+      load_links_for_layout(self.layout, ".")
+
+    with open("package-renamed.link", "r+") as fp:
+      fp.truncate(10)
+    with self.assertRaises(ManifestVerificationError):
+      load_links_for_layout(self.layout, ".")
+
+    data = open("write-code.776a00e2.link").read()
+    with open("write-code.776a00e2.link", "w") as fp:
+      fp.write(data.replace("foo.py", "bar.py"))
+    with self.assertRaises(ManifestVerificationError):
+      read_link_file("write-code.776a00e2.link",
+          [entry for entry in load_manifest(".").values()
+              if entry["step"] == "write-code"][0])
+
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+"""
+<Program Name>
+  test_merkle.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Test in_toto.merkle module.
+
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from in_toto.merkle import (MerkleTree, get_merkle_root, verify_merkle_proof,
+    add_merkle_roots, verify_merkle_roots, MERKLE_ROOTS_KEY)
+from in_toto.models.link import Link
+from in_toto.runlib import in_toto_run
+from in_toto.exceptions import MerkleVerificationError
+
+
+
+def _get_artifacts(count):
+  """Return a dictionary of `count` dummy artifacts. """
+  return {"file-{:03}".format(i): {"sha256": "{:064x}".format(i)}
+      for i in range(count)}
+
+
+
+class TestMerkleTree(unittest.TestCase):
+  """Test Merkle roots, proofs and diffs. """
+
+  def test_root(self):
+    """Roots are order-independent and change with any artifact. """
+    artifacts = _get_artifacts(5)
+    self.assertEqual(get_merkle_root(artifacts),
+        get_merkle_root(dict(reversed(list(artifacts.items())))))
+
+    changed_artifacts = dict(artifacts)
+    changed_artifacts["file-003"] = {"sha256": "0" * 64}
+    self.assertNotEqual(get_merkle_root(artifacts),
+        get_merkle_root(changed_artifacts))
+
+    # Empty and single artifact trees
+    self.assertEqual(len(get_merkle_root({})), 64)
+    self.assertNotEqual(get_merkle_root({}), get_merkle_root(_get_artifacts(1)))
+
+
+  def test_proof(self):
+    """Proofs verify for each artifact of trees of different sizes. """
+    for count in [1, 2, 3, 7, 8, 33]:
+      artifacts = _get_artifacts(count)
+      tree = MerkleTree(artifacts)
+      for path, hash_dict in artifacts.items():
+        proof = tree.get_proof(path)
+        self.assertTrue(len(proof) <= len(tree.levels))
+        verify_merkle_proof(tree.root, path, hash_dict, proof)
+
+    # Fail with wrong hash, unknown root and malformed proof
+    proof = tree.get_proof("file-005")
+    with self.assertRaises(MerkleVerificationError):
+      verify_merkle_proof(tree.root, "file-005", {"sha256": "0" * 64}, proof)
+    with self.assertRaises(MerkleVerificationError):
+      verify_merkle_proof(get_merkle_root({}), "file-005",
+          artifacts["file-005"], proof)
+    with self.assertRaises(MerkleVerificationError):
+      verify_merkle_proof(tree.root, "file-005", artifacts["file-005"],
+          [["up", "00"]])
+    with self.assertRaises(MerkleVerificationError):
+      verify_merkle_proof(tree.root, "file-005", artifacts["file-005"],
+          [["left", "not-hex"]])
+
+    # Fail with unknown path
+    with self.assertRaises(KeyError):
+      tree.get_proof("unknown")
+
+
+  def test_diff(self):
+    """Diff reports added, removed and modified artifacts. """
+    artifacts = _get_artifacts(20)
+    tree = MerkleTree(artifacts)
+    self.assertEqual(tree.diff(MerkleTree(dict(artifacts))),
+        {"added": [], "removed": [], "modified": []})
+
+    other_artifacts = dict(artifacts)
+    other_artifacts["file-002"] = {"sha256": "0" * 64}
+    other_artifacts["file-010"] = {"sha256": "0" * 64}
+    del other_artifacts["file-015"]
+    other_artifacts["file-005a"] = {"sha256": "1" * 64}
+    other_artifacts["new"] = {"sha256": "2" * 64}
+
+    self.assertEqual(tree.diff(MerkleTree(other_artifacts)), {
+      "added": ["file-005a", "new"],
+      "removed": ["file-015"],
+      "modified": ["file-002", "file-010"]
+    })
+    self.assertEqual(MerkleTree(other_artifacts).diff(tree), {
+      "added": ["file-015"],
+      "removed": ["file-005a", "new"],
+      "modified": ["file-002", "file-010"]
+    })
+
+    # Diff with empty and much smaller trees
+    self.assertEqual(tree.diff(MerkleTree({}))["removed"], sorted(artifacts))
+    self.assertEqual(MerkleTree(_get_artifacts(3)).diff(tree)["added"],
+        sorted(artifacts)[3:])
+
+
+
+class TestMerkleRoots(unittest.TestCase):
+  """Test Merkle roots in link environment. """
+
+  def test_add_verify_merkle_roots(self):
+    """Add and verify roots, fail with missing or outdated roots. """
+    link = Link(name="foo", materials=_get_artifacts(3),
+        products=_get_artifacts(4))
+
+    with self.assertRaises(MerkleVerificationError):
+      verify_merkle_roots(link)
+
+    add_merkle_roots(link)
+    verify_merkle_roots(link)
+    self.assertEqual(link.environment[MERKLE_ROOTS_KEY]["products"],
+        get_merkle_root(link.products))
+
+    link.products = _get_artifacts(5)
+    with self.assertRaises(MerkleVerificationError):
+      verify_merkle_roots(link)
+
+
+  def test_in_toto_run_record_merkle_roots(self):
+    """Record Merkle roots with in_toto_run. """
+    test_dir = os.path.realpath(tempfile.mkdtemp())
+    try:
+      open(os.path.join(test_dir, "foo"), "w").close()
+      link = in_toto_run("foo", [test_dir], [test_dir], [],
+          record_merkle_roots=True)
+      verify_merkle_roots(link.signed)
+
+      link = in_toto_run("foo", [test_dir], [test_dir], [])
+      self.assertNotIn(MERKLE_ROOTS_KEY, link.signed.environment)
+
+    finally:
+      shutil.rmtree(test_dir)
+
+
+
+if __name__ == "__main__":
+  unittest.main()
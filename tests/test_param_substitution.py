@@ -115,6 +115,7 @@ class Test_SubstituteRunField(unittest.TestCase):
         "inspect": [{
           "name": "run-command",
           "run": ["{COMMAND}"],
+          "artifact_paths": ["{COMMAND}.out"],
         }]
       })
 
@@ -122,6 +123,7 @@ class Test_SubstituteRunField(unittest.TestCase):
     """Check that the substitution is performed on the run field."""
     substitute_parameters(self.layout, {"COMMAND": "touch"})
     self.assertEquals(self.layout.inspect[0].run[0], "touch")
+    self.assertEquals(self.layout.inspect[0].artifact_paths, ["touch.out"])
 
 
   def test_inspection_fail_with_non_zero_retval(self):
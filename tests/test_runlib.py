@@ -23,6 +23,7 @@ import os
 import unittest
 import shutil
 import tempfile
+from mock import patch
 
 import in_toto.settings
 import in_toto.exceptions
@@ -37,6 +38,7 @@ from in_toto.models.link import (UNFINISHED_FILENAME_FORMAT, FILENAME_FORMAT)
 
 import securesystemslib.formats
 import securesystemslib.exceptions
+import securesystemslib.hash
 
 class Test_ApplyExcludePatterns(unittest.TestCase):
   """Test _apply_exclude_patterns(names, exclude_patterns) """
@@ -344,6 +346,30 @@ class TestRecordArtifactsAsDict(unittest.TestCase):
     """Test _hash_artifact passing hash algorithm. """
     self.assertTrue("sha256" in list(_hash_artifact("foo", ["sha256"]).keys()))
 
+  def test_record_with_hash_cache(self):
+    """Test reuse hashes of unchanged files and rehash changed files. """
+    hash_cache = {}
+    with patch("in_toto.runlib.securesystemslib.hash.digest_filename",
+        wraps=securesystemslib.hash.digest_filename) as digest:
+      artifacts_dict = record_artifacts_as_dict(["."], hash_cache=hash_cache)
+      self.assertEqual(digest.call_count, len(self.full_file_path_list))
+
+      # Nothing changed, nothing is rehashed
+      self.assertDictEqual(
+          record_artifacts_as_dict(["."], hash_cache=hash_cache),
+          artifacts_dict)
+      self.assertEqual(digest.call_count, len(self.full_file_path_list))
+
+      # Changed file is rehashed
+      with open("foo", "w") as fp:
+        fp.write("changed foo")
+      changed_dict = record_artifacts_as_dict(["."], hash_cache=hash_cache)
+      self.assertEqual(digest.call_count, len(self.full_file_path_list) + 1)
+      self.assertNotEqual(changed_dict["foo"], artifacts_dict["foo"])
+
+    with open("foo", "w") as fp:
+      fp.write("foo")
+
 
 
 class TestInTotoRun(unittest.TestCase):
@@ -433,6 +459,17 @@ class TestInTotoRun(unittest.TestCase):
     link = in_toto_run(self.step_name, [], [], ["echo", "test"])
     self.assertEquals(link.signed.environment["workdir"], os.getcwd())
 
+  def test_in_toto_run_with_cwd_and_base_path(self):
+    """Successfully run command and record artifacts in other directory. """
+    other_dir = os.path.realpath(tempfile.mkdtemp())
+    link = in_toto_run(self.step_name, ["."], ["."], ["touch", "created"],
+        base_path=other_dir, cwd=other_dir)
+    self.assertEquals(link.signed.environment["workdir"], other_dir)
+    self.assertEqual(list(link.signed.materials.keys()), [])
+    self.assertEqual(list(link.signed.products.keys()), ["created"])
+    self.assertFalse(os.path.exists("created"))
+    shutil.rmtree(other_dir)
+
   def test_in_toto_bad_signing_key_format(self):
     """Fail run, passed key is not properly formatted. """
     with self.assertRaises(securesystemslib.exceptions.FormatError):
@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+"""
+<Program Name>
+  test_verify_server.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Test in_toto.verify_server module, i.e. the verification service and
+  requests to a running server.
+
+"""
+import os
+import json
+import stat
+import time
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from mock import patch
+
+import six
+
+import in_toto.settings
+from in_toto.models.metadata import Metablock
+from in_toto.util import import_rsa_key_from_file
+from in_toto.verify_server import (VerificationService, create_server,
+    request_verification, _get_authentication_headers)
+
+
+
+class TestVerifyServer(unittest.TestCase):
+  """Verify the demo supply chain through the service and a running server. """
+
+  @classmethod
+  def setUpClass(self):
+    demo_files = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "demo_files")
+
+    self.working_dir = os.getcwd()
+    self.test_dir = os.path.realpath(tempfile.mkdtemp())
+    os.chdir(self.test_dir)
+    for name in os.listdir(demo_files):
+      shutil.copy(os.path.join(demo_files, name), self.test_dir)
+
+    alice = import_rsa_key_from_file("alice")
+    self.alice_pub = import_rsa_key_from_file("alice.pub")
+    self.layout_path = os.path.join(self.test_dir, "demo.layout")
+    layout = Metablock.load("demo.layout.template")
+    layout.sign(alice)
+    layout.dump(self.layout_path)
+
+    self.bad_layout_path = os.path.join(self.test_dir, "bad.layout")
+    layout.signed.steps[0].pubkeys = []
+    layout.signatures = []
+    layout.sign(alice)
+    layout.dump(self.bad_layout_path)
+
+
+  @classmethod
+  def tearDownClass(self):
+    os.chdir(self.working_dir)
+    shutil.rmtree(self.test_dir)
+
+
+  def setUp(self):
+    # The service enables the link cache in settings
+    patcher = patch("in_toto.settings.LINK_CACHE_MAX_ENTRIES",
+        in_toto.settings.LINK_CACHE_MAX_ENTRIES)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+
+    self.service = VerificationService(
+        {self.alice_pub["keyid"]: self.alice_pub}, [self.test_dir])
+    self.request = {
+      "layout": self.layout_path,
+      "link_dir": self.test_dir,
+      "working_dir": self.test_dir
+    }
+
+
+  def test_verify(self):
+    """Verify layout by path and then by digest of the cached layout. """
+    response = self.service.verify(self.request)
+    self.assertTrue(response["success"], response.get("error"))
+
+    request = dict(self.request, layout=None,
+        layout_sha256=response["layout_sha256"],
+        layout_keyids=[self.alice_pub["keyid"]])
+    self.assertTrue(self.service.verify(request)["success"])
+
+
+  def test_verify_failure(self):
+    """Errors are reported in the response. """
+    bad_requests = [
+      ([], "ValueError"),
+      ({}, "FormatError"),
+      (dict(self.request, layout="demo.layout"), "ValueError"),
+      (dict(self.request, layout=None, layout_sha256="0" * 64), "ValueError"),
+      (dict(self.request, layout_keyids=["0" * 64]), "ValueError"),
+      (dict(self.request, link_dir=None), "FormatError"),
+      # Paths must be below the roots of the server
+      (dict(self.request, working_dir=os.path.dirname(self.test_dir)),
+          "ValueError"),
+      (dict(self.request, link_dir=os.path.join(self.test_dir, "escape")),
+          "ValueError"),
+      (dict(self.request, layout=self.bad_layout_path),
+          "LinkNotFoundError")
+    ]
+    os.symlink(os.path.dirname(self.test_dir), "escape")
+    try:
+      for request, error_type in bad_requests:
+        response = self.service.verify(request)
+        self.assertFalse(response["success"])
+        self.assertEqual(response["error_type"], error_type)
+
+    finally:
+      os.remove("escape")
+
+    with self.assertRaises(ValueError):
+      VerificationService({self.alice_pub["keyid"]: self.alice_pub}, [])
+
+
+  def test_serve_unix_socket(self):
+    """Request verification from a server listening on a Unix socket. """
+    address = "unix:" + os.path.join(self.test_dir, "server.sock")
+    server = create_server(address, self.service)
+    self.addCleanup(server.server_close)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    self.addCleanup(thread.join)
+    self.addCleanup(server.shutdown)
+
+    # The socket is only accessible by the current user
+    mode = os.stat(os.path.join(self.test_dir, "server.sock")).st_mode
+    self.assertFalse(mode & (stat.S_IRWXG | stat.S_IRWXO))
+
+    response = request_verification(address, self.request, timeout=60)
+    self.assertTrue(response["success"], response.get("error"))
+
+    response = request_verification(address, dict(self.request,
+        layout=self.bad_layout_path), timeout=60)
+    self.assertFalse(response["success"])
+
+    # The socket of a previous server is replaced, other files are not
+    server.shutdown()
+    server.server_close()
+    create_server(address, self.service).server_close()
+
+    path = os.path.join(self.test_dir, "not-a-socket")
+    with open(path, "w") as fp:
+      fp.write("keep")
+    with self.assertRaises(ValueError):
+      create_server("unix:" + path, self.service)
+    with open(path) as fp:
+      self.assertEqual(fp.read(), "keep")
+
+
+  def test_serve_loopback_only(self):
+    """TCP servers only listen on loopback addresses. """
+    with self.assertRaises(ValueError):
+      create_server("0.0.0.0:0", self.service)
+
+    server = create_server("127.0.0.1:0", self.service)
+    self.addCleanup(server.server_close)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    self.addCleanup(thread.join)
+    self.addCleanup(server.shutdown)
+
+    address = "127.0.0.1:{}".format(server.server_address[1])
+    response = request_verification(address, self.request, timeout=60)
+    self.assertTrue(response["success"], response.get("error"))
+
+    # Requests that a browser could send on behalf of a web page are rejected
+    for headers, status in [
+        ({"Content-Type": "text/plain"}, 415),
+        ({"Content-Type": "application/json", "Host": "attacker.test:80"},
+            403)]:
+      connection = six.moves.http_client.HTTPConnection("127.0.0.1",
+          server.server_address[1], timeout=60)
+      try:
+        connection.request("POST", "/verify", json.dumps(self.request),
+            headers)
+        self.assertEqual(connection.getresponse().status, status)
+
+      finally:
+        connection.close()
+
+
+  def test_serve_bad_requests(self):
+    """Requests without valid Content-Length, and slow clients are rejected.
+    """
+    server = create_server("127.0.0.1:0", self.service)
+    self.addCleanup(server.server_close)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    self.addCleanup(thread.join)
+    self.addCleanup(server.shutdown)
+
+    for content_length in [None, "-1", "many"]:
+      connection = six.moves.http_client.HTTPConnection("127.0.0.1",
+          server.server_address[1], timeout=60)
+      try:
+        connection.putrequest("POST", "/verify")
+        connection.putheader("Content-Type", "application/json")
+        if content_length is not None:
+          connection.putheader("Content-Length", content_length)
+        connection.endheaders()
+        self.assertEqual(connection.getresponse().status, 400)
+
+      finally:
+        connection.close()
+
+    # A client that does not send its announced request body is disconnected
+    with patch("in_toto.verify_server._VerificationRequestHandler.timeout",
+        0.1):
+      client = socket.create_connection(("127.0.0.1",
+          server.server_address[1]), timeout=60)
+      try:
+        client.sendall(b"POST /verify HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+            b"Content-Type: application/json\r\nContent-Length: 10\r\n\r\n")
+        start = time.time()
+        self.assertEqual(client.recv(1024), b"")
+        self.assertLess(time.time() - start, 30)
+
+      finally:
+        client.close()
+
+
+  def test_serve_secret(self):
+    """Servers with a secret authenticate requests and responses. """
+    # Listening on all interfaces is only possible with a secret
+    server = create_server("0.0.0.0:0", self.service, secret=b"secret")
+    self.addCleanup(server.server_close)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    self.addCleanup(thread.join)
+    self.addCleanup(server.shutdown)
+
+    address = "127.0.0.1:{}".format(server.server_address[1])
+    response = request_verification(address, self.request, timeout=60,
+        secret=b"secret")
+    self.assertTrue(response["success"], response.get("error"))
+
+    # Unauthenticated requests are rejected
+    response = request_verification(address, self.request, timeout=60)
+    self.assertFalse(response["success"])
+
+    connection = six.moves.http_client.HTTPConnection("127.0.0.1",
+        server.server_address[1], timeout=60)
+    try:
+      connection.request("POST", "/verify", json.dumps(self.request),
+          {"Content-Type": "application/json"})
+      self.assertEqual(connection.getresponse().status, 401)
+
+    finally:
+      connection.close()
+
+    # Responses that are not authenticated with the secret are not trusted
+    with self.assertRaises(ValueError):
+      request_verification(address, self.request, timeout=60,
+          secret=b"other")
+
+    # Authenticated requests are only accepted once and until they expire
+    body = json.dumps(self.request).encode("utf-8")
+    for validity, statuses in [(60, [200, 401]), (-1, [401])]:
+      headers = _get_authentication_headers(b"secret", body,
+          validity=validity)
+      headers["Content-Type"] = "application/json"
+      for status in statuses:
+        connection = six.moves.http_client.HTTPConnection("127.0.0.1",
+            server.server_address[1], timeout=60)
+        try:
+          connection.request("POST", "/verify", body, headers)
+          self.assertEqual(connection.getresponse().status, status)
+
+        finally:
+          connection.close()
+
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+<Program Name>
+  test_verify_watch.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Test in_toto.verify_watch module, i.e. incremental verification of links as
+  they arrive in a link directory.
+
+"""
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from mock import patch
+
+import in_toto.settings
+import in_toto.exceptions
+from in_toto.models.metadata import Metablock
+from in_toto.util import import_rsa_key_from_file
+from in_toto.verify_watch import LinkWatcher, in_toto_verify_watch
+
+
+
+class TestVerifyWatch(unittest.TestCase):
+  """Watch an initially empty link directory, to which the demo links are
+  copied. """
+
+  @classmethod
+  def setUpClass(self):
+    self.demo_files = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "demo_files")
+
+    self.working_dir = os.getcwd()
+    self.test_dir = os.path.realpath(tempfile.mkdtemp())
+    os.chdir(self.test_dir)
+    # Inspections need the final product in the working directory
+    shutil.copy(os.path.join(self.demo_files, "foo.tar.gz"), self.test_dir)
+
+    alice = import_rsa_key_from_file(os.path.join(self.demo_files, "alice"))
+    alice_pub = import_rsa_key_from_file(os.path.join(self.demo_files,
+        "alice.pub"))
+    self.layout_key_dict = {alice_pub["keyid"]: alice_pub}
+    self.layout = Metablock.load(os.path.join(self.demo_files,
+        "demo.layout.template"))
+    self.layout.sign(alice)
+
+
+  @classmethod
+  def tearDownClass(self):
+    os.chdir(self.working_dir)
+    shutil.rmtree(self.test_dir)
+
+
+  def setUp(self):
+    self.link_dir = tempfile.mkdtemp(dir=self.test_dir)
+
+
+  def _copy_link(self, name):
+    """Copy the demo link with the passed name atomically to the link
+    directory. """
+    tmp_path = os.path.join(self.link_dir, name + ".tmp")
+    shutil.copy(os.path.join(self.demo_files, name), tmp_path)
+    os.rename(tmp_path, os.path.join(self.link_dir, name))
+
+
+  def test_link_watcher(self):
+    """Links are verified once when they arrive or change. """
+    watcher = LinkWatcher(self.layout.signed, self.link_dir)
+    self.assertListEqual(watcher.poll(), [])
+    self.assertListEqual([status["name"] for status in
+        watcher.get_missing_steps()], ["write-code", "package"])
+
+    self._copy_link("write-code.776a00e2.link")
+    self.assertListEqual(watcher.poll(), ["write-code.776a00e2.link"])
+    self.assertListEqual([status["name"] for status in
+        watcher.get_missing_steps()], ["package"])
+
+    # A partially written link is not verified until it changes again
+    with open(os.path.join(self.link_dir, "package.2f89b927.link"), "w") as fp:
+      fp.write("{")
+    self.assertListEqual(watcher.poll(), ["package.2f89b927.link"])
+    self.assertEqual(len(watcher.get_missing_steps()), 1)
+
+    self._copy_link("package.2f89b927.link")
+    with patch("in_toto.models.metadata.Metablock.verify_signature") as mock:
+      self.assertListEqual(watcher.poll(), ["package.2f89b927.link"])
+      self.assertListEqual(watcher.poll(), [])
+      self.assertEqual(mock.call_count, 1)
+    self.assertListEqual(watcher.get_missing_steps(), [])
+
+    # Removed links are missing again
+    os.remove(os.path.join(self.link_dir, "write-code.776a00e2.link"))
+    self.assertListEqual(watcher.poll(), ["write-code.776a00e2.link"])
+    self.assertListEqual([status["name"] for status in
+        watcher.get_missing_steps()], ["write-code"])
+
+
+  def test_verify_watch(self):
+    """Verification finishes once the links of all steps arrived. """
+    progress = []
+    timer = threading.Timer(0.2, self._copy_link,
+        args=["package.2f89b927.link"])
+    self._copy_link("write-code.776a00e2.link")
+    timer.start()
+    try:
+      in_toto_verify_watch(self.layout, self.layout_key_dict, self.link_dir,
+          poll_interval=0.05, timeout=60, progress_callback=progress.append)
+
+    finally:
+      timer.cancel()
+
+    self.assertListEqual([[status["name"] for status in missing_steps]
+        for missing_steps in progress], [["package"], []])
+
+    # The link cache is only enabled while watching
+    self.assertEqual(in_toto.settings.LINK_CACHE_MAX_ENTRIES, 0)
+
+
+  def test_verify_watch_signatures_verified_once(self):
+    """Link signatures verified while watching are not verified again. """
+    self._copy_link("write-code.776a00e2.link")
+    self._copy_link("package.2f89b927.link")
+
+    verified_types = []
+    verify_signature = Metablock.verify_signature
+    def _verify_signature(metablock, verification_key):
+      verified_types.append(metablock.type_)
+      return verify_signature(metablock, verification_key)
+
+    with patch.object(Metablock, "verify_signature", _verify_signature):
+      in_toto_verify_watch(self.layout, self.layout_key_dict, self.link_dir,
+          poll_interval=0.01, timeout=60)
+
+    # One check per link, and one for the layout
+    self.assertListEqual(sorted(verified_types), ["layout", "link", "link"])
+
+
+  def test_verify_watch_timeout(self):
+    """Waiting for missing links times out. """
+    self._copy_link("write-code.776a00e2.link")
+    with self.assertRaises(in_toto.exceptions.LinkNotFoundError) as ctx:
+      in_toto_verify_watch(self.layout, self.layout_key_dict, self.link_dir,
+          poll_interval=0.01, timeout=0.05)
+
+    self.assertIn("'package' (0 of 1 links)", str(ctx.exception))
+
+
+
+if __name__ == "__main__":
+  unittest.main()
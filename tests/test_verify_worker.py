@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+"""
+<Program Name>
+  test_verify_worker.py
+
+<Author>
+  in-toto developers <in-toto-dev@googlegroups.com>
+
+<Started>
+  Oct 18, 2026
+
+<Copyright>
+  See LICENSE for licensing information.
+
+<Purpose>
+  Test in_toto.verify_worker module, i.e. verification workers and the
+  distribution of verification tasks to several worker processes.
+
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import shutil
+import tempfile
+import unittest
+import subprocess
+from mock import patch
+
+import in_toto
+import in_toto.settings
+import in_toto.exceptions
+from in_toto import verifylib
+from in_toto.verifylib import SUBLAYOUT_LINK_DIR_FORMAT
+from in_toto.models.common import asdict
+from in_toto.models.layout import Layout, Step
+from in_toto.models.link import Link, FILENAME_FORMAT
+from in_toto.models.metadata import Metablock
+from in_toto.util import import_rsa_key_from_file
+from in_toto.verify_worker import (WorkerService, get_link_file_references,
+    in_toto_verify_distributed, TASK_LINKS)
+
+
+
+class TestVerifyWorker(unittest.TestCase):
+  """Verify the demo supply chain with several local worker processes. """
+
+  @classmethod
+  def setUpClass(self):
+    demo_files = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "demo_files")
+
+    self.working_dir = os.getcwd()
+    self.test_dir = os.path.realpath(tempfile.mkdtemp())
+    os.chdir(self.test_dir)
+    for name in os.listdir(demo_files):
+      shutil.copy(os.path.join(demo_files, name), self.test_dir)
+
+    self.alice = import_rsa_key_from_file("alice")
+    alice_pub = import_rsa_key_from_file("alice.pub")
+    self.layout_key_dict = {alice_pub["keyid"]: alice_pub}
+    self.layout_template = Metablock.load("demo.layout.template")
+
+    # Workers authenticate tasks and responses with a shared secret
+    with open("worker.secret", "w") as fp:
+      fp.write("secret\n")
+    self.secret = b"secret"
+
+    # Worker processes must import the tested in_toto package
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(
+        os.path.dirname(os.path.realpath(in_toto.__file__))))
+
+    self.workers = []
+    self.processes = []
+    for index in range(3):
+      address = "unix:" + os.path.join(self.test_dir,
+          "worker{}.sock".format(index))
+      self.processes.append(subprocess.Popen([sys.executable, "-m",
+          "in_toto.in_toto_verify_worker", "--listen", address,
+          "--link-root", self.test_dir, "--keys", "bob.pub", "carl.pub",
+          "--secret-file", "worker.secret", "--quiet"], env=env))
+      self.workers.append(address)
+
+    # Wait until all workers listen on their sockets
+    for _ in range(600):
+      if all(os.path.exists(address[len("unix:"):])
+          for address in self.workers):
+        break
+      time.sleep(0.1)
+
+    else:
+      self.tearDownClass()
+      raise RuntimeError("Verification workers did not start")
+
+
+  @classmethod
+  def tearDownClass(self):
+    for process in self.processes:
+      process.terminate()
+      process.wait()
+
+    os.chdir(self.working_dir)
+    shutil.rmtree(self.test_dir)
+
+
+  def _get_layout(self, modify=None):
+    """Returns a copy of the demo layout, optionally modified by the passed
+    function, signed by alice. """
+    layout = Metablock.read(json.loads(repr(self.layout_template)))
+    if modify:
+      modify(layout.signed)
+    layout.signatures = []
+    layout.sign(self.alice)
+    return layout
+
+
+  def test_verify_distributed(self):
+    """Distributed verification has the same outcome as in_toto_verify. """
+    rule_stats = []
+    summary_link = in_toto_verify_distributed(self._get_layout(),
+        self.layout_key_dict, self.workers, link_dir_path=self.test_dir,
+        rule_stats=rule_stats, secret=self.secret)
+
+    expected_rule_stats = []
+    expected_summary_link = verifylib.in_toto_verify(self._get_layout(),
+        self.layout_key_dict, self.test_dir, rule_stats=expected_rule_stats)
+
+    self.assertEqual(repr(summary_link), repr(expected_summary_link))
+    self.assertListEqual(
+        [(stats["item"], stats["rule"]) for stats in rule_stats],
+        [(stats["item"], stats["rule"]) for stats in expected_rule_stats])
+
+    # The same worker address can be passed multiple times
+    in_toto_verify_distributed(self._get_layout(), self.layout_key_dict,
+        self.workers[:1] * 2, link_dir_path=self.test_dir,
+        secret=self.secret)
+
+
+  def test_verify_distributed_fail(self):
+    """Errors of workers are raised with the class of the worker error. """
+    def _disallow_products(layout):
+      layout.steps[1].expected_products = [["DISALLOW", "*"]]
+
+    with self.assertRaises(in_toto.exceptions.RuleVerificationError):
+      in_toto_verify_distributed(self._get_layout(_disallow_products),
+          self.layout_key_dict, self.workers, link_dir_path=self.test_dir,
+          secret=self.secret)
+
+    def _require_two_links(layout):
+      layout.steps[0].threshold = 2
+      layout.steps[0].pubkeys = list(layout.keys.keys())
+
+    with self.assertRaises(in_toto.exceptions.LinkNotFoundError):
+      in_toto_verify_distributed(self._get_layout(_require_two_links),
+          self.layout_key_dict, self.workers, link_dir_path=self.test_dir,
+          secret=self.secret)
+
+    with self.assertRaises(ValueError):
+      in_toto_verify_distributed(self._get_layout(), self.layout_key_dict,
+          [], link_dir_path=self.test_dir, secret=self.secret)
+
+    # Workers reject unauthenticated tasks, and responses of workers with
+    # another secret are not trusted
+    with self.assertRaises(RuntimeError):
+      in_toto_verify_distributed(self._get_layout(), self.layout_key_dict,
+          self.workers, link_dir_path=self.test_dir)
+
+    with self.assertRaises(ValueError):
+      in_toto_verify_distributed(self._get_layout(), self.layout_key_dict,
+          self.workers, link_dir_path=self.test_dir, secret=b"other")
+
+
+  def test_verify_distributed_sublayout(self):
+    """Workers report sublayouts, which the coordinator verifies. """
+    bob = import_rsa_key_from_file("bob")
+    bob_pub = import_rsa_key_from_file("bob.pub")
+    carl = import_rsa_key_from_file("carl")
+    carl_pub = import_rsa_key_from_file("carl.pub")
+
+    link_dir = os.path.join(self.test_dir, "sublayout-links")
+    sublayout_link_dir = os.path.join(link_dir,
+        SUBLAYOUT_LINK_DIR_FORMAT.format(name="delegated",
+        keyid=bob_pub["keyid"]))
+    os.makedirs(sublayout_link_dir)
+
+    layout = Metablock(signed=Layout(keys={bob_pub["keyid"]: bob_pub},
+        steps=[Step(name="delegated", pubkeys=[bob_pub["keyid"]],
+        expected_products=[["ALLOW", "foo"], ["DISALLOW", "*"]])]))
+    layout.sign(self.alice)
+
+    sublayout = Metablock(signed=Layout(keys={carl_pub["keyid"]: carl_pub},
+        steps=[Step(name="write", pubkeys=[carl_pub["keyid"]])]))
+    sublayout.sign(bob)
+    sublayout.dump(os.path.join(link_dir, FILENAME_FORMAT.format(
+        step_name="delegated", keyid=bob_pub["keyid"])))
+
+    link = Metablock(signed=Link(name="write",
+        products={"foo": {"sha256": "0" * 64}}))
+    link.sign(carl)
+    link.dump(os.path.join(sublayout_link_dir, FILENAME_FORMAT.format(
+        step_name="write", keyid=carl_pub["keyid"])))
+
+    with patch("in_toto.verifylib.verify_sublayouts",
+        wraps=verifylib.verify_sublayouts) as verify_sublayouts:
+      summary_link = in_toto_verify_distributed(layout,
+          self.layout_key_dict, self.workers, link_dir_path=link_dir,
+          secret=self.secret)
+    self.assertEqual(summary_link.signed.products,
+        {"foo": {"sha256": "0" * 64}})
+    self.assertEqual(verify_sublayouts.call_count, 1)
+
+    # The rules of steps that refer to the sublayout are verified locally
+    layout.signed.steps[0].expected_products = [["DISALLOW", "*"]]
+    layout.signatures = []
+    layout.sign(self.alice)
+    with self.assertRaises(in_toto.exceptions.RuleVerificationError):
+      in_toto_verify_distributed(layout, self.layout_key_dict, self.workers,
+          link_dir_path=link_dir, secret=self.secret)
+
+
+  def test_worker_service(self):
+    """Tasks must use link directories below the link root and link files
+    that match their references. """
+    patcher = patch("in_toto.settings.LINK_CACHE_MAX_ENTRIES",
+        in_toto.settings.LINK_CACHE_MAX_ENTRIES)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+
+    layout = self.layout_template.signed
+    service = WorkerService(self.test_dir, layout.keys)
+    step = layout.steps[0]
+    references = get_link_file_references(layout, self.test_dir)[step.name]
+    request = {
+      "task": TASK_LINKS,
+      "link_dir": self.test_dir,
+      "step": asdict(step),
+      "links": references
+    }
+    response = service.verify(request)
+    self.assertTrue(response["success"], response.get("error"))
+    self.assertEqual(response["reference"], list(references.values())[0])
+
+    keyid = list(references.keys())[0]
+    bad_requests = [
+      (dict(request, task="bogus"), "ValueError"),
+      (dict(request, link_dir=os.path.dirname(self.test_dir)), "ValueError"),
+      (dict(request, links={keyid: dict(references[keyid],
+          filename="../demo.layout.template")}), "ValueError"),
+      (dict(request, links={keyid: dict(references[keyid],
+          sha256="0" * 64)}), "ManifestVerificationError"),
+      # Inline links are not accepted
+      (dict(request, links={keyid: {"link": json.loads(repr(Metablock.load(
+          os.path.join(self.test_dir, references[keyid]["filename"]))))}}),
+          "FormatError"),
+      # Keys cannot be passed with a task
+      (dict(request, keys={}), None)
+    ]
+    for bad_request, error_type in bad_requests[:-1]:
+      response = service.verify(bad_request)
+      self.assertFalse(response["success"])
+      self.assertEqual(response["error_type"], error_type)
+
+    # Only the pinned functionary keys are used
+    self.assertTrue(service.verify(bad_requests[-1][0])["success"])
+    response = WorkerService(self.test_dir, {}).verify(request)
+    self.assertFalse(response["success"])
+
+    # Sublayouts are reported and not verified
+    sublayout = Metablock(signed=Layout())
+    sublayout.sign(import_rsa_key_from_file("bob"))
+    sublayout.dump("sublayout.link")
+    self.addCleanup(os.remove, "sublayout.link")
+    with open("sublayout.link", "rb") as fp:
+      data = fp.read()
+    response = service.verify(dict(request, links={keyid: {
+        "filename": "sublayout.link", "length": len(data),
+        "sha256": hashlib.sha256(data).hexdigest()}}))
+    self.assertTrue(response["success"], response.get("error"))
+    self.assertTrue(response["sublayout"])
+
+
+
+if __name__ == "__main__":
+  unittest.main()
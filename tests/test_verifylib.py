@@ -19,6 +19,7 @@
 """
 
 import os
+import sys
 import shutil
 import copy
 import tempfile
@@ -39,10 +40,12 @@ from in_toto.verifylib import (verify_delete_rule, verify_create_rule,
     verify_command_alignment, run_all_inspections, in_toto_verify,
     verify_sublayouts, get_summary_link, _raise_on_bad_retval,
     load_links_for_layout, verify_link_signature_thresholds,
-    verify_threshold_constraints)
+    verify_threshold_constraints, get_inspection_artifact_paths,
+    in_toto_verify_batch, in_toto_verify_links, in_toto_verify_with_receipt,
+    verify_receipt)
 from in_toto.exceptions import (RuleVerificationError,
     SignatureVerificationError, LayoutExpiredError, BadReturnValueError,
-    ThresholdVerificationError)
+    ThresholdVerificationError, ReceiptVerificationError)
 from in_toto.util import import_rsa_key_from_file, import_public_keys_from_files_as_dict
 import in_toto.gpg.functions
 
@@ -133,6 +136,197 @@ class TestRunAllInspections(unittest.TestCase):
     with self.assertRaises(BadReturnValueError):
       run_all_inspections(layout)
 
+  def test_concurrent_inspections_isolated(self):
+    """Run inspections concurrently in copies of the working directory. """
+    layout = Layout.read({
+        "_type": "layout",
+        "steps": [],
+        "inspect": [{
+          "name": "touch-" + name,
+          "run": ["touch", name],
+        } for name in ["a", "b", "c"]]
+    })
+
+    for use_hardlinks in [False, True]:
+      links = run_all_inspections(layout, max_workers=2,
+          use_hardlinks=use_hardlinks)
+
+      for name in ["a", "b", "c"]:
+        link = links["touch-" + name]
+        self.assertListEqual(list(link.signed.materials.keys()), ["foo"])
+        self.assertListEqual(sorted(link.signed.products.keys()),
+            sorted(["foo", name]))
+        self.assertEqual(repr(Metablock.load("touch-{}.link".format(name))),
+            repr(link))
+
+        # Inspections did not change the working directory
+        self.assertFalse(os.path.exists(name))
+
+  def test_concurrent_inspections_fail_fast(self):
+    """Don't start inspections after failure and raise in layout order. """
+    marker_dir = os.path.realpath(tempfile.mkdtemp())
+    marker_path = os.path.join(marker_dir, "started")
+    layout = Layout.read({
+        "_type": "layout",
+        "steps": [],
+        "inspect": [{
+          "name": "slow-failure",
+          "run": [sys.executable, "-c",
+              "import time, sys; time.sleep(0.5); sys.exit(1)"],
+        }, {
+          "name": "fast-failure",
+          "run": ["false"],
+        }, {
+          "name": "not-started",
+          "run": ["touch", marker_path],
+        }]
+    })
+
+    with self.assertRaises(BadReturnValueError) as ctx:
+      run_all_inspections(layout, max_workers=2)
+
+    self.assertTrue("time.sleep" in str(ctx.exception))
+    self.assertFalse(os.path.exists(marker_path))
+    shutil.rmtree(marker_dir)
+
+  def test_cached_inspections(self):
+    """Replay cached inspections and restore their products. """
+    working_dir = os.path.realpath(tempfile.mkdtemp())
+    cache_dir = os.path.realpath(tempfile.mkdtemp())
+    with open(os.path.join(working_dir, "foo"), "w") as fp:
+      fp.write("foo")
+    layout = Layout.read({
+        "_type": "layout",
+        "steps": [],
+        "inspect": [{
+          "name": "build-bar",
+          "artifact_paths": ["foo", "bar", "baz"],
+          "run": ["sh", "-c", "echo run >> runs; cp foo bar;"
+              " chmod 750 bar; rm -f baz"],
+        }]
+    })
+
+    def _run():
+      """Return the link of the inspection and its number of runs. """
+      link = run_all_inspections(layout, working_dir)["build-bar"]
+      with open(os.path.join(working_dir, "runs")) as fp:
+        return link, len(fp.readlines())
+
+    try:
+      with patch("in_toto.settings.INSPECTION_CACHE_PATH", cache_dir):
+        open(os.path.join(working_dir, "baz"), "w").close()
+        link, runs = _run()
+        self.assertEqual(runs, 1)
+        self.assertListEqual(sorted(link.signed.products), ["bar", "foo"])
+
+        # Products are restored and removed materials are removed again
+        os.remove(os.path.join(working_dir, "bar"))
+        open(os.path.join(working_dir, "baz"), "w").close()
+        cached_link, runs = _run()
+        self.assertEqual(runs, 1)
+        self.assertEqual(repr(cached_link), repr(link))
+        with open(os.path.join(working_dir, "bar")) as fp:
+          self.assertEqual(fp.read(), "foo")
+        self.assertEqual(
+            os.stat(os.path.join(working_dir, "bar")).st_mode & 0o777, 0o750)
+        self.assertFalse(os.path.exists(os.path.join(working_dir, "baz")))
+
+        # Changed materials or a changed command run the inspection again
+        with open(os.path.join(working_dir, "foo"), "w") as fp:
+          fp.write("changed")
+        self.assertEqual(_run()[1], 2)
+        layout.inspect[0].run[-1] += " "
+        self.assertEqual(_run()[1], 3)
+
+        # Inspections are run again if cached products are missing
+        shutil.rmtree(os.path.join(cache_dir, "objects"))
+        os.mkdir(os.path.join(cache_dir, "objects"))
+        os.remove(os.path.join(working_dir, "bar"))
+        self.assertEqual(_run()[1], 4)
+
+    finally:
+      shutil.rmtree(working_dir)
+      shutil.rmtree(cache_dir)
+
+  def test_inspection_records_scoped_artifacts(self):
+    """Only record artifacts observable by rules and reuse hashes. """
+    os.mkdir("scoped")
+    open(os.path.join("scoped", "baz"), "w").write("baz")
+    layout = Layout.read({
+        "_type": "layout",
+        "steps": [],
+        "inspect": [{
+          "name": "touch-scoped",
+          "run": ["touch", "scoped/qux"],
+          "expected_products": [["CREATE", "scoped/qux"],
+              ["DISALLOW", "scoped/*"]],
+        }, {
+          "name": "explicit-paths",
+          "run": ["true"],
+          "artifact_paths": ["foo"],
+        }]
+    })
+
+    with patch("in_toto.runlib.securesystemslib.hash.digest_filename",
+        wraps=in_toto.runlib.securesystemslib.hash.digest_filename) as digest:
+      links = run_all_inspections(layout)
+      hashed_files = [os.path.basename(call[0][0])
+          for call in digest.call_args_list]
+
+    self.assertListEqual(list(links["touch-scoped"].signed.materials.keys()),
+        ["scoped/baz"])
+    self.assertListEqual(sorted(links["touch-scoped"].signed.products.keys()),
+        ["scoped/baz", "scoped/qux"])
+    self.assertListEqual(list(links["explicit-paths"].signed.materials.keys()),
+        ["foo"])
+
+    # Each file was hashed only once
+    self.assertListEqual(sorted(hashed_files), ["baz", "foo", "qux"])
+
+    shutil.rmtree("scoped")
+
+
+
+class TestGetInspectionArtifactPaths(unittest.TestCase):
+  """Test verifylib.get_inspection_artifact_paths(layout, inspection). """
+
+  def _get_paths(self, inspect, index=0):
+    """Return artifact paths of inspection at index in layout with the passed
+    inspections. """
+    layout = Layout.read({"_type": "layout", "steps": [], "inspect": inspect})
+    return get_inspection_artifact_paths(layout, layout.inspect[index])
+
+  def test_explicit_artifact_paths(self):
+    """Explicit artifact paths take precedence over rules. """
+    self.assertListEqual(self._get_paths([{"name": "a",
+        "artifact_paths": ["foo", "bar"],
+        "expected_materials": [["ALLOW", "*"]]}]), ["bar", "foo"])
+
+  def test_no_rules(self):
+    """Record everything if the inspection is not constrained. """
+    self.assertListEqual(self._get_paths([{"name": "a"}]), ["."])
+
+  def test_paths_from_rules(self):
+    """Record literal prefixes of rule patterns. """
+    self.assertListEqual(self._get_paths([{"name": "a",
+        "expected_materials": [["ALLOW", "dist/pkg/*.tar.gz"],
+            ["DISALLOW", "dist/pkg/sub/*"], ["CREATE", "./README"],
+            ["MATCH", "*", "IN", "src", "WITH", "PRODUCTS", "FROM", "b"],
+            ["DELETE", "../outside"], ["MODIFY", ".git/config"]],
+        "expected_products": [["MODIFY", "docs/[ab]"]]}]),
+        ["README", "dist/pkg", "docs", "src"])
+
+  def test_wildcard_in_first_component(self):
+    """Record everything if a rule pattern can match any top-level path. """
+    self.assertListEqual(self._get_paths([{"name": "a",
+        "expected_materials": [["ALLOW", "foo"], ["DISALLOW", "*"]]}]), ["."])
+
+  def test_paths_from_referencing_rules(self):
+    """Record paths observed by other inspections' match rules. """
+    self.assertListEqual(self._get_paths([{"name": "a"}, {"name": "b",
+        "expected_materials": [["MATCH", "*.py", "WITH", "PRODUCTS", "IN",
+            "lib", "FROM", "a"]]}]), ["lib"])
+
 
 class TestVerifyCommandAlignment(unittest.TestCase):
   """Test verifylib.verify_command_alignment(command, expected_command)"""
@@ -750,6 +944,46 @@ class TestVerifyItemRules(unittest.TestCase):
     ]
     verify_item_rules(self.item_name, "products", rules, self.links)
 
+  def test_rule_stats(self):
+    """Collect statistics for passing and failing rules. """
+    rules = [
+      ["DELETE", "foobar"],
+      ["CREATE", "baz"],
+      ["MODIFY", "bar"],
+      ["MATCH", "foo", "WITH", "MATERIALS", "FROM", "item"],
+      ["ALLOW", "*"],
+    ]
+    rule_stats = []
+    verify_item_rules(self.item_name, "materials", rules, self.links,
+        rule_stats=rule_stats)
+
+    self.assertListEqual([stats["rule"] for stats in rule_stats],
+        [" ".join(rule) for rule in rules])
+    self.assertListEqual([stats["candidates"] for stats in rule_stats],
+        [3, 3, 4, 2, 1])
+    self.assertListEqual([stats["consumed"] for stats in rule_stats],
+        [1, 1, 1, 1, 1])
+    self.assertListEqual([stats["materials_queue_after"]
+        for stats in rule_stats], [2, 2, 2, 1, 0])
+    self.assertListEqual([stats["products_queue_after"]
+        for stats in rule_stats], [3, 2, 1, 1, 1])
+    for stats in rule_stats:
+      self.assertEqual(stats["item"], self.item_name)
+      self.assertEqual(stats["source_type"], "materials")
+      self.assertTrue(stats["passed"])
+      self.assertTrue(stats["seconds"] >= 0)
+
+    # Statistics of a failing rule are collected too
+    rule_stats = []
+    with self.assertRaises(RuleVerificationError):
+      verify_item_rules(self.item_name, "products", [["DISALLOW", "*"]],
+          self.links, rule_stats=rule_stats)
+    self.assertEqual(len(rule_stats), 1)
+    self.assertFalse(rule_stats[0]["passed"])
+    self.assertEqual(rule_stats[0]["rule_type"], "disallow")
+    self.assertEqual(rule_stats[0]["candidates"], 3)
+    self.assertEqual(rule_stats[0]["consumed"], 0)
+
   def test_fail_wrong_source_type(self):
     """Fail with wrong source_type."""
 
@@ -853,6 +1087,93 @@ class TestVerifyAllItemRules(unittest.TestCase):
     """Pass rule verification for dummy supply chain Inspections. """
     verify_all_item_rules(self.inspections, self.links)
 
+  def test_release_unreferenced_links(self):
+    """Links are removed after their last reference, unless kept. """
+    links = dict(self.links)
+    released = []
+
+    def _verify_item_rules(source_name, source_type, rules, links,
+        rule_stats=None):
+      released.append(sorted(set(self.links) - set(links)))
+
+    with patch("in_toto.verifylib.verify_item_rules",
+        side_effect=_verify_item_rules):
+      verify_all_item_rules(self.steps, links, keep_links=set(["package"]))
+
+    # 'untar' is never referenced, 'write-code' is released after 'package'
+    self.assertListEqual(released, [["untar"]] * 4)
+    self.assertListEqual(list(links.keys()), ["package"])
+
+    # Links are not removed by default
+    links = dict(self.links)
+    verify_all_item_rules(self.inspections, links)
+    self.assertEqual(len(links), 3)
+
+
+  def test_verify_concurrently(self):
+    """Verify rules of multiple items concurrently. """
+    items = self.steps + self.inspections
+    rule_stats = []
+    links = dict(self.links)
+    verify_all_item_rules(items, links, rule_stats=rule_stats,
+        keep_links=set(), max_workers=4)
+
+    # Statistics appear in item order and all links are released
+    self.assertListEqual([stats["item"] for stats in rule_stats],
+        ["write-code", "package", "package", "package", "untar", "untar"])
+    self.assertDictEqual(links, {})
+
+
+  def test_verify_concurrently_fail(self):
+    """The failure of the first failing item is raised. """
+    items = self.steps + self.inspections
+    items[1].expected_products = [["DISALLOW", "*"]]
+    items[2].expected_products = [["DISALLOW", "*"]]
+
+    with self.assertRaises(RuleVerificationError) as ctx:
+      verify_all_item_rules(items, dict(self.links), max_workers=4)
+
+    # The error of 'package' is raised and not the one of 'untar'
+    self.assertIn("foo.tar.gz", str(ctx.exception))
+
+
+class TestLoadLinksForLayout(unittest.TestCase):
+  """Test verifylib.load_links_for_layout. """
+
+  @classmethod
+  def setUpClass(self):
+    """Load demo layout and keep path to demo link files. """
+    self.demo_files = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "demo_files")
+    self.layout = Metablock.load(os.path.join(self.demo_files,
+        "demo.layout.template")).signed
+
+
+  def test_load_links(self):
+    """Load links sequentially and concurrently with the same result. """
+    chain_link_dict = load_links_for_layout(self.layout, self.demo_files)
+    self.assertEqual(sorted(chain_link_dict.keys()), ["package", "write-code"])
+    for step in self.layout.steps:
+      self.assertEqual(list(chain_link_dict[step.name].keys()), step.pubkeys)
+
+    self.assertEqual(load_links_for_layout(self.layout, self.demo_files,
+        max_workers=4), chain_link_dict)
+
+
+  def test_load_links_fail_threshold(self):
+    """Fail to load links from a missing or empty directory. """
+    with self.assertRaises(in_toto.exceptions.LinkNotFoundError):
+      load_links_for_layout(self.layout, "bogus-link-dir", max_workers=4)
+
+    empty_dir = os.path.realpath(tempfile.mkdtemp())
+    try:
+      with self.assertRaises(in_toto.exceptions.LinkNotFoundError):
+        load_links_for_layout(self.layout, empty_dir)
+
+    finally:
+      shutil.rmtree(empty_dir)
+
+
 
 class TestInTotoVerify(unittest.TestCase):
   """
@@ -1045,6 +1366,187 @@ class TestInTotoVerify(unittest.TestCase):
     with self.assertRaises(RuleVerificationError):
       in_toto_verify(layout, layout_key_dict)
 
+  def test_verify_with_step_cache(self):
+    """Test pass verification of cached steps and reverify changed steps. """
+    in_toto.settings.STEP_CACHE_PATH = os.path.join(self.test_dir,
+        "step-cache")
+    layout_key_dict = import_public_keys_from_files_as_dict([self.alice_path])
+
+    try:
+      with patch("in_toto.verifylib.verify_link_signature_thresholds",
+          wraps=in_toto.verifylib.verify_link_signature_thresholds) as verify:
+        # First verification verifies and caches all steps
+        in_toto_verify(Metablock.load(self.layout_single_signed_path),
+            layout_key_dict)
+        self.assertListEqual([step.name for step in
+            verify.call_args[1]["steps"]], ["write-code", "package"])
+
+        # Second verification uses cached results for all steps
+        in_toto_verify(Metablock.load(self.layout_single_signed_path),
+            layout_key_dict)
+        self.assertListEqual(verify.call_args[1]["steps"], [])
+
+        # Only the step of a changed link (and referencing steps) is verified
+        shutil.copy("package.2f89b927.link", "package.link.bak")
+        link = Metablock.load("package.2f89b927.link")
+        link.signed.products["foo.tar.gz"] = {"sha256": "bad"}
+        link.dump("package.2f89b927.link")
+        with self.assertRaises(ThresholdVerificationError):
+          in_toto_verify(Metablock.load(self.layout_single_signed_path),
+              layout_key_dict)
+        self.assertListEqual([step.name for step in
+            verify.call_args[1]["steps"]], ["package"])
+        os.rename("package.link.bak", "package.2f89b927.link")
+
+        # Additional layout signatures don't change the cache keys
+        in_toto_verify(Metablock.load(self.layout_double_signed_path),
+            import_public_keys_from_files_as_dict(
+            [self.alice_path, self.bob_path]))
+        self.assertListEqual(verify.call_args[1]["steps"], [])
+
+        # A changed layout invalidates all cached steps, failures aren't cached
+        for _ in range(2):
+          with self.assertRaises(RuleVerificationError):
+            in_toto_verify(Metablock.load(self.layout_failing_step_rule_path),
+                layout_key_dict)
+          self.assertListEqual([step.name for step in
+              verify.call_args[1]["steps"]], ["write-code", "package"])
+
+    finally:
+      in_toto.settings.STEP_CACHE_PATH = None
+      shutil.rmtree(os.path.join(self.test_dir, "step-cache"))
+
+  def test_verify_releases_byproducts(self):
+    """Byproducts of all but the last step are released, unless cached. """
+    layout_key_dict = import_public_keys_from_files_as_dict([self.alice_path])
+    shutil.copy("write-code.776a00e2.link", "write-code.link.bak")
+    link = Metablock.load("write-code.776a00e2.link")
+    link.signed.byproducts = {"stdout": "foo"}
+    link.signatures = []
+    link.sign(import_rsa_key_from_file("bob"))
+    link.dump("write-code.776a00e2.link")
+
+    try:
+      for link_cache_entries, released in [(0, True), (10, False)]:
+        with patch("in_toto.settings.LINK_CACHE_MAX_ENTRIES",
+            link_cache_entries), patch(
+            "in_toto.verifylib.verify_threshold_constraints") as verify:
+          in_toto_verify(Metablock.load(self.layout_single_signed_path),
+              layout_key_dict)
+
+        chain_link_dict = verify.call_args[0][1]
+        for link in chain_link_dict["write-code"].values():
+          self.assertEqual(link.signed.byproducts == {}, released)
+        # Byproducts of the last step are needed for the summary link
+        for link in chain_link_dict["package"].values():
+          self.assertNotEqual(link.signed.byproducts, {})
+
+    finally:
+      os.rename("write-code.link.bak", "write-code.776a00e2.link")
+
+  def test_verify_batch(self):
+    """Test batch verification of passing and failing products. """
+    os.mkdir("batch-bad")
+    shutil.copy("write-code.776a00e2.link", "batch-bad")
+    os.mkdir("batch-good")
+    for path in glob.glob("*.*.link"):
+      shutil.copy(path, "batch-good")
+    layout_key_dict = import_public_keys_from_files_as_dict([self.alice_path])
+    os.mkdir("batch-inspections")
+    products = [
+      {"link_dir": "batch-good", "inspection_link_dir": "batch-inspections"},
+      {"link_dir": "batch-bad"},
+      {"link_dir": ".", "working_dir": self.test_dir,
+          "substitution_parameters": {"unused": "value"}}
+    ]
+
+    try:
+      for product_workers in [1, 3]:
+        link_dir_contents = sorted(os.listdir("batch-good"))
+        results = in_toto_verify_batch(
+            Metablock.load(self.layout_single_signed_path), layout_key_dict,
+            products, product_workers=product_workers)
+        self.assertListEqual([result["success"] for result in results],
+            [True, False, True])
+        self.assertEqual(results[1]["link_dir"], "batch-bad")
+        self.assertEqual(results[1]["error_type"], "LinkNotFoundError")
+
+        # Inspection links are written to the inspection link directory, or
+        # else the working directory, but never to the link directory
+        self.assertListEqual(sorted(os.listdir("batch-good")),
+            link_dir_contents)
+        for link_dir in ["batch-inspections", self.test_dir]:
+          self.assertTrue(os.path.exists(os.path.join(link_dir,
+              "untar.link")))
+          os.remove(os.path.join(link_dir, "untar.link"))
+
+      # Layout failures are raised for the whole batch
+      with self.assertRaises(LayoutExpiredError):
+        in_toto_verify_batch(Metablock.load(self.layout_expired_path),
+            layout_key_dict, products)
+
+      with self.assertRaises(securesystemslib.exceptions.FormatError):
+        in_toto_verify_batch(Metablock.load(self.layout_single_signed_path),
+            layout_key_dict, [{"working_dir": "."}])
+
+    finally:
+      shutil.rmtree("batch-bad")
+      shutil.rmtree("batch-good")
+      shutil.rmtree("batch-inspections")
+
+  def test_verify_with_receipt(self):
+    """Test creating and checking verification receipts. """
+    layout_key_dict = import_public_keys_from_files_as_dict([self.alice_path])
+    receipt_key_dict = import_public_keys_from_files_as_dict([self.bob_path])
+    bob = import_rsa_key_from_file("bob")
+    layout = Metablock.load(self.layout_single_signed_path)
+    products = {"foo.tar.gz": Metablock.load(
+        "package.2f89b927.link").signed.products["foo.tar.gz"]}
+
+    receipt = in_toto_verify_with_receipt(
+        Metablock.load(self.layout_single_signed_path), layout_key_dict, bob)
+    self.assertEqual(receipt.signed.products, products)
+    self.assertEqual(receipt.signed.expires, layout.signed.expires)
+
+    # Receipts are only created if verification passes
+    with self.assertRaises(RuleVerificationError):
+      in_toto_verify_with_receipt(
+          Metablock.load(self.layout_failing_step_rule_path),
+          layout_key_dict, bob)
+
+    # The receipt survives a round trip to disk
+    receipt.dump("foo.receipt")
+    receipt = Metablock.load("foo.receipt")
+    verify_receipt(receipt, receipt_key_dict, layout=layout,
+        substitution_parameters={}, products=products)
+
+    with self.assertRaises(SignatureVerificationError):
+      verify_receipt(receipt, {})
+
+    with self.assertRaises(SignatureVerificationError):
+      verify_receipt(receipt, layout_key_dict)
+
+    with self.assertRaises(securesystemslib.exceptions.FormatError):
+      verify_receipt(layout, layout_key_dict)
+
+    mismatches = [
+      {"layout": Metablock.load(self.layout_double_signed_path)},
+      {"substitution_parameters": {"EDITOR": "vim"}},
+      {"products": {"bar": {"sha256": "0" * 64}}},
+      {"products": {"foo.tar.gz": {"sha256": "0" * 64}}},
+      {"products": {"foo.tar.gz": {"sha512": "0" * 128}}}
+    ]
+    for kwargs in mismatches:
+      with self.assertRaises(ReceiptVerificationError):
+        verify_receipt(receipt, receipt_key_dict, **kwargs)
+
+    # Receipts expire with the layout they were created for
+    receipt.signed.expires = "2000-01-01T00:00:00Z"
+    receipt.signatures = []
+    receipt.sign(bob)
+    with self.assertRaises(LayoutExpiredError):
+      verify_receipt(receipt, receipt_key_dict)
+
   def test_verify_layout_signatures_fail_with_no_keys(self):
     """Layout signature verification fails when no keys are passed. """
     layout_metablock = Metablock(signed=Layout())
@@ -1217,6 +1719,27 @@ class TestInTotoVerifyThresholds(unittest.TestCase):
       verify_link_signature_thresholds(layout, chain_link_dict)
 
 
+  def test_thresholds_use_current_keys(self):
+    """Keys replaced in place in the layout are used for verification. """
+    layout = Layout(keys={self.bob_keyid: self.bob_pubkey},
+        steps=[Step(name=self.name, pubkeys=[self.bob_keyid])])
+
+    link_bob = Metablock(signed=Link(name=self.name))
+    link_bob.sign(self.bob)
+    chain_link_dict = {self.name: {self.bob_keyid: link_bob}}
+    verify_link_signature_thresholds(layout, chain_link_dict)
+
+    # A replaced key or step is not served from a stale lookup
+    layout.keys[self.bob_keyid] = self.alice_pubkey
+    with self.assertRaises(ThresholdVerificationError):
+      verify_link_signature_thresholds(layout, chain_link_dict)
+
+    layout.keys[self.bob_keyid] = self.bob_pubkey
+    layout.steps[0] = Step(name=self.name, pubkeys=[self.alice_keyid])
+    with self.assertRaises(ThresholdVerificationError):
+      verify_link_signature_thresholds(layout, chain_link_dict)
+
+
   def test_threshold_constraints_fail_with_not_enough_links(self):
     """ Fail with not enough links. """
     # Layout with one step and threshold 2
@@ -1259,6 +1782,14 @@ class TestInTotoVerifyThresholds(unittest.TestCase):
       }
     }
 
+    with self.assertRaises(ThresholdVerificationError) as ctx:
+      verify_threshold_constraints(layout, chain_link_dict)
+    self.assertIn("materials 'foo'", str(ctx.exception))
+
+    # Artifacts modified in place after a check are compared anew
+    link_alice.signed.materials["foo"] = {"sha256": self.foo_hash}
+    verify_threshold_constraints(layout, chain_link_dict)
+    link_alice.signed.materials["foo"] = {"sha256": "0" * 64}
     with self.assertRaises(ThresholdVerificationError):
       verify_threshold_constraints(layout, chain_link_dict)
 
@@ -1522,6 +2053,20 @@ class TestVerifySublayouts(unittest.TestCase):
     verify_sublayouts(
         self.super_layout, self.super_layout_links, ".")
 
+  def test_sublayout_link_digests(self):
+    """Test that the digests of the sublayout's links are collected. """
+    for max_workers in [1, 2]:
+      chain_link_dict = load_links_for_layout(self.super_layout, ".")
+      keyid, sublayout = list(chain_link_dict["sub_layout"].items())[0]
+      link_digests = {"sub_layout": {keyid: "digest"}}
+      verify_sublayouts(self.super_layout, chain_link_dict, ".",
+          max_workers=max_workers, link_digests=link_digests)
+
+      sublayout_digests = link_digests["sub_layout"][keyid]
+      self.assertEqual(sublayout_digests["layout"], "digest")
+      self.assertListEqual(sorted(sublayout_digests["links"]),
+          ["package", "write-code"])
+
 
 
 
@@ -1633,6 +2178,279 @@ class TestInTotoVerifyMultiLevelSublayouts(unittest.TestCase):
 
 
 
+class TestInTotoVerifyLinks(unittest.TestCase):
+  """Test verifylib.in_toto_verify_links with in-memory links. """
+
+  @classmethod
+  def setUpClass(self):
+    self.working_dir = os.getcwd()
+    demo_files = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "demo_files")
+
+    self.test_dir = os.path.realpath(tempfile.mkdtemp())
+    os.chdir(self.test_dir)
+    # Inspections need the final product in the working directory
+    shutil.copy(os.path.join(demo_files, "foo.tar.gz"), self.test_dir)
+
+    self.keys = {}
+    for key_name in ["alice", "bob", "carl"]:
+      self.keys[key_name + "_priv"] = import_rsa_key_from_file(
+          os.path.join(demo_files, key_name))
+      self.keys[key_name + "_pub"] = import_rsa_key_from_file(
+          os.path.join(demo_files, key_name + ".pub"))
+
+    self.layout = Metablock.load(os.path.join(demo_files,
+        "demo.layout.template"))
+    self.layout.sign(self.keys["alice_priv"])
+
+    self.links = {}
+    for name in ["write-code.776a00e2.link", "package.2f89b927.link"]:
+      link = Metablock.load(os.path.join(demo_files, name))
+      self.links[link.signed.name] = {link.signatures[0]["keyid"]: link}
+
+
+  @classmethod
+  def tearDownClass(self):
+    os.chdir(self.working_dir)
+    shutil.rmtree(self.test_dir)
+
+
+  def test_verify_links(self):
+    """Verify demo supply chain without loading links from disk. """
+    layout_key_dict = {
+      self.keys["alice_pub"]["keyid"]: self.keys["alice_pub"]
+    }
+
+    # Links of unauthorized functionaries are ignored
+    links = dict(self.links)
+    links["package"] = dict(links["package"])
+    links["package"][self.keys["alice_pub"]["keyid"]] = list(
+        links["write-code"].values())[0]
+
+    with patch("in_toto.verifylib.load_links_for_layout") as mock_load, \
+        patch("in_toto.verifylib._release_byproducts") as mock_release:
+      summary_link = in_toto_verify_links(self.layout, layout_key_dict, links)
+      mock_load.assert_not_called()
+      # Passed links are not modified
+      mock_release.assert_not_called()
+    self.assertEqual(summary_link.signed.name, "write-code")
+
+    links = {"write-code": self.links["write-code"]}
+    with self.assertRaises(in_toto.exceptions.LinkNotFoundError):
+      in_toto_verify_links(self.layout, layout_key_dict, links)
+
+
+  def test_verify_multi_level_sublayout_links(self):
+    """Verify nested sublayouts with in-memory links. """
+    carls_layout = Metablock(signed=Layout())
+    carls_layout.sign(self.keys["carl_priv"])
+
+    bobs_layout = Metablock(signed=Layout(
+        keys={self.keys["carl_pub"]["keyid"]: self.keys["carl_pub"]},
+        steps=[Step(name="delegated-to-carl",
+            pubkeys=[self.keys["carl_pub"]["keyid"]])]))
+    bobs_layout.sign(self.keys["bob_priv"])
+
+    root_layout = Metablock(signed=Layout(
+        keys={self.keys["bob_pub"]["keyid"]: self.keys["bob_pub"]},
+        steps=[Step(name="delegated-to-bob",
+            pubkeys=[self.keys["bob_pub"]["keyid"]])]))
+    root_layout.sign(self.keys["alice_priv"])
+
+    bob_keyid = self.keys["bob_pub"]["keyid"]
+    carl_keyid = self.keys["carl_pub"]["keyid"]
+    links = {"delegated-to-bob": {bob_keyid: bobs_layout}}
+    sublayout_links = {
+      "delegated-to-bob": {
+        bob_keyid: {
+          "links": {"delegated-to-carl": {carl_keyid: carls_layout}}
+        }
+      }
+    }
+    layout_key_dict = {
+      self.keys["alice_pub"]["keyid"]: self.keys["alice_pub"]
+    }
+
+    in_toto_verify_links(root_layout, layout_key_dict, links,
+        sublayout_links=sublayout_links)
+
+    # Missing links of a sublayout
+    with self.assertRaises(in_toto.exceptions.LinkNotFoundError):
+      in_toto_verify_links(root_layout, layout_key_dict, links)
+
+
+
+class TestInTotoVerifyConcurrentSublayouts(unittest.TestCase):
+  """Test verifylib.in_toto_verify with concurrently verified sublayouts. """
+
+  @classmethod
+  def setUpClass(self):
+    """Load keys and create and change into temporary directory. """
+    demo_files = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "demo_files")
+    self.alice = import_rsa_key_from_file(os.path.join(demo_files, "alice"))
+    self.alice_pub = import_rsa_key_from_file(
+        os.path.join(demo_files, "alice.pub"))
+
+    self.working_dir = os.getcwd()
+    self.test_dir = os.path.realpath(tempfile.mkdtemp())
+    os.chdir(self.test_dir)
+
+  @classmethod
+  def tearDownClass(self):
+    """Change back to initial working dir and remove temp dir. """
+    os.chdir(self.working_dir)
+    shutil.rmtree(self.test_dir)
+
+  def setUp(self):
+    """Create a fresh link directory for each test. """
+    self.link_dir = os.path.realpath(tempfile.mkdtemp(dir=self.test_dir))
+
+  def _dump_layout(self, link_dir, name, layout):
+    """Sign and dump the passed layout as link for a step 'name' to the passed
+    link dir and return its link dir for sublayout links. """
+    metablock = Metablock(signed=layout)
+    metablock.sign(self.alice)
+    metablock.dump(os.path.join(link_dir, FILENAME_FORMAT.format(
+        step_name=name, keyid=self.alice["keyid"])))
+
+    sublayout_link_dir = os.path.join(link_dir, SUBLAYOUT_LINK_DIR_FORMAT.format(
+        name=name, keyid=self.alice["keyid"]))
+    os.mkdir(sublayout_link_dir)
+    return sublayout_link_dir
+
+  def _create_root_layout(self, step_names):
+    """Return signed root layout with one sublayout step per passed name. """
+    root_layout = Metablock(signed=Layout(
+        keys={self.alice_pub["keyid"]: self.alice_pub},
+        steps=[Step(name=name, pubkeys=[self.alice_pub["keyid"]])
+            for name in step_names]))
+    root_layout.sign(self.alice)
+    return root_layout
+
+  def _create_inspection_layout(self, name, run=None):
+    """Return sublayout with one inspection that creates a file named after
+    the passed name and disallows files created by other sublayouts. """
+    return Layout(inspect=[Inspection(name="inspect-" + name,
+        run=run or ["touch", name + ".created"],
+        expected_products=[["CREATE", name + ".created"],
+            ["DISALLOW", "*.created"]])])
+
+  def test_isolated_inspections(self):
+    """Concurrent sublayouts' inspections don't see each other's files. """
+    names = ["sub-a", "sub-b", "sub-c"]
+    for name in names:
+      self._dump_layout(self.link_dir, name,
+          self._create_inspection_layout(name))
+
+    root_layout = self._create_root_layout(names)
+    root_key_dict = {self.alice_pub["keyid"]: self.alice_pub}
+
+    in_toto_verify(root_layout, root_key_dict, link_dir_path=self.link_dir,
+        max_workers=2)
+
+    # Inspections ran in temporary copies of the working directory
+    self.assertFalse(glob.glob("*.created"))
+
+    # Inspection links are written to a directory per sublayout
+    self.assertFalse(glob.glob("inspect-*.link"))
+    for name in names:
+      self.assertTrue(os.path.exists(os.path.join(
+          SUBLAYOUT_LINK_DIR_FORMAT.format(name=name,
+          keyid=self.alice["keyid"]), "inspect-" + name + ".link")))
+
+    # Sequentially verified sublayouts share the working directory
+    with self.assertRaises(RuleVerificationError):
+      in_toto_verify(root_layout, root_key_dict, link_dir_path=self.link_dir)
+
+    for path in glob.glob("*.created"):
+      os.remove(path)
+
+  def test_workspace_copies(self):
+    """Only sublayouts with inspections copy the working directory, using
+    hardlinks if enabled. """
+    self._dump_layout(self.link_dir, "no-inspection", Layout())
+    for name in ["sub-a", "sub-b"]:
+      self._dump_layout(self.link_dir, name,
+          self._create_inspection_layout(name))
+
+    root_layout = self._create_root_layout(
+        ["no-inspection", "sub-a", "sub-b"])
+    with patch("in_toto.verifylib._copy_workspace",
+        wraps=in_toto.verifylib._copy_workspace) as copy_workspace:
+      in_toto_verify(root_layout, {self.alice_pub["keyid"]: self.alice_pub},
+          link_dir_path=self.link_dir, max_workers=3,
+          inspection_hardlinks=True)
+
+    self.assertListEqual([args for args, _ in copy_workspace.call_args_list],
+        [(self.test_dir, True)] * 2)
+
+  def test_rule_workers(self):
+    """Rules of concurrently verified sublayouts are verified in spawned
+    worker processes. """
+    names = ["sub-a", "sub-b"]
+    for name in names:
+      self._dump_layout(self.link_dir, name, Layout(inspect=[
+          Inspection(name="inspect-" + name + "-" + str(i),
+              run=["true"], expected_products=[["DISALLOW", "*.created"]])
+          for i in range(2)]))
+
+    root_layout = self._create_root_layout(names)
+    root_key_dict = {self.alice_pub["keyid"]: self.alice_pub}
+
+    # Forking while other threads run might deadlock the child processes
+    with patch("multiprocessing.Pool", side_effect=AssertionError("fork")), \
+        patch("in_toto.verifylib._create_process_pool",
+        wraps=in_toto.verifylib._create_process_pool) as create_pool:
+      in_toto_verify(root_layout, root_key_dict, link_dir_path=self.link_dir,
+          max_workers=2, rule_workers=2)
+
+      with open("sub-a.created", "w"):
+        pass
+      try:
+        with self.assertRaises(RuleVerificationError):
+          in_toto_verify(root_layout, root_key_dict,
+              link_dir_path=self.link_dir, max_workers=2, rule_workers=2,
+              inspection_hardlinks=True)
+
+      finally:
+        os.remove("sub-a.created")
+
+    self.assertGreaterEqual(create_pool.call_count, 2)
+
+  def test_nested_sublayouts_share_workers(self):
+    """Nested concurrent sublayouts don't starve with a single worker. """
+    names = ["outer-a", "outer-b"]
+    for name in names:
+      sublayout_link_dir = self._dump_layout(self.link_dir, name,
+          Layout(keys={self.alice_pub["keyid"]: self.alice_pub},
+              steps=[Step(name=name + "-inner-" + str(i),
+                  pubkeys=[self.alice_pub["keyid"]]) for i in range(2)]))
+
+      for i in range(2):
+        self._dump_layout(sublayout_link_dir, name + "-inner-" + str(i),
+            Layout())
+
+    root_layout = self._create_root_layout(names)
+    in_toto_verify(root_layout, {self.alice_pub["keyid"]: self.alice_pub},
+        link_dir_path=self.link_dir, max_workers=2)
+
+  def test_deterministic_error_order(self):
+    """The error of the first failing sublayout in layout order is raised. """
+    self._dump_layout(self.link_dir, "slow-failure",
+        self._create_inspection_layout("slow-failure",
+            run=[sys.executable, "-c", "import time; time.sleep(0.5);"
+                " open('unexpected.created', 'w').close()"]))
+    self._dump_layout(self.link_dir, "fast-failure",
+        self._create_inspection_layout("fast-failure", run=["false"]))
+
+    root_layout = self._create_root_layout(["slow-failure", "fast-failure"])
+    with self.assertRaises(RuleVerificationError):
+      in_toto_verify(root_layout, {self.alice_pub["keyid"]: self.alice_pub},
+          link_dir_path=self.link_dir, max_workers=2)
+
+
+
 
 
 class TestGetSummaryLink(unittest.TestCase):